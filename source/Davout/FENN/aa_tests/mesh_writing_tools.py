@@ -0,0 +1,80 @@
+# Routine to store functions to write meshes used by the tests
+
+import numpy as np
+
+# Defines a function to write a msh file of a box [0, 1]x[0, 1]x[0, 1]
+# of hexahedrons of 8 nodes. n_divisions is the number of divisions a-
+# long each axis, or a list [n_x, n_y, n_z]. The lower and upper halves
+# of the box in z are the physical groups 'volume 1' and 'volume 2',
+# whereas the faces z=0 and z=1 are 'bottom' and 'top'
+
+def write_hexahedral_box_mesh(file_path, n_divisions):
+
+    if isinstance(n_divisions, int):
+
+        n_divisions = [n_divisions, n_divisions, n_divisions]
+
+    n_x, n_y, n_z = n_divisions
+
+    if n_z<2:
+
+        raise ValueError("The number of divisions along z at 'write_he"+
+        "xahedral_box_mesh' is "+str(n_z)+". It must be at least 2, su"+
+        "ch that both volumes have elements")
+
+    # Gets the tag of a node given its position in the grid
+
+    def node_tag(i, j, k):
+
+        return 1+i+((n_x+1)*(j+((n_y+1)*k)))
+
+    nodes = [[node_tag(i, j, k), x, y, z] for k, z in enumerate(
+    np.linspace(0.0, 1.0, n_z+1)) for j, y in enumerate(np.linspace(0.0,
+    1.0, n_y+1)) for i, x in enumerate(np.linspace(0.0, 1.0, n_x+1))]
+
+    # Gets the quadrilaterals of the bottom and top faces and the hexa-
+    # hedrons as lists [element type, physical group tag, nodes]
+
+    elements = []
+
+    for j in range(n_y):
+
+        for i in range(n_x):
+
+            for k, physical_group_tag in [[0, 1], [n_z, 2]]:
+
+                elements.append([3, physical_group_tag, [node_tag(i, j,
+                k), node_tag(i+1, j, k), node_tag(i+1, j+1, k), node_tag(
+                i, j+1, k)]])
+
+    for k in range(n_z):
+
+        for j in range(n_y):
+
+            for i in range(n_x):
+
+                elements.append([5, 3 if k<(n_z//2) else 4, [node_tag(i,
+                j, k), node_tag(i+1, j, k), node_tag(i+1, j+1, k),
+                node_tag(i, j+1, k), node_tag(i, j, k+1), node_tag(i+1, j,
+                k+1), node_tag(i+1, j+1, k+1), node_tag(i, j+1, k+1)]])
+
+    with open(file_path, "w") as outfile:
+
+        outfile.write("$MeshFormat\n2.2 0 8\n$EndMeshFormat\n$Physical"+
+        "Names\n4\n2 1 \"bottom\"\n2 2 \"top\"\n3 3 \"volume 1\"\n3 4 "+
+        "\"volume 2\"\n$EndPhysicalNames\n$Nodes\n"+str(len(nodes))+"\n")
+
+        for node in nodes:
+
+            outfile.write(" ".join(str(value) for value in node)+"\n")
+
+        outfile.write("$EndNodes\n$Elements\n"+str(len(elements))+"\n")
+
+        for index, (element_type, physical_group_tag, element_nodes) in (
+        enumerate(elements)):
+
+            outfile.write(str(index+1)+" "+str(element_type)+" 2 "+str(
+            physical_group_tag)+" 1 "+" ".join(str(node) for node in (
+            element_nodes))+"\n")
+
+        outfile.write("$EndElements\n")
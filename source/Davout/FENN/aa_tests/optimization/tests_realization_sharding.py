@@ -0,0 +1,180 @@
+# Routine to test the distribution of the realizations of the BVP over
+# worker processes
+
+import unittest
+
+import os
+
+import shutil
+
+import tempfile
+
+import numpy as np
+
+import tensorflow as tf
+
+from ...physics.compressible_cauchy_hyperelasticy import CompressibleHyperelasticity
+
+from ...constitutive_models.hyperelastic_isotropic_models import NeoHookean
+
+from ...tool_box import mesh_tools
+
+from ...optimization.objective_function import LossFunction
+
+from ...optimization.neural_network_assembler import MultiAgentModel
+
+from ...optimization.realization_sharding import ShardEvaluator, RealizationShardingDriver
+
+from ..mesh_writing_tools import write_hexahedral_box_mesh
+
+# Defines the function that builds the shard evaluator of a slice of
+# realizations. It is defined at the top level of the module, such that
+# it can be sent to the worker processes. Each realization has its own
+# Young modulus in the upper half of the box. The mesh is read through
+# the binary cache, such that only the first reading parses the msh fi-
+# le, whereas the workers load the cache entry
+
+def build_shard(realization_indices, file_name, file_directory,
+agents_dofs):
+
+    elements_per_field = {"Displacement": {"number of DOFs per node": 3,
+    "required element type": "hexahedron of 8 nodes"}}
+
+    mesh_data_class = mesh_tools.read_msh_mesh(file_name, 2,
+    elements_per_field, parent_directory=file_directory, dtype=
+    tf.float64, cache_directory=os.path.join(file_directory, "mesh_cac"+
+    "he"))
+
+    constitutive_models = {"volume 1": NeoHookean({"E": 1E6, "nu": 0.4},
+    mesh_data_class), "volume 2": NeoHookean([{"E": 1E6*(index+1), "nu":
+    0.3} for index in realization_indices], mesh_data_class)}
+
+    boundary_conditions_dict = {"bottom": {"BC case": "FixedSupportDiri"+
+    "chletBC", "field name": "Displacement"}}
+
+    traction_dictionary = {"top": {"load case": "TractionVectorOnSurfac"+
+    "e", "amplitude_tractionX": 0.0, "amplitude_tractionY": 1E4, "ampli"+
+    "tude_tractionZ": 1E5}}
+
+    residual_class = CompressibleHyperelasticity(mesh_data_class,
+    constitutive_models, traction_dictionary=traction_dictionary,
+    boundary_conditions_dict=boundary_conditions_dict, time=1.0,
+    n_realizations=len(realization_indices))
+
+    vector_of_parameters = residual_class.vector_of_parameters
+
+    loss_function_instance = LossFunction({"conditioner name": "Identit"+
+    "yMultiple"}, {"loss function name": "QuadraticForm"},
+    vector_of_parameters)
+
+    multi_agent_model = MultiAgentModel(agents_dofs, 4, [{"tanh": 5}, {
+    "linear": agents_dofs.shape[1]}], vector_of_parameters.dtype.name,
+    residual_class.integer_dtype, vector_of_parameters,
+    loss_function_instance, seed=1)
+
+    return ShardEvaluator(residual_class, loss_function_instance,
+    multi_agent_model)
+
+# Defines a function to test the sharding of the realizations
+
+class TestRealizationSharding(unittest.TestCase):
+
+    def setUp(self):
+
+        self.file_name = "sharding_box"
+
+        # Writes the mesh into a temporary directory, which is removed
+        # with the cache of the mesh after the test
+
+        self.file_directory = tempfile.mkdtemp()
+
+        n_divisions = 2
+
+        write_hexahedral_box_mesh(os.path.join(self.file_directory,
+        self.file_name+".msh"), n_divisions)
+
+        self.n_dofs = 3*((n_divisions+1)**3)
+
+        self.n_realizations = 5
+
+    def tearDown(self):
+
+        shutil.rmtree(self.file_directory, ignore_errors=True)
+
+    # Defines a function to test the loss function and the gradients of
+    # the sharded realizations against those of a single process
+
+    def test_sharded_loss_and_gradients(self):
+
+        print("\n#####################################################"+
+        "###################\n#                  Tests the sharding of"+
+        " realizations                  #\n###########################"+
+        "#############################################\n")
+
+        # Splits the last DOFs of the mesh between two agents
+
+        agents_dofs = np.arange(self.n_dofs-18, self.n_dofs).reshape(2, 9)
+
+        build_arguments = {"file_name": self.file_name, "file_directory":
+        self.file_directory, "agents_dofs": agents_dofs}
+
+        # Evaluates the loss function and the gradients in this process
+
+        single_process = build_shard(np.arange(self.n_realizations),
+        **build_arguments)
+
+        random_generator = np.random.default_rng(1)
+
+        vector_of_parameters = 1E-4*random_generator.normal(size=(
+        self.n_realizations, self.n_dofs))
+
+        model_input = 1E-3*random_generator.normal(size=(
+        self.n_realizations, 4))
+
+        weights = single_process.agent_model.agent_model.get_weights()
+
+        loss, gradient = single_process.evaluate_loss_and_gradient(
+        vector_of_parameters)
+
+        agent_loss, agent_gradients = (
+        single_process.evaluate_agent_loss_and_gradient(weights,
+        model_input, vector_of_parameters))
+
+        # Evaluates them with the realizations split over two workers
+
+        with RealizationShardingDriver(build_shard, self.n_realizations,
+        2, build_arguments=build_arguments, threads_per_worker=1
+        ) as driver:
+
+            sharded_loss, sharded_gradient = (
+            driver.evaluate_loss_and_gradient(vector_of_parameters))
+
+            sharded_agent_loss, sharded_agent_gradients = (
+            driver.evaluate_agent_loss_and_gradient(weights,
+            model_input, vector_of_parameters))
+
+        print("Loss function: single process -> "+str(loss)+"; sharded"+
+        " -> "+str(sharded_loss)+"\nLoss function of the agents: singl"+
+        "e process -> "+str(agent_loss)+"; sharded -> "+str(
+        sharded_agent_loss)+"\n")
+
+        np.testing.assert_allclose(sharded_loss, loss, rtol=1E-12)
+
+        np.testing.assert_allclose(sharded_gradient, gradient, rtol=1E-10,
+        atol=1E-12*np.abs(gradient).max())
+
+        np.testing.assert_allclose(sharded_agent_loss, agent_loss, rtol=
+        1E-12)
+
+        for sharded_agent_gradient, agent_gradient in zip(
+        sharded_agent_gradients, agent_gradients):
+
+            np.testing.assert_allclose(sharded_agent_gradient,
+            agent_gradient, rtol=1E-10, atol=1E-12*np.abs(agent_gradient
+            ).max())
+
+# Runs all tests
+
+if __name__=="__main__":
+
+    unittest.main()
@@ -4,16 +4,37 @@
 
 import unittest
 
+import os
+
+import shutil
+
+import tempfile
+
+import numpy as np
+
 from ..finite_elements.volume_elements.tetrahedrons import Tetrahedron
 
 from ..finite_elements.surface_elements.triangles import Triangle
 
+from ..finite_elements.volume_elements.hexahedrons import Hexahedron
+
+from ..finite_elements.volume_elements.hexahedrons import (
+SerendipityHexahedron)
+
+from ..finite_elements.surface_elements.quadrilaterals import (
+Quadrilateral)
+
+from ..tool_box.shape_functions_tools import (
+get_hexahedron_nodes_natural_coordinates)
+
 from ..tool_box import mesh_tools
 
 from ...MultiMech.tool_box.mesh_handling_tools import create_box_mesh
 
 from ...PythonicUtilities.path_tools import get_parent_path_of_file
 
+from .mesh_writing_tools import write_hexahedral_box_mesh
+
 # Defines a function to test the ANN tools methods
 
 class TestANNTools(unittest.TestCase):
@@ -115,6 +136,71 @@ class TestANNTools(unittest.TestCase):
         #print("The derivatives of the shape functions at all quadratur"+
         #"e point are:\n"+str(tetradron_mesh.shape_functions_derivatives))
 
+    # Defines a function to test the hexahedral and quadrilateral ele-
+    # ments
+
+    def test_hexahedron(self):
+
+        print("\n#####################################################"+
+        "###################\n#           Tests the "+
+        "hexahedral and quadrilateral elements   "+
+        "         #\n###########################"+
+        "#############################################\n")
+
+        # Maps the reference hexahedron to the box [0, 0.2]x[0, 0.3]x[0,
+        # 1.0] with a shear in the xz plane
+
+        dimensions = np.array([0.2, 0.3, 1.0])
+
+        for element_class, number_of_nodes, polynomial_degree in [(
+        Hexahedron, 8, 1), (SerendipityHexahedron, 20, 2), (Hexahedron,
+        27, 2)]:
+
+            natural_coordinates = get_hexahedron_nodes_natural_coordinates(
+            number_of_nodes)
+
+            nodes_coordinates = 0.5*(natural_coordinates+1.0)*dimensions
+
+            nodes_coordinates[:,0] += 0.1*nodes_coordinates[:,2]
+
+            dofs_per_element = np.arange(3*number_of_nodes).reshape(
+            number_of_nodes, 3)
+
+            hexahedron_mesh = element_class([nodes_coordinates], [
+            dofs_per_element], polynomial_degree=polynomial_degree,
+            quadrature_degree=3)
+
+            print("The volume of the hexahedron of "+str(number_of_nodes)+
+            " nodes is "+str(np.sum(hexahedron_mesh.dx.numpy())))
+
+            self.assertTrue(np.isclose(np.sum(hexahedron_mesh.dx.numpy()),
+            np.prod(dimensions), rtol=1E-4))
+
+            # Verifies the partition of unity and that the gradient of a 
+            # linear field is exact
+
+            self.assertTrue(np.allclose(np.sum(
+            hexahedron_mesh.shape_functions_tensor.numpy(), axis=1), 1.0))
+
+            linear_field = nodes_coordinates@np.array([1.0, 2.0, 3.0])
+
+            self.assertTrue(np.allclose(np.einsum('eqnx,n->eqx', 
+            hexahedron_mesh.shape_functions_derivatives.numpy(), 
+            linear_field), [1.0, 2.0, 3.0], rtol=1E-4))
+
+        # Creates a bilinear quadrilateral in the 3D space, whose normal
+        # is the z axis
+
+        quadrilateral_mesh = Quadrilateral([[[0.0, 0.0, 1.0], [0.2, 0.0,
+        1.0], [0.2, 0.3, 1.0], [0.0, 0.3, 1.0]]], [[[0,1,2], [3,4,5], [
+        6,7,8], [9,10,11]]])
+
+        self.assertTrue(np.isclose(np.sum(quadrilateral_mesh.dx.numpy()), 
+        0.06, rtol=1E-4))
+
+        self.assertTrue(np.allclose(quadrilateral_mesh.normal_vector.numpy(
+        ), [0.0, 0.0, 1.0], atol=1E-6))
+
     # Defines a function to test reading a mesh
 
     def test_mesh_reader(self):
@@ -201,6 +287,135 @@ class TestANNTools(unittest.TestCase):
         print("\nThere are "+str(mesh_data_class.global_number_dofs)+
         " DOFs in the mesh")
 
+    # Defines a function to test the binary cache of the msh mesh reader
+
+    def test_mesh_cache(self):
+
+        print("\n#####################################################"+
+        "###################\n#                    Tests the binary mes"+
+        "h cache                     #\n###########################"+
+        "#############################################\n")
+
+        file_name = "box"
+
+        file_directory = get_parent_path_of_file()
+
+        # Creates a box mesh 
+
+        create_box_mesh(0.2, 0.3, 1.0, 2, 2, 3, file_name=file_name, 
+        verbose=False, convert_to_xdmf=False, file_directory=
+        file_directory, mesh_polinomial_order=2, n_subdomains_z=1)
+
+        # Defines a dictionary of finite element per field
+
+        elements_per_field = {"Displacement": {"number of DOFs per nod"+
+        "e": 3, "required element type": "tetrahedron of 10 nodes"}}
+
+        # Reads this mesh twice. The first reading writes the cache en-
+        # try, whereas the second one loads it
+
+        cache_directory = file_directory+"//mesh_cache"
+
+        parsed_mesh = mesh_tools.read_msh_mesh(file_name, 2, 
+        elements_per_field, cache_directory=cache_directory)
+
+        cached_mesh = mesh_tools.read_msh_mesh(file_name, 2, 
+        elements_per_field, cache_directory=cache_directory, verbose=True)
+
+        self.assertEqual(parsed_mesh.global_number_dofs, 
+        cached_mesh.global_number_dofs)
+
+        for region in ["domain_elements", "boundary_elements"]:
+
+            for field_name, element_dict in getattr(parsed_mesh, region
+            ).items():
+                
+                for physical_group, element_class in element_dict.items():
+
+                    cached_element = getattr(cached_mesh, region)[
+                    field_name][physical_group]
+
+                    self.assertTrue(np.array_equal(
+                    element_class.dofs_per_element.numpy(), 
+                    cached_element.dofs_per_element.numpy()))
+
+                    self.assertTrue(np.allclose(element_class.dx.numpy(),
+                    cached_element.dx.numpy()))
+
+    # Defines a function to test the binary cache of a mesh of hexahe-
+    # drons and of quadrilaterals
+
+    def test_hexahedral_mesh_cache(self):
+
+        print("\n#####################################################"+
+        "###################\n#             Tests the binary cache of "+
+        "a hexahedral mesh              #\n###########################"+
+        "#############################################\n")
+
+        file_name = "hexahedral_box"
+
+        # Writes a msh file with two layers of two hexahedrons of 8 no-
+        # des into a temporary directory, which is removed with the ca-
+        # che after the test
+
+        file_directory = tempfile.mkdtemp()
+
+        self.addCleanup(shutil.rmtree, file_directory, ignore_errors=
+        True)
+
+        write_hexahedral_box_mesh(os.path.join(file_directory, file_name+
+        ".msh"), [2, 1, 2])
+
+        # Defines a dictionary of finite element per field
+
+        elements_per_field = {"Displacement": {"number of DOFs per nod"+
+        "e": 3, "required element type": "hexahedron of 8 nodes"}}
+
+        # Reads this mesh twice. The first reading writes the cache en-
+        # try, whereas the second one loads it
+
+        cache_directory = file_directory+"//mesh_cache"
+
+        parsed_mesh = mesh_tools.read_msh_mesh(file_name, 2,
+        elements_per_field, parent_directory=file_directory,
+        cache_directory=cache_directory)
+
+        cached_mesh = mesh_tools.read_msh_mesh(file_name, 2,
+        elements_per_field, parent_directory=file_directory,
+        cache_directory=cache_directory, verbose=True)
+
+        self.assertEqual(parsed_mesh.global_number_dofs,
+        cached_mesh.global_number_dofs)
+
+        for region in ["domain_elements", "boundary_elements"]:
+
+            for field_name, element_dict in getattr(parsed_mesh, region
+            ).items():
+
+                for physical_group, element_class in element_dict.items():
+
+                    cached_element = getattr(cached_mesh, region)[
+                    field_name][physical_group]
+
+                    self.assertEqual(type(element_class).__name__, type(
+                    cached_element).__name__)
+
+                    self.assertTrue(np.array_equal(
+                    element_class.dofs_per_element.numpy(),
+                    cached_element.dofs_per_element.numpy()))
+
+                    self.assertTrue(np.allclose(element_class.dx.numpy(),
+                    cached_element.dx.numpy()))
+
+        # Verifies the volume and the area of the bottom face
+
+        self.assertTrue(np.isclose(sum(np.sum(element_class.dx.numpy()
+        ) for element_class in cached_mesh.domain_elements[
+        "Displacement"].values()), 1.0))
+
+        self.assertTrue(np.isclose(np.sum(cached_mesh.boundary_elements[
+        "Displacement"][1].dx.numpy()), 1.0))
+
 # Runs all tests
 
 if __name__=="__main__":
@@ -2,6 +2,10 @@
 
 import numpy as np
 
+import tensorflow as tf
+
+from scipy.sparse.linalg import splu
+
 from dolfin import assemble
 
 from ..physics.compressible_cauchy_hyperelasticy import CompressibleHyperelasticity
@@ -12,6 +16,10 @@ from ..tool_box import mesh_tools
 
 from ..optimization.objective_function import LossFunction
 
+from ..optimization import conditioning_matrices
+
+from ..optimization.neural_network_assembler import MultiAgentModel
+
 from ...MultiMech.tool_box.mesh_handling_tools import create_box_mesh, read_mshMesh, dofs_per_node_finder_class
 
 from ...MultiMech.tool_box import functional_tools, variational_tools
@@ -531,6 +539,261 @@ class TestANNTools:
         loss_function_instance.evaluate_loss(vector_of_parameters, 
         residual_vector), conditioning_constants)
 
+    # Defines a function to test the conditioning matrices built from 
+    # the reference stiffness matrix
+
+    def test_physics_based_conditioning_matrices(self):
+
+        print("\n#####################################################"+
+        "###################\n#              Tests physics-based condi"+
+        "tioning matrices               #\n##########################"+
+        "##############################################\n", flush=True)
+
+        # Creates a dictionary to tell Dirichlet boundary conditions
+
+        boundary_conditions_dict = {"bottom": {"BC case": "FixedSuppor"+
+        "tDirichletBC", "field name": "Displacement"}}
+
+        # Sets the dictionary of constitutive models
+
+        constitutive_models = dict()
+
+        for subdomain in range(self.n_subdomains_z):
+
+            constitutive_models["volume "+str(subdomain+1)] = NeoHookean(
+            self.base_material_properties, self.mesh_data_class[0])
+
+        # Sets the dictionary of traction classes
+
+        traction_dictionary = {"top": {"load case": "TractionVectorOnS"+
+        "urface", "amplitude_tractionX": 0.0, "amplitude_tractionY": 0.0, 
+        "amplitude_tractionZ": self.base_neumann_load[1]}}
+
+        # Instantiates the class to evaluate the residual vector
+
+        residual_class = CompressibleHyperelasticity(self.mesh_data_class[0],
+        constitutive_models, traction_dictionary=traction_dictionary, 
+        boundary_conditions_dict=boundary_conditions_dict, time=
+        self.base_current_time, n_realizations=2)
+
+        vector_of_parameters = residual_class.vector_of_parameters
+
+        residual_vector = residual_class.evaluate_residual_tensor(
+        vector_of_parameters)
+
+        # Gets the reference stiffness matrix of the first realization
+
+        stiffness_matrix = (
+        conditioning_matrices.get_reference_stiffness_matrix(
+        residual_class, 0))
+
+        # Verifies that the tangent matrix assembled for a single reali-
+        # zation is the one of that realization in the batched assembly
+
+        internal_work = residual_class.internal_work_variation
+
+        null_vector = tf.zeros_like(vector_of_parameters)
+
+        batched_tangent_values = internal_work.assemble_tangent_values(
+        null_vector).numpy()
+
+        for realization in range(2):
+
+            np.testing.assert_allclose(
+            internal_work.assemble_realization_tangent_values(
+            null_vector, realization).numpy(), batched_tangent_values[
+            realization])
+
+        # Gets the conditioned residual vectors
+
+        conditioned_residuals = dict()
+
+        for conditioner_info in [{"conditioner name": "InverseDiagonal"+
+        "Tangent"}, {"conditioner name": "InverseDiagonalTangent", "lu"+
+        "mped": True}, {"conditioner name": "IncompleteLUTangent", "dr"+
+        "op tolerance": 0.0}, {"conditioner name": "EnergyNormTangent"}]:
+
+            conditioner_info["residual class"] = residual_class
+
+            conditioner_name = conditioner_info["conditioner name"]
+
+            if "lumped" in conditioner_info:
+
+                conditioner_name = "Lumped"+conditioner_name
+
+            loss_function_instance = LossFunction(conditioner_info, {"l"+
+            "oss function name": "QuadraticForm"}, vector_of_parameters)
+
+            conditioned_residuals[conditioner_name] = (
+            loss_function_instance.conditioning_matrices_instances(
+            vector_of_parameters, residual_vector).numpy())
+
+            print("Loss function with '"+str(conditioner_info["conditi"+
+            "oner name"])+"': "+str(loss_function_instance.evaluate_loss(
+            vector_of_parameters, residual_vector).numpy()), flush=True)
+
+        # The energy norm conditioner must solve the reference stiffness
+        # matrix, whereas the incomplete factorization without dropping
+        # must solve it twice, and the diagonal conditioners must divide
+        # by the squared diagonal and by the squared lumped stiffness
+
+        energy_norm_residual = conditioned_residuals["EnergyNormTangent"]
+
+        np.testing.assert_allclose((stiffness_matrix@(
+        energy_norm_residual.T)).T, residual_vector.numpy(), atol=1E-5*
+        np.max(np.abs(residual_vector.numpy())))
+
+        np.testing.assert_allclose(conditioned_residuals["InverseDiago"+
+        "nalTangent"]*(stiffness_matrix.diagonal()**2), 
+        residual_vector.numpy(), rtol=1E-5)
+
+        lumped_stiffness = np.asarray(abs(stiffness_matrix).sum(axis=1)
+        ).reshape(-1)
+
+        np.testing.assert_allclose(conditioned_residuals["LumpedInvers"+
+        "eDiagonalTangent"]*(lumped_stiffness**2), 
+        residual_vector.numpy(), rtol=1E-5)
+
+        factorization = splu(stiffness_matrix)
+
+        twice_solved_residual = factorization.solve(factorization.solve(
+        residual_vector.numpy().T.astype(np.float64))).T
+
+        np.testing.assert_allclose(conditioned_residuals["IncompleteLU"+
+        "Tangent"], twice_solved_residual, atol=1E-3*np.max(np.abs(
+        twice_solved_residual)))
+
+    # Defines a function to test the fused evaluation of multiple agents
+    # against the evaluation of each agent with its own weights
+
+    def test_multi_agent_model(self):
+
+        print("\n#####################################################"+
+        "###################\n#                  Tests the fused multi"+
+        "-agent model                   #\n##########################"+
+        "##############################################\n", flush=True)
+
+        # Creates a dictionary to tell Dirichlet boundary conditions
+
+        boundary_conditions_dict = {"bottom": {"BC case": "FixedSuppor"+
+        "tDirichletBC", "field name": "Displacement"}}
+
+        # Sets the dictionary of constitutive models
+
+        constitutive_models = dict()
+
+        for subdomain in range(self.n_subdomains_z):
+
+            constitutive_models["volume "+str(subdomain+1)] = NeoHookean(
+            self.base_material_properties, self.mesh_data_class[0])
+
+        traction_dictionary = {"top": {"load case": "TractionVectorOnS"+
+        "urface", "amplitude_tractionX": 0.0, "amplitude_tractionY": 0.0, 
+        "amplitude_tractionZ": self.base_neumann_load[1]}}
+
+        residual_class = CompressibleHyperelasticity(self.mesh_data_class[0],
+        constitutive_models, traction_dictionary=traction_dictionary, 
+        boundary_conditions_dict=boundary_conditions_dict, time=
+        self.base_current_time, n_realizations=2)
+
+        vector_of_parameters = residual_class.vector_of_parameters
+
+        loss_function_instance = LossFunction({"conditioner name": "Id"+
+        "entityMultiple"}, {"loss function name": "QuadraticForm"}, 
+        vector_of_parameters)
+
+        # Splits the last DOFs of the mesh among the agents
+
+        n_agents = 8
+
+        n_agent_dofs = 3
+
+        agents_dofs = np.arange(vector_of_parameters.shape[1]-(n_agents*
+        n_agent_dofs), vector_of_parameters.shape[1]).reshape(n_agents,
+        n_agent_dofs)
+
+        layers_info = [{"tanh": 5}, {"tanh": 5}, {"linear": n_agent_dofs}]
+
+        # Uses a small input, such that the displacements given by the
+        # agents do not invert the elements
+
+        model_input = 1E-3*np.random.default_rng(1).normal(size=(2, 4)
+        ).astype(vector_of_parameters.dtype.as_numpy_dtype)
+
+        # Tests the fused agents without and with a shared trunk
+
+        for n_shared_layers in [0, 1]:
+
+            multi_agent_model = MultiAgentModel(agents_dofs, 4, 
+            layers_info, vector_of_parameters.dtype.name, 
+            residual_class.integer_dtype, vector_of_parameters,
+            loss_function_instance, n_shared_layers=n_shared_layers)
+
+            updated_vector_of_parameters = (
+            multi_agent_model.evaluate_model(model_input, 
+            vector_of_parameters)).numpy()
+
+            # Verifies that the kernels of the heads differ between any
+            # two agents at initialization
+
+            network = multi_agent_model.agent_model
+
+            for kernel in network.kernels[n_shared_layers:]:
+
+                kernel = kernel.numpy().reshape(n_agents, -1)
+
+                differences = np.max(np.abs(kernel[:, None, :]-kernel[
+                None, :, :]), axis=2)
+
+                assert np.all(differences[~np.eye(n_agents, dtype=bool)]>
+                0.0), "Two agents have the same initial kernel"
+
+            # Evaluates each agent with its own weights
+
+            for agent in range(n_agents):
+
+                output = model_input
+
+                for layer_index, (kernel, bias) in enumerate(zip(
+                network.kernels, network.biases)):
+
+                    if layer_index>=n_shared_layers:
+
+                        kernel, bias = kernel[agent], bias[agent, 0]
+
+                    output = (output@kernel.numpy())+bias.numpy()
+
+                    if layer_index<len(layers_info)-1:
+
+                        output = np.tanh(output)
+
+                np.testing.assert_allclose(updated_vector_of_parameters[
+                :, agents_dofs[agent]], output, rtol=1E-4, atol=1E-9)
+
+            # Verifies the gradient of the loss function with respect to
+            # the weights of all agents. The residual is evaluated with
+            # the output of the agents
+
+            with tf.GradientTape() as tape:
+
+                updated_vector_of_parameters = (
+                multi_agent_model.evaluate_model(model_input, 
+                vector_of_parameters))
+
+                loss = loss_function_instance.evaluate_loss(
+                updated_vector_of_parameters, 
+                residual_class.evaluate_residual_tensor(
+                updated_vector_of_parameters))
+
+            print("Loss function with "+str(n_shared_layers)+" shared "+
+            "layers: "+str(loss.numpy()))
+
+            assert np.isfinite(loss.numpy()), "The loss is not finite"
+
+            assert all(gradient is not None for gradient in (
+            tape.gradient(loss, network.trainable_variables))), ("A gra"+
+            "dient with respect to the weights is None")
+
 # Runs all tests
 
 if __name__=="__main__":
@@ -18,6 +18,12 @@ from ..constitutive_models.hyperelastic_isotropic_models import NeoHookean
 
 from ..tool_box import mesh_tools
 
+from ..tool_box.optimization_tools import BatchedNewtonKrylovSolver
+
+from ..tool_box.assembly_tools import AssemblyPlan
+
+from ..tool_box.sensitivity_tools import AdjointSensitivity
+
 from ...MultiMech.tool_box.mesh_handling_tools import create_box_mesh, read_mshMesh, dofs_per_node_finder_class
 
 from ...MultiMech.tool_box import functional_tools, variational_tools
@@ -393,6 +399,766 @@ class TestANNTools(unittest.TestCase):
         "to calculate the residual for the third time:   "+str(
         third_residual_evaluation-second_residual_evaluation)+"\n")
 
+    # Defines a function to test the tangent matrix against a finite 
+    # difference of the residual vector
+
+    def test_tangent_matrix(self):
+
+        print("\n#####################################################"+
+        "###################\n#                     Tests the tangent "+
+        "matrix                       #\n###########################"+
+        "#############################################\n")
+
+        file_name = "box"
+
+        file_directory = get_parent_path_of_file()
+
+        # Creates a box mesh 
+
+        n_subdomains_z = 2
+
+        create_box_mesh(0.2, 0.3, 1.0, 2, 2, 4, file_name=file_name, 
+        verbose=False, convert_to_xdmf=False, file_directory=
+        file_directory, mesh_polinomial_order=2, n_subdomains_z=
+        n_subdomains_z)
+
+        # Reads this mesh
+
+        elements_per_field = {"Displacement": {"number of DOFs per nod"+
+        "e": 3, "required element type": "tetrahedron of 10 nodes"}}
+
+        mesh_data_class = mesh_tools.read_msh_mesh(file_name, 2, 
+        elements_per_field, dtype=tf.float64)
+
+        # Sets the dictionary of constitutive models
+
+        constitutive_models = dict()
+
+        for subdomain in range(n_subdomains_z):
+
+            constitutive_models["volume "+str(subdomain+1)] = NeoHookean(
+            {"E": 1E6, "nu": 0.4}, mesh_data_class)
+
+        boundary_conditions_dict = {"bottom": {"BC case": "FixedSuppor"+
+        "tDirichletBC", "field name": "Displacement"}}
+
+        traction_dictionary = {"top": {"load case": "TractionVectorOnS"+
+        "urface", "amplitude_tractionX": 0.0, "amplitude_tractionY": 0.0, 
+        "amplitude_tractionZ": 1E5}}
+
+        residual_class = CompressibleHyperelasticity(mesh_data_class,
+        constitutive_models, traction_dictionary=traction_dictionary, 
+        boundary_conditions_dict=boundary_conditions_dict, time=1.0, 
+        n_realizations=2)
+
+        # Perturbs the vector of parameters to get out of the reference
+        # configuration
+
+        vector_of_parameters = residual_class.vector_of_parameters
+
+        global_residual_vector = residual_class.global_residual_vector
+
+        vector_of_parameters.assign(tf.random.stateless_normal(
+        vector_of_parameters.shape, [1, 2], dtype=tf.float64)*1E-4)
+
+        # Evaluates the tangent matrix and the residual vector
+
+        tangent_matrix = tf.sparse.to_dense(
+        residual_class.evaluate_tangent_matrix(vector_of_parameters)
+        ).numpy()
+
+        residual_vector = residual_class.evaluate_residual_vector(
+        vector_of_parameters, global_residual_vector).numpy()
+
+        # Evaluates the residual at a perturbed vector of parameters
+
+        perturbation = tf.random.stateless_normal(
+        vector_of_parameters.shape, [3, 4], dtype=tf.float64)*1E-7
+
+        vector_of_parameters.assign_add(perturbation)
+
+        perturbed_residual = residual_class.evaluate_residual_vector(
+        vector_of_parameters, global_residual_vector).numpy()
+
+        # Compares the directional derivative with the finite difference
+
+        directional_derivative = np.einsum('pij,pj->pi', tangent_matrix, 
+        perturbation.numpy())
+
+        relative_error = (np.linalg.norm(perturbed_residual-
+        residual_vector-directional_derivative)/np.linalg.norm(
+        directional_derivative))
+
+        print("Relative error of the finite difference: "+str(
+        relative_error))
+
+        self.assertLess(relative_error, 1E-4)
+
+        # Verifies the symmetry of the tangent matrix
+
+        self.assertTrue(np.allclose(tangent_matrix, np.transpose(
+        tangent_matrix, (0, 2, 1)), atol=1E-8*np.abs(tangent_matrix
+        ).max()))
+
+    # Defines a function to test the batched Newton-Krylov solver
+
+    def test_batched_newton_krylov(self):
+
+        print("\n#####################################################"+
+        "###################\n#               Tests the batched Newto"+
+        "n-Krylov solver                #\n###########################"+
+        "#############################################\n")
+
+        file_name = "box"
+
+        file_directory = get_parent_path_of_file()
+
+        # Creates a box mesh 
+
+        n_subdomains_z = 2
+
+        n_realizations = 3
+
+        create_box_mesh(0.2, 0.3, 1.0, 2, 2, 4, file_name=file_name, 
+        verbose=False, convert_to_xdmf=False, file_directory=
+        file_directory, mesh_polinomial_order=2, n_subdomains_z=
+        n_subdomains_z)
+
+        # Reads this mesh
+
+        elements_per_field = {"Displacement": {"number of DOFs per nod"+
+        "e": 3, "required element type": "tetrahedron of 10 nodes"}}
+
+        mesh_data_class = mesh_tools.read_msh_mesh(file_name, 2, 
+        elements_per_field, dtype=tf.float64)
+
+        # Sets the dictionary of constitutive models with a different
+        # Young modulus for each realization in the second subdomain
+
+        constitutive_models = {"volume 1": NeoHookean({"E": 1E6, "nu": 
+        0.4}, mesh_data_class), "volume 2": NeoHookean([{"E": 1E6*(i+1), 
+        "nu": 0.3} for i in range(n_realizations)], mesh_data_class)}
+
+        boundary_conditions_dict = {"top": {"BC case": "PrescribedDiri"+
+        "chletBC", "load_function": "linear", "degrees_ofFreedomList": 2,
+        "end_point": [1.0, 0.1], "field name": "Displacement"}, "botto"+
+        "m": {"BC case": "FixedSupportDirichletBC", "field name": "Disp"+
+        "lacement"}}
+
+        traction_dictionary = {"top": {"load case": "TractionVectorOnS"+
+        "urface", "amplitude_tractionX": [1E4*i for i in range(
+        n_realizations)], "amplitude_tractionY": [0.0]*n_realizations, 
+        "amplitude_tractionZ": [0.0]*n_realizations}}
+
+        residual_class = CompressibleHyperelasticity(mesh_data_class,
+        constitutive_models, traction_dictionary=traction_dictionary, 
+        boundary_conditions_dict=boundary_conditions_dict, time=0.0, 
+        n_realizations=n_realizations)
+
+        # Solves all realizations in lockstep
+
+        solver = BatchedNewtonKrylovSolver(residual_class, 
+        linear_solver="CG", preconditioner="block Jacobi")
+
+        vector_of_parameters = solver(time=1.0)
+
+        self.assertTrue(bool(tf.reduce_all(solver.converged)))
+
+        # Verifies the residual with the in-place assembly
+
+        residual_vector = residual_class.evaluate_residual_vector(
+        vector_of_parameters, residual_class.global_residual_vector)
+
+        residual_norm = tf.norm(residual_vector*solver.free_dofs_mask, 
+        axis=1)
+
+        print("Norms of the residual vectors: "+str(residual_norm.numpy(
+        )))
+
+        self.assertTrue(np.allclose(residual_norm.numpy(), 
+        solver.residual_norm.numpy()))
+
+    # Defines a function to test the assembly plan against the scatter
+    # of element contributions with tensors of indices
+
+    def test_assembly_plan(self):
+
+        print("\n###################################################"+
+        "#####################\n#                       Tests the ass"+
+        "embly plan                        #\n#######################"+
+        "#################################################\n")
+
+        # Creates random element contributions [n_realizations, 
+        # n_elements, n_nodes, 3] and DOFs per element
+
+        n_realizations = 8
+
+        n_elements = 20000
+
+        n_dofs = 90000
+
+        dofs_per_element = tf.random.stateless_uniform([n_elements, 10,
+        3], [1, 2], maxval=n_dofs, dtype=tf.int32)
+
+        element_contributions = tf.random.stateless_normal([
+        n_realizations, n_elements, 10, 3], [3, 4], dtype=tf.float64)
+
+        # Creates the tensor of indices [n_realizations, n_elements,
+        # n_nodes, 3, 2] for the scatter
+
+        realization_indices = tf.broadcast_to(tf.range(n_realizations)[
+        :, None, None, None], [n_realizations, n_elements, 10, 3])
+
+        updates_indices = tf.stack([realization_indices, tf.broadcast_to(
+        dofs_per_element[None], tf.shape(realization_indices))], axis=-1)
+
+        scatter_assembly = tf.function(lambda x: tf.tensor_scatter_nd_add(
+        tf.zeros([n_realizations, n_dofs], dtype=tf.float64), 
+        updates_indices, x))
+
+        # Creates the assembly plan
+
+        assembly_plan = AssemblyPlan(dofs_per_element, n_dofs, tf.float64)
+
+        # Compares both assemblies and their times after tracing
+
+        scatter_result = scatter_assembly(element_contributions)
+
+        plan_result = assembly_plan(element_contributions)
+
+        self.assertTrue(np.allclose(scatter_result.numpy(), 
+        plan_result.numpy()))
+
+        start_time = time()
+
+        for i in range(10):
+
+            scatter_assembly(element_contributions)
+
+        scatter_time = (time()-start_time)/10
+
+        start_time = time()
+
+        for i in range(10):
+
+            assembly_plan(element_contributions)
+
+        plan_time = (time()-start_time)/10
+
+        print("Time to assemble with scatter: "+str(scatter_time)+"\nT"+
+        "ime to assemble with the assembly plan: "+str(plan_time)+"\n")
+
+    # Defines a function to test the residual evaluation with XLA com-
+    # pilation and with mixed precision against the double precision
+    # evaluation compiled by the graph runtime
+
+    def test_mixed_precision_and_xla(self):
+
+        print("\n#####################################################"+
+        "###################\n#                 Tests mixed precision a"+
+        "nd XLA                        #\n###########################"+
+        "#############################################\n")
+
+        file_name = "box"
+
+        file_directory = get_parent_path_of_file()
+
+        # Creates a box mesh 
+
+        n_subdomains_z = 2
+
+        n_realizations = 2
+
+        create_box_mesh(0.2, 0.3, 1.0, 2, 2, 4, file_name=file_name, 
+        verbose=False, convert_to_xdmf=False, file_directory=
+        file_directory, mesh_polinomial_order=2, n_subdomains_z=
+        n_subdomains_z)
+
+        # Reads this mesh in double precision
+
+        elements_per_field = {"Displacement": {"number of DOFs per nod"+
+        "e": 3, "required element type": "tetrahedron of 10 nodes"}}
+
+        mesh_data_class = mesh_tools.read_msh_mesh(file_name, 2, 
+        elements_per_field, dtype=tf.float64)
+
+        boundary_conditions_dict = {"bottom": {"BC case": "FixedSuppor"+
+        "tDirichletBC", "field name": "Displacement"}}
+
+        traction_dictionary = {"top": {"load case": "TractionVectorOnS"+
+        "urface", "amplitude_tractionX": 0.0, "amplitude_tractionY": 1E4, 
+        "amplitude_tractionZ": 1E5}}
+
+        # Creates the constitutive models once. They are shared by all
+        # the execution modes, thus, they must keep their numerical type
+
+        constitutive_models = dict()
+
+        for subdomain in range(n_subdomains_z):
+
+            constitutive_models["volume "+str(subdomain+1)] = NeoHookean(
+            {"E": 1E6, "nu": 0.4}, mesh_data_class)
+
+        # Iterates through the execution modes. The first one is the 
+        # baseline
+
+        baseline_residual = None
+
+        for jit_compile, mixed_precision in [(False, False), (True, 
+        False), (False, True), (True, True)]:
+
+            residual_class = CompressibleHyperelasticity(mesh_data_class,
+            constitutive_models, traction_dictionary=traction_dictionary, 
+            boundary_conditions_dict=boundary_conditions_dict, time=1.0, 
+            n_realizations=n_realizations, jit_compile=jit_compile,
+            mixed_precision=mixed_precision)
+
+            vector_of_parameters = residual_class.vector_of_parameters
+
+            vector_of_parameters.assign(tf.random.stateless_normal(
+            vector_of_parameters.shape, [1, 2], dtype=tf.float64)*1E-5)
+
+            residual_vector = residual_class.evaluate_residual_vector(
+            vector_of_parameters, residual_class.global_residual_vector
+            ).numpy()
+
+            # Evaluates the relative error with respect to the baseline
+
+            if baseline_residual is None:
+
+                baseline_residual = residual_vector
+
+            relative_error = (np.linalg.norm(residual_vector-
+            baseline_residual)/np.linalg.norm(baseline_residual))
+
+            print("jit_compile="+str(jit_compile)+", mixed_precision="+
+            str(mixed_precision)+"\nRelative error of the residual: "+
+            str(relative_error)+"\n")
+
+            self.assertLess(relative_error, 1E-4 if mixed_precision else 
+            1E-10)
+
+            # Verifies that the constitutive models given to the assem-
+            # bler have not been cast
+
+            for constitutive_model in constitutive_models.values():
+
+                self.assertEqual(constitutive_model.mu.dtype, tf.float64)
+
+    # Defines a function to test the evaluation of the residual vector 
+    # by blocks of elements under a memory budget against the evaluation
+    # of all elements at once
+
+    def test_memory_budget(self):
+
+        print("\n###################################################"+
+        "#####################\n#              Tests the"+
+        " evaluation by blocks of elements    "+
+        "          #\n#######################"+
+        "#################################################\n")
+
+        file_name = "box"
+
+        file_directory = get_parent_path_of_file()
+
+        # Creates a box mesh 
+
+        n_subdomains_z = 2
+
+        n_realizations = 3
+
+        create_box_mesh(0.2, 0.3, 1.0, 4, 4, 8, file_name=file_name, 
+        verbose=False, convert_to_xdmf=False, file_directory=
+        file_directory, mesh_polinomial_order=2, n_subdomains_z=
+        n_subdomains_z)
+
+        # Reads this mesh
+
+        elements_per_field = {"Displacement": {"number of DOFs per nod"+
+        "e": 3, "required element type": "tetrahedron of 10 nodes"}}
+
+        mesh_data_class = mesh_tools.read_msh_mesh(file_name, 2, 
+        elements_per_field, dtype=tf.float64)
+
+        boundary_conditions_dict = {"bottom": {"BC case": "FixedSuppor"+
+        "tDirichletBC", "field name": "Displacement"}}
+
+        traction_dictionary = {"top": {"load case": "TractionVectorOnS"+
+        "urface", "amplitude_tractionX": 0.0, "amplitude_tractionY": 1E4, 
+        "amplitude_tractionZ": 1E5}}
+
+        # Defines a function to evaluate the residual vector under a me-
+        # mory budget in megabytes. Returns the residual vector and the
+        # internal work class
+
+        def evaluate_residual_vector(memory_budget_MB):
+
+            constitutive_models = {"volume 1": NeoHookean({"E": 1E6, "n"+
+            "u": 0.4}, mesh_data_class), "volume 2": NeoHookean([{"E": 
+            1E6*(i+1), "nu": 0.3} for i in range(n_realizations)], 
+            mesh_data_class)}
+
+            residual_class = CompressibleHyperelasticity(mesh_data_class,
+            constitutive_models, traction_dictionary=traction_dictionary, 
+            boundary_conditions_dict=boundary_conditions_dict, time=1.0, 
+            n_realizations=n_realizations, memory_budget_MB=
+            memory_budget_MB)
+
+            internal_work = residual_class.internal_work_variation
+
+            print("Memory budget: "+str(memory_budget_MB)+" MB; elemen"+
+            "ts per block: "+str(internal_work.element_block_size)+" of"+
+            " "+str(internal_work.number_elements)+"; elements per mat"+
+            "erial: "+str(internal_work.material_number_elements))
+
+            vector_of_parameters = residual_class.vector_of_parameters
+
+            vector_of_parameters.assign(tf.random.stateless_normal(
+            vector_of_parameters.shape, [1, 2], dtype=tf.float64)*1E-4)
+
+            return residual_class.evaluate_residual_vector(
+            vector_of_parameters, residual_class.global_residual_vector
+            ).numpy(), internal_work
+
+        # Iterates through memory budgets in megabytes. The first one 
+        # evaluates all elements at once, and the second one is large
+        # enough for all elements
+
+        residual_vectors = []
+
+        for memory_budget_MB in [None, 1E6, 1.0, 0.1]:
+
+            residual_vector, internal_work = evaluate_residual_vector(
+            memory_budget_MB)
+
+            residual_vectors.append(residual_vector)
+
+        # Sets a budget for more elements than the largest material has,
+        # but for less elements than the whole mesh has. The elements
+        # must still be evaluated by blocks
+
+        block_size = max(internal_work.material_number_elements)+1
+
+        self.assertLess(block_size, internal_work.number_elements)
+
+        residual_vector, internal_work = evaluate_residual_vector((
+        block_size+0.5)*internal_work.bytes_per_element/1E6)
+
+        self.assertEqual(internal_work.element_block_size, block_size)
+
+        self.assertEqual(internal_work.appropriate_residual_evaluation, 
+        internal_work.evaluate_residual_by_blocks)
+
+        residual_vectors.append(residual_vector)
+
+        for residual_vector in residual_vectors[1:]:
+
+            self.assertTrue(np.allclose(residual_vector, 
+            residual_vectors[0], rtol=1E-10, atol=1E-10*np.abs(
+            residual_vectors[0]).max()))
+
+    # Defines a function to test the sensitivities given by the adjoint
+    # method against finite differences of converged solutions
+
+    def test_adjoint_sensitivity(self):
+
+        print("\n###################################################"+
+        "#####################\n#                Tests the adjoint se"+
+        "nsitivity analysis                #\n#######################"+
+        "#################################################\n")
+
+        file_name = "box"
+
+        file_directory = get_parent_path_of_file()
+
+        # Creates a box mesh 
+
+        n_subdomains_z = 2
+
+        n_realizations = 2
+
+        create_box_mesh(0.2, 0.3, 1.0, 2, 2, 4, file_name=file_name, 
+        verbose=False, convert_to_xdmf=False, file_directory=
+        file_directory, mesh_polinomial_order=2, n_subdomains_z=
+        n_subdomains_z)
+
+        # Reads this mesh
+
+        elements_per_field = {"Displacement": {"number of DOFs per nod"+
+        "e": 3, "required element type": "tetrahedron of 10 nodes"}}
+
+        mesh_data_class = mesh_tools.read_msh_mesh(file_name, 2, 
+        elements_per_field, dtype=tf.float64)
+
+        boundary_conditions_dict = {"bottom": {"BC case": "FixedSuppor"+
+        "tDirichletBC", "field name": "Displacement"}}
+
+        # Defines a function to solve the BVP for a vertical traction and
+        # a Young modulus of the second volume per realization. Returns
+        # the class of the residual, the solver and the constitutive mo-
+        # dels
+
+        def solve_bvp(traction_z, young_modulus):
+
+            constitutive_models = {"volume 1": NeoHookean({"E": 1E6, "n"+
+            "u": 0.4}, mesh_data_class), "volume 2": NeoHookean([{"E": 
+            E, "nu": 0.3} for E in young_modulus], mesh_data_class)}
+
+            traction_dictionary = {"top": {"load case": "TractionVecto"+
+            "rOnSurface", "amplitude_tractionX": [0.0]*n_realizations, 
+            "amplitude_tractionY": [1E4]*n_realizations, "amplitude_tr"+
+            "actionZ": traction_z}}
+
+            residual_class = CompressibleHyperelasticity(mesh_data_class,
+            constitutive_models, traction_dictionary=traction_dictionary, 
+            boundary_conditions_dict=boundary_conditions_dict, time=1.0, 
+            n_realizations=n_realizations)
+
+            solver = BatchedNewtonKrylovSolver(residual_class, 
+            relative_tolerance=1E-12, absolute_tolerance=1E-9, 
+            krylov_relative_tolerance=1E-10, verbose=False)
+
+            solver(time=1.0)
+
+            self.assertTrue(bool(tf.reduce_all(solver.converged)))
+
+            return residual_class, solver, constitutive_models
+
+        # Defines the quantity of interest as the sum of the squares of
+        # the vertical displacements
+
+        def quantity_of_interest(vector_of_parameters):
+
+            return tf.reduce_sum(vector_of_parameters[:, 2::3]**2, axis=
+            1)
+
+        traction_z = [5E4, 8E4]
+
+        young_modulus = [1E6*(i+1) for i in range(n_realizations)]
+
+        residual_class, solver, constitutive_models = solve_bvp(
+        traction_z, young_modulus)
+
+        sensitivities = AdjointSensitivity(residual_class, 
+        quantity_of_interest)()
+
+        print("Number of Krylov iterations of the adjoint problems: "+
+        str(sensitivities["number of Krylov iterations"].numpy()))
+
+        # Evaluates the derivative with respect to the vertical traction
+        # by central finite differences
+
+        step = 1E-4
+
+        adjoint_derivative = sensitivities["traction vectors"][0][:, 2
+        ].numpy()
+
+        quantity_forward = quantity_of_interest(solve_bvp([value*(1+step
+        ) for value in traction_z], young_modulus)[0].vector_of_parameters
+        ).numpy()
+
+        quantity_backward = quantity_of_interest(solve_bvp([value*(1-
+        step) for value in traction_z], young_modulus)[0
+        ].vector_of_parameters).numpy()
+
+        finite_differences_derivative = ((quantity_forward-
+        quantity_backward)/(2*step*np.array(traction_z)))
+
+        print("Traction adjoint derivatives: "+str(adjoint_derivative)+
+        "\nTraction finite differences derivatives: "+str(
+        finite_differences_derivative))
+
+        self.assertTrue(np.allclose(adjoint_derivative, 
+        finite_differences_derivative, rtol=1E-5))
+
+        # Evaluates the derivative with respect to the Young modulus of 
+        # the second volume. The Lamé parameters are proportional to it,
+        # thus, dJ/dE = ((dJ/dmu)*mu+(dJ/dlmbda)*lmbda)/E
+
+        constitutive_model = constitutive_models["volume 2"]
+
+        material_sensitivities = sensitivities["material parameters"][
+        residual_class.internal_work_variation.constitutive_models.index(
+        constitutive_model)]
+
+        adjoint_derivative = tf.reshape((material_sensitivities["mu"]*
+        constitutive_model.mu)+(material_sensitivities["lmbda"]*
+        constitutive_model.lmbda), [-1]).numpy()/np.array(young_modulus)
+
+        quantity_forward = quantity_of_interest(solve_bvp(traction_z, [
+        value*(1+step) for value in young_modulus])[0
+        ].vector_of_parameters).numpy()
+
+        quantity_backward = quantity_of_interest(solve_bvp(traction_z, [
+        value*(1-step) for value in young_modulus])[0
+        ].vector_of_parameters).numpy()
+
+        finite_differences_derivative = ((quantity_forward-
+        quantity_backward)/(2*step*np.array(young_modulus)))
+
+        print("Young modulus adjoint derivatives: "+str(
+        adjoint_derivative)+"\nYoung modulus finite differences deriv"+
+        "atives: "+str(finite_differences_derivative))
+
+        self.assertTrue(np.allclose(adjoint_derivative, 
+        finite_differences_derivative, rtol=1E-5))
+
+        # Evaluates the derivative with respect to a prescribed value per
+        # realization. The prescribed DOF with the largest derivative is
+        # perturbed in the converged solution, then, the free DOFs are
+        # solved again without applying the boundary conditions
+
+        dirichlet_indices = residual_class.BCs_class.all_indices.numpy()
+
+        dirichlet_derivatives = sensitivities["Dirichlet values"].numpy()
+
+        converged_solution = residual_class.vector_of_parameters.numpy()
+
+        displacement_step = 1E-6
+
+        for realization in range(n_realizations):
+
+            positions = np.flatnonzero(dirichlet_indices[:,0]==
+            realization)
+
+            position = positions[np.argmax(np.abs(dirichlet_derivatives[
+            positions]))]
+
+            quantities = []
+
+            for sign in [1.0, -1.0]:
+
+                perturbed_solution = converged_solution.copy()
+
+                perturbed_solution[realization, dirichlet_indices[
+                position, 1]] += sign*displacement_step
+
+                residual_class.vector_of_parameters.assign(
+                perturbed_solution)
+
+                solver()
+
+                self.assertTrue(bool(tf.reduce_all(solver.converged)))
+
+                quantities.append(quantity_of_interest(
+                residual_class.vector_of_parameters).numpy()[realization])
+
+            finite_differences_derivative = ((quantities[0]-quantities[1
+            ])/(2*displacement_step))
+
+            print("Realization "+str(realization)+", prescribed DOF "+
+            str(dirichlet_indices[position, 1])+": adjoint derivative "+
+            str(dirichlet_derivatives[position])+"; finite differences"+
+            " derivative "+str(finite_differences_derivative))
+
+            self.assertTrue(np.isclose(dirichlet_derivatives[position],
+            finite_differences_derivative, rtol=1E-4))
+
+    # Defines a function to test the update of loads linear in time,
+    # whose values per unit of time are computed once
+
+    def test_incremental_load_updates(self):
+
+        print("\n###################################################"+
+        "#####################\n#               Tests the update of l"+
+        "oads linear in time               #\n#######################"+
+        "#################################################\n")
+
+        file_name = "box"
+
+        file_directory = get_parent_path_of_file()
+
+        # Creates a box mesh 
+
+        n_subdomains_z = 2
+
+        n_realizations = 2
+
+        create_box_mesh(0.2, 0.3, 1.0, 2, 2, 4, file_name=file_name, 
+        verbose=False, convert_to_xdmf=False, file_directory=
+        file_directory, mesh_polinomial_order=2, n_subdomains_z=
+        n_subdomains_z)
+
+        # Reads this mesh
+
+        elements_per_field = {"Displacement": {"number of DOFs per nod"+
+        "e": 3, "required element type": "tetrahedron of 10 nodes"}}
+
+        mesh_data_class = mesh_tools.read_msh_mesh(file_name, 2, 
+        elements_per_field, dtype=tf.float64)
+
+        constitutive_models = {"volume 1": NeoHookean({"E": 1E6, "nu": 
+        0.4}, mesh_data_class), "volume 2": NeoHookean({"E": 2E6, "nu": 
+        0.3}, mesh_data_class)}
+
+        final_time = 2.0
+
+        boundary_conditions_dict = {"top": {"BC case": "PrescribedDiri"+
+        "chletBC", "load_function": "linear", "degrees_ofFreedomList": [
+        0], "end_point": [final_time, [[0.01, 0.02]]], "field name": 
+        "Displacement"}, "bottom": {"BC case": "FixedSupportDirichletBC",
+        "field name": "Displacement"}}
+
+        # Creates a traction constant in time and the same traction fol-
+        # lowing a linear load curve
+
+        residual_classes = []
+
+        for load_curve in [False, True]:
+
+            traction_dictionary = {"top": {"load case": "TractionVecto"+
+            "rOnSurface", "amplitude_tractionX": [0.0]*n_realizations, 
+            "amplitude_tractionY": [2E4]*n_realizations, "amplitude_tr"+
+            "actionZ": [5E4, 8E4]}}
+
+            if load_curve:
+
+                traction_dictionary["top"]["load_function"] = "linear"
+
+                traction_dictionary["top"]["final_time"] = final_time
+
+            residual_classes.append(CompressibleHyperelasticity(
+            mesh_data_class, constitutive_models, traction_dictionary=
+            traction_dictionary, boundary_conditions_dict=
+            boundary_conditions_dict, time=0.0, n_realizations=
+            n_realizations))
+
+        constant_class, linear_class = residual_classes
+
+        # Updates the loads at several times
+
+        for time in [0.5, 1.0, 2.0]:
+
+            for residual_class in residual_classes:
+
+                residual_class.apply_all_boundary_conditions(
+                residual_class.vector_of_parameters, time)
+
+            # Verifies the prescribed values against the load curve
+            # evaluated by each BC class
+
+            prescribed_values = (
+            linear_class.BCs_class.all_values.numpy())
+
+            for BC_class in linear_class.BCs_class.BCs_classes:
+
+                BC_class.update_load_curve()
+
+            self.assertTrue(np.allclose(prescribed_values, tf.concat([
+            BC_class.prescribed_values for BC_class in (
+            linear_class.BCs_class.BCs_classes)], axis=0).numpy()))
+
+            # Verifies the external work against the constant traction 
+            # scaled by the load curve
+
+            linear_work = linear_class.traction_work_variation
+
+            constant_work = constant_class.traction_work_variation
+
+            self.assertTrue(np.allclose(
+            linear_work.evaluate_residual_tensor().numpy(), (time/
+            final_time)*constant_work.evaluate_residual_tensor().numpy()))
+
 # Runs all tests
 
 if __name__=="__main__":
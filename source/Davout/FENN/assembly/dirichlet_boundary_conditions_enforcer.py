@@ -117,6 +117,30 @@ class DirichletBoundaryConditions:
         self.all_values = tf.Variable(tf.concat([(bc.prescribed_values
         ) for bc in self.BCs_classes], axis=0))
 
+        # Saves the time object
+
+        self.time = time
+
+        # Gets the prescribed values per unit of time of each BC class.
+        # If all load curves are linear in time, the stacked rates are
+        # computed once, and the update of the loads is a single multi-
+        # plication by the time. Otherwise, the load curves of all BC 
+        # classes are evaluated and stacked at each update
+
+        values_per_unit_time = [bc.get_values_per_unit_time() for (bc
+        ) in self.BCs_classes]
+
+        if all(values is not None for values in values_per_unit_time):
+
+            self.all_values_per_unit_time = tf.concat(
+            values_per_unit_time, axis=0)
+
+            self.appropriate_update = self.update_linear_loads
+
+        else:
+
+            self.appropriate_update = self.update_load_curves
+
         # Applies boundary conditions using the initial information
 
         if apply_BCs_at_initialization:
@@ -128,6 +152,24 @@ class DirichletBoundaryConditions:
     @tf.function
     def update_boundary_conditions(self):
 
+        self.appropriate_update()
+
+    # Defines a function to update the loads when all load curves are
+    # linear in time
+
+    def update_linear_loads(self):
+
+        # Scales the stacked rates of the prescribed values by the time
+
+        self.all_values.assign(tf.cast(self.time, 
+        self.all_values_per_unit_time.dtype)*
+        self.all_values_per_unit_time)
+
+    # Defines a function to update the loads by evaluating the load cur-
+    # ve of each BC class
+
+    def update_load_curves(self):
+
         # Iterates through the boundary conditions
 
         for BC_class in self.BCs_classes:
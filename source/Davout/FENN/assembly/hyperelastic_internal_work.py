@@ -1,67 +1,77 @@
 # Routine to store methods to calculate the local (individual finite el-
 # ement level) residual vector due to internal forces
 
-import tensorflow as tf 
+import tensorflow as tf
 
-from ..tool_box.constitutive_tools import DeformationGradient
+import numpy as np
 
-from ..tool_box.mesh_info_tools import get_volume_info_from_mesh_data_class
+import copy
+
+from ..tool_box.constitutive_tools import DeformationGradient, first_elasticity_tensor_by_automatic_differentiation, get_block_of_elements
+
+from ..tool_box.mesh_info_tools import get_volume_info_from_mesh_data_class, verify_mesh_realizations
+
+from ..tool_box.assembly_tools import AssemblyPlan
 
 ########################################################################
 #               Internal work in reference configuration               #
 ########################################################################
 
-# Defines a class to get the constitutive model dictionary and transform 
+# Defines a class to get the constitutive model dictionary and transform
 # it into a compiled evaluation of the residual vector due to the inter-
 # nal work in the reference configuration, considering compressible hy-
-# perelasticity
+# perelasticity. The elements of all physical groups are concatenated
+# into a single flat array of elements, ordered by constitutive model,
+# thus, the physical groups can have different numbers of elements. The
+# kinematics, the contraction with the variation field and the scatter
+# into the residual vector are done once for all elements; only the e-
+# valuation of the constitutive models is dispatched per material. The
+# kinematics and the constitutive models can be evaluated in a numerical
+# type (compute_dtype) of lower precision than the mesh, in which case
+# the geometric tensors are stored in compute_dtype, whereas the global
+# residual vector is still accumulated in the numerical type of the mesh.
+# If a memory budget is given, the residual vector is evaluated by blocks
+# of elements whose size is chosen to fit the intermediate tensors, e.g.
+# the deformation gradient and the stress, into the budget
 
 class CompressibleInternalWorkReferenceConfiguration:
 
-    def __init__(self, n_realizations, constitutive_models_dict, 
-    mesh_data_class):
-        
+    def __init__(self, n_realizations, constitutive_models_dict,
+    mesh_data_class, compute_dtype=None, jit_compile=False, 
+    memory_budget_MB=None):
+
         # Gets the number of batched BVP instances
 
         self.n_realizations = n_realizations
-        
-        # Initializes the list of instances of the class to compute the
-        # deformation gradient 
-
-        self.deformation_gradient_list = []
-
-        # Initializes a list with the function to evaluate the first Pi-
-        # ola-Kirchhoff stress tensor at each physical group
-
-        self.first_piola_kirchhoff_list = []
 
-        # Creates a tensor [n_physical_groups, n_elements, 
-        # n_quadrature_points, 3, 3] containing the shape functions of
-        # the elements at each physical group multiplied by the integra-
-        # tion measure
+        # Initializes a dictionary whose keys are the ids of the instan-
+        # ces of the constitutive models, and whose values are dictiona-
+        # ries with the constitutive model and the lists of information
+        # of the physical groups that share it. Physical groups with the
+        # same instance of constitutive model are evaluated together
 
-        self.variation_gradient_dx = []
+        materials_dict = dict()
 
-        # Creates a list of indices to update the global residual vector
-        # across the different realizations of the BVP 
+        # Initializes the flag to tell if there are multiple realizations
+        # of the mesh
 
-        self.updates_indices = []
+        multiple_meshes = None
 
         # Iterates through the dictionary of constitutive models
 
         for physical_group, constitutive_class in (
         constitutive_models_dict.items()):
-            
+
             # Gets necessary information from the mesh data class, such
             # as the dictionary of domain finite elements
 
             (mesh_data, physical_group_tag, mesh_common_info
-            ) = get_volume_info_from_mesh_data_class(mesh_data_class, 
+            ) = get_volume_info_from_mesh_data_class(mesh_data_class,
             physical_group, "constitutive models", "CompressibleIntern"+
             "alWorkReferenceConfiguration", "Displacement")
 
             # Verifies if the number of realizations given is consistent
-            # with the global number of realizations. If the number of 
+            # with the global number of realizations. If the number of
             # realization of the material parameters are zero, it is no
             # problem
 
@@ -76,146 +86,432 @@ class CompressibleInternalWorkReferenceConfiguration:
                 " the global number of realizations is "+str(
                 self.n_realizations)+". They must be the same")
 
-            # Gets the identity tensor for the mesh within this physical
-            # group
+            # Verifies if all physical groups agree on the multiplicity
+            # of the mesh
+
+            if multiple_meshes is None:
+
+                multiple_meshes = isinstance(mesh_data, list)
+
+            elif multiple_meshes!=isinstance(mesh_data, list):
+
+                raise ValueError("The physical group '"+str(
+                physical_group)+"' in 'CompressibleInternalWorkReferen"+
+                "ceConfiguration' does not have the same number of mes"+
+                "h realizations as the other physical groups")
+
+            # Saves the numerical types and the number of quadrature
+            # points
+
+            self.float_dtype = mesh_common_info.float_dtype
+
+            self.integer_dtype = mesh_common_info.integer_dtype
+
+            number_quadrature_points = (
+            mesh_common_info.number_quadrature_points)
+
+            # Creates the dictionary of this material if it has not been
+            # found yet
+
+            if not (id(constitutive_class) in materials_dict):
+
+                materials_dict[id(constitutive_class)] = {"constitutiv"+
+                "e model": constitutive_class, "DOFs per element": [],
+                "shape functions derivatives": [], "integration measur"+
+                "e": [], "number of elements": 0}
+
+            material_info = materials_dict[id(constitutive_class)]
+
+            # Adds the tensor of DOFs per element [n_elements, n_nodes,
+            # 3]
+
+            material_info["DOFs per element"].append(
+            mesh_common_info.dofs_per_element)
+
+            material_info["number of elements"] += int(
+            mesh_common_info.number_elements)
+
+            # If there are multiple realizations of the mesh, the tensor
+            # of derivatives of the shape functions and the integration
+            # measure must be taken for each mesh realization. They are
+            # stacked with the realizations as first index
+
+            if multiple_meshes:
+
+                material_info["shape functions derivatives"].append(
+                tf.stack([mesh_realization.shape_functions_derivatives
+                for mesh_realization in mesh_data], axis=0))
+
+                material_info["integration measure"].append(tf.stack([
+                mesh_realization.dx for mesh_realization in mesh_data],
+                axis=0))
+
+            # Otherwise, takes the tensors from the single mesh present
+
+            else:
+
+                material_info["shape functions derivatives"].append(
+                mesh_data.shape_functions_derivatives)
+
+                material_info["integration measure"].append(
+                mesh_data.dx)
+
+        # Sets the numerical type of the evaluation of the kinematics and
+        # of the constitutive models
+
+        if compute_dtype is None:
+
+            compute_dtype = self.float_dtype
+
+        self.compute_dtype = compute_dtype
+
+        # Gets the number of materials, i.e. of different instances of
+        # constitutive models
+
+        self.n_materials = len(materials_dict)
+
+        # Initializes the list with the function to evaluate the first
+        # Piola-Kirchhoff stress tensor of each material
+
+        self.first_piola_kirchhoff_list = []
+
+        # Initializes a list with the function to evaluate the first e-
+        # lasticity tensor of each material. It is used to assemble the
+        # tangent matrix
+
+        self.first_elasticity_tensor_list = []
+
+        # Initializes a list with the instances of the constitutive mo-
+        # dels. The functions above are bound to tf.function, which keeps
+        # only weak references to the instances, thus, the instances are
+        # kept alive here, even if the dictionary of constitutive models
+        # was built in a scope that has ended, e.g. in the function that
+        # builds the physics in a worker process
+
+        self.constitutive_models = []
+
+        # Initializes a list with the number of elements of each materi-
+        # al. The elements of a material are contiguous in the flat ar-
+        # ray of elements, thus, this list splits the array into the
+        # segments of each material. The index of the first element of
+        # each segment is saved as well
+
+        self.material_number_elements = []
+
+        self.material_first_elements = []
+
+        # Initializes the lists of tensors to be concatenated along the
+        # elements dimension
+
+        dofs_per_element = []
+
+        shape_functions_derivatives = []
 
-            identity_tensor = tf.eye(3, batch_shape=[self.n_realizations,
-            mesh_common_info.number_elements, 
-            mesh_common_info.number_quadrature_points], dtype=
-            mesh_common_info.float_dtype)
+        integration_measure = []
 
-            # Puts the identity tensor into the constitutive model class 
-            # if it has the attribute
+        # Iterates through the materials
 
-            if hasattr(constitutive_class, "identity_tensor"):
+        for material_info in materials_dict.values():
 
-                constitutive_class.identity_tensor = identity_tensor
+            constitutive_class = material_info["constitutive model"]
 
-            # Adds the function to evaluate the first Piola-Kirchhoff 
+            number_elements = material_info["number of elements"]
+
+            self.material_first_elements.append(sum(
+            self.material_number_elements))
+
+            self.material_number_elements.append(number_elements)
+
+            dofs_per_element.extend(material_info["DOFs per element"])
+
+            shape_functions_derivatives.extend(material_info["shape fu"+
+            "nctions derivatives"])
+
+            integration_measure.extend(material_info["integration meas"+
+            "ure"])
+
+            # Casts the material parameters to the numerical type of the
+            # evaluation if it differs from the one of the mesh. A shal-
+            # low copy of the constitutive model is cast, so that the 
+            # instance given by the user, which may be shared with other
+            # assemblers, keeps its numerical type
+
+            if self.compute_dtype!=self.float_dtype:
+
+                if not hasattr(constitutive_class, "set_compute_dtype"):
+
+                    raise TypeError("The constitutive model '"+str(
+                    type(constitutive_class).__name__)+"' does not hav"+
+                    "e the method 'set_compute_dtype', thus, it cannot"+
+                    " be evaluated with the numerical type "+str(
+                    self.compute_dtype)+" in 'CompressibleInternalWork"+
+                    "ReferenceConfiguration'")
+
+                constitutive_class = copy.copy(constitutive_class)
+
+                constitutive_class.set_compute_dtype(self.compute_dtype)
+
+            self.constitutive_models.append(constitutive_class)
+
+            # Adds the function to evaluate the first Piola-Kirchhoff
             # stress tensor
 
             self.first_piola_kirchhoff_list.append(
             constitutive_class.first_piola_kirchhoff)
 
-            # Instantiates the class to calculate the deformation gradi-
-            # ent
+            # Adds the function to evaluate the first elasticity tensor.
+            # If the constitutive model does not have an analytical ex-
+            # pression for it, differentiates the first Piola-Kirchhoff
+            # stress tensor automatically
 
-            self.deformation_gradient_list.append(DeformationGradient(
-            mesh_common_info.dofs_per_element, mesh_data, 
-            identity_tensor))
+            if hasattr(constitutive_class, "first_elasticity_tensor"):
 
-            # If there are multiple realizations of the mesh, the tensor
-            # of derivatives of the shape functions must be taken for
-            # each mesh realization
+                self.first_elasticity_tensor_list.append(
+                constitutive_class.first_elasticity_tensor)
+
+            else:
 
-            if isinstance(mesh_data, list):
+                self.first_elasticity_tensor_list.append(lambda F,
+                first_piola_kirchhoff=(
+                constitutive_class.first_piola_kirchhoff): (
+                first_elasticity_tensor_by_automatic_differentiation(
+                first_piola_kirchhoff, F)))
 
-                # Adds the derivatives of the shape functions multiplied 
-                # by the integration measure. Creates a tensor whose 
-                # first index is that of the realizations
+        # Gets the axis of the elements, which comes after the realiza-
+        # tions axis if there are multiple realizations of the mesh
 
-                self.variation_gradient_dx.append(tf.einsum('peqnj,peq'+
-                '->peqnj', tf.stack([
-                mesh_realization.shape_functions_derivatives for (
-                mesh_realization) in mesh_data], axis=0), tf.stack([
-                mesh_realization.dx for mesh_realization in mesh_data])))
+        element_axis = 1 if multiple_meshes else 0
 
-                # Sets the appropriate function to contract the first
-                # Piola-Kirchhoff stress tensor with the material gradi-
-                # ent of the variation field
+        # Concatenates the tensor of DOFs per element [n_elements,
+        # n_nodes, 3]
 
-                self.appropriate_contraction = (
-                self.contract_multiple_meshes)
+        self.dofs_per_element = tf.concat(dofs_per_element, axis=0)
 
-            # Otherwise, takes the tensor of derivatives from the single
-            # mesh present
+        self.number_elements = int(self.dofs_per_element.shape[0])
 
-            else:
+        # Concatenates the derivatives of the shape functions [(
+        # n_realizations), n_elements, n_quadrature_points, n_nodes, 3]
+        # and the integration measure [(n_realizations), n_elements,
+        # n_quadrature_points]
+
+        shape_functions_derivatives = tf.concat(
+        shape_functions_derivatives, axis=element_axis)
+
+        integration_measure = tf.concat(integration_measure, axis=
+        element_axis)
+
+        # Instantiates the class to calculate the deformation gradient
+        # for all elements at once. The derivatives of the shape func-
+        # tions are stored in the numerical type of the evaluation
 
-                # Adds the derivatives of the shape functions multiplied 
-                # by the integration measure
+        self.deformation_gradient = DeformationGradient(
+        self.dofs_per_element, tf.cast(shape_functions_derivatives,
+        self.compute_dtype))
 
-                self.variation_gradient_dx.append(tf.einsum('eqnj,eq->'+
-                'eqnj', mesh_data.shape_functions_derivatives, 
-                mesh_data.dx))
+        self.element_axis = element_axis
 
-                # Sets the appropriate function to contract the first
-                # Piola-Kirchhoff stress tensor with the material gradi-
-                # ent of the variation field
+        # Multiplies the derivatives of the shape functions by the inte-
+        # gration measure and sets the appropriate functions to contract
+        # the stress and the elasticity tensors with the material gradi-
+        # ent of the variation field. The product is evaluated in the 
+        # numerical type of the mesh, then, it is stored in the numerical
+        # type of the evaluation
 
-                self.appropriate_contraction = (
-                self.contract_single_mesh)
+        if multiple_meshes:
 
-            # Creates the indices for updating the global residual vector
-            # batched along the different realizations of the BVP
+            self.variation_gradient_dx = tf.einsum('peqnj,peq->peqnj',
+            shape_functions_derivatives, integration_measure)
 
-            # Creates the realizations indices and expands for broadcas-
-            # ting
+            self.appropriate_contraction = self.contract_multiple_meshes
 
-            realization_indices = tf.range(self.n_realizations, dtype=
-            mesh_common_info.integer_dtype)[:, None, None, None]
+            self.appropriate_tangent_contraction = (
+            self.contract_tangent_multiple_meshes)
 
-            # Broadcasts to match the realizations dimension as the 
-            # trailing dimension
+        else:
 
-            realization_indices = tf.broadcast_to(realization_indices, [
-            self.n_realizations, tf.shape(
-            mesh_common_info.dofs_per_element)[0], tf.shape(
-            mesh_common_info.dofs_per_element)[1], tf.shape(
-            mesh_common_info.dofs_per_element)[2]])
+            self.variation_gradient_dx = tf.einsum('eqnj,eq->eqnj',
+            shape_functions_derivatives, integration_measure)
 
-            # Expands DOF indices and broadcasts to the realization di-
-            # mension
+            self.appropriate_contraction = self.contract_single_mesh
 
-            dofs_indices = tf.broadcast_to(tf.expand_dims(
-            mesh_common_info.dofs_per_element, axis=0), tf.shape(
-            realization_indices))
+            self.appropriate_tangent_contraction = (
+            self.contract_tangent_single_mesh)
 
-            # Stacks them both to form a concatenation (cartesian product 
-            # of realization and DOFs indices)
+        self.variation_gradient_dx = tf.cast(self.variation_gradient_dx,
+        self.compute_dtype)
 
-            self.updates_indices.append(tf.stack([realization_indices,
-            dofs_indices], axis=-1))
+        # Gets the global number of DOFs
 
-        # Gets the number of materials
+        global_number_dofs, _, _ = verify_mesh_realizations(
+        mesh_data_class, self.n_realizations, "Displacement", "Compres"+
+        "sibleInternalWorkReferenceConfiguration")
 
-        self.n_materials = len(self.first_piola_kirchhoff_list)
+        self.global_number_dofs = global_number_dofs
 
-        # Stacks the derivatives of the shape functions multiplied by the
-        # integration measure into a tensor [n_physical_groups, 
-        # n_elements, n_quadrature_points, n_nodes, n_physical_dimensions]
+        # Creates the plan to assemble the contributions of the elements
+        # into the global residual vector. It is common to all realiza-
+        # tions of the BVP. If the residual is to be compiled by XLA, the
+        # plan must be compatible with it
 
-        self.variation_gradient_dx = tf.stack(self.variation_gradient_dx,
-        axis=0)
+        self.assembly_plan = AssemblyPlan(self.dofs_per_element, 
+        global_number_dofs, self.float_dtype, jit_compile=jit_compile)
 
-        # Makes deformation_gradient_list and first_piola_kirchhoff_list
-        # tuples to show their immutability
+        # Initializes the sparsity pattern of the tangent matrix. It is
+        # built only if the tangent matrix is asked for
+
+        self.tangent_indices = None
+
+        # Initializes the DOFs of the nodes, which are used to assemble
+        # the diagonal blocks of the tangent matrix associated to each
+        # node. They are built only if these blocks are asked for
+
+        self.nodal_dofs = None
+
+        # Makes the lists tuples to show their immutability
 
         self.first_piola_kirchhoff_list = tuple(
         self.first_piola_kirchhoff_list)
 
-        self.deformation_gradient_list = tuple(
-        self.deformation_gradient_list)
+        self.first_elasticity_tensor_list = tuple(
+        self.first_elasticity_tensor_list)
+
+        self.material_number_elements = tuple(
+        self.material_number_elements)
+
+        self.material_first_elements = tuple(
+        self.material_first_elements)
 
-    # Defines a function to contract the first Piola-Kirchhoff stress 
+        # Sets the evaluation of the residual vector for all elements at
+        # once or by blocks of elements, if a memory budget is given
+
+        self.appropriate_residual_evaluation = (
+        self.evaluate_residual_at_once)
+
+        self.element_block_size = self.number_elements
+
+        if memory_budget_MB is not None:
+
+            self.set_element_block_size(memory_budget_MB, int(
+            self.dofs_per_element.shape[1]), number_quadrature_points)
+
+        # Sets the iterator over the blocks of elements. The blocks are
+        # evaluated in a graph loop, unless the residual is to be compi-
+        # led by XLA, which does not differentiate in forward mode 
+        # through loops with dynamic slices. In this case, the loop is
+        # unrolled
+
+        self.blocks_iterator = range if jit_compile else tf.range
+
+    # Defines a function to set the number of elements per block given
+    # a memory budget in megabytes for the intermediate tensors of the 
+    # evaluation of the residual vector. The realizations are not split,
+    # because the material parameters and the loads are batched across
+    # them, thus, only the elements are tiled
+
+    def set_element_block_size(self, memory_budget_MB, number_of_nodes,
+    number_quadrature_points):
+
+        # Estimates the number of bytes per element and per realization.
+        # In the numerical type of the evaluation, there are the gathered
+        # DOFs [n_nodes, 3]; the displacement gradient, the deformation 
+        # gradient, the stress and about three temporary tensors of the
+        # constitutive model [n_quadrature_points, 3, 3]; and the contri-
+        # bution of the element [n_nodes, 3]. The latter is cast to the 
+        # numerical type of the mesh and transposed for the scatter
+
+        self.bytes_per_element = self.n_realizations*((((2*
+        number_of_nodes*3)+(6*number_quadrature_points*9))*
+        self.compute_dtype.size)+(2*number_of_nodes*3*
+        self.float_dtype.size))
+
+        block_size = int((memory_budget_MB*1E6)//self.bytes_per_element)
+
+        if block_size<1:
+
+            raise ValueError("The memory budget of "+str(memory_budget_MB
+            )+" MB in 'CompressibleInternalWorkReferenceConfiguration'"+
+            " is not enough for a single element, which requires about"+
+            " "+str(self.bytes_per_element/1E6)+" MB for "+str(
+            self.n_realizations)+" realizations")
+
+        # If all elements fit into the budget, evaluates them at once.
+        # The evaluation at once takes all the elements of all the ma-
+        # terials together, thus, the block size is compared with the 
+        # total number of elements
+
+        if block_size>=self.number_elements:
+
+            return
+
+        self.element_block_size = block_size
+
+        self.appropriate_residual_evaluation = (
+        self.evaluate_residual_by_blocks)
+
+    # Defines a function to dispatch a tensor [n_realizations, n_ele-
+    # ments, ...] to the constitutive functions of the materials. The
+    # tensor is split into the contiguous segments of elements of each
+    # material, and the results are concatenated back
+
+    def dispatch_to_materials(self, constitutive_functions, F):
+
+        # Avoids splitting if there is a single material
+
+        if self.n_materials==1:
+
+            return constitutive_functions[0](F)
+
+        return tf.concat([constitutive_function(F_material) for (
+        constitutive_function, F_material) in zip(
+        constitutive_functions, tf.split(F,
+        self.material_number_elements, axis=1))], axis=1)
+
+    # Defines a function to contract the first Piola-Kirchhoff stress
     # tensor with the material gradient of the variation field, in case
     # of a single mesh realization
 
     @tf.function
-    def contract_single_mesh(self, P, i):
+    def contract_single_mesh(self, P, variation_gradient_dx):
 
-        return tf.reduce_sum(tf.einsum('peqij,eqnj->peqni', P, 
-        self.variation_gradient_dx[i]), axis=2)
+        return tf.reduce_sum(tf.einsum('peqij,eqnj->peqni', P,
+        variation_gradient_dx), axis=2)
 
-    # Defines a function to contract the first Piola-Kirchhoff stress 
+    # Defines a function to contract the first Piola-Kirchhoff stress
     # tensor with the material gradient of the variation field, in case
     # of multiple mesh realizations
 
     @tf.function
-    def contract_multiple_meshes(self, P, i):
+    def contract_multiple_meshes(self, P, variation_gradient_dx):
+
+        return tf.reduce_sum(tf.einsum('peqij,peqnj->peqni', P,
+        variation_gradient_dx), axis=2)
+
+    # Defines a function to evaluate the contribution of each element to
+    # the internal work as a tensor [n_realizations, n_elements, n_nodes,
+    # n_physical_dimensions]
+
+    @tf.function
+    def evaluate_element_internal_work(self, vector_of_parameters):
+
+        # Gets the batched tensor [n_realizations, n_elements,
+        # n_quadrature_points, 3, 3] of the deformation gradient and,
+        # then, calculates the first Piola-Kirchhoff stress as [
+        # n_realizations, n_elements, n_quadrature_points, 3, 3]
 
-        return tf.reduce_sum(tf.einsum('peqij,peqnj->peqni', P, 
-        self.variation_gradient_dx[i]), axis=2)
+        P = self.dispatch_to_materials(self.first_piola_kirchhoff_list,
+        self.deformation_gradient.compute_batched_deformation_gradient(
+        vector_of_parameters))
+
+        # Contracts the first Piola-Kirchhoff stress with the derivatives
+        # of the shape functions multiplied by the integration measure
+        # to get the integration of the internal work of the variational
+        # form. Then, sums over the quadrature points, that are the third
+        # dimension (index 2 in python convention). Casts the result to
+        # the numerical type of the mesh, such that the global residual
+        # vector is accumulated in it
+
+        return tf.cast(self.appropriate_contraction(P, 
+        self.variation_gradient_dx), self.float_dtype)
 
     # Defines a function to assemble the residual vector
 
@@ -223,36 +519,330 @@ class CompressibleInternalWorkReferenceConfiguration:
     def assemble_residual_vector(self, global_residual_vector,
     vector_of_parameters):
 
-        # Iterates through the physical groups
+        # Adds the contribution of all elements to the global residual
+        # vector. Performs this change in place, as global_residual_vec-
+        # tor is a variable
+
+        global_residual_vector.assign_add(self.evaluate_residual_tensor(
+        vector_of_parameters))
+
+    # Defines a function to contract the first elasticity tensor with
+    # the material gradients of the variation and of the increment of
+    # the field, in case of a single mesh realization. The result is the
+    # tensor of element tangent matrices [n_realizations, n_elements,
+    # n_nodes, n_physical_dimensions, n_nodes, n_physical_dimensions]
+
+    @tf.function
+    def contract_tangent_single_mesh(self, A):
+
+        return tf.einsum('peqijkl,eqaj,eqbl->peaibk', A,
+        self.variation_gradient_dx,
+        self.deformation_gradient.shape_functions_derivatives)
+
+    # Defines a function to contract the first elasticity tensor with
+    # the material gradients of the variation and of the increment of
+    # the field, in case of multiple mesh realizations
+
+    @tf.function
+    def contract_tangent_multiple_meshes(self, A):
+
+        return tf.einsum('peqijkl,peqaj,peqbl->peaibk', A,
+        self.variation_gradient_dx,
+        self.deformation_gradient.shape_functions_derivatives)
+
+    # Defines a function to build the sparsity pattern of the tangent
+    # matrix using the DOFs per element. It is built only once, and it
+    # is common to all realizations of the BVP
+
+    def build_tangent_sparsity_pattern(self, global_number_dofs):
+
+        # Gets the DOFs of each element as [n_elements, n_local_dofs], in
+        # the same order as the element tangent matrices are flattened
+
+        local_dofs = np.asarray(self.dofs_per_element, dtype=np.int64
+        ).reshape(self.number_elements, -1)
+
+        # Gets the flat indices (row*n_dofs+column) of every entry of
+        # every element tangent matrix
+
+        flat_indices = ((local_dofs[:,:,None]*global_number_dofs)+
+        local_dofs[:,None,:]).reshape(-1)
+
+        # Gets the unique entries of the global matrix and, for each en-
+        # try of the element matrices, the position of its global entry.
+        # The unique entries are sorted by row, then, by column
+
+        unique_indices, segment_ids = np.unique(flat_indices,
+        return_inverse=True)
+
+        self.tangent_number_of_entries = unique_indices.shape[0]
+
+        self.tangent_segment_ids = tf.constant(segment_ids.reshape(-1),
+        dtype=tf.int64)
+
+        # Saves the indices [n_entries, 2] of the nonzero entries
+
+        self.tangent_indices = tf.constant(np.stack([unique_indices//
+        global_number_dofs, unique_indices%global_number_dofs], axis=1),
+        dtype=tf.int64)
+
+    # Defines a function to assemble the values of the nonzero entries of
+    # the tangent matrix as a tensor [n_realizations, n_entries]. The
+    # sparsity pattern must have been built before
+
+    @tf.function
+    def assemble_tangent_values(self, vector_of_parameters):
+
+        # Evaluates the first elasticity tensor as [n_realizations,
+        # n_elements, n_quadrature_points, 3, 3, 3, 3]
+
+        A = self.dispatch_to_materials(self.first_elasticity_tensor_list,
+        self.deformation_gradient.compute_batched_deformation_gradient(
+        vector_of_parameters))
+
+        # Contracts it with the gradients of the shape functions and
+        # flattens the element tangent matrices as [n_element_entries,
+        # n_realizations]
+
+        element_tangents = tf.transpose(tf.reshape(tf.cast(
+        self.appropriate_tangent_contraction(A), self.float_dtype), [
+        self.n_realizations, -1]))
+
+        # Sums the contributions of all elements into the nonzero entries
+        # of the global matrix
+
+        return tf.transpose(tf.math.unsorted_segment_sum(element_tangents,
+        self.tangent_segment_ids, self.tangent_number_of_entries))
+
+    # Defines a function to get the subscripts of the geometric tensors
+    # of the elements, i.e. the derivatives of the shape functions and
+    # the integration measure, for the contractions with einsum
+
+    def get_geometry_subscripts(self):
+
+        if self.element_axis==1:
+
+            return "peq"
+
+        return "eq"
+
+    # Defines a function to assemble the diagonal of the tangent matrix
+    # as a tensor [n_realizations, n_dofs]. Only the diagonal entries of
+    # the element tangent matrices are contracted, then, they are summed
+    # into the global vector with the assembly plan of the residual vec-
+    # tor
+
+    @tf.function
+    def assemble_tangent_diagonal(self, vector_of_parameters):
+
+        A = self.dispatch_to_materials(self.first_elasticity_tensor_list,
+        self.deformation_gradient.compute_batched_deformation_gradient(
+        vector_of_parameters))
+
+        # Contracts the entries of the first elasticity tensor with the
+        # repeated indices of the node and of the direction, which gives
+        # the tensor [n_realizations, n_elements, n_nodes, 3]
+
+        geometry_subscripts = self.get_geometry_subscripts()
+
+        element_diagonals = tf.einsum('peqijil,'+geometry_subscripts+
+        'aj,'+geometry_subscripts+'al->peai', A,
+        self.variation_gradient_dx,
+        self.deformation_gradient.shape_functions_derivatives)
+
+        return self.assembly_plan(tf.cast(element_diagonals, 
+        self.float_dtype))
+
+    # Defines a function to get the DOFs of each node [n_nodes, 3] and,
+    # for each node of each element, the index of its node. They are 
+    # built only once, and they are common to all realizations
+
+    def build_nodal_blocks_pattern(self):
+
+        nodal_dofs, node_indices = np.unique(np.asarray(
+        self.dofs_per_element, dtype=np.int64).reshape(-1, 3), axis=0,
+        return_inverse=True)
+
+        self.nodal_dofs = tf.constant(nodal_dofs, dtype=tf.int64)
+
+        self.nodal_segment_ids = tf.constant(node_indices.reshape(-1), 
+        dtype=tf.int64)
+
+        self.number_of_nodes = int(nodal_dofs.shape[0])
+
+    # Defines a function to assemble the 3x3 diagonal blocks of the tan-
+    # gent matrix associated to each node as a tensor [n_realizations,
+    # n_nodes, 3, 3]. Only the blocks of the element tangent matrices 
+    # that couple a node to itself are contracted. The nodal pattern 
+    # must have been built before
+
+    @tf.function
+    def assemble_tangent_nodal_blocks(self, vector_of_parameters):
+
+        A = self.dispatch_to_materials(self.first_elasticity_tensor_list,
+        self.deformation_gradient.compute_batched_deformation_gradient(
+        vector_of_parameters))
+
+        # Contracts the first elasticity tensor with the gradients of the
+        # shape functions of the same node, which gives the tensor [
+        # n_realizations, n_elements, n_nodes, 3, 3]
+
+        geometry_subscripts = self.get_geometry_subscripts()
+
+        element_blocks = tf.cast(tf.einsum('peqijkl,'+geometry_subscripts+
+        'aj,'+geometry_subscripts+'al->peaik', A, 
+        self.variation_gradient_dx,
+        self.deformation_gradient.shape_functions_derivatives), 
+        self.float_dtype)
+
+        # Puts the nodes of the elements in the first axis and sums the
+        # blocks of each node
+
+        element_blocks = tf.reshape(tf.transpose(element_blocks, [1, 2,
+        0, 3, 4]), [-1, tf.shape(element_blocks)[0], 3, 3])
+
+        return tf.transpose(tf.math.unsorted_segment_sum(element_blocks,
+        self.nodal_segment_ids, self.number_of_nodes), [1, 0, 2, 3])
+
+    # Defines a function to assemble the values of the nonzero entries of
+    # the tangent matrix of a single realization as a tensor [n_entries].
+    # The material parameters are batched inside the constitutive mo-
+    # dels, thus, the first elasticity tensor is evaluated for all rea-
+    # lizations, but only the one of the given realization is contracted
+    # and summed into the global matrix. The sparsity pattern must have
+    # been built before
+
+    @tf.function
+    def assemble_realization_tangent_values(self, vector_of_parameters,
+    realization):
+
+        A = self.dispatch_to_materials(self.first_elasticity_tensor_list,
+        self.deformation_gradient.compute_batched_deformation_gradient(
+        vector_of_parameters))
+
+        # Keeps the first elasticity tensor of the realization, unless
+        # it is common to all realizations
+
+        if A.shape[0]!=1:
+
+            A = A[realization:(realization+1)]
+
+        # Gets the geometric tensors of the realization if there are mul-
+        # tiple mesh realizations
+
+        variation_gradient_dx = self.variation_gradient_dx
+
+        shape_functions_derivatives = (
+        self.deformation_gradient.shape_functions_derivatives)
+
+        if self.element_axis==1:
+
+            variation_gradient_dx = variation_gradient_dx[realization]
+
+            shape_functions_derivatives = shape_functions_derivatives[
+            realization]
+
+        # Contracts it with the gradients of the shape functions and sums
+        # the contributions of all elements into the nonzero entries of
+        # the global matrix
+
+        element_tangents = tf.reshape(tf.cast(tf.einsum('peqijkl,eqaj,'+
+        'eqbl->peaibk', A, variation_gradient_dx,
+        shape_functions_derivatives), self.float_dtype), [-1])
+
+        return tf.math.unsorted_segment_sum(element_tangents,
+        self.tangent_segment_ids, self.tangent_number_of_entries)
+
+    # Defines a function to evaluate the parcel of the residual vector
+    # due to the internal work as a tensor [n_realizations, n_dofs] in-
+    # stead of adding it in place into a variable. As a pure function of
+    # the vector of parameters, it can be differentiated in forward mode,
+    # what is used by matrix-free solvers
+
+    @tf.function
+    def evaluate_residual_tensor(self, vector_of_parameters):
+
+        return self.appropriate_residual_evaluation(vector_of_parameters)
+
+    # Defines a function to evaluate the parcel of the residual vector
+    # for all elements at once using the assembly plan
+
+    def evaluate_residual_at_once(self, vector_of_parameters):
+
+        return self.assembly_plan(self.evaluate_element_internal_work(
+        vector_of_parameters))
+
+    # Defines a function to evaluate the parcel of the residual vector
+    # by blocks of elements. Each block belongs to a single material, 
+    # and the blocks of the same size are evaluated in a loop, such that
+    # only the intermediate tensors of one block are alive at a time
+
+    def evaluate_residual_by_blocks(self, vector_of_parameters):
+
+        # Initializes the transposed residual vector [n_dofs, 
+        # n_realizations], whose rows are the targets of the scatter
+
+        residual_vector = tf.zeros([self.global_number_dofs, tf.shape(
+        vector_of_parameters)[0]], dtype=self.float_dtype)
+
+        # Iterates through the materials
+
+        for material in range(self.n_materials):
+
+            first_element = tf.constant(self.material_first_elements[
+            material], dtype=tf.int32)
+
+            number_elements = self.material_number_elements[material]
+
+            # Gets the number of full blocks and the number of elements
+            # of the last, incomplete block
+
+            n_full_blocks = number_elements//self.element_block_size
+
+            remainder = number_elements-(n_full_blocks*
+            self.element_block_size)
+
+            for block in self.blocks_iterator(n_full_blocks):
+
+                residual_vector = self.add_block_to_residual(
+                residual_vector, vector_of_parameters, material, 
+                first_element+(block*self.element_block_size),
+                self.element_block_size)
+
+            if remainder>0:
+
+                residual_vector = self.add_block_to_residual(
+                residual_vector, vector_of_parameters, material, 
+                first_element+(n_full_blocks*self.element_block_size),
+                remainder)
+
+        return tf.transpose(residual_vector)
+
+    # Defines a function to add the contribution of a block of elements
+    # of a material to the transposed residual vector
 
-        for i in range(self.n_materials):
+    def add_block_to_residual(self, residual_vector, vector_of_parameters,
+    material, first_element, number_of_elements):
 
-            # Gets the batched tensor [n_realizations, n_elements, 
-            # n_quadrature_points, 3, 3] of the deformation gradient and,
-            # then, calculates the first Piola-Kirchhoff stress as [
-            # n_realizations, n_elements, n_quadrature_points, 3, 3]
+        # Evaluates the deformation gradient and the first Piola-Kirch-
+        # hoff stress of the block
 
-            P = self.first_piola_kirchhoff_list[i](
-            self.deformation_gradient_list[i
-            ].compute_batched_deformation_gradient(vector_of_parameters))
+        P = self.first_piola_kirchhoff_list[material](
+        self.deformation_gradient.compute_block_deformation_gradient(
+        vector_of_parameters, first_element, number_of_elements))
 
-            # Contracts the first Piola-Kirchhoff stress with the deri-
-            # vatives of the shape functions multiplied by the integra-
-            # tion measure to get the integration of the internal work 
-            # of the variational form. Then, sums over the quadrature 
-            # points, that are the third dimension (index 2 in python 
-            # convention).
-            # The result is a tensor [n_realizations, n_elements, 
-            # n_nodes, n_physical_dimensions]
+        # Contracts the stress with the material gradient of the varia-
+        # tion field of the block, and casts to the numerical type of the
+        # mesh to accumulate the residual vector
 
-            internal_work = self.appropriate_contraction(P, i)
+        element_work = tf.cast(self.appropriate_contraction(P, 
+        get_block_of_elements(self.variation_gradient_dx, first_element,
+        number_of_elements, self.element_axis)), self.float_dtype)
 
-            # Adds the contribution of this physical group to the global
-            # residual vector. Uses the own tensor of DOF indexing to
-            # scatter the local residual. Another dimension is added to
-            # the indexing tensor to make it compatible with tensorflow
-            # tensor_scatter_nd_add. Performs this change in place, as
-            # global_residual_vector is a variable
+        # Scatters the contributions [n_element_entries, n_realizations]
+        # into the rows of their DOFs
 
-            global_residual_vector.scatter_nd_add(self.updates_indices[i], 
-            internal_work)
\ No newline at end of file
+        return tf.tensor_scatter_nd_add(residual_vector, tf.reshape(
+        get_block_of_elements(self.dofs_per_element, first_element, 
+        number_of_elements, 0), [-1, 1]), tf.transpose(tf.reshape(
+        element_work, [tf.shape(element_work)[0], -1])))
\ No newline at end of file
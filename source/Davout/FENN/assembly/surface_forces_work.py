@@ -7,7 +7,9 @@ from ...PythonicUtilities.package_tools import load_classes_from_module
 
 from ..tool_box import neumann_loading_tools
 
-from ..tool_box.mesh_info_tools import get_boundary_info_from_mesh_data_class
+from ..tool_box.mesh_info_tools import get_boundary_info_from_mesh_data_class, verify_mesh_realizations
+
+from ..tool_box.assembly_tools import AssemblyPlan
 
 # Defines a class to compute the contribution to the residual vector due
 # to the surface tractions
@@ -15,7 +17,7 @@ from ..tool_box.mesh_info_tools import get_boundary_info_from_mesh_data_class
 class ReferentialTractionWork:
 
     def __init__(self, n_realizations, traction_dict, 
-    mesh_data_class, field_name, time):
+    mesh_data_class, field_name, time, jit_compile=False):
         
         # Gets the number of batched BVP instances
 
@@ -31,10 +33,10 @@ class ReferentialTractionWork:
 
         self.traction_classes = []
 
-        # Initializes a list of indices to update the global residual
-        # vector across different realizations of the BVP
+        # Initializes a list of the tensors of DOFs per element of each
+        # surface, to build the plan to assemble the residual vector
 
-        self.updates_indices = []
+        dofs_per_element = []
 
         # Gets the available classes to construct the traction tensors
 
@@ -149,57 +151,43 @@ class ReferentialTractionWork:
 
                 self.appropiate_contraction = self.contract_single_mesh
 
-            # Creates the indices for updating the global residual vector
-            # batched along the different realizations of the BVP
-
-            # Creates the realizations indices and expands for broadcas-
-            # ting
-
-            realization_indices = tf.range(self.n_realizations, dtype=
-            mesh_common_info.integer_dtype)[:, None, None, None]
-
-            # Broadcasts to match the realizations dimension as the 
-            # trailing dimension
-
-            realization_indices = tf.broadcast_to(realization_indices, [
-            self.n_realizations, tf.shape(
-            mesh_common_info.dofs_per_element)[0], tf.shape(
-            mesh_common_info.dofs_per_element)[1], tf.shape(
-            mesh_common_info.dofs_per_element)[2]])
-
-            # Expands DOF indices and broadcasts to the realization di-
-            # mension
-
-            dofs_indices = tf.broadcast_to(tf.expand_dims(
-            mesh_common_info.dofs_per_element, axis=0), tf.shape(
-            realization_indices))
-
-            # Stacks them both to form a concatenation (cartesian product 
-            # of realization and DOFs indices)
+            # Adds the tensor of DOFs per element [n_elements, n_nodes,
+            # 3]
 
-            self.updates_indices.append(tf.stack([realization_indices,
-            dofs_indices], axis=-1))
+            dofs_per_element.append(mesh_common_info.dofs_per_element)
 
         # Gets the number of surfaces under load
 
         self.n_surfaces_under_load = len(self.variation_field_ds)
 
-        # Stacks the shape functions multiplied by the integration mea-
-        # sure into a tensor [n_physical_groups, n_elements, 
-        # n_quadrature_points, n_nodes] or [n_physical_groups, 
-        # n_realizations, n_elements, n_quadrature_points, n_nodes] in 
-        # case of multiple realizations of the mesh
+        # Makes the list of the shape functions multiplied by the inte-
+        # gration measure, which are tensors [n_elements, 
+        # n_quadrature_points, n_nodes] or [n_realizations, n_elements, 
+        # n_quadrature_points, n_nodes] in case of multiple realizations
+        # of the mesh, a tuple. They are not stacked, because the surfa-
+        # ces can have different numbers of elements
 
-        self.variation_field_ds = tf.stack(self.variation_field_ds,
-        axis=0)
+        self.variation_field_ds = tuple(self.variation_field_ds)
 
         # Makes traction_classes a tuple to show its immutability
 
         self.traction_classes = tuple(self.traction_classes)
 
-        # Stacks all tensors of DOF indices of all traction classes
-        
-        self.all_indices = tf.concat(self.updates_indices, axis=0)
+        # Gets the global number of DOFs
+
+        global_number_dofs, float_dtype, _ = verify_mesh_realizations(
+        mesh_data_class, self.n_realizations, field_name, "Referential"+
+        "TractionWork")
+
+        # Creates the plan to assemble the contributions of the elements
+        # of all surfaces into the global residual vector. The elements
+        # of the surfaces are concatenated in the order of the traction
+        # classes. If the residual is to be compiled by XLA, the plan
+        # must be compatible with it
+
+        self.assembly_plan = AssemblyPlan(tf.concat(dofs_per_element, 
+        axis=0), global_number_dofs, float_dtype, jit_compile=
+        jit_compile)
 
         # Iterates through the loaded surfaces to stack all external work
         # at once
@@ -214,67 +202,149 @@ class ReferentialTractionWork:
 
         self.all_external_work = tf.Variable(tf.concat([
         self.appropiate_contraction(i) for i in range(
-        self.n_surfaces_under_load)], axis=0))
+        self.n_surfaces_under_load)], axis=1))
+
+        # Saves the time object
+
+        self.time = time
+
+        # Sorts the surfaces by their dependence on time. The external 
+        # work of constant tractions is computed once. The external work
+        # of tractions linear in time is computed once per unit of time,
+        # and scaled by the time at each update. Only the other tracti-
+        # ons are computed and contracted again at each update, and they
+        # are written into their own slice of elements
+
+        constant_work = []
+
+        work_per_unit_time = []
+
+        self.recomputed_surfaces = []
+
+        first_element = 0
+
+        for i, traction_class in enumerate(self.traction_classes):
+
+            surface_work = self.appropiate_contraction(i)
+
+            n_elements = surface_work.shape[1]
+
+            traction_per_unit_time = (
+            traction_class.get_traction_per_unit_time())
+
+            if traction_class.recompute_at_update:
+
+                self.recomputed_surfaces.append((i, first_element,
+                first_element+n_elements))
+
+                constant_work.append(tf.zeros_like(surface_work))
+
+                work_per_unit_time.append(tf.zeros_like(surface_work))
+
+            elif traction_per_unit_time is not None:
+
+                constant_work.append(tf.zeros_like(surface_work))
+
+                work_per_unit_time.append(self.appropiate_contraction(
+                i, traction_per_unit_time))
+
+            else:
+
+                constant_work.append(surface_work)
+
+                work_per_unit_time.append(None)
+
+            first_element += n_elements
+
+        self.recomputed_surfaces = tuple(self.recomputed_surfaces)
+
+        # If there are tractions linear in time, stacks the external 
+        # work per unit of time, and the constant external work
+
+        self.linear_in_time = any(work is not None for work in (
+        work_per_unit_time))
+
+        if self.linear_in_time:
+
+            self.constant_external_work = tf.concat(constant_work, 
+            axis=1)
+
+            self.external_work_per_unit_time = tf.concat([(
+            tf.zeros_like(constant) if work is None else work) for (
+            constant, work) in zip(constant_work, work_per_unit_time)], 
+            axis=1)
 
     # Defines a function to contract the traction tensor with the varia-
     # tion of the field if the mesh is the same across all realizations
 
     @tf.function
-    def contract_single_mesh(self, i):
+    def contract_single_mesh(self, i, traction_tensor=None):
+
+        if traction_tensor is None:
+
+            traction_tensor = self.traction_classes[i].traction_tensor
 
         return -tf.reduce_sum(tf.einsum('peqi,eqn->peqni', 
-        self.traction_classes[i].traction_tensor, 
-        self.variation_field_ds[i]), axis=2)
+        traction_tensor, self.variation_field_ds[i]), axis=2)
 
     # Defines a function to contract the traction tensor with the varia-
     # tion of the field if there are multiple realizations of the mesh
 
     @tf.function
-    def contract_multiple_meshes(self, i):
+    def contract_multiple_meshes(self, i, traction_tensor=None):
+
+        if traction_tensor is None:
+
+            traction_tensor = self.traction_classes[i].traction_tensor
 
         return -tf.reduce_sum(tf.einsum('peqi,peqn->peqni', 
-        self.traction_classes[i].traction_tensor, 
-        self.variation_field_ds[i]), axis=2)
+        traction_tensor, self.variation_field_ds[i]), axis=2)
 
-    # Defines a function to update the loads
+    # Defines a function to update the loads. The constant tractions
+    # are not computed again
 
     @tf.function
     def update_boundary_conditions(self, vector_of_parameters):
 
-        # Iterates through the loaded surfaces to update the calculation
-        # of the traction tensor
+        # Scales the external work of the tractions linear in time by
+        # the time, and adds the constant external work
+
+        if self.linear_in_time:
+
+            self.all_external_work.assign(self.constant_external_work+(
+            self.time*self.external_work_per_unit_time))
+
+        # Iterates through the surfaces whose tractions must be computed
+        # again, e.g. if they depend on the vector of parameters
 
-        for i in range(self.n_surfaces_under_load):
+        for i, first_element, last_element in self.recomputed_surfaces:
 
             self.traction_classes[i].compute_traction(
             vector_of_parameters)
 
-        # Iterates through the loaded surfaces to stack all external work
-        # at once
+            # Contracts the referential traction vector with the shape
+            # functions multiplied by the integration measure, and over-
+            # writes the elements of this surface in the tensor [n_rea-
+            # lizations, n_elements, n_nodes, n_physical_dimensions]
 
-        # Contracts the referential traction vector with the shape func-
-        # tions multiplied by the integration measure to get the inte-
-        # gration of the variation of the external work due to surface
-        # tractions. Then, sums over the quadrature points, that are the
-        # second dimension (index 1 in python convention). The result is 
-        # a tensor [n_realizations, n_elements, n_nodes, 
-        # n_physical_dimensions]
-
-        self.all_external_work.assign(tf.concat([
-        self.appropiate_contraction(i) for i in range(
-        self.n_surfaces_under_load)], axis=0))
+            self.all_external_work[:, first_element:last_element
+            ].assign(self.appropiate_contraction(i))
 
     # Defines a function to assemble the residual vector
 
     @tf.function
     def assemble_residual_vector(self, global_residual_vector):
         
-        # Adds the contribution of this physical group to the global re-
-        # sidual vector. Uses the own tensor of DOF indexing to scatter
-        # the local residual. Another dimension was added to the indexing 
-        # tensor to make it compatible with tensorflow 
-        # tensor_scatter_nd_add. Performs this change in place, as 
-        # global_residual_vector is a variable
+        # Adds the contribution of all surfaces to the global residual 
+        # vector using the assembly plan. Performs this change in place, 
+        # as global_residual_vector is a variable
         
-        global_residual_vector.scatter_nd_add(self.all_indices,
-        self.all_external_work)
\ No newline at end of file
+        global_residual_vector.assign_add(self.evaluate_residual_tensor())
+
+    # Defines a function to evaluate the parcel of the residual vector
+    # due to the surface tractions as a tensor [n_realizations, n_dofs]
+
+    @tf.function
+    def evaluate_residual_tensor(self):
+
+        return self.assembly_plan(self.all_external_work)
\ No newline at end of file
@@ -3,7 +3,7 @@
 
 import tensorflow as tf
 
-from ..tool_box.math_tools import get_inverse
+from ..tool_box.math_tools import get_determinant_3x3, get_cofactor_3x3
 
 # Defines a class for a Neo Hookean hyperelastic model
 
@@ -91,10 +91,15 @@ class NeoHookean:
             "ngle value of material parameters across the realizations"+
             " of the BVP")
 
-        # Initializes the identity tensor attribute that the code will
-        # automatically fill it later
+    # Defines a function to cast the material parameters to the numeri-
+    # cal type in which the constitutive model is evaluated, which may
+    # differ from the numerical type of the mesh in mixed precision
 
-        self.identity_tensor = None
+    def set_compute_dtype(self, compute_dtype):
+
+        self.mu = tf.cast(self.mu, compute_dtype)
+
+        self.lmbda = tf.cast(self.lmbda, compute_dtype)
 
     # Defines a function to evaluate the free energy density. F, the de-
     # formation energy, is a tensor [n_realizations, n_elements, n_qua-
@@ -111,7 +116,7 @@ class NeoHookean:
 
         I1_C = tf.linalg.trace(C)
 
-        J  = tf.linalg.det(F)
+        J  = get_determinant_3x3(F)
 
         ln_J = tf.math.log(J)
 
@@ -125,17 +130,16 @@ class NeoHookean:
     @tf.function
     def first_piola_kirchhoff(self, F):
 
-        # Computes the transpose of the inverse of the deformation gra-
-        # dient. Transposes only the two last indices
-
-        F_inv_transposed = get_inverse(tf.transpose(F, perm=[0, 1, 2, 4, 
-        3]), self.identity_tensor)
-
         # Computes the jacobian [n_realizations, n_elements, 
         # n_quadrature_points], then expands two dimensions to the right
 
-        J = tf.expand_dims(tf.expand_dims(tf.linalg.det(F), axis=-1),
-        axis=-1)
+        J = tf.expand_dims(tf.expand_dims(get_determinant_3x3(F), 
+        axis=-1), axis=-1)
+
+        # Computes the transpose of the inverse of the deformation gra-
+        # dient as its cofactor divided by the jacobian
+
+        F_inv_transposed = get_cofactor_3x3(F)/J
 
         # Evaluates the analytical expression for the first Piola-
         # Kirchhoff stress tensor as a tensor [n_realizations, n_ele-
@@ -143,4 +147,58 @@ class NeoHookean:
 
         scalar_coefficient = (self.lmbda*tf.math.log(J))-self.mu
 
-        return (self.mu*F)+(scalar_coefficient*F_inv_transposed)
\ No newline at end of file
+        return (self.mu*F)+(scalar_coefficient*F_inv_transposed)
+    
+    # Defines a function to get the first elasticity tensor, i.e. the 
+    # derivative of the first Piola-Kirchhoff stress tensor with respect
+    # to the deformation gradient, A_iJkL = dP_iJ/dF_kL. The result is a
+    # tensor [n_realizations, n_elements, n_quadrature_points, 3, 3, 3, 
+    # 3]
+
+    @tf.function
+    def first_elasticity_tensor(self, F):
+
+        # Computes the jacobian [n_realizations, n_elements, 
+        # n_quadrature_points]
+
+        J = get_determinant_3x3(F)
+
+        # Computes the transpose of the inverse of the deformation gra-
+        # dient as its cofactor divided by the jacobian
+
+        F_inv_transposed = get_cofactor_3x3(F)/J[..., tf.newaxis, 
+        tf.newaxis]
+
+        # Computes the logarithm of the jacobian, then expands four di-
+        # mensions to the right
+
+        ln_J = tf.math.log(J)[..., tf.newaxis, tf.newaxis, tf.newaxis, 
+        tf.newaxis]
+
+        # Expands the Lamé parameters to the dimension of the fourth or-
+        # der tensor if they are batched across realizations
+
+        mu = self.mu
+
+        lmbda = self.lmbda
+
+        if len(mu.shape)>0:
+
+            mu = mu[..., tf.newaxis, tf.newaxis]
+
+            lmbda = lmbda[..., tf.newaxis, tf.newaxis]
+
+        # Evaluates the fourth order identity delta_ik delta_JL
+
+        identity = tf.eye(3, dtype=F.dtype)
+
+        fourth_order_identity = tf.einsum('ik,jl->ijkl', identity, 
+        identity)
+
+        # Evaluates the analytical expression of the first elasticity 
+        # tensor
+
+        return ((mu*fourth_order_identity)+(lmbda*tf.einsum('...ij,...'+
+        'kl->...ijkl', F_inv_transposed, F_inv_transposed))-(((lmbda*ln_J
+        )-mu)*tf.einsum('...il,...kj->...ijkl', F_inv_transposed, 
+        F_inv_transposed)))
@@ -0,0 +1,276 @@
+# Routine to store classes of quadrilateral finite elements. Each class
+# is made for a type of finite element
+
+import tensorflow as tf
+
+from ...tool_box.tensorflow_utilities import convert_object_to_tensor
+
+from ...tool_box.math_tools import jacobian_2D_element
+
+from ...tool_box import shape_functions_tools
+
+# Defines a class to store the Lagrange quadrilateral elements, i.e. the
+# bilinear quadrilateral of 4 nodes and the biquadratic quadrilateral of
+# 9 nodes
+
+class Quadrilateral:
+
+    # Creates a dictionary with the types of elements created by this
+    # class. The keys are GMSH element type, and the values are other
+    # dictionaries with necessary information. The natural coordinates
+    # of the nodes follow the GMSH ordering, thus, the connectivity is
+    # not permuted
+
+    stored_elements = {3: {"polynomial degree": 1, "number of nodes": 4,
+    "name": "quadrilateral of 4 nodes", "indices of the gmsh connectiv"+
+    "ity": list(range(4))}, 10: {"polynomial degree": 2, "number of no"+
+    "des": 9, "name": "quadrilateral of 9 nodes", "indices of the gmsh"+
+    " connectivity": list(range(9))}}
+
+    def __init__(self, node_coordinates, dofs_per_element,
+    polynomial_degree=1, quadrature_degree=2, dtype=tf.float32,
+    integer_dtype=tf.int32):
+
+        # Saves the numerical type
+
+        self.dtype = dtype
+
+        self.integer_dtype = integer_dtype
+
+        # Saves the number of elements
+
+        self.number_elements = len(node_coordinates)
+
+        # Ensures node coordinates and dofs per element are tensors with
+        # the given type
+
+        node_coordinates = convert_object_to_tensor(node_coordinates,
+        self.dtype)
+
+        # Verifies if this is a quadrilateral embedded in a 3D space by
+        # counting the number of coordinates for each node
+
+        if node_coordinates.shape[2]>2:
+
+            self.quadrilateral_in_3D_space = True
+
+        else:
+
+            self.quadrilateral_in_3D_space = False
+
+        # The dofs per element is a tensor [n_elements, n_nodes,
+        # n_dofs_per_node]
+
+        self.dofs_per_element = convert_object_to_tensor(
+        dofs_per_element, self.integer_dtype)
+
+        # Evaluates the Gauss points and their corresponding weights
+
+        self.get_quadrature_points(quadrature_degree)
+
+        # Precomputes the shape functions in the Gauss points
+
+        self.make_shape_functions(polynomial_degree,
+        node_coordinates.shape[1])
+
+        # Precomputes the shape functions and their first order deriva-
+        # tives in the original finite element coordinates. This is car-
+        # ried out for all elements
+
+        self.evaluate_shape_function_and_derivatives(node_coordinates)
+
+    # Defines a function to store the quadrature points and the corres-
+    # ponding weights with respect to the quadrature degree. The tensor
+    # product Gauss-Legendre rule is used
+
+    def get_quadrature_points(self, quadrature_degree):
+
+        quadrature_points, weights = (
+        shape_functions_tools.get_gauss_legendre_quadrature(2,
+        quadrature_degree))
+
+        # Saves the quadrature points as a tensor [n_quadrature_points, 
+        # 2] to build the shape functions
+
+        self.quadrature_points = tf.constant(quadrature_points, dtype=
+        self.dtype)
+
+        self.r = tf.constant(quadrature_points[:,0], dtype=self.dtype)
+
+        self.s = tf.constant(quadrature_points[:,1], dtype=self.dtype)
+
+        self.weights = tf.constant(weights, dtype=self.dtype)
+
+        # Saves the number of quadrature points
+
+        self.number_quadrature_points = self.weights.shape[0]
+
+    # Defines a function to calculate the Lagrange shape functions and
+    # their derivatives with respect to the natural coordinates
+
+    def make_shape_functions(self, polynomial_degree, number_of_nodes):
+
+        if not (polynomial_degree in [1, 2]):
+
+            raise ValueError("'polynomial_degree' was given as "+str(
+            polynomial_degree)+". However, only 1 and 2 are currently "+
+            "implemented for quadrilaterals")
+
+        # Gets the natural coordinates of the nodes
+
+        nodes_natural_coordinates = (shape_functions_tools.
+        get_quadrilateral_nodes_natural_coordinates(number_of_nodes))
+
+        N, dN = shape_functions_tools.evaluate_lagrange_shape_functions(
+        self.quadrature_points.numpy(), nodes_natural_coordinates,
+        polynomial_degree)
+
+        self.store_shape_functions(N, dN)
+
+    # Defines a function to store the shape functions as a tensor [n_qua-
+    # drature_points, n_nodes] and their derivatives with respect to the
+    # natural coordinates as a tensor [n_quadrature_points, n_nodes, 2]
+
+    def store_shape_functions(self, N, dN):
+
+        self.shape_functions_tensor = tf.constant(N, dtype=self.dtype)
+
+        self.natural_derivatives_N = tf.constant(dN, dtype=self.dtype)
+
+    # Defines a function to return the shape functions evaluated at the
+    # original coordinates of the finite element
+
+    def evaluate_shape_function_and_derivatives(self, nodes_coordinates):
+
+        """Computes the shape functions and their derivatives in the
+        original system of coordinates of the finite elements. Computes
+        jacobians to perform the mapping of the derivatives"""
+
+        # If it is a quadrilateral embedded in a 3D space, the element
+        # is not necessarily flat, thus, the tangent vectors are evalua-
+        # ted at each quadrature point
+
+        if self.quadrilateral_in_3D_space:
+
+            # Gets the tangent vectors dX/dr and dX/ds as tensors [n_e-
+            # lements, n_quadrature_points, 3]
+
+            a_1 = tf.einsum('qn,eni->eqi', self.natural_derivatives_N[...,
+            0], nodes_coordinates)
+
+            a_2 = tf.einsum('qn,eni->eqi', self.natural_derivatives_N[...,
+            1], nodes_coordinates)
+
+            # Evaluates the outward pointing vector using the cross pro-
+            # duct. Its norm is the ratio of areas of the mapping
+
+            normal_vector = tf.linalg.cross(a_1, a_2)
+
+            det_J = tf.linalg.norm(normal_vector, axis=-1)
+
+            eps = tf.keras.backend.epsilon()
+
+            # Saves the normal vector to each Gauss point, thus, getting
+            # a tensor [n_elements, n_quadrature_points, 3]
+
+            self.normal_vector = normal_vector/(det_J[..., tf.newaxis]+
+            eps)
+
+            # Gets the inverse of the metric tensor g_ab = a_a.a_b to e-
+            # valuate the surface gradient of the shape functions
+
+            g_11 = tf.reduce_sum(a_1*a_1, axis=-1)
+
+            g_12 = tf.reduce_sum(a_1*a_2, axis=-1)
+
+            g_22 = tf.reduce_sum(a_2*a_2, axis=-1)
+
+            det_g = (g_11*g_22)-(g_12*g_12)+eps
+
+            # Gets the contravariant vectors a^1 and a^2
+
+            contravariant_1 = (((g_22/det_g)[..., tf.newaxis]*a_1)-((
+            g_12/det_g)[..., tf.newaxis]*a_2))
+
+            contravariant_2 = (((g_11/det_g)[..., tf.newaxis]*a_2)-((
+            g_12/det_g)[..., tf.newaxis]*a_1))
+
+            # The derivatives of the shape functions in the original co-
+            # ordinates are the surface gradient, i.e. a tensor of [ele-
+            # ments, quadrature points, nodes, 3]
+
+            self.shape_functions_derivatives = (tf.einsum('qn,eqi->eqni',
+            self.natural_derivatives_N[...,0], contravariant_1)+
+            tf.einsum('qn,eqi->eqni', self.natural_derivatives_N[...,1],
+            contravariant_2))
+
+        else:
+
+            # Gets the jacobian determinant and its inverse
+
+            det_J, J_inv = jacobian_2D_element(self.natural_derivatives_N,
+            nodes_coordinates[..., 0], nodes_coordinates[..., 1])
+
+            # The jacobian inverse is a tensor of [elements, quadrature
+            # points, original coordinates, natural coordinates]. Where-
+            # as the natural derivatives are a tensor of [quadrature po-
+            # ints, nodes, natural coordinates]. Thus, the derivatives of
+            # the shape functions in the original coordinates are a ten-
+            # sor of [elements, quadrature points, nodes, original coor-
+            # dinates]
+
+            self.shape_functions_derivatives = tf.einsum('eqxr,qnr->eqnx',
+            J_inv, self.natural_derivatives_N)
+
+        # Multiplies the quadrature weights by the determinant of the
+        # jacobian transformation to have the correct integration measure
+
+        self.dx = tf.einsum('eq,q->eq', det_J, self.weights)
+
+    # Defines a function to recover the DOFs of the current field using
+    # an indices tensor [n_elements, n_nodes, n_physical_dimensions]
+
+    def get_field_dofs(self, field_vector):
+
+        # Gathers the field to get a tensor with the same dimensions as
+        # the indices tensor
+
+        return tf.gather(field_vector, self.dofs_per_element)
+
+# Defines a class to store the serendipity quadrilateral element of 8
+# nodes, i.e. the quadratic quadrilateral without the node at the center
+
+class SerendipityQuadrilateral(Quadrilateral):
+
+    stored_elements = {16: {"polynomial degree": 2, "number of nodes":
+    8, "name": "quadrilateral of 8 nodes", "indices of the gmsh connec"+
+    "tivity": list(range(8))}}
+
+    def __init__(self, node_coordinates, dofs_per_element,
+    polynomial_degree=2, quadrature_degree=2, dtype=tf.float32,
+    integer_dtype=tf.int32):
+
+        super().__init__(node_coordinates, dofs_per_element,
+        polynomial_degree=polynomial_degree, quadrature_degree=
+        quadrature_degree, dtype=dtype, integer_dtype=integer_dtype)
+
+    # Defines a function to calculate the serendipity shape functions
+    # and their derivatives with respect to the natural coordinates
+
+    def make_shape_functions(self, polynomial_degree, number_of_nodes):
+
+        if polynomial_degree!=2:
+
+            raise ValueError("'polynomial_degree' was given as "+str(
+            polynomial_degree)+". However, only 2 is currently impleme"+
+            "nted for serendipity quadrilaterals")
+
+        # Gets the natural coordinates of the nodes
+
+        nodes_natural_coordinates = (shape_functions_tools.
+        get_quadrilateral_nodes_natural_coordinates(number_of_nodes))
+
+        N, dN = shape_functions_tools.evaluate_serendipity_shape_functions(
+        self.quadrature_points.numpy(), nodes_natural_coordinates)
+
+        self.store_shape_functions(N, dN)
@@ -0,0 +1,216 @@
+# Routine to store classes of hexahedron finite elements. Each class is
+# made for a type of finite element
+
+import tensorflow as tf
+
+from ...tool_box.tensorflow_utilities import convert_object_to_tensor
+
+from ...tool_box.math_tools import jacobian_3D_element
+
+from ...tool_box import shape_functions_tools
+
+# Defines a class to store the Lagrange hexahedron elements, i.e. the
+# trilinear hexahedron of 8 nodes and the triquadratic hexahedron of 27
+# nodes
+
+class Hexahedron:
+
+    # Creates a dictionary with the types of elements created by this
+    # class. The keys are GMSH element type, and the values are other
+    # dictionaries with necessary information. The natural coordinates
+    # of the nodes follow the GMSH ordering, thus, the connectivity is
+    # not permuted
+
+    stored_elements = {5: {"polynomial degree": 1, "number of nodes": 8,
+    "name": "hexahedron of 8 nodes", "indices of the gmsh connectivity":
+    list(range(8)), "suitable boundary element type tag": 3}, 12: {"po"+
+    "lynomial degree": 2, "number of nodes": 27, "name": "hexahedron o"+
+    "f 27 nodes", "indices of the gmsh connectivity": list(range(27)),
+    "suitable boundary element type tag": 10}}
+
+    def __init__(self, node_coordinates, dofs_per_element,
+    polynomial_degree=1, quadrature_degree=2, dtype=tf.float32,
+    integer_dtype=tf.int32):
+
+        # Saves the numerical type
+
+        self.dtype = dtype
+
+        self.integer_dtype = integer_dtype
+
+        # Saves the number of elements
+
+        self.number_elements = len(node_coordinates)
+
+        # Ensures node coordinates and dofs per element are tensors with
+        # the given type
+
+        node_coordinates = convert_object_to_tensor(node_coordinates,
+        self.dtype)
+
+        # The dofs per element is a tensor [n_elements, n_nodes,
+        # n_dofs_per_node]
+
+        self.dofs_per_element = convert_object_to_tensor(
+        dofs_per_element, self.integer_dtype)
+
+        # Evaluates the Gauss points and their corresponding weights
+
+        self.get_quadrature_points(quadrature_degree)
+
+        # Precomputes the shape functions in the Gauss points
+
+        self.make_shape_functions(polynomial_degree,
+        node_coordinates.shape[1])
+
+        # Precomputes the shape functions and their first order deriva-
+        # tives in the original finite element coordinates. This is car-
+        # ried out for all elements
+
+        self.evaluate_shape_function_and_derivatives(node_coordinates)
+
+    # Defines a function to store the quadrature points and the corres-
+    # ponding weights with respect to the quadrature degree. The tensor
+    # product Gauss-Legendre rule is used
+
+    def get_quadrature_points(self, quadrature_degree):
+
+        quadrature_points, weights = (
+        shape_functions_tools.get_gauss_legendre_quadrature(3,
+        quadrature_degree))
+
+        # Saves the quadrature points as a tensor [n_quadrature_points, 
+        # 3] to build the shape functions
+
+        self.quadrature_points = tf.constant(quadrature_points, dtype=
+        self.dtype)
+
+        self.r = tf.constant(quadrature_points[:,0], dtype=self.dtype)
+
+        self.s = tf.constant(quadrature_points[:,1], dtype=self.dtype)
+
+        self.t = tf.constant(quadrature_points[:,2], dtype=self.dtype)
+
+        self.weights = tf.constant(weights, dtype=self.dtype)
+
+        # Saves the number of quadrature points
+
+        self.number_quadrature_points = self.weights.shape[0]
+
+    # Defines a function to calculate the Lagrange shape functions and
+    # their derivatives with respect to the natural coordinates
+
+    def make_shape_functions(self, polynomial_degree, number_of_nodes):
+
+        if not (polynomial_degree in [1, 2]):
+
+            raise ValueError("'polynomial_degree' was given as "+str(
+            polynomial_degree)+". However, only 1 and 2 are currently "+
+            "implemented for hexahedrons")
+
+        # Gets the natural coordinates of the nodes
+
+        nodes_natural_coordinates = (shape_functions_tools.
+        get_hexahedron_nodes_natural_coordinates(number_of_nodes))
+
+        N, dN = shape_functions_tools.evaluate_lagrange_shape_functions(
+        self.quadrature_points.numpy(), nodes_natural_coordinates,
+        polynomial_degree)
+
+        self.store_shape_functions(N, dN)
+
+    # Defines a function to store the shape functions as a tensor [n_qua-
+    # drature_points, n_nodes] and their derivatives with respect to the
+    # natural coordinates as a tensor [n_quadrature_points, n_nodes, 3]
+
+    def store_shape_functions(self, N, dN):
+
+        self.shape_functions_tensor = tf.constant(N, dtype=self.dtype)
+
+        self.natural_derivatives_N = tf.constant(dN, dtype=self.dtype)
+
+    # Defines a function to return the shape functions evaluated at the
+    # original coordinates of the finite element
+
+    def evaluate_shape_function_and_derivatives(self, nodes_coordinates):
+
+        """Computes the shape functions and their derivatives in the
+        original system of coordinates of the finite elements. Computes
+        jacobians to perform the mapping of the derivatives"""
+
+        # Gets the x, y, and z coordinates of the nodes
+
+        x = nodes_coordinates[..., 0]
+
+        y = nodes_coordinates[..., 1]
+
+        z = nodes_coordinates[..., 2]
+
+        # Gets the jacobian determinant and its inverse
+
+        det_J, J_inv = jacobian_3D_element(self.natural_derivatives_N, x,
+        y, z)
+
+        # The jacobian inverse is a tensor of [elements, quadrature
+        # points, original coordinates, natural coordinates]. Whereas the
+        # natural derivatives are a tensor of [quadrature points, nodes,
+        # natural coordinates]. Thus, the derivatives of the shape func-
+        # tions in the original coordinates are a tensor of [elements,
+        # quadrature points, nodes, original coordinates]
+
+        self.shape_functions_derivatives = tf.einsum('eqxr,qnr->eqnx',
+        J_inv, self.natural_derivatives_N)
+
+        # Multiplies the quadrature weights by the determinant of the
+        # jacobian transformation to have the correct integration measure
+
+        self.dx = tf.einsum('eq,q->eq', det_J, self.weights)
+
+    # Defines a function to recover the DOFs of the current field using
+    # an indices tensor [n_elements, n_nodes, n_physical_dimensions]
+
+    def get_field_dofs(self, field_vector):
+
+        # Gathers the field to get a tensor with the same dimensions as
+        # the indices tensor
+
+        return tf.gather(field_vector, self.dofs_per_element)
+
+# Defines a class to store the serendipity hexahedron element of 20 no-
+# des, i.e. the quadratic hexahedron without the nodes at the centers
+# of the faces and of the volume
+
+class SerendipityHexahedron(Hexahedron):
+
+    stored_elements = {17: {"polynomial degree": 2, "number of nodes":
+    20, "name": "hexahedron of 20 nodes", "indices of the gmsh connect"+
+    "ivity": list(range(20)), "suitable boundary element type tag": 16}}
+
+    def __init__(self, node_coordinates, dofs_per_element,
+    polynomial_degree=2, quadrature_degree=2, dtype=tf.float32,
+    integer_dtype=tf.int32):
+
+        super().__init__(node_coordinates, dofs_per_element,
+        polynomial_degree=polynomial_degree, quadrature_degree=
+        quadrature_degree, dtype=dtype, integer_dtype=integer_dtype)
+
+    # Defines a function to calculate the serendipity shape functions
+    # and their derivatives with respect to the natural coordinates
+
+    def make_shape_functions(self, polynomial_degree, number_of_nodes):
+
+        if polynomial_degree!=2:
+
+            raise ValueError("'polynomial_degree' was given as "+str(
+            polynomial_degree)+". However, only 2 is currently impleme"+
+            "nted for serendipity hexahedrons")
+
+        # Gets the natural coordinates of the nodes
+
+        nodes_natural_coordinates = (shape_functions_tools.
+        get_hexahedron_nodes_natural_coordinates(number_of_nodes))
+
+        N, dN = shape_functions_tools.evaluate_serendipity_shape_functions(
+        self.quadrature_points.numpy(), nodes_natural_coordinates)
+
+        self.store_shape_functions(N, dN)
@@ -2,6 +2,12 @@
 
 import tensorflow as tf
 
+import numpy as np
+
+from scipy import sparse
+
+from scipy.sparse import linalg as sparse_linalg
+
 from ...PythonicUtilities.dictionary_tools import verify_obligatory_and_optional_keys
 
 # Defines a class to calculate a conditioning matrix which is a multi-
@@ -49,4 +55,343 @@ class IdentityMultiple:
         # tor, which is exactly multiplying the global residual vector 
         # by the constant
 
-        return self.constant*global_residual_vector
\ No newline at end of file
+        return self.constant*global_residual_vector
+
+########################################################################
+#                      Physics-based conditioners                      #
+########################################################################
+
+# Defines a function to get the nonzero entries of the tangent matrix
+# at the null vector of parameters of one realization. Returns the va-
+# lues [n_entries] in double precision, the indices [n_entries, 2] and
+# a boolean mask [n_dofs] of the DOFs with Dirichlet boundary conditions
+# in this realization
+
+def get_reference_tangent_entries(residual_class, reference_realization):
+
+    internal_work = residual_class.internal_work_variation
+
+    n_realizations, n_dofs = residual_class.vector_of_parameters.shape
+
+    if reference_realization<0 or reference_realization>=n_realizations:
+
+        raise IndexError("The reference realization to build the stif"+
+        "fness matrix of the conditioner is "+str(reference_realization
+        )+", but there are only "+str(n_realizations)+" realizations")
+
+    # Builds the sparsity pattern of the tangent matrix if it has not
+    # been built yet
+
+    if internal_work.tangent_indices is None:
+
+        internal_work.build_tangent_sparsity_pattern(n_dofs)
+
+    # Assembles the nonzero entries of the reference realization at the
+    # null vector of parameters
+
+    tangent_values = internal_work.assemble_realization_tangent_values(
+    tf.zeros([n_realizations, n_dofs], dtype=
+    residual_class.vector_of_parameters.dtype), reference_realization
+    ).numpy().astype(np.float64)
+
+    tangent_indices = internal_work.tangent_indices.numpy()
+
+    # Gets the DOFs with Dirichlet boundary conditions in the reference
+    # realization
+
+    dirichlet_indices = residual_class.BCs_class.all_indices.numpy()
+
+    dirichlet_dofs = np.zeros(n_dofs, dtype=bool)
+
+    dirichlet_dofs[dirichlet_indices[dirichlet_indices[:,0]==(
+    reference_realization), 1]] = True
+
+    return tangent_values, tangent_indices, dirichlet_dofs
+
+# Defines a function to get the reference stiffness matrix, i.e. the
+# tangent matrix at the null vector of parameters, of one realization as
+# a scipy sparse matrix in CSC format. The rows and the columns of the
+# DOFs with Dirichlet boundary conditions are replaced by those of the
+# identity, thus, the matrix is symmetric positive definite
+
+def get_reference_stiffness_matrix(residual_class,
+reference_realization):
+
+    tangent_values, tangent_indices, dirichlet_dofs = (
+    get_reference_tangent_entries(residual_class, 
+    reference_realization))
+
+    n_dofs = dirichlet_dofs.shape[0]
+
+    # Removes the entries in the rows and in the columns of these DOFs,
+    # then, adds ones to their diagonal entries
+
+    free_entries = ~(dirichlet_dofs[tangent_indices[:,0]] | (
+    dirichlet_dofs[tangent_indices[:,1]]))
+
+    stiffness_matrix = sparse.coo_matrix((tangent_values[free_entries],
+    (tangent_indices[free_entries,0], tangent_indices[free_entries,1])),
+    shape=(n_dofs, n_dofs))
+
+    stiffness_matrix = stiffness_matrix+sparse.diags(
+    dirichlet_dofs.astype(np.float64))
+
+    return sparse.csc_matrix(stiffness_matrix)
+
+# Defines a function to wrap a scipy factorization as a tensorflow func-
+# tion that applies the inverse of the factorized matrix, K⁻¹, to each
+# row of a tensor [n_realizations, n_dofs] or to a single vector
+# [n_dofs]. If squared is True, K⁻ᵀK⁻¹ is applied instead, thus, the
+# quadratic form of the loss function is the squared norm of the pre-
+# conditioned residual, K⁻¹R. The gradient applies the transposed ope-
+# rator
+
+def get_factorization_solver(factorization, float_dtype, squared=False):
+
+    # Sets the sequence of solutions of the operator and of its trans-
+    # pose
+
+    transpositions, transposed_transpositions = ["N"], ["T"]
+
+    if squared:
+
+        transpositions, transposed_transpositions = ["N", "T"], ["N",
+        "T"]
+
+    def solve_numpy(vector, transpositions):
+
+        vector = np.asarray(vector, dtype=np.float64).T
+
+        for transposition in transpositions:
+
+            vector = factorization.solve(vector, trans=transposition)
+
+        return vector.T.astype(float_dtype.as_numpy_dtype)
+
+    def solve_tensor(vector, transpositions):
+
+        solution = tf.numpy_function(lambda array: solve_numpy(array,
+        transpositions), [vector], float_dtype)
+
+        solution.set_shape(vector.shape)
+
+        return solution
+
+    @tf.custom_gradient
+    def apply_inverse(vector):
+
+        def gradient(upstream):
+
+            return solve_tensor(upstream, transposed_transpositions)
+
+        return solve_tensor(vector, transpositions), gradient
+
+    return apply_inverse
+
+# Defines a class to calculate a conditioning matrix from the diagonal
+# D of the reference stiffness matrix. The conditioning matrix is D⁻²,
+# thus, the quadratic form of the loss function is the squared norm of
+# the Jacobi-preconditioned residual, D⁻¹R. If the key 'lumped' is True,
+# the diagonal is replaced by the sum of the absolute values of each
+# row, i.e. the lumped stiffness. Only the entries of the reference rea-
+# lization are assembled, and the diagonal is taken directly from their
+# positions, without building the sparse matrix. The diagonal is evalu-
+# ated once, then, it is used for all realizations and iterations
+
+class InverseDiagonalTangent:
+
+    def __init__(self, info_dictionary, float_dtype, number_of_dofs):
+
+        # Verifies the keys of the dictionary of information for this
+        # class
+
+        verify_obligatory_and_optional_keys(info_dictionary, ["conditi"+
+        "oner name", "residual class"], {"reference realization": {"ty"+
+        "pe": int, "description": "Index of the realization whose refe"+
+        "rence stiffness matrix is used for all realizations"}, "lumpe"+
+        "d": {"type": bool, "description": "Flag to use the sum of the"+
+        " absolute values of the rows instead of the diagonal"}},
+        "info_dictionary", "InverseDiagonalTangent")
+
+        # Saves the code-given information
+
+        self.number_of_dofs = number_of_dofs
+
+        self.float_dtype = float_dtype
+
+        reference_realization = 0
+
+        if "reference realization" in info_dictionary:
+
+            reference_realization = info_dictionary["reference realiza"+
+            "tion"]
+
+        # Gets the nonzero entries of the reference tangent matrix
+
+        tangent_values, tangent_indices, dirichlet_dofs = (
+        get_reference_tangent_entries(info_dictionary["residual class"],
+        reference_realization))
+
+        rows, columns = tangent_indices[:,0], tangent_indices[:,1]
+
+        if "lumped" in info_dictionary and info_dictionary["lumped"]:
+
+            # Sums the absolute values of the rows, without the columns
+            # of the DOFs with Dirichlet boundary conditions
+
+            free_entries = ~dirichlet_dofs[columns]
+
+            diagonal = np.bincount(rows[free_entries], weights=np.abs(
+            tangent_values[free_entries]), minlength=
+            dirichlet_dofs.shape[0])
+
+        else:
+
+            # Gets the positions of the diagonal entries. Every DOF be-
+            # longs to at least one element, and the entries are sorted
+            # by row, thus, they are ordered by DOF
+
+            diagonal_positions = np.flatnonzero(rows==columns)
+
+            diagonal = tangent_values[diagonal_positions]
+
+        # The DOFs with Dirichlet boundary conditions get 1, as in the 
+        # reference stiffness matrix
+
+        diagonal[dirichlet_dofs] = 1.0
+
+        # Saves the inverse of the squared diagonal as a tensor
+        # [n_dofs], which is broadcast over the realizations
+
+        self.inverse_diagonal = tf.constant(1.0/(diagonal**2), dtype=
+        self.float_dtype)
+
+    # Defines a function to multiply the conditioning matrix by the re-
+    # sidual vector tensor
+
+    @tf.function
+    def __call__(self, vector_of_parameters, global_residual_vector):
+
+        return self.inverse_diagonal*global_residual_vector
+
+# Defines a class to calculate a conditioning matrix from an incomplete
+# factorization K̃ of the reference stiffness matrix. The conditioning
+# matrix is K̃⁻ᵀK̃⁻¹, thus, the quadratic form of the loss function is
+# the squared norm of the preconditioned residual, K̃⁻¹R, whose Hessian
+# is close to the identity near the reference configuration. Scipy does
+# not have the incomplete Cholesky factorization, thus, the threshold
+# incomplete LU factorization of SuperLU is used with a symmetric orde-
+# ring and without pivoting, which keeps the pattern of the factors
+# symmetric. The factorization is done once, then, it is used for all
+# realizations and iterations
+
+class IncompleteLUTangent:
+
+    def __init__(self, info_dictionary, float_dtype, number_of_dofs):
+
+        # Verifies the keys of the dictionary of information for this
+        # class
+
+        verify_obligatory_and_optional_keys(info_dictionary, ["conditi"+
+        "oner name", "residual class"], {"reference realization": {"ty"+
+        "pe": int, "description": "Index of the realization whose refe"+
+        "rence stiffness matrix is used for all realizations"}, "drop "+
+        "tolerance": {"type": float, "description": "Relative toleranc"+
+        "e to drop entries of the incomplete factors"}, "fill factor":
+        {"type": float, "description": "Upper bound of the ratio of no"+
+        "nzero entries of the factors to those of the matrix"}},
+        "info_dictionary", "IncompleteLUTangent")
+
+        # Saves the code-given information
+
+        self.number_of_dofs = number_of_dofs
+
+        self.float_dtype = float_dtype
+
+        reference_realization = 0
+
+        if "reference realization" in info_dictionary:
+
+            reference_realization = info_dictionary["reference realiza"+
+            "tion"]
+
+        drop_tolerance = 1E-5
+
+        if "drop tolerance" in info_dictionary:
+
+            drop_tolerance = info_dictionary["drop tolerance"]
+
+        fill_factor = 10.0
+
+        if "fill factor" in info_dictionary:
+
+            fill_factor = info_dictionary["fill factor"]
+
+        # Factorizes the reference stiffness matrix
+
+        self.factorization = sparse_linalg.spilu(
+        get_reference_stiffness_matrix(info_dictionary["residual cla"+
+        "ss"], reference_realization), drop_tol=drop_tolerance,
+        fill_factor=fill_factor, permc_spec="MMD_AT_PLUS_A",
+        diag_pivot_thresh=0.0)
+
+        self.apply_inverse = get_factorization_solver(
+        self.factorization, self.float_dtype, squared=True)
+
+    # Defines a function to multiply the conditioning matrix by the re-
+    # sidual vector tensor
+
+    @tf.function
+    def __call__(self, vector_of_parameters, global_residual_vector):
+
+        return self.apply_inverse(global_residual_vector)
+
+# Defines a class to calculate a conditioning matrix which is the inver-
+# se of the reference stiffness matrix. Thus, the quadratic form of the
+# loss function is the energy norm of the residual, R·K⁻¹R, whose condi-
+# tion number is that of K instead of that of K². The matrix is factori-
+# zed once, then, the factors are used for all realizations and itera-
+# tions
+
+class EnergyNormTangent:
+
+    def __init__(self, info_dictionary, float_dtype, number_of_dofs):
+
+        # Verifies the keys of the dictionary of information for this
+        # class
+
+        verify_obligatory_and_optional_keys(info_dictionary, ["conditi"+
+        "oner name", "residual class"], {"reference realization": {"ty"+
+        "pe": int, "description": "Index of the realization whose refe"+
+        "rence stiffness matrix is used for all realizations"}},
+        "info_dictionary", "EnergyNormTangent")
+
+        # Saves the code-given information
+
+        self.number_of_dofs = number_of_dofs
+
+        self.float_dtype = float_dtype
+
+        reference_realization = 0
+
+        if "reference realization" in info_dictionary:
+
+            reference_realization = info_dictionary["reference realiza"+
+            "tion"]
+
+        # Factorizes the reference stiffness matrix
+
+        self.factorization = sparse_linalg.splu(
+        get_reference_stiffness_matrix(info_dictionary["residual cla"+
+        "ss"], reference_realization))
+
+        self.apply_inverse = get_factorization_solver(
+        self.factorization, self.float_dtype)
+
+    # Defines a function to multiply the conditioning matrix by the re-
+    # sidual vector tensor
+
+    @tf.function
+    def __call__(self, vector_of_parameters, global_residual_vector):
+
+        return self.apply_inverse(global_residual_vector)
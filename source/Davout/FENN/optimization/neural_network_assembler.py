@@ -139,5 +139,299 @@ class AgentModel:
 
         return self.loss_function_class.evaluate_loss(
         updated_vector_of_parameters, residual_vector)
-    
-    # Defines a function to compute the gradient of the loss function
\ No newline at end of file
+
+########################################################################
+#                          Fused multi-agent model                     #
+########################################################################
+
+# Defines a class to store the weights of a group of agents with identi-
+# cal architectures as batched tensors, i.e. the kernel of each layer is
+# a tensor [n_agents, n_inputs, n_outputs], and all agents are evaluated
+# with a single batched matmul per layer. The first n_shared_layers are
+# a trunk shared by all agents, whose kernels are [n_inputs, n_outputs],
+# whereas the remaining layers are the heads of the agents. The methods
+# get_weights and set_weights follow the convention of keras models
+
+class BatchedAgentsNetwork(tf.Module):
+
+    def __init__(self, n_agents, input_dimension, 
+    activation_functions_per_layer, float_dtype, n_shared_layers=0, 
+    seed=None):
+
+        super().__init__()
+
+        self.n_agents = n_agents
+
+        self.n_shared_layers = n_shared_layers
+
+        # Initializes the lists of kernels, biases, and activation func-
+        # tions
+
+        self.kernels = []
+
+        self.biases = []
+
+        self.activation_functions = []
+
+        n_inputs = input_dimension
+
+        for layer_index, layer_info in enumerate(
+        activation_functions_per_layer):
+
+            # Each layer must have a single activation function, such 
+            # that the neurons of all agents can be evaluated at once
+
+            if len(layer_info)!=1:
+
+                raise ValueError("The "+str(layer_index+1)+"-th layer "+
+                "information in 'activation_functions_per_layer' at 'B"+
+                "atchedAgentsNetwork' has "+str(len(layer_info))+" act"+
+                "ivation functions. Each layer must have a single acti"+
+                "vation function. Currently, it is: "+str(layer_info))
+
+            activation_name, n_outputs = list(layer_info.items())[0]
+
+            self.activation_functions.append(tf.keras.activations.get(
+            activation_name))
+
+            # Creates the kernels with the Glorot uniform initialization,
+            # and null biases. The layers of the trunk are shared. The 
+            # kernels of all agents are drawn in a single call, such that
+            # each agent gets different values. If a seed is given, the 
+            # draw is stateless with a seed per layer
+
+            if layer_index<n_shared_layers:
+
+                kernel_shape = [n_inputs, n_outputs]
+
+                bias_shape = [n_outputs]
+
+            else:
+
+                kernel_shape = [n_agents, n_inputs, n_outputs]
+
+                bias_shape = [n_agents, 1, n_outputs]
+
+            limit = np.sqrt(6.0/(n_inputs+n_outputs))
+
+            if seed is None:
+
+                kernel = tf.random.uniform(kernel_shape, minval=-limit,
+                maxval=limit, dtype=float_dtype)
+
+            else:
+
+                kernel = tf.random.stateless_uniform(kernel_shape, [seed,
+                layer_index], minval=-limit, maxval=limit, dtype=
+                float_dtype)
+
+            self.kernels.append(tf.Variable(kernel, name="kernel_"+str(
+            layer_index)))
+
+            self.biases.append(tf.Variable(tf.zeros(bias_shape, dtype=
+            float_dtype), name="bias_"+str(layer_index)))
+
+            n_inputs = n_outputs
+
+        self.output_dimension = n_inputs
+
+    # Defines a function to evaluate all agents. The input is a tensor 
+    # [n_realizations, input_dimension], shared by all agents, or a ten-
+    # sor [n_agents, n_realizations, input_dimension]. Returns a tensor 
+    # [n_agents, n_realizations, output_dimension]
+
+    @tf.function
+    def __call__(self, model_input):
+
+        output = model_input
+
+        for layer_index, (kernel, bias, activation) in enumerate(zip(
+        self.kernels, self.biases, self.activation_functions)):
+
+            # The trunk evaluates each realization once for all agents
+
+            if layer_index<self.n_shared_layers:
+
+                output = activation(tf.matmul(output, kernel)+bias)
+
+            # The heads are evaluated by a batched matmul over the agents.
+            # A shared input is broadcast along the axis of agents
+
+            else:
+
+                if len(output.shape)==2:
+
+                    output = tf.broadcast_to(output[None, ...], [
+                    self.n_agents, *output.shape])
+
+                output = activation(tf.matmul(output, kernel)+bias)
+
+        # If all layers are shared, the agents differ by their DOFs only
+
+        if len(output.shape)==2:
+
+            output = tf.broadcast_to(output[None, ...], [self.n_agents,
+            *output.shape])
+
+        return output
+
+    # Defines a function to get the weights as a list of numpy arrays
+
+    def get_weights(self):
+
+        return [variable.numpy() for variable in self.trainable_variables]
+
+    # Defines a function to set the weights from a list of arrays in the
+    # order of get_weights
+
+    def set_weights(self, weights):
+
+        for variable, weight in zip(self.trainable_variables, weights):
+
+            variable.assign(weight)
+
+# Defines a class to evaluate a group of agents with a single network 
+# call and a single scatter into the vector of parameters. Each agent 
+# gives the values of its own DOFs, hence, the agents must have the sa-
+# me number of DOFs, which is the number of neurons in the output layer. 
+# agents_dofs_list is a list with the list of DOFs of each agent or an 
+# array [n_agents, n_agent_dofs]. Agents with different architectures 
+# must be split in different instances of this class
+
+class MultiAgentModel:
+
+    def __init__(self, agents_dofs_list: (list | np.ndarray), 
+    input_dimension: int, activation_functions_per_layer: list,  
+    float_dtype, integer_dtype, vector_of_parameters, 
+    loss_function_class, n_shared_layers=0, seed=None):
+        
+        # Verifies if activation_functions_per_layer is a list of dicti-
+        # onaries
+
+        if not isinstance(activation_functions_per_layer, list):
+
+            raise TypeError("'activation_functions_per_layer' at 'Mult"+
+            "iAgentModel' must be a list with dictionaries. Each dicti"+
+            "onary tells the activation function and the number of neu"+
+            "rons in the corresponding layer")
+        
+        for layer_index, layer_info in enumerate(
+        activation_functions_per_layer):
+
+            if not isinstance(layer_info, dict):
+
+                raise TypeError("The "+str(layer_index+1)+"-th layer i"+
+                "nformation in 'activation_functions_per_layer' is not"+
+                " a dictionary. It must be a dictionary whose key is t"+
+                "he name of the activation function of the said layer "+
+                "and the corresponding value is the number of neurons")
+
+        # Verifies the number of shared layers. The last layer cannot be
+        # shared, otherwise all agents would give the same values
+
+        if n_shared_layers<0 or n_shared_layers>=len(
+        activation_functions_per_layer):
+
+            raise ValueError("'n_shared_layers' at 'MultiAgentModel' i"+
+            "s "+str(n_shared_layers)+". It must be at least 0 and les"+
+            "s than the number of layers, "+str(len(
+            activation_functions_per_layer)))
+
+        # Verifies if agents_dofs_list is a list or a numpy array
+
+        if (not isinstance(agents_dofs_list, list)) and (not isinstance(
+        agents_dofs_list, np.ndarray)):
+            
+            raise TypeError("'agents_dofs_list' at 'MultiAgentModel' i"+
+            "s not a list, nor a numpy array. It must be a list with t"+
+            "he lists of DOFs of each agent, or a numpy array [n_agent"+
+            "s, n_agent_dofs]")
+
+        agent_sizes = set(len(agent_dofs) for agent_dofs in (
+        agents_dofs_list))
+
+        if len(agent_sizes)!=1:
+
+            raise ValueError("The agents at 'MultiAgentModel' have dif"+
+            "ferent numbers of DOFs: "+str(sorted(agent_sizes))+". All"+
+            " agents of a fused model must have the same number of DOF"+
+            "s. Split them in groups of agents with the same size")
+
+        agents_dofs_list = np.asarray(agents_dofs_list)
+
+        # Gets the number of realizations and the number of DOFs in the
+        # whole mesh
+
+        self.n_realizations = vector_of_parameters.shape[0]
+
+        self.n_dofs = vector_of_parameters.shape[1]
+
+        self.n_agents, self.n_agent_dofs = agents_dofs_list.shape
+
+        if np.max(agents_dofs_list)>=self.n_dofs:
+
+            raise IndexError("The maximum DOF index of the agents at '"+
+            "MultiAgentModel' is "+str(np.max(agents_dofs_list))+", wh"+
+            "ich is out of bounds, for the DOF with the maximum index "+
+            "number is "+str(self.n_dofs-1))
+
+        if len(np.unique(agents_dofs_list))!=agents_dofs_list.size:
+
+            raise ValueError("The agents at 'MultiAgentModel' share so"+
+            "me DOFs. Each DOF must be given by a single agent")
+
+        # Creates the batched network of all agents
+
+        self.agent_model = BatchedAgentsNetwork(self.n_agents, 
+        input_dimension, activation_functions_per_layer, float_dtype,
+        n_shared_layers=n_shared_layers, seed=seed)
+
+        if self.agent_model.output_dimension!=self.n_agent_dofs:
+
+            raise ValueError("The output layer of the agents at 'Multi"+
+            "AgentModel' has "+str(self.agent_model.output_dimension)+
+            " neurons, but each agent has "+str(self.n_agent_dofs)+" D"+
+            "OFs. They must be the same")
+
+        # Builds the indices for a single scatter of the outputs of all
+        # agents. The output of the network is transposed to [n_reali-
+        # zations, n_agents, n_agent_dofs], then, flattened. Thus, the 
+        # indices are [n_realizations*n_agents*n_agent_dofs, 2]
+
+        dofs_indices = tf.broadcast_to(tf.constant(agents_dofs_list.reshape(
+        -1), dtype=integer_dtype)[None, :], [self.n_realizations, 
+        self.n_agents*self.n_agent_dofs])
+
+        realization_indices = tf.broadcast_to(tf.range(
+        self.n_realizations, dtype=integer_dtype)[:, None], [
+        self.n_realizations, self.n_agents*self.n_agent_dofs])
+
+        self.scatter_indices = tf.reshape(tf.stack([realization_indices, 
+        dofs_indices], axis=-1), [-1, 2])
+
+        # Stores the instance of the loss function class
+
+        self.loss_function_class = loss_function_class
+
+    # Defines a function to get the result of all agents and, then, to 
+    # plug it to the global vector of parameters with a single scatter
+
+    @tf.function
+    def evaluate_model(self, model_input, vector_of_parameters):
+
+        return tf.tensor_scatter_nd_update(vector_of_parameters, 
+        self.scatter_indices, tf.reshape(tf.transpose(self.agent_model(
+        model_input), perm=[1, 0, 2]), [-1]))
+
+    # Defines a function to get the result of all agents and, then, to 
+    # compute the loss function
+
+    @tf.function
+    def evaluate_loss_function(self, model_input, vector_of_parameters,
+    residual_vector):
+
+        updated_vector_of_parameters = self.evaluate_model(model_input,
+        vector_of_parameters)
+
+        return self.loss_function_class.evaluate_loss(
+        updated_vector_of_parameters, residual_vector)
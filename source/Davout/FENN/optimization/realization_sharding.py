@@ -0,0 +1,434 @@
+# Routine to store methods to distribute the realizations of the BVP a-
+# cross a pool of worker processes. Each worker evaluates the residual
+# and the loss function of its own slice of realizations, then, the loss
+# values and the gradients are reduced by the driver
+
+import multiprocessing
+
+import traceback
+
+import tensorflow as tf
+
+import numpy as np
+
+from multiprocessing import shared_memory
+
+########################################################################
+#                           Shard evaluator                            #
+########################################################################
+
+# Defines a class to store the objects each worker needs to evaluate its
+# slice of realizations: the class of the residual (the physics), the
+# LossFunction instance, and, optionally, the AgentModel instance. These
+# objects must be built for the slice of realizations only, i.e. their
+# vector of parameters has as many rows as realizations in the shard
+
+class ShardEvaluator:
+
+    def __init__(self, residual_class, loss_function_class,
+    agent_model=None):
+
+        # Verifies if the residual class has the pure evaluation of the
+        # residual
+
+        if not hasattr(residual_class, "evaluate_residual_tensor"):
+
+            raise TypeError("'residual_class' at 'ShardEvaluator' does"+
+            " not have the method 'evaluate_residual_tensor'. It must "+
+            "be a physics class, e.g. 'CompressibleHyperelasticity'")
+
+        self.residual_class = residual_class
+
+        self.loss_function_class = loss_function_class
+
+        self.agent_model = agent_model
+
+        self.float_dtype = residual_class.vector_of_parameters.dtype
+
+    # Defines a function to evaluate the loss function and its gradient
+    # with respect to the vector of parameters of this shard. Returns
+    # the loss value and the gradient [n_shard_realizations, n_dofs] as
+    # numpy objects
+
+    def evaluate_loss_and_gradient(self, vector_of_parameters):
+
+        vector_of_parameters = tf.constant(vector_of_parameters, dtype=
+        self.float_dtype)
+
+        with tf.GradientTape() as tape:
+
+            tape.watch(vector_of_parameters)
+
+            loss = self.loss_function_class.evaluate_loss(
+            vector_of_parameters,
+            self.residual_class.evaluate_residual_tensor(
+            vector_of_parameters))
+
+        return loss.numpy(), tape.gradient(loss, vector_of_parameters
+        ).numpy()
+
+    # Defines a function to evaluate the loss function of the agent mo-
+    # del and its gradient with respect to the trainable variables of
+    # the neural network. The weights are given by the driver, thus, all
+    # workers evaluate the same network
+
+    def evaluate_agent_loss_and_gradient(self, weights, model_input,
+    vector_of_parameters):
+
+        if self.agent_model is None:
+
+            raise ValueError("The loss function of the agent model was"+
+            " asked at 'ShardEvaluator', but no 'agent_model' was give"+
+            "n to build the shard")
+
+        # Updates the weights of the network
+
+        self.agent_model.agent_model.set_weights(weights)
+
+        model_input = tf.constant(model_input, dtype=self.float_dtype)
+
+        vector_of_parameters = tf.constant(vector_of_parameters, dtype=
+        self.float_dtype)
+
+        trainable_variables = (
+        self.agent_model.agent_model.trainable_variables)
+
+        with tf.GradientTape() as tape:
+
+            # Plugs the output of the network into the vector of parame-
+            # ters, then, evaluates the residual and the loss function
+
+            updated_vector_of_parameters = (
+            self.agent_model.evaluate_model(model_input,
+            vector_of_parameters))
+
+            loss = self.loss_function_class.evaluate_loss(
+            updated_vector_of_parameters,
+            self.residual_class.evaluate_residual_tensor(
+            updated_vector_of_parameters))
+
+        gradients = tape.gradient(loss, trainable_variables)
+
+        return loss.numpy(), [gradient.numpy() for gradient in (
+        gradients)]
+
+########################################################################
+#                                Worker                                #
+########################################################################
+
+# Defines a function to attach to the blocks of shared memory created by
+# the driver. Returns a dictionary of read-only numpy arrays and the
+# list of blocks, which must be kept alive while the arrays are in use
+
+def attach_shared_arrays(shared_arrays_info):
+
+    shared_arrays = {}
+
+    memory_blocks = []
+
+    for name, (block_name, shape, dtype) in shared_arrays_info.items():
+
+        memory_block = shared_memory.SharedMemory(name=block_name)
+
+        memory_blocks.append(memory_block)
+
+        array = np.ndarray(shape, dtype=dtype, buffer=memory_block.buf)
+
+        array.flags.writeable = False
+
+        shared_arrays[name] = array
+
+    return shared_arrays, memory_blocks
+
+# Defines the function that runs in each worker process. It builds the
+# shard evaluator, then, answers the requests of the driver until it is
+# asked to close
+
+def run_worker(connection, build_function, realization_indices,
+build_arguments, shared_arrays_info, threads_per_worker):
+
+    # Limits the number of threads of this worker, such that the workers
+    # do not oversubscribe the cores. This must be done before any ten-
+    # sorflow operation
+
+    if threads_per_worker is not None:
+
+        tf.config.threading.set_intra_op_parallelism_threads(
+        threads_per_worker)
+
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    memory_blocks = []
+
+    try:
+
+        shared_arrays, memory_blocks = attach_shared_arrays(
+        shared_arrays_info)
+
+        shard_evaluator = build_function(realization_indices,
+        **shared_arrays, **build_arguments)
+
+        if not isinstance(shard_evaluator, ShardEvaluator):
+
+            raise TypeError("'build_function' at 'RealizationShardingD"+
+            "river' must return an instance of 'ShardEvaluator', but i"+
+            "t returned "+str(type(shard_evaluator)))
+
+        connection.send(("ok", None))
+
+    except Exception:
+
+        connection.send(("error", traceback.format_exc()))
+
+        connection.close()
+
+        return
+
+    # Answers the requests
+
+    while True:
+
+        method_name, arguments = connection.recv()
+
+        if method_name=="close":
+
+            break
+
+        try:
+
+            connection.send(("ok", getattr(shard_evaluator,
+            method_name)(*arguments)))
+
+        except Exception:
+
+            connection.send(("error", traceback.format_exc()))
+
+    for memory_block in memory_blocks:
+
+        memory_block.close()
+
+    connection.close()
+
+########################################################################
+#                                Driver                                #
+########################################################################
+
+# Defines a class to distribute the realizations over a pool of worker
+# processes. build_function must be a function defined at the top level
+# of a module, such that it can be sent to the workers. It is called in
+# each worker as build_function(realization_indices, **shared_arrays,
+# **build_arguments), and it must return a ShardEvaluator built only for
+# the realizations in realization_indices. shared_arrays is a dictionary
+# of numpy arrays, e.g. node coordinates or samples of material parame-
+# ters, which are copied once to shared memory and given to the workers
+# as read-only arrays, instead of being copied to each worker. If the
+# build_function reads a msh mesh, it should give the 'cache_directory'
+# argument to read_msh_mesh, such that the mesh is parsed once and the
+# workers load the binary cache entry instead
+
+class RealizationShardingDriver:
+
+    def __init__(self, build_function, n_realizations, n_workers,
+    build_arguments=None, shared_arrays=None, threads_per_worker=None):
+
+        if n_workers<1 or n_workers>n_realizations:
+
+            raise ValueError("'n_workers' at 'RealizationShardingDrive"+
+            "r' is "+str(n_workers)+". It must be at least 1 and at mo"+
+            "st the number of realizations, "+str(n_realizations))
+
+        if build_arguments is None:
+
+            build_arguments = {}
+
+        if shared_arrays is None:
+
+            shared_arrays = {}
+
+        self.n_realizations = n_realizations
+
+        self.n_workers = n_workers
+
+        # Splits the realizations into contiguous slices of almost the
+        # same size
+
+        self.realization_indices = np.array_split(np.arange(
+        n_realizations), n_workers)
+
+        # Copies the shared arrays to blocks of shared memory
+
+        self.memory_blocks = []
+
+        shared_arrays_info = {}
+
+        for name, array in shared_arrays.items():
+
+            array = np.ascontiguousarray(array)
+
+            memory_block = shared_memory.SharedMemory(create=True, size=
+            max(array.nbytes, 1))
+
+            np.ndarray(array.shape, dtype=array.dtype, buffer=
+            memory_block.buf)[...] = array
+
+            self.memory_blocks.append(memory_block)
+
+            shared_arrays_info[name] = (memory_block.name, array.shape,
+            array.dtype.str)
+
+        # Starts the workers. The spawn method is used because tensor-
+        # flow is not safe to fork after its runtime is initialized
+
+        context = multiprocessing.get_context("spawn")
+
+        self.connections = []
+
+        self.workers = []
+
+        for indices in self.realization_indices:
+
+            driver_connection, worker_connection = context.Pipe()
+
+            worker = context.Process(target=run_worker, args=(
+            worker_connection, build_function, indices, build_arguments,
+            shared_arrays_info, threads_per_worker), daemon=True)
+
+            worker.start()
+
+            self.connections.append(driver_connection)
+
+            self.workers.append(worker)
+
+        # Waits for all workers to build their shards. If any of them
+        # fails, finishes the others before raising the error
+
+        try:
+
+            self.gather_results()
+
+        except Exception:
+
+            self.close()
+
+            raise
+
+    # Defines a function to receive the answers of all workers in the
+    # order of the shards
+
+    def gather_results(self):
+
+        results = []
+
+        error_messages = ""
+
+        for index, connection in enumerate(self.connections):
+
+            status, result = connection.recv()
+
+            if status=="error":
+
+                error_messages += ("\n\nWorker "+str(index)+" (realiza"+
+                "tions "+str(self.realization_indices[index].tolist())+
+                "):\n"+result)
+
+            results.append(result)
+
+        if len(error_messages)>0:
+
+            raise RuntimeError("The following workers failed at 'Reali"+
+            "zationShardingDriver':"+error_messages)
+
+        return results
+
+    # Defines a function to send a request to all workers. The argu-
+    # ments_function gets the realization indices of the shard and re-
+    # turns the tuple of arguments for that worker
+
+    def broadcast_request(self, method_name, arguments_function):
+
+        for indices, connection in zip(self.realization_indices,
+        self.connections):
+
+            connection.send((method_name, arguments_function(indices)))
+
+        return self.gather_results()
+
+    # Defines a function to evaluate the loss function and its gradient
+    # with respect to the whole vector of parameters [n_realizations,
+    # n_dofs]. The loss values of the shards are summed, which is the
+    # loss of all realizations for loss functions that sum over the re-
+    # alizations, whereas the gradients are concatenated along the axis
+    # of realizations
+
+    def evaluate_loss_and_gradient(self, vector_of_parameters):
+
+        vector_of_parameters = np.asarray(vector_of_parameters)
+
+        results = self.broadcast_request("evaluate_loss_and_gradient",
+        lambda indices: (vector_of_parameters[indices],))
+
+        loss = sum(result[0] for result in results)
+
+        return loss, np.concatenate([result[1] for result in results],
+        axis=0)
+
+    # Defines a function to evaluate the loss function of the agent mo-
+    # del and its gradient with respect to the weights of the network.
+    # The weights are a list of numpy arrays as given by get_weights of
+    # the keras model. The gradients of the shards are summed, i.e. all-
+    # reduced, because the weights are shared by all realizations
+
+    def evaluate_agent_loss_and_gradient(self, weights, model_input,
+    vector_of_parameters):
+
+        model_input = np.asarray(model_input)
+
+        vector_of_parameters = np.asarray(vector_of_parameters)
+
+        results = self.broadcast_request("evaluate_agent_loss_and_grad"+
+        "ient", lambda indices: (weights, model_input[indices],
+        vector_of_parameters[indices]))
+
+        loss = sum(result[0] for result in results)
+
+        gradients = [np.sum(np.stack(shard_gradients, axis=0), axis=0
+        ) for shard_gradients in zip(*[result[1] for result in (
+        results)])]
+
+        return loss, gradients
+
+    # Defines a function to finish the workers and to release the shared
+    # memory
+
+    def close(self):
+
+        for connection, worker in zip(self.connections, self.workers):
+
+            if worker.is_alive():
+
+                connection.send(("close", None))
+
+            worker.join()
+
+            connection.close()
+
+        self.connections = []
+
+        self.workers = []
+
+        for memory_block in self.memory_blocks:
+
+            memory_block.close()
+
+            memory_block.unlink()
+
+        self.memory_blocks = []
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exception_type, exception_value,
+    exception_traceback):
+
+        self.close()
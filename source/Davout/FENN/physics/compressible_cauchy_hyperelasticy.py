@@ -18,7 +18,8 @@ class CompressibleHyperelasticity:
     def __init__(self, mesh_data_class, constitutive_models_dict, 
     vector_of_parameters=None, global_residual_vector=None,
     traction_dictionary=None, boundary_conditions_dict=None, time=0.0, 
-    n_realizations=1, save_vector_of_parameters_in_class=True):
+    n_realizations=1, save_vector_of_parameters_in_class=True, 
+    jit_compile=False, mixed_precision=False, memory_budget_MB=None):
         
         # Verifies if there are realizations of the mesh and gathers im-
         # portant information, such as global number of DOFs and numeri-
@@ -28,6 +29,23 @@ class CompressibleHyperelasticity:
         ) = verify_mesh_realizations(mesh_data_class, n_realizations, 
         "Displacement", "CompressibleHyperelasticity")
 
+        # Verifies if the kinematics and the constitutive models are to
+        # be evaluated in single precision, while the global residual
+        # vector is accumulated in the double precision of the mesh
+
+        compute_dtype = None
+
+        if mixed_precision:
+
+            if self.dtype!=tf.float64:
+
+                raise ValueError("'mixed_precision' was asked in 'Comp"+
+                "ressibleHyperelasticity', but the mesh was read with "+
+                "the numerical type "+str(self.dtype)+". Mixed precis"+
+                "ion requires the mesh to be read with tf.float64")
+
+            compute_dtype = tf.float32
+
         # Creates a time object
 
         self.time = tf.Variable(time, dtype=self.dtype)
@@ -58,7 +76,9 @@ class CompressibleHyperelasticity:
         # vector due to the variation of the internal work
 
         self.internal_work_variation = CompressibleInternalWorkReferenceConfiguration(
-        n_realizations, constitutive_models_dict, mesh_data_class)
+        n_realizations, constitutive_models_dict, mesh_data_class,
+        compute_dtype=compute_dtype, jit_compile=jit_compile, 
+        memory_budget_MB=memory_budget_MB)
 
         # Instantiates the class to compute the parcel of the residual
         # vector due to the variation of the external work made by the
@@ -66,7 +86,21 @@ class CompressibleHyperelasticity:
 
         self.traction_work_variation = ReferentialTractionWork(
         n_realizations, traction_dictionary, mesh_data_class, "D"+
-        "isplacement", self.time)
+        "isplacement", self.time, jit_compile=jit_compile)
+
+        # If asked, compiles the whole evaluation of the residual with
+        # XLA. The functions are wrapped again per instance, since the
+        # class methods are compiled by the graph runtime only
+
+        if jit_compile:
+
+            self.evaluate_residual_vector = tf.function(
+            self.evaluate_residual_vector.python_function, jit_compile=
+            True)
+
+            self.evaluate_residual_tensor = tf.function(
+            self.evaluate_residual_tensor.python_function, jit_compile=
+            True)
 
         # Saves the vector of parameters if needed
 
@@ -124,4 +158,65 @@ class CompressibleHyperelasticity:
         self.traction_work_variation.assemble_residual_vector(
         global_residual_vector)
 
-        return global_residual_vector
\ No newline at end of file
+        return global_residual_vector
+
+    # Defines a function to compute the residual vector as a tensor, 
+    # without writing into the global residual variable. It is a pure
+    # function of the vector of parameters, thus, it can be differentia-
+    # ted in forward mode to get Jacobian-vector products
+
+    @tf.function
+    def evaluate_residual_tensor(self, vector_of_parameters):
+
+        # Gets the parcel of the variation of the internal work
+
+        residual_vector = (
+        self.internal_work_variation.evaluate_residual_tensor(
+        vector_of_parameters))
+
+        # Adds the parcel of the variation of the work due to surface 
+        # tractions. The tractions are evaluated when the boundary con-
+        # ditions are updated, thus, they are constant here
+
+        return (residual_vector+
+        self.traction_work_variation.evaluate_residual_tensor())
+
+    # Defines a function to compute the tangent matrix, i.e. the deriva-
+    # tive of the residual vector with respect to the vector of parame-
+    # ters. Returns a sparse tensor [n_realizations, n_dofs, n_dofs]. 
+    # The tractions are dead loads, thus, only the internal work contri-
+    # butes. Dirichlet boundary conditions are not applied to the matrix
+
+    def evaluate_tangent_matrix(self, vector_of_parameters):
+
+        # Builds the sparsity pattern at the first call
+
+        if self.internal_work_variation.tangent_indices is None:
+
+            self.internal_work_variation.build_tangent_sparsity_pattern(
+            self.global_number_dofs)
+
+        # Assembles the values of the nonzero entries [n_realizations,
+        # n_entries]
+
+        tangent_values = (
+        self.internal_work_variation.assemble_tangent_values(
+        vector_of_parameters))
+
+        # Creates the indices of the batched sparse tensor by pairing 
+        # each realization with the sparsity pattern
+
+        n_realizations = tangent_values.shape[0]
+
+        n_entries = self.internal_work_variation.tangent_number_of_entries
+
+        realization_indices = tf.repeat(tf.range(n_realizations, dtype=
+        tf.int64), n_entries)[:, None]
+
+        indices = tf.concat([realization_indices, tf.tile(
+        self.internal_work_variation.tangent_indices, [n_realizations, 
+        1])], axis=1)
+
+        return tf.sparse.SparseTensor(indices, tf.reshape(tangent_values,
+        [-1]), [n_realizations, self.global_number_dofs, 
+        self.global_number_dofs])
\ No newline at end of file
@@ -0,0 +1,98 @@
+# Routine to store methods to assemble local (element-level) contribu-
+# tions into global vectors
+
+import tensorflow as tf
+
+import numpy as np
+
+########################################################################
+#                            Assembly plans                            #
+########################################################################
+
+# Defines a class to store the plan to assemble a tensor of element con-
+# tributions [n_realizations, n_elements, n_nodes, n_dofs_per_node] in-
+# to a global vector [n_realizations, n_dofs]. The plan is built once
+# from the tensor of DOFs per element, and it is a sparse matrix [n_dofs,
+# n_local_entries] of ones with the entries sorted by global DOF, i.e.
+# in CSR order. Thus, the assembly is a single sparse-dense product, and
+# the memory of the plan does not scale with the number of realizations,
+# unlike the tensors of indices for scatter_nd_add. XLA does not compile
+# sparse-dense products, thus, if the plan is to be used inside a func-
+# tion compiled with jit_compile=True, the assembly is done by a segment
+# sum over the global DOFs instead
+
+class AssemblyPlan:
+
+    def __init__(self, dofs_per_element, number_of_dofs, float_dtype,
+    jit_compile=False):
+
+        # Flattens the tensor of DOFs per element in the same order as
+        # the element contributions are flattened
+
+        flat_dofs = np.asarray(dofs_per_element, dtype=np.int64).reshape(
+        -1)
+
+        self.number_of_entries = flat_dofs.shape[0]
+
+        self.number_of_dofs = number_of_dofs
+
+        # If the plan is to be compiled by XLA, saves the global DOF of 
+        # each local entry to be used as segment ids
+
+        if jit_compile:
+
+            self.segment_ids = tf.constant(flat_dofs, dtype=tf.int64)
+
+            self.appropriate_assembly = self.assemble_with_segment_sum
+
+            return
+
+        self.appropriate_assembly = self.assemble_with_sparse_product
+
+        # Gets the permutation that sorts the local entries by global
+        # DOF. The sort is stable to keep the order of the elements with-
+        # in each DOF
+
+        permutation = np.argsort(flat_dofs, kind="stable")
+
+        # Creates the sparse assembly matrix. Each row is a global DOF
+        # and each column is a local entry
+
+        self.assembly_matrix = tf.sparse.SparseTensor(np.stack([
+        flat_dofs[permutation], permutation], axis=1), tf.ones([
+        self.number_of_entries], dtype=float_dtype), [number_of_dofs,
+        self.number_of_entries])
+
+    # Defines a function to assemble the element contributions. Returns
+    # a tensor [n_realizations, n_dofs]
+
+    @tf.function
+    def __call__(self, element_contributions):
+
+        return self.appropriate_assembly(element_contributions)
+
+    # Defines a function to assemble the element contributions using the
+    # sparse assembly matrix
+
+    def assemble_with_sparse_product(self, element_contributions):
+
+        # Flattens the contributions to [n_realizations,
+        # n_local_entries], then, multiplies by the assembly matrix
+
+        return tf.transpose(tf.sparse.sparse_dense_matmul(
+        self.assembly_matrix, tf.reshape(element_contributions, [
+        tf.shape(element_contributions)[0], self.number_of_entries]),
+        adjoint_b=True))
+
+    # Defines a function to assemble the element contributions using a
+    # segment sum, which is compatible with XLA
+
+    def assemble_with_segment_sum(self, element_contributions):
+
+        # Flattens the contributions to [n_local_entries, n_realizati-
+        # ons], then, sums the entries of each global DOF
+
+        return tf.transpose(tf.math.unsorted_segment_sum(tf.transpose(
+        tf.reshape(element_contributions, [tf.shape(
+        element_contributions)[0], self.number_of_entries])),
+        self.segment_ids, self.number_of_dofs))
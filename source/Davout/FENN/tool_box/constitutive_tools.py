@@ -12,7 +12,7 @@ import tensorflow as tf
 
 class DeformationGradient:
 
-    def __init__(self, indexing_dofs_tensor, mesh_data, identity_tensor):
+    def __init__(self, indexing_dofs_tensor, shape_functions_derivatives):
         
         """
         Defines a class to compute the batched deformation gradient
@@ -20,31 +20,29 @@ class DeformationGradient:
         indexing_dofs_tensor: indices of DOFs of the global vector of 
         parameters as a tensor [n_elements, n_nodes, 3]
 
-        mesh_data: instance of a finite element class that has, in 
-        particular the tensor of derivatives of the shape functions 
-        with respect to the original coordinates (x, y, z) as a tensor
-        [n_elements, n_quadrature_points, n_nodes, 3]
-
-        identity_tensor: identity tensor as a tensor [n_elements, 
-        n_quadrature_points, 3, 3]
+        shape_functions_derivatives: tensor of derivatives of the shape
+        functions with respect to the original coordinates (x, y, z) as
+        a tensor [n_elements, n_quadrature_points, n_nodes, 3]; or as a
+        tensor [n_realizations, n_elements, n_quadrature_points, 
+        n_nodes, 3] if multiple realizations of the mesh were generated
         """
         
         self.indexing_dofs_tensor = indexing_dofs_tensor
 
-        self.identity_tensor = identity_tensor
+        self.shape_functions_derivatives = shape_functions_derivatives
 
-        # Mesh data can be a list if multiple realizations of the mesh
-        # were generated
+        # Creates the identity tensor [3, 3]. It is added to the dis-
+        # placement gradient by broadcasting, thus, it is never materia-
+        # lized with the dimensions of the elements
 
-        if isinstance(mesh_data, list):
+        self.identity_tensor = tf.eye(3, dtype=
+        shape_functions_derivatives.dtype)
 
-            # Gets the tensors of derivatives of shape functions across
-            # the realizations of the mesh and stacks them into a single
-            # tensor
+        # Verifies if the tensor of derivatives of the shape functions 
+        # has the realizations dimension, i.e. if multiple realizations 
+        # of the mesh were generated
 
-            self.shape_functions_derivatives = tf.stack([
-            single_mesh_data.shape_functions_derivatives for (
-            single_mesh_data) in mesh_data], axis=0)
+        if len(shape_functions_derivatives.shape)==5:
 
             # Sets the appropriate function to contract the tensor of 
             # derivatives of the shape functions with the DOFs of the
@@ -52,16 +50,14 @@ class DeformationGradient:
 
             self.appropriate_contraction = self.contract_multiple_meshes
 
-        # Otherwise, if there is a single mesh for all realizations of
-        # the BVP
+            # Saves the axis of the elements
 
-        else:
+            self.element_axis = 1
 
-            # Takes the tensor of derivatives of the shape functions di-
-            # rectly from the mesh data
+        # Otherwise, there is a single mesh for all realizations of the
+        # BVP
 
-            self.shape_functions_derivatives = (
-            mesh_data.shape_functions_derivatives)
+        else:
 
             # Sets the appropriate function to contract the tensor of 
             # derivatives of the shape functions with the DOFs of the
@@ -69,39 +65,128 @@ class DeformationGradient:
 
             self.appropriate_contraction = self.contract_single_mesh
 
+            # Saves the axis of the elements
+
+            self.element_axis = 0
+
     # Defines a function to contract the tensor of derivatives of the
     # shape functions with the tensor of DOFs of the field, in case of a
     # single mesh realization
 
     @tf.function
-    def contract_single_mesh(self, field_dofs):
+    def contract_single_mesh(self, shape_functions_derivatives, 
+    field_dofs):
 
-        return tf.einsum('eqnj,peni->peqij', 
-        self.shape_functions_derivatives, field_dofs)
+        return tf.einsum('eqnj,peni->peqij', shape_functions_derivatives,
+        field_dofs)
 
     # Defines a function to contract the tensor of derivatives of the
     # shape functions with the tensor of DOFs of the field, in case of 
     # multiple mesh realizations
 
     @tf.function
-    def contract_multiple_meshes(self, field_dofs):
+    def contract_multiple_meshes(self, shape_functions_derivatives, 
+    field_dofs):
 
-        return tf.einsum('peqnj,peni->peqij', 
-        self.shape_functions_derivatives, field_dofs)
+        return tf.einsum('peqnj,peni->peqij', shape_functions_derivatives,
+        field_dofs)
 
-    @tf.function
-    def compute_batched_deformation_gradient(self, vector_of_parameters):
+    # Defines a function to compute the deformation gradient given the 
+    # tensor of indices of the DOFs and the tensor of derivatives of the
+    # shape functions of a set of elements
+
+    def compute_deformation_gradient(self, vector_of_parameters, 
+    indexing_dofs_tensor, shape_functions_derivatives):
         
         # Gathers the vector of DOFs for this mesh. Uses axis=1 to ensure
         # that the gathering is done in the DOFs index, as the first in-
-        # dex is related to batching for multiple BVP instances
+        # dex is related to batching for multiple BVP instances. Casts
+        # the DOFs to the numerical type of the derivatives of the shape
+        # functions, which may be of lower precision than the vector of
+        # parameters in mixed precision
 
-        field_dofs = tf.gather(vector_of_parameters, 
-        self.indexing_dofs_tensor, axis=1)
+        field_dofs = tf.cast(tf.gather(vector_of_parameters, 
+        indexing_dofs_tensor, axis=1), shape_functions_derivatives.dtype)
 
         # Contracts the DOFs to get the material displacement gradient as 
         # a tensor [n_realizations, n_elements, n_quadrature_points, 3, 
         # 3]. Then, adds the identity tensor and returns
 
-        return (self.appropriate_contraction(field_dofs)+
-        self.identity_tensor)
\ No newline at end of file
+        return (self.appropriate_contraction(shape_functions_derivatives,
+        field_dofs)+self.identity_tensor)
+
+    # Defines a function to compute the deformation gradient of all ele-
+    # ments
+
+    @tf.function
+    def compute_batched_deformation_gradient(self, vector_of_parameters):
+
+        return self.compute_deformation_gradient(vector_of_parameters,
+        self.indexing_dofs_tensor, self.shape_functions_derivatives)
+
+    # Defines a function to compute the deformation gradient of a block
+    # of contiguous elements. The number of elements of the block must
+    # be an integer, so that the shape of the result is static, whereas
+    # the first element can be a tensor
+
+    @tf.function
+    def compute_block_deformation_gradient(self, vector_of_parameters,
+    first_element, number_of_elements):
+
+        return self.compute_deformation_gradient(vector_of_parameters,
+        get_block_of_elements(self.indexing_dofs_tensor, first_element,
+        number_of_elements, 0), get_block_of_elements(
+        self.shape_functions_derivatives, first_element, 
+        number_of_elements, self.element_axis))
+
+# Defines a function to get a block of contiguous elements of a tensor
+# along the axis of the elements. The indices are built as first_element
+# plus a range, thus, the size of the block is static
+
+def get_block_of_elements(tensor, first_element, number_of_elements, 
+element_axis):
+
+    return tf.gather(tensor, first_element+tf.range(number_of_elements),
+    axis=element_axis)
+
+########################################################################
+#                          Elasticity tensors                          #
+########################################################################
+
+# Defines a function to compute the first elasticity tensor, A_iJkL = 
+# dP_iJ/dF_kL, by forward automatic differentiation of a function that
+# evaluates the first Piola-Kirchhoff stress tensor. It is used for con-
+# stitutive models that do not provide an analytical expression
+
+def first_elasticity_tensor_by_automatic_differentiation(
+first_piola_kirchhoff, F):
+
+    # Initializes a list of the derivatives of P with respect to each 
+    # component F_kL
+
+    derivatives_list = []
+
+    for k in range(3):
+
+        for L in range(3):
+
+            # Creates the direction of the component F_kL
+
+            direction = tf.broadcast_to(tf.reshape(tf.one_hot((3*k)+L, 
+            9, dtype=F.dtype), [3, 3]), tf.shape(F))
+
+            # Differentiates P along this direction
+
+            with tf.autodiff.ForwardAccumulator(F, direction) as (
+            accumulator):
+                
+                P = first_piola_kirchhoff(F)
+
+            derivatives_list.append(accumulator.jvp(P))
+
+    # Stacks the derivatives as [..., 3, 3, 9], then, reshapes to the
+    # fourth order tensor [..., 3, 3, 3, 3]
+
+    A = tf.stack(derivatives_list, axis=-1)
+
+    return tf.reshape(A, tf.concat([tf.shape(A)[:-1], [3, 3]], axis=0))
@@ -131,6 +131,13 @@ class FixedSupportDirichletBC:
 
         pass
 
+    # Defines a function to get the prescribed values per unit of time. 
+    # The values are null at all times, thus, the rate is null as well
+
+    def get_values_per_unit_time(self):
+
+        return self.prescribed_values
+
 ########################################################################
 #                    Prescribed value and direction                    #
 ########################################################################
@@ -489,18 +496,26 @@ class PrescribedDirichletBC:
         # and creates a variable for the prescribed values
 
         self.prescribed_values = tf.Variable(tf.reshape(
-        self.appropriate_broadcaster(), [-1]))
+        self.appropriate_broadcaster(self.evaluate_load_instances()), [
+        -1]))
+
+    # Defines a function to get the list of values of the load instances
+    # at the current time
+
+    def evaluate_load_instances(self):
+
+        return [load_instance() for load_instance in (
+        self.list_of_load_instances)]
 
     # Defines a function to broadcast the tensor of prescribed values if
     # the same values are prescribed for all realizations
 
     @tf.function
-    def broadcast_same_values(self):
+    def broadcast_same_values(self, load_values):
 
-        # Gets the values by calling the loading classes
+        # Stacks the values of the loading classes
 
-        values = tf.reshape(tf.stack([load_instance() for (
-        load_instance) in self.list_of_load_instances], axis=0), [-1])
+        values = tf.reshape(tf.stack(load_values, axis=0), [-1])
 
         # Broadcasts the values across realizations
 
@@ -513,13 +528,12 @@ class PrescribedDirichletBC:
     # there is a prescribed value for each realization
 
     @tf.function
-    def broadcast_multiple_values(self):
+    def broadcast_multiple_values(self, load_values):
 
-        # Gets the values by calling the loading classes, and reshapes
-        # to match [n_realizations, n_prescribed_dofs]
+        # Stacks the values of the loading classes, and reshapes to 
+        # match [n_realizations, n_prescribed_dofs]
 
-        values = tf.reshape(tf.stack([load_instance() for (
-        load_instance) in self.list_of_load_instances], axis=0), [
+        values = tf.reshape(tf.stack(load_values, axis=0), [
         self.n_selected_realizations, self.n_prescribed_dofs])
 
         return values
@@ -533,4 +547,21 @@ class PrescribedDirichletBC:
         # ble for the prescribed values
 
         self.prescribed_values.assign(tf.reshape(
-        self.appropriate_broadcaster(), [-1]))
\ No newline at end of file
+        self.appropriate_broadcaster(self.evaluate_load_instances()), [
+        -1]))
+
+    # Defines a function to get the prescribed values per unit of time, 
+    # if all load curves are linear in time. Returns None otherwise, 
+    # then, the load curves must be evaluated at each update
+
+    def get_values_per_unit_time(self):
+
+        for load_instance in self.list_of_load_instances:
+
+            if not getattr(load_instance, "linear_in_time", False):
+
+                return None
+
+        return tf.reshape(self.appropriate_broadcaster([
+        load_instance.evaluate_value_per_unit_time() for (
+        load_instance) in self.list_of_load_instances]), [-1])
\ No newline at end of file
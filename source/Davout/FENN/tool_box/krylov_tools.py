@@ -0,0 +1,251 @@
+# Routine to store Krylov methods to solve batches of linear systems.
+# The first dimension of every tensor is the realization of the BVP,
+# i.e. the linear systems are solved in lockstep. The linear operator
+# and the preconditioner are functions that get a tensor [n_realizati-
+# ons, n_dofs] and return a tensor of the same shape, thus, the matri-
+# ces do not need to be assembled
+
+import tensorflow as tf
+
+########################################################################
+#                          Conjugate gradient                          #
+########################################################################
+
+# Defines a function to solve a batch of symmetric positive definite
+# linear systems A*x=b using the preconditioned conjugate gradient me-
+# thod. The realizations that are not active or that have converged
+# are frozen, i.e. their solution is not updated anymore
+
+def batched_conjugate_gradient(linear_operator, right_hand_side,
+preconditioner=None, active_realizations=None, relative_tolerance=1E-6,
+maximum_iterations=500):
+
+    # Sets the identity as preconditioner if none is given
+
+    if preconditioner is None:
+
+        preconditioner = tf.identity
+
+    # Gets the norm of the right hand side per realization
+
+    right_hand_side_norm = tf.norm(right_hand_side, axis=1)
+
+    # Sets all realizations as active if no information is given
+
+    if active_realizations is None:
+
+        active_realizations = tf.ones(tf.shape(right_hand_side_norm),
+        dtype=tf.bool)
+
+    # Initializes the solution as null, thus, the residual of the linear
+    # system is the right hand side itself
+
+    solution = tf.zeros_like(right_hand_side)
+
+    residual = right_hand_side
+
+    preconditioned_residual = preconditioner(residual)
+
+    search_direction = preconditioned_residual
+
+    residual_dot_preconditioned = tf.reduce_sum(residual*
+    preconditioned_residual, axis=1)
+
+    # Marks the realizations that do not need iterations, i.e. the inac-
+    # tive ones and the ones with null right hand side
+
+    converged = tf.logical_or(tf.logical_not(active_realizations),
+    right_hand_side_norm<=0.0)
+
+    # Initializes the counter of iterations per realization
+
+    n_iterations = tf.zeros(tf.shape(right_hand_side_norm), dtype=
+    tf.int32)
+
+    iteration = tf.constant(0)
+
+    while iteration<maximum_iterations and not tf.reduce_all(converged):
+
+        # Applies the linear operator to the search direction
+
+        operator_direction = linear_operator(search_direction)
+
+        # Evaluates the step size. The converged realizations get a null
+        # step
+
+        step_size = tf.where(converged, tf.zeros_like(
+        residual_dot_preconditioned), tf.math.divide_no_nan(
+        residual_dot_preconditioned, tf.reduce_sum(search_direction*
+        operator_direction, axis=1)))
+
+        # Updates the solution and the residual
+
+        solution += step_size[:, tf.newaxis]*search_direction
+
+        residual -= step_size[:, tf.newaxis]*operator_direction
+
+        # Counts this iteration for the realizations that were still
+        # running, then, verifies convergence
+
+        n_iterations += tf.cast(tf.logical_not(converged), tf.int32)
+
+        converged = tf.logical_or(converged, tf.norm(residual, axis=1)<=(
+        relative_tolerance*right_hand_side_norm))
+
+        # Updates the search direction
+
+        preconditioned_residual = preconditioner(residual)
+
+        new_residual_dot_preconditioned = tf.reduce_sum(residual*
+        preconditioned_residual, axis=1)
+
+        beta = tf.where(converged, tf.zeros_like(
+        residual_dot_preconditioned), tf.math.divide_no_nan(
+        new_residual_dot_preconditioned, residual_dot_preconditioned))
+
+        search_direction = (preconditioned_residual+(beta[:, tf.newaxis]*
+        search_direction))
+
+        residual_dot_preconditioned = new_residual_dot_preconditioned
+
+        iteration += 1
+
+    return solution, n_iterations
+
+########################################################################
+#                                GMRES                                 #
+########################################################################
+
+# Defines a function to solve a batch of general linear systems A*x=b
+# using the restarted GMRES method with right preconditioning. The
+# Arnoldi process of each cycle is unrolled, and the small least squa-
+# res problems are solved in batch at the end of each cycle. The reali-
+# zations that are not active or that have converged are frozen
+
+def batched_gmres(linear_operator, right_hand_side, preconditioner=None,
+active_realizations=None, relative_tolerance=1E-6, maximum_iterations=
+500, restart=20):
+
+    # Sets the identity as preconditioner if none is given
+
+    if preconditioner is None:
+
+        preconditioner = tf.identity
+
+    # Gets the norm of the right hand side per realization
+
+    right_hand_side_norm = tf.norm(right_hand_side, axis=1)
+
+    # Sets all realizations as active if no information is given
+
+    if active_realizations is None:
+
+        active_realizations = tf.ones(tf.shape(right_hand_side_norm),
+        dtype=tf.bool)
+
+    # Gets the number of restart cycles
+
+    maximum_cycles = max(1, -(-maximum_iterations//restart))
+
+    # Initializes the solution as null
+
+    solution = tf.zeros_like(right_hand_side)
+
+    # Marks the realizations that do not need iterations, i.e. the inac-
+    # tive ones and the ones with null right hand side
+
+    converged = tf.logical_or(tf.logical_not(active_realizations),
+    right_hand_side_norm<=0.0)
+
+    # Initializes the counter of iterations per realization
+
+    n_iterations = tf.zeros(tf.shape(right_hand_side_norm), dtype=
+    tf.int32)
+
+    # Creates the first vector of the canonical basis to build the right
+    # hand side of the least squares problems
+
+    first_basis_vector = tf.one_hot(0, restart+1, dtype=
+    right_hand_side.dtype)
+
+    cycle = tf.constant(0)
+
+    while cycle<maximum_cycles and not tf.reduce_all(converged):
+
+        # Evaluates the residual of the linear system at the beginning
+        # of the cycle and verifies convergence
+
+        residual = right_hand_side-linear_operator(solution)
+
+        residual_norm = tf.norm(residual, axis=1)
+
+        converged = tf.logical_or(converged, residual_norm<=(
+        relative_tolerance*right_hand_side_norm))
+
+        # Initializes the orthonormal basis of the Krylov subspace and
+        # the columns of the Hessenberg matrix
+
+        basis = [tf.math.divide_no_nan(residual, residual_norm[:,
+        tf.newaxis])]
+
+        hessenberg_columns = []
+
+        # Performs the Arnoldi process
+
+        for j in range(restart):
+
+            new_vector = linear_operator(preconditioner(basis[j]))
+
+            # Orthogonalizes the new vector against the basis using clas-
+            # sical Gram-Schmidt twice, to recover orthogonality in fi-
+            # nite precision
+
+            stacked_basis = tf.stack(basis, axis=1)
+
+            projections = tf.einsum('pkn,pn->pk', stacked_basis,
+            new_vector)
+
+            new_vector -= tf.einsum('pk,pkn->pn', projections,
+            stacked_basis)
+
+            corrections = tf.einsum('pkn,pn->pk', stacked_basis,
+            new_vector)
+
+            new_vector -= tf.einsum('pk,pkn->pn', corrections,
+            stacked_basis)
+
+            new_vector_norm = tf.norm(new_vector, axis=1)
+
+            # Saves the column of the Hessenberg matrix padded with zeros
+            # to the size restart+1
+
+            hessenberg_columns.append(tf.concat([projections+corrections,
+            new_vector_norm[:, tf.newaxis], tf.zeros([tf.shape(
+            new_vector)[0], restart-j-1], dtype=new_vector.dtype)],
+            axis=1))
+
+            basis.append(tf.math.divide_no_nan(new_vector,
+            new_vector_norm[:, tf.newaxis]))
+
+        # Solves the least squares problems [n_realizations, restart+1,
+        # restart]
+
+        coefficients = tf.linalg.lstsq(tf.stack(hessenberg_columns,
+        axis=2), (residual_norm[:, tf.newaxis]*first_basis_vector)[...,
+        tf.newaxis], fast=False)[..., 0]
+
+        # Updates the solution of the realizations that have not con-
+        # verged yet
+
+        correction = preconditioner(tf.einsum('pk,pkn->pn', coefficients,
+        tf.stack(basis[:restart], axis=1)))
+
+        solution += tf.where(converged[:, tf.newaxis], tf.zeros_like(
+        correction), correction)
+
+        n_iterations += restart*tf.cast(tf.logical_not(converged),
+        tf.int32)
+
+        cycle += 1
+
+    return solution, n_iterations
@@ -14,6 +14,46 @@ def get_inverse(tensor_to_be_inverted, identity_tensor):
 
     return tf.linalg.solve(tensor_to_be_inverted, identity_tensor)
 
+# Defines a function to evaluate the determinant of a batched tensor [
+# ..., 3, 3] by the rule of Sarrus. Unlike tf.linalg.det, it does not 
+# use a LU decomposition, thus, it can be compiled by XLA
+
+@tf.function
+def get_determinant_3x3(tensor):
+
+    return ((tensor[...,0,0]*((tensor[...,1,1]*tensor[...,2,2])-(tensor[
+    ...,1,2]*tensor[...,2,1])))-(tensor[...,0,1]*((tensor[...,1,0]*
+    tensor[...,2,2])-(tensor[...,1,2]*tensor[...,2,0])))+(tensor[...,0,2
+    ]*((tensor[...,1,0]*tensor[...,2,1])-(tensor[...,1,1]*tensor[...,2,0
+    ]))))
+
+# Defines a function to evaluate the cofactor of a batched tensor [..., 
+# 3, 3], i.e. det(A)*inv(A)^T. Like the determinant, it is evaluated in
+# closed form, thus, no identity tensor needs to be broadcast to solve a
+# linear system
+
+@tf.function
+def get_cofactor_3x3(tensor):
+
+    # Gets the rows of the cofactor
+
+    row_1 = tf.stack([(tensor[...,1,1]*tensor[...,2,2])-(tensor[...,1,2]*
+    tensor[...,2,1]), (tensor[...,1,2]*tensor[...,2,0])-(tensor[...,1,0]*
+    tensor[...,2,2]), (tensor[...,1,0]*tensor[...,2,1])-(tensor[...,1,1]*
+    tensor[...,2,0])], axis=-1)
+
+    row_2 = tf.stack([(tensor[...,0,2]*tensor[...,2,1])-(tensor[...,0,1]*
+    tensor[...,2,2]), (tensor[...,0,0]*tensor[...,2,2])-(tensor[...,0,2]*
+    tensor[...,2,0]), (tensor[...,0,1]*tensor[...,2,0])-(tensor[...,0,0]*
+    tensor[...,2,1])], axis=-1)
+
+    row_3 = tf.stack([(tensor[...,0,1]*tensor[...,1,2])-(tensor[...,0,2]*
+    tensor[...,1,1]), (tensor[...,0,2]*tensor[...,1,0])-(tensor[...,0,0]*
+    tensor[...,1,2]), (tensor[...,0,0]*tensor[...,1,1])-(tensor[...,0,1]*
+    tensor[...,1,0])], axis=-1)
+
+    return tf.stack([row_1, row_2, row_3], axis=-2)
+
 ########################################################################
 #                               Mappings                               #
 ########################################################################
@@ -2,6 +2,18 @@
 
 import tensorflow as tf
 
+import mmap
+
+import os
+
+import json
+
+import shutil
+
+import hashlib
+
+import tempfile
+
 import numpy as np
 
 from time import time
@@ -12,6 +24,8 @@ from ...PythonicUtilities.string_tools import string_toList
 
 from ..finite_elements.finite_element_dispatcher import dispatch_region_elements
 
+from ..finite_elements.elements_manager import automatic_import_finite_element_classes
+
 # Defines a class to inform mesh data
 
 class MshMeshData:
@@ -69,7 +83,7 @@ class GmshVersions:
 
 def read_msh_mesh(file_name, quadrature_degree, elements_per_field, 
 parent_directory=None, verbose=False, dtype=tf.float32, integer_dtype=
-tf.int32):
+tf.int32, cache_directory=None):
     
     # Verifies if file name is a list
 
@@ -88,7 +102,8 @@ tf.int32):
 
             meshes_list.append(reader_msh_mesh(file, quadrature_degree, 
             elements_per_field, parent_directory=parent_directory, 
-            verbose=verbose, dtype=dtype, integer_dtype=integer_dtype))
+            verbose=verbose, dtype=dtype, integer_dtype=integer_dtype,
+            cache_directory=cache_directory))
 
         # Returns the list
 
@@ -100,13 +115,14 @@ tf.int32):
 
         return reader_msh_mesh(file_name, quadrature_degree, 
         elements_per_field, parent_directory=parent_directory, verbose=
-        verbose, dtype=dtype, integer_dtype=integer_dtype)
+        verbose, dtype=dtype, integer_dtype=integer_dtype, 
+        cache_directory=cache_directory)
 
 # Defines a function to read a single mesh .msh
 
 def reader_msh_mesh(file_name, quadrature_degree, elements_per_field, 
 parent_directory=None, verbose=False, dtype=tf.float32, integer_dtype=
-tf.int32):
+tf.int32, cache_directory=None):
 
     # If the parent directory is None, get the parent path of the file 
     # where this function has been called
@@ -124,83 +140,119 @@ tf.int32):
 
     file_name = verify_path(parent_directory, file_name)
 
-    # Reads the msh file into a list of strings. Each element is a line
+    # If a cache directory is given, tries to load the mesh data and the
+    # dispatched finite elements from the binary cache of this mesh. The
+    # cache entry is identified by the content of the file and by the
+    # information used to dispatch the elements
 
-    start_time = time()
+    cache_path = None
 
-    lines_list = []
+    if cache_directory is not None:
 
-    try:
+        start_time = time()
+
+        cache_path = get_mesh_cache_path(file_name, cache_directory, 
+        quadrature_degree, elements_per_field, dtype, integer_dtype)
+
+        mesh_data_class = load_mesh_cache(cache_path, dtype, 
+        integer_dtype)
+
+        if mesh_data_class is not None:
+
+            if verbose:
 
-        with open(file_name, "r") as infile:
+                print("###############################################"+
+                "#########################\n#                         "+
+                "    Elapsed time                             #\n#####"+
+                "#####################################################"+
+                "##############\n")
 
-            for line in infile:
+                print("Loading the mesh from the binary cache took: "+
+                str(time()-start_time)+" s\n")
 
-                lines_list.append(line.strip())
+                print_mesh_summary(mesh_data_class)
+
+            return mesh_data_class
+
+    # Maps the msh file into memory instead of reading it into a list of
+    # strings. The sections are, then, scanned directly in the mapped 
+    # bytes and only the blocks of nodes and elements are copied to be 
+    # parsed in bulk
+
+    start_time = time()
+
+    try:
+
+        infile = open(file_name, "rb")
 
     except:
 
         raise FileNotFoundError("The file "+file_name+" was not found "+
         "while evaluating trying to read a msh mesh.")
 
-    lines_reading_time = time()-start_time
-    
-    # Gets the gmsh version with which the file was written
+    with infile, mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mapped_file:
 
-    gmsh_version, start_reading_at_index = read_gmsh_version(lines_list, 
-    0)
+        lines_reading_time = time()-start_time
+        
+        # Gets the gmsh version with which the file was written
 
-    # Instantiates the class of gmsh versions and verifies if the captu-
-    # red version is one of the allowed versions
+        gmsh_version, start_reading_at_index = read_gmsh_version(
+        mapped_file, 0)
 
-    version_info = GmshVersions().versions
+        # Instantiates the class of gmsh versions and verifies if the 
+        # captured version is one of the allowed versions
 
-    if gmsh_version in version_info:
+        version_info = GmshVersions().versions
 
-        # Captures only this version information
+        if gmsh_version in version_info:
 
-        version_info = version_info[gmsh_version]
+            # Captures only this version information
 
-    else:
+            version_info = version_info[gmsh_version]
 
-        raise NameError("The captured gmsh version is '"+str(gmsh_version
-        )+"', but it is not one of the allowed versions. See a list of"+
-        " the available versions:\n"+str(list(version_info.keys())))
+        else:
 
-    # Reads the physical groups. Gets the dictionaries of physical groups
-    # of names to tags
+            raise NameError("The captured gmsh version is '"+str(
+            gmsh_version)+"', but it is not one of the allowed version"+
+            "s. See a list of the available versions:\n"+str(list(
+            version_info.keys())))
 
-    start_time = time()
+        # Reads the physical groups. Gets the dictionaries of physical 
+        # groups of names to tags
 
-    (domain_physicalGroupsNameToTag, 
-    boundary_physicalGroupsNameToTag, start_reading_at_index
-    ) = read_physical_groups(lines_list, start_reading_at_index, 
-    start_key=version_info["physical groups"][0], end_key=version_info[
-    "physical groups"][1])
+        start_time = time()
 
-    physical_groups_reading_time = time()-start_time
+        (domain_physicalGroupsNameToTag, 
+        boundary_physicalGroupsNameToTag, start_reading_at_index
+        ) = read_physical_groups(mapped_file, start_reading_at_index, 
+        start_key=version_info["physical groups"][0], end_key=
+        version_info["physical groups"][1])
 
-    # Reads the node coordinates
+        physical_groups_reading_time = time()-start_time
 
-    start_time = time()
+        # Reads the node coordinates
 
-    nodes_coordinates, start_reading_at_index = read_nodes(lines_list,
-    start_reading_at_index, start_key=version_info["nodes"][0], end_key=
-    version_info["nodes"][1])
+        start_time = time()
 
-    nodes_reading_time = time()-start_time
-    
-    # Reads the finite elements connectivities
+        nodes_coordinates, start_reading_at_index = read_nodes(
+        mapped_file, start_reading_at_index, start_key=version_info[
+        "nodes"][0], end_key=version_info["nodes"][1])
 
-    start_time = time()
+        nodes_reading_time = time()-start_time
+        
+        # Reads the finite elements connectivities
 
-    (domain_connectivities, boundary_connectivities, 
-    start_reading_at_index) = read_elements(lines_list, 
-    start_reading_at_index, list(domain_physicalGroupsNameToTag.values()
-    ), list(boundary_physicalGroupsNameToTag.values()), start_key=
-    version_info["elements"][0], end_key=version_info["elements"][1])
+        start_time = time()
 
-    connectivities_reading_time = time()-start_time
+        (domain_connectivities, boundary_connectivities, 
+        start_reading_at_index) = read_elements(mapped_file, 
+        start_reading_at_index, list(
+        domain_physicalGroupsNameToTag.values()), list(
+        boundary_physicalGroupsNameToTag.values()), start_key=
+        version_info["elements"][0], end_key=version_info["elements"][1])
+
+        connectivities_reading_time = time()-start_time
 
     # Instantiates the class of mesh data and returns it
 
@@ -259,94 +311,135 @@ tf.int32):
         domain_dispatching_reading_time+boundary_dispatching_reading_time
         )+" s\n")
 
-        print("There are "+str(nodes_coordinates.shape[0])+" nodes in "+
-        "the mesh\n")
+        print_mesh_summary(mesh_data_class)
 
-        print("#######################################################"+
-        "#################\n#                        Domain physical g"+
-        "roups                        #\n#############################"+
-        "###########################################\n")
+    # Saves the mesh data and the dispatched finite elements into the
+    # binary cache
 
-        for name, tag in domain_physicalGroupsNameToTag.items():
+    if cache_path is not None:
 
-            print("Domain physical group name: "+str(name)+"; tag: "+str(
-            tag))
+        save_mesh_cache(mesh_data_class, cache_path)
 
-            for field, dictionary in mesh_data_class.domain_elements.items():
+    return mesh_data_class
 
-                print("    field '"+str(field)+"' has "+str(dictionary[
-                tag].number_elements)+" finite elements")
+# Defines a function to print the number of nodes and the number of fi-
+# nite elements per physical group of a mesh data class
 
-            print("")
+def print_mesh_summary(mesh_data_class):
 
-        print("\n#####################################################"+
-        "###################\n#                       Boundary physica"+
-        "l groups                       #\n###########################"+
-        "#############################################\n")
+    print("There are "+str(mesh_data_class.nodes_coordinates.shape[0])+
+    " nodes in the mesh\n")
 
-        for name, tag in boundary_physicalGroupsNameToTag.items():
+    print("#######################################################"+
+    "#################\n#                        Domain physical g"+
+    "roups                        #\n#############################"+
+    "###########################################\n")
 
-            print("Boundary physical group name: "+str(name)+"; tag: "+
-            str(tag))
+    for name, tag in (
+    mesh_data_class.domain_physicalGroupsNameToTag.items()):
 
-            for field, dictionary in mesh_data_class.boundary_elements.items():
+        print("Domain physical group name: "+str(name)+"; tag: "+str(
+        tag))
 
-                print("    field '"+str(field)+"' has "+str(dictionary[
-                tag].number_elements)+" finite elements")
+        for field, dictionary in mesh_data_class.domain_elements.items():
 
-            print("")
+            print("    field '"+str(field)+"' has "+str(dictionary[
+            tag].number_elements)+" finite elements")
 
-    return mesh_data_class
+        print("")
 
-# Defines a function to read the bit about the Gmsh output file version
+    print("\n#####################################################"+
+    "###################\n#                       Boundary physica"+
+    "l groups                       #\n###########################"+
+    "#############################################\n")
 
-def read_gmsh_version(lines_list, start_reading_at_index, start_key=
-"$MeshFormat", end_key="$EndMeshFormat"):
+    for name, tag in (
+    mesh_data_class.boundary_physicalGroupsNameToTag.items()):
 
-    # Initializes a variable with the gmsh version 
+        print("Boundary physical group name: "+str(name)+"; tag: "+
+        str(tag))
 
-    gmsh_version = None
+        for field, dictionary in mesh_data_class.boundary_elements.items():
 
-    # Initializes a flag to tell if reading is allowed already
+            print("    field '"+str(field)+"' has "+str(dictionary[
+            tag].number_elements)+" finite elements")
 
-    flag_reading = False
+        print("")
 
-    # Iterates through the lines
+# Defines a function to find a section of the msh file delimited by a 
+# start key and an end key. The mapped file is scanned from the given
+# position on, and the bytes between the line of the start key and the
+# end key are returned together with the position right after the end 
+# key
 
-    for i in range(start_reading_at_index, len(lines_list)):
+def get_msh_section(mapped_file, start_reading_at_index, start_key, 
+end_key):
 
-        # Gets the line
+    # Finds the start key
 
-        line = lines_list[i]
+    start_position = mapped_file.find(start_key.encode(), 
+    start_reading_at_index)
 
-        # Verifies if reading is not allowed yet
+    if start_position==-1:
 
-        if not flag_reading:
+        raise KeyError("The key '"+str(start_key)+"' was not found in "+
+        "the msh file")
+    
+    # Jumps to the line after the start key
+
+    start_position = mapped_file.find(b"\n", start_position)+1
+
+    # Finds the end key
+
+    end_position = mapped_file.find(end_key.encode(), start_position)
+
+    if end_position==-1:
+
+        raise KeyError("The key '"+str(end_key)+"' was not found in th"+
+        "e msh file after the key '"+str(start_key)+"'")
+    
+    # Returns the section and the position to keep on reading
+
+    return (mapped_file[start_position:end_position], end_position+len(
+    end_key))
+
+# Defines a function to split the first line of a section, which holds 
+# the number of entities (nodes or elements) in the section, from the
+# block of numerical data
 
-            # Verifies if this line is equal to the start key
+def split_count_from_section(section):
 
-            if isinstance(line, str) and line==start_key:
+    # Finds the end of the first line
 
-                # Updates the flag reading to allow for reading
+    first_line_end = section.find(b"\n")
 
-                flag_reading = True
+    if first_line_end==-1:
 
-            continue
+        first_line_end = len(section)
 
-        # Verifies if the end key has been reached
+    # Returns the number of entities and the numerical block
 
-        elif isinstance(line, str) and line==end_key:
+    return int(section[:first_line_end]), section[(first_line_end+1):]
 
-            # Modifies the start index for the next index
+# Defines a function to read the bit about the Gmsh output file version
 
-            start_reading_at_index = i+1
+def read_gmsh_version(mapped_file, start_reading_at_index, start_key=
+"$MeshFormat", end_key="$EndMeshFormat"):
 
-            break 
+    # Gets the section of the file format
 
-        gmsh_version = line
+    section, start_reading_at_index = get_msh_section(mapped_file, 
+    start_reading_at_index, start_key, end_key)
 
-        #gmsh_version = str(line[0])+" "+str(int(line[1]))+" "+str(int(
-        #line[2]))
+    # Takes the last non-empty line as the gmsh version
+
+    gmsh_version = None
+
+    for line in section.decode().splitlines():
+
+        if len(line.strip())>0:
+
+            gmsh_version = line.strip()
 
     return gmsh_version, start_reading_at_index
     
@@ -354,7 +447,7 @@ def read_gmsh_version(lines_list, start_reading_at_index, start_key=
 # a dictionary of domain physical groups names to tags and another to 
 # boundary information
 
-def read_physical_groups(lines_list, start_reading_at_index, start_key=
+def read_physical_groups(mapped_file, start_reading_at_index, start_key=
 "$PhysicalNames", end_key="$EndPhysicalNames"):
 
     # Initializes a dictionary where the keys corresponds to the topolo-
@@ -364,41 +457,17 @@ def read_physical_groups(lines_list, start_reading_at_index, start_key=
 
     physical_groups_dicts = {}
 
-    # Initializes a flag to tell if reading is allowed already
+    # Gets the section of physical groups. It is small, thus, it can be
+    # read line by line
 
-    flag_reading = False
+    section, start_reading_at_index = get_msh_section(mapped_file, 
+    start_reading_at_index, start_key, end_key)
 
     # Iterates through the lines
 
-    for i in range(start_reading_at_index, len(lines_list)):
-
-        # Gets the line
-
-        line = lines_list[i]
-
-        # Verifies if reading is not allowed yet
-
-        if not flag_reading:
-
-            # Verifies if this line is equal to the start key
-
-            if isinstance(line, str) and line==start_key:
-
-                # Updates the flag reading to allow for reading
-
-                flag_reading = True
-
-            continue
+    for line in section.decode().splitlines():
 
-        # Verifies if the end key has been reached
-
-        elif isinstance(line, str) and line==end_key:
-
-            # Modifies the start index for the next index
-
-            start_reading_at_index = i+1
-
-            break 
+        line = line.strip()
 
         # Iterates through the line looking for '"", that tell a physi-
         # cal group name
@@ -473,185 +542,191 @@ def read_physical_groups(lines_list, start_reading_at_index, start_key=
     return (domain_physicalGroupsNameToTag, 
     boundary_physicalGroupsNameToTag, start_reading_at_index)
     
-# Defines a function to read the bit about nodes. The output is a list of
-# lists, where each list corresponds to a node with that index and the 
-# components are the coordinates
+# Defines a function to read the bit about nodes. The output is an array
+# [n_nodes, 3], where each row corresponds to a node with that index and
+# the columns are the coordinates
 
-def read_nodes(lines_list, start_reading_at_index, start_key="$Nodes", 
+def read_nodes(mapped_file, start_reading_at_index, start_key="$Nodes", 
 end_key="$EndNodes"):
 
-    # Initializes a list of nodes
+    # Gets the block of nodes and the number of nodes
 
-    nodes_coordinates = None
+    section, start_reading_at_index = get_msh_section(mapped_file, 
+    start_reading_at_index, start_key, end_key)
 
-    number_of_nodes = None
+    number_of_nodes, section = split_count_from_section(section)
 
-    # Initializes a flag to tell if reading is allowed already
+    # Parses the whole block at once. Each line has the node tag and 
+    # the three coordinates
 
-    flag_reading = False
+    nodes_block = np.fromstring(section, dtype=float, sep=" ")
 
-    # Iterates through the lines
+    if nodes_block.shape[0]!=(4*number_of_nodes):
 
-    for i in range(start_reading_at_index, len(lines_list)):
+        raise ValueError("The msh file says there are "+str(
+        number_of_nodes)+" nodes, but "+str(nodes_block.shape[0]/4)+" "+
+        "nodes were read. Each node line must have the node tag and th"+
+        "ree coordinates")
 
-        # Gets the line
+    nodes_block = nodes_block.reshape(number_of_nodes, 4)
 
-        line = lines_list[i]
+    # Gets the node tags and subtracts 1 to make them compatible with 
+    # python indexing
 
-        # Verifies if reading is not allowed yet
+    nodes_tags = nodes_block[:,0].astype(int)-1
 
-        if not flag_reading:
+    # Scatters the coordinates into a preallocated array using the node
+    # tags as rows
 
-            # Verifies if this line is equal to the start key
+    nodes_coordinates = np.zeros((np.max(nodes_tags)+1, 3))
 
-            if line==start_key:
+    nodes_coordinates[nodes_tags] = nodes_block[:,1:4]
 
-                # Updates the flag reading to allow for reading
+    return nodes_coordinates, start_reading_at_index
+    
+# Defines a function to read the bit about finite element connectivity. 
+# The output is a dictionary of physical groups tags, whose values are 
+# dictionaries of element types whose values are arrays [n_elements, 
+# n_nodes] of node numbers (subtracts one off the number given by Gmsh 
+# to compatibilize with python indexing)
 
-                flag_reading = True
+def read_elements(mapped_file, start_reading_at_index, 
+domain_physical_groups_tags, boundary_physical_groups_tags, start_key=
+"$Elements", end_key="$EndElements"):
 
-            continue
+    # Gets the block of elements and the number of elements
 
-        # Verifies if the end key has been reached
+    section, start_reading_at_index = get_msh_section(mapped_file, 
+    start_reading_at_index, start_key, end_key)
 
-        elif line==end_key:
+    number_of_elements, section = split_count_from_section(section)
 
-            # Modifies the start index for the next index
+    # Parses the whole block at once into a flat array. Each line has the
+    # element tag, the element type, the number of tags, the tags (the
+    # first one is the physical group) and the nodes
 
-            start_reading_at_index = i+1
+    elements_block = np.fromstring(section, dtype=int, sep=" ")
 
-            break 
+    # As the number of nodes changes with the element type, counts the
+    # number of entries per line using the bytes of the block. An entry
+    # starts at a character that is not blank and that follows a blank
 
-        # Transforms this line to a list to get the different informa-
-        # tion readily available, and independently
+    section_bytes = np.frombuffer(section, dtype=np.uint8)
 
-        line_info = string_toList("["+line+"]", element_separator=" ")
+    not_blank = section_bytes>32
 
-        # Otherwise it is the number of nodes
+    entries_starts = np.flatnonzero(not_blank[1:] & (~not_blank[:-1]))+1
 
-        if len(line_info)==1:
+    if not_blank.shape[0]>0 and not_blank[0]:
 
-            number_of_nodes = line_info[0]
+        entries_starts = np.concatenate(([0], entries_starts))
 
-            nodes_coordinates = np.zeros((number_of_nodes, 3))
+    # Counts the entries up to the end of each line
 
-            start_reading_at_index = i+1
+    lines_ends = np.flatnonzero(section_bytes==10)
 
-            break
+    if lines_ends.shape[0]==0 or lines_ends[-1]!=(
+    section_bytes.shape[0]-1):
 
-    # Converts the read lines to lists and then to an array of node co-
-    # ordinates
+        lines_ends = np.concatenate((lines_ends, [
+        section_bytes.shape[0]]))
 
-    numerical_lines = [np.fromstring(line.strip(), sep=" ")[1:4] for (
-    line) in lines_list[start_reading_at_index:(start_reading_at_index+
-    number_of_nodes)]]
+    entries_per_line = np.diff(np.concatenate(([0], np.searchsorted(
+    entries_starts, lines_ends))))
 
-    nodes_coordinates = np.asarray(numerical_lines, dtype=float)
+    # Discards empty lines
 
-    return nodes_coordinates, start_reading_at_index+number_of_nodes
-    
-# Defines a function to read the bit about finite element connectivity. 
-# The output is a list of lists, where each list corresponds to a finite
-# element with that index, and the components are the node numbers (sub-
-# tracts one off the number given by Gmsh to compatibilize with python
-# indexing)
-
-def read_elements(lines_list, start_reading_at_index, 
-domain_physical_groups_tags, boundary_physical_groups_tags, start_key=
-"$Elements", end_key="$EndElements"):
-
-    # Initializes a flag to tell if reading is allowed already
-
-    flag_reading = False
+    entries_per_line = entries_per_line[entries_per_line>0]
 
-    # Iterates through the lines
+    if entries_per_line.shape[0]!=number_of_elements:
 
-    initial_index = 0
+        raise ValueError("The msh file says there are "+str(
+        number_of_elements)+" elements, but "+str(
+        entries_per_line.shape[0])+" elements were read")
 
-    for i in range(start_reading_at_index, len(lines_list)):
+    # Gets the position of the first entry of each line in the flat ar-
+    # ray
 
-        # Gets the line
+    lines_starts = np.cumsum(entries_per_line)-entries_per_line
 
-        line = lines_list[i]
+    # Gets the element type, the number of tags and the physical group 
+    # tag of all elements at once
 
-        # Verifies if reading is not allowed yet
+    elements_types = elements_block[lines_starts+1]
 
-        if not flag_reading:
+    number_of_tags = elements_block[lines_starts+2]
 
-            # Verifies if this line is equal to the start key
+    physical_groups_tags = elements_block[lines_starts+3]
 
-            if line==start_key:
+    # Gets the position of the first node of each element and the num-
+    # ber of nodes of each element
 
-                # Updates the flag reading to allow for reading
+    nodes_starts = lines_starts+3+number_of_tags
 
-                flag_reading = True
+    number_of_nodes = entries_per_line-3-number_of_tags
 
-                initial_index = i+1
+    # Separates the connectivity dictionaries into domain and boundary
 
-            continue
+    domain_connectivity = dict()
 
-        # Verifies if the end key has been reached
+    boundary_connectivity = dict()
 
-        elif line==end_key:
+    # Gets the physical groups in the order they first appear in the 
+    # file, so that the DOF numbering follows the element ordering 
 
-            # Modifies the start index for the next index
+    _, first_appearances = np.unique(physical_groups_tags, return_index=
+    True)
 
-            start_reading_at_index = i+1
+    # Iterates through the physical groups
 
-            break 
+    for physical_group_tag in physical_groups_tags[np.sort(
+    first_appearances)]:
 
-    # Creates a dictionary of connectivity
+        physical_group_tag = int(physical_group_tag)
 
-    connectivity_dict = {}
+        # Creates a mask for the elements of this physical group
 
-    # Iterates over the lines
+        physical_group_mask = physical_groups_tags==physical_group_tag
 
-    for line in lines_list[initial_index:start_reading_at_index]:
+        # Sets a dictionary such as {element_type: 
+        # array_of_connectivities}
 
-        # Converts the line to an array
+        elements_dictionary = dict()
 
-        line_array = np.fromstring(line.strip(), sep=" ", dtype=int)
+        physical_group_types = elements_types[physical_group_mask]
 
-        # If the line has length of 1, it tells the number of elements
-        # only
+        _, first_appearances = np.unique(physical_group_types, 
+        return_index=True)
 
-        if len(line_array)<=1: 
+        for element_type in physical_group_types[np.sort(
+        first_appearances)]:
             
-            continue
-
-        # Gets the physical group tag and element type tag
+            element_type = int(element_type)
 
-        physical_group_tag = line_array[3]
+            # Creates a mask for the elements of this type in this phy-
+            # sical group
 
-        element_type = line_array[1]
+            element_mask = physical_group_mask & (elements_types==
+            element_type)
 
-        # Gets the indices of the node of this element, subtracts 1 to
-        # make them compatible with python ordering
+            # Verifies if the elements have the same number of nodes
 
-        nodes_indices = line_array[5:] - 1
+            element_number_of_nodes = np.unique(number_of_nodes[
+            element_mask])
 
-        # Sets a dictionary such as {physical_group_tag: {element_type:
-        # array_of_connectivities}}
+            if element_number_of_nodes.shape[0]!=1:
 
-        connectivity_dict.setdefault(physical_group_tag, {}).setdefault(
-        element_type, []).append(nodes_indices)
+                raise ValueError("The elements of type "+str(
+                element_type)+" at physical group "+str(
+                physical_group_tag)+" have different numbers of nodes:"+
+                " "+str(element_number_of_nodes))
 
-    # Separates the connectivity dictionaries into domain and boundary
-
-    domain_connectivity = dict()
-
-    boundary_connectivity = dict()
-
-    # Iterates through the physical groups
-    
-    for physical_group_tag, elements_dictionary in connectivity_dict.items():
-
-        # Converts the connectivities to a proper numpy integer array
+            # Gathers the indices of the nodes of these elements, sub-
+            # tracts 1 to make them compatible with python ordering
 
-        for element_type, connectivity in elements_dictionary.items():
-            
-            elements_dictionary[element_type] = np.array(connectivity, 
-            dtype=int)
+            elements_dictionary[element_type] = (elements_block[
+            nodes_starts[element_mask][:,None]+np.arange(
+            element_number_of_nodes[0])[None,:]]-1)
 
         # Verifies if the physical group tag is one of the domain's
 
@@ -674,4 +749,275 @@ domain_physical_groups_tags, boundary_physical_groups_tags, start_key=
             "\nand for boundary:\n"+str(boundary_physical_groups_tags))
 
     return (domain_connectivity, boundary_connectivity, 
-    start_reading_at_index)
\ No newline at end of file
+    start_reading_at_index)
+
+########################################################################
+#                          Binary mesh caching                         #
+########################################################################
+
+# Defines the version of the layout of the binary cache. It must be in-
+# creased whenever the layout changes, so that old entries are not read
+
+mesh_cache_version = 1
+
+# Defines a function to get the path to the cache entry of a mesh. The 
+# name of the entry is a hash of the content of the msh file and of the
+# information used to dispatch the finite elements
+
+def get_mesh_cache_path(file_name, cache_directory, quadrature_degree,
+elements_per_field, dtype, integer_dtype):
+
+    # Hashes the content of the file in chunks to not load it whole
+
+    file_hash = hashlib.sha256()
+
+    with open(file_name, "rb") as infile:
+
+        for chunk in iter(lambda: infile.read(1048576), b""):
+
+            file_hash.update(chunk)
+
+    # Adds the dispatching information to the hash
+
+    file_hash.update(json.dumps([mesh_cache_version, quadrature_degree,
+    elements_per_field, tf.as_dtype(dtype).name, tf.as_dtype(
+    integer_dtype).name], sort_keys=True, default=str).encode())
+
+    # Names the entry after the mesh file and the hash
+
+    entry_name = (os.path.basename(take_outFileNameTermination(file_name)
+    )+"_"+file_hash.hexdigest()[:32])
+
+    return verify_path(cache_directory, entry_name)
+
+# Defines a function to save the mesh data class and the dispatched fi-
+# nite elements into a cache entry. Each array is saved as a .npy file, 
+# such that it can be memory mapped when read. The entry is written to a
+# temporary directory and, then, renamed, so that other processes never
+# see an incomplete entry
+
+def save_mesh_cache(mesh_data_class, cache_path):
+
+    # If the entry has already been written by another process, there is
+    # nothing to do
+
+    if os.path.isdir(cache_path):
+
+        return
+
+    temporary_path = tempfile.mkdtemp(prefix=".writing_", dir=
+    os.path.dirname(os.path.abspath(cache_path)))
+
+    # Initializes the dictionary of information that is not an array
+
+    metadata = {"domain physical groups": 
+    mesh_data_class.domain_physicalGroupsNameToTag, "boundary physical"+
+    " groups": mesh_data_class.boundary_physicalGroupsNameToTag, "quad"+
+    "rature degree": mesh_data_class.quadrature_degree, "global number"+
+    " of DOFs": int(mesh_data_class.global_number_dofs), "connectivit"+
+    "ies": [], "DOFs per node": [], "elements": []}
+
+    # Initializes a counter of saved arrays to name the files
+
+    arrays_counter = [0]
+
+    # Defines a function to save an array and to return the name of its
+    # file
+
+    def save_array(array):
+
+        array_file = "array_"+str(arrays_counter[0])+".npy"
+
+        np.save(os.path.join(temporary_path, array_file), np.asarray(
+        array))
+
+        arrays_counter[0] += 1
+
+        return array_file
+
+    try:
+
+        # Saves the node coordinates
+
+        metadata["nodes coordinates"] = save_array(
+        mesh_data_class.nodes_coordinates)
+
+        # Saves the connectivities as a list of [region, physical group 
+        # tag, element type, file]
+
+        for region, connectivities in [["domain", 
+        mesh_data_class.domain_connectivities], ["boundary", 
+        mesh_data_class.boundary_connectivities]]:
+
+            for physical_group_tag, elements_dictionary in (
+            connectivities.items()):
+
+                for element_type, connectivity in (
+                elements_dictionary.items()):
+                    
+                    metadata["connectivities"].append([region, int(
+                    physical_group_tag), int(element_type), save_array(
+                    connectivity)])
+
+        # Saves the DOFs per node of each field
+
+        for field_name, dofs_node_array in (
+        mesh_data_class.dofs_node_dict.items()):
+
+            metadata["DOFs per node"].append([field_name, save_array(
+            dofs_node_array)])
+
+        # Saves the attributes of the dispatched finite elements. Tensors
+        # are saved as arrays, whereas numerical types and plain values
+        # are saved into the metadata
+
+        for region, elements_dictionaries in [["domain", 
+        mesh_data_class.domain_elements], ["boundary", 
+        mesh_data_class.boundary_elements]]:
+
+            for field_name, elements_dictionary in (
+            elements_dictionaries.items()):
+
+                for physical_group_tag, element in (
+                elements_dictionary.items()):
+
+                    element_info = {"region": region, "field name": 
+                    field_name, "physical group tag": int(
+                    physical_group_tag), "class name": type(element
+                    ).__name__, "tensors": {}, "types": {}, "values": {}}
+
+                    for attribute_name, value in vars(element).items():
+
+                        if tf.is_tensor(value) or isinstance(value, 
+                        tf.Variable):
+                            
+                            element_info["tensors"][attribute_name] = [
+                            save_array(value.numpy()), value.dtype.name]
+
+                        elif isinstance(value, tf.DType):
+
+                            element_info["types"][attribute_name] = (
+                            value.name)
+
+                        elif isinstance(value, (bool, int, float, str)):
+
+                            element_info["values"][attribute_name] = value
+
+                        else:
+
+                            raise TypeError("The attribute '"+str(
+                            attribute_name)+"' of the finite element c"+
+                            "lass '"+str(type(element).__name__)+"' ca"+
+                            "nnot be saved into the binary mesh cache."+
+                            " Only tensors, numerical types and plain "+
+                            "values can be saved")
+
+                    metadata["elements"].append(element_info)
+
+        # Writes the metadata as the last file, then, publishes the entry
+
+        with open(os.path.join(temporary_path, "metadata.json"), "w"
+        ) as outfile:
+
+            json.dump(metadata, outfile)
+
+        os.rename(temporary_path, cache_path)
+
+    # If the entry could not be saved or another process has published
+    # it in the meantime, discards the temporary directory. The cache is
+    # an acceleration only, thus, it must not stop the reading
+
+    except OSError:
+
+        shutil.rmtree(temporary_path, ignore_errors=True)
+
+    except TypeError:
+
+        shutil.rmtree(temporary_path, ignore_errors=True)
+
+        raise
+
+# Defines a function to load the mesh data class and the dispatched fi-
+# nite elements from a cache entry. The arrays are memory mapped in read
+# only mode, but they are copied into tensors, thus, each process holds
+# its own copy of the mesh. The cache spares the parsing of the msh fi-
+# le and the dispatching of the finite elements only. Returns None if 
+# there is no entry
+
+def load_mesh_cache(cache_path, dtype, integer_dtype):
+
+    metadata_file = os.path.join(cache_path, "metadata.json")
+
+    if not os.path.isfile(metadata_file):
+
+        return None
+    
+    with open(metadata_file, "r") as infile:
+
+        metadata = json.load(infile)
+
+    # Defines a function to memory map a saved array
+
+    def load_array(array_file):
+
+        return np.load(os.path.join(cache_path, array_file), mmap_mode=
+        "r")
+
+    # Recovers the connectivities
+
+    connectivities = {"domain": dict(), "boundary": dict()}
+
+    for region, physical_group_tag, element_type, array_file in (
+    metadata["connectivities"]):
+        
+        connectivities[region].setdefault(physical_group_tag, dict())[
+        element_type] = load_array(array_file)
+
+    # Instantiates the mesh data class
+
+    mesh_data_class = MshMeshData(load_array(metadata["nodes coordinat"+
+    "es"]), metadata["domain physical groups"], metadata["boundary phy"+
+    "sical groups"], connectivities["domain"], connectivities["boundar"+
+    "y"], metadata["quadrature degree"], dtype, integer_dtype, 
+    global_number_dofs=metadata["global number of DOFs"], 
+    dofs_node_dict={field_name: load_array(array_file) for (field_name,
+    array_file) in metadata["DOFs per node"]})
+
+    # Recovers the finite elements without calling their constructors,
+    # for the shape functions, their derivatives and the integration 
+    # measures were already computed
+
+    finite_elements_classes = {class_object.__name__: class_object for (
+    class_object) in set(automatic_import_finite_element_classes(
+    ).values())}
+
+    elements = {"domain": dict(), "boundary": dict()}
+
+    for element_info in metadata["elements"]:
+
+        element_class = finite_elements_classes[element_info["class name"]]
+
+        element = element_class.__new__(element_class)
+
+        for attribute_name, (array_file, tensor_dtype) in element_info[
+        "tensors"].items():
+            
+            setattr(element, attribute_name, tf.convert_to_tensor(
+            load_array(array_file), dtype=tensor_dtype))
+
+        for attribute_name, type_name in element_info["types"].items():
+
+            setattr(element, attribute_name, tf.as_dtype(type_name))
+
+        for attribute_name, value in element_info["values"].items():
+
+            setattr(element, attribute_name, value)
+
+        elements[element_info["region"]].setdefault(element_info["fiel"+
+        "d name"], dict())[element_info["physical group tag"]] = element
+
+    mesh_data_class.domain_elements = elements["domain"]
+
+    mesh_data_class.boundary_elements = elements["boundary"]
+
+    return mesh_data_class
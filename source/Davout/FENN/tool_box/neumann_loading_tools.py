@@ -7,6 +7,10 @@ import numpy as np
 
 from .tensorflow_utilities import convert_object_to_tensor
 
+from ..tool_box import parametric_curves_tools
+
+from ...PythonicUtilities.package_tools import load_classes_from_module
+
 ########################################################################
 #                            Traction vector                           #
 ########################################################################
@@ -155,12 +159,58 @@ class TractionVectorOnSurface:
 
         self.n_quadrature_points = (
         self.mesh_realizations_common_info.number_quadrature_points)
+
+        # Verifies if a parametric curve is asked for. In this case, the
+        # amplitudes are the values at the final time, and the traction
+        # follows the load curve. Otherwise, the traction is constant in
+        # time
+
+        self.load_instance = None
+
+        if "load_function" in traction_information:
+
+            self.load_instance = get_load_curve_instance(
+            traction_information, physical_group_name, time,
+            self.traction_vector, "TractionVectorOnSurface")
+
+        # Flags whether the traction tensor must be computed again when
+        # the loads are updated, i.e. if the load curve is not linear in
+        # time. A linear load curve is scaled by the time instead
+
+        self.recompute_at_update = ((self.load_instance is not None
+        ) and (not getattr(self.load_instance, "linear_in_time", False
+        )))
         
         # Calls the method to build the traction tensor if required
 
         self.traction_tensor = tf.Variable(tf.broadcast_to(
-        self.traction_vector, [self.n_realizations, self.n_elements,
-        self.n_quadrature_points, 3]))
+        self.evaluate_traction_vector(), [self.n_realizations, 
+        self.n_elements, self.n_quadrature_points, 3]))
+
+    # Defines a function to get the traction vector at the current time
+
+    def evaluate_traction_vector(self):
+
+        if self.load_instance is None:
+
+            return self.traction_vector
+
+        return self.load_instance()
+
+    # Defines a function to get the traction tensor per unit of time, if
+    # the traction follows a load curve linear in time. Returns None o-
+    # therwise
+
+    def get_traction_per_unit_time(self):
+
+        if (self.load_instance is None) or self.recompute_at_update:
+
+            return None
+
+        return tf.broadcast_to(
+        self.load_instance.evaluate_value_per_unit_time(), [
+        self.n_realizations, self.n_elements, self.n_quadrature_points, 
+        3])
         
     # Defines a function to build the traction [n_elements, 
     # n_quadrature_points, 3] with the first ever given vector of para-
@@ -172,9 +222,9 @@ class TractionVectorOnSurface:
         # Gets the number of elements and the number of quadrature points
         # to create the traction tensor
 
-        self.traction_tensor.assign(tf.broadcast_to(self.traction_vector, 
-        [self.n_realizations, self.n_elements, self.n_quadrature_points, 
-        3]))
+        self.traction_tensor.assign(tf.broadcast_to(
+        self.evaluate_traction_vector(), [self.n_realizations, 
+        self.n_elements, self.n_quadrature_points, 3]))
 
 ########################################################################
 #                       Prescribed stress tensor                       #
@@ -368,6 +418,20 @@ class FirstPiolaKirchhoffOnSurface:
 
         self.traction_tensor = tf.Variable(self.appropriate_computation(
         ))
+
+        # The prescribed stress is contracted with the normal vectors 
+        # of the reference configuration, thus, the traction depends 
+        # neither on the time nor on the vector of parameters, and it is
+        # not computed again when the loads are updated
+
+        self.recompute_at_update = False
+
+    # Defines a function to get the traction tensor per unit of time. 
+    # The traction is constant in time, thus, returns None
+
+    def get_traction_per_unit_time(self):
+
+        return None
         
     # Defines a function to build the traction [n_realizations, n_ele-
     # ments, n_quadrature_points, 3] with the first ever given vector of 
@@ -446,4 +510,46 @@ class FirstPiolaKirchhoffOnSurface:
 
         return tf.einsum('pij,peqj->peqi', 
         self.prescribed_first_piola_kirchhoff, 
-        self.stacked_normal_vectors)
\ No newline at end of file
+        self.stacked_normal_vectors)
+
+########################################################################
+#                              Load curves                             #
+########################################################################
+
+# Defines a function to get the instance of the parametric curve asked 
+# by the key 'load_function' of the information dictionary of a Neumann
+# boundary condition. The key 'final_time' gives the time at which the
+# load reaches the final value
+
+def get_load_curve_instance(load_information, physical_group_name, 
+time, final_value, class_name):
+
+    # Gets the available parametric curves
+
+    available_parametric_curves = load_classes_from_module(
+    parametric_curves_tools, return_dictionary_of_classes=True)
+
+    load_name = load_information["load_function"]
+
+    if not (load_name in available_parametric_curves):
+
+        names = ""
+
+        for name in available_parametric_curves:
+
+            names += "\n"+str(name)
+
+        raise NameError("'load_function' provided to '"+str(class_name)+
+        "' at physical group '"+str(physical_group_name)+"' has the na"+
+        "me '"+str(load_name)+"', but it is not an available parametri"+
+        "c load. Check the available methods:"+names)
+
+    if not ("final_time" in load_information):
+
+        raise KeyError("'load_function' was provided to '"+str(
+        class_name)+"' at physical group '"+str(physical_group_name)+
+        "', but the key 'final_time' was not. It must be the time at w"+
+        "hich the load reaches the given amplitudes")
+
+    return available_parametric_curves[load_name](time, final_value, 
+    load_information["final_time"])
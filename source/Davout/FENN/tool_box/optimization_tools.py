@@ -4,6 +4,10 @@ import scipy.optimize as optimize
 
 import numpy as np
 
+import tensorflow as tf
+
+from ..tool_box.krylov_tools import batched_conjugate_gradient, batched_gmres
+
 # Defines a class to wrap scipy methods for unconstrained optimization
 # using gradient information only
 
@@ -85,4 +89,431 @@ class UnconstrainedFirstOrderMinimization:
 
         # Updates the design variables
 
-        self.design_variables = result.x
\ No newline at end of file
+        self.design_variables = result.x
+
+########################################################################
+#                        Newton-Krylov methods                         #
+########################################################################
+
+# Defines a class to solve the realizations of the BVP in lockstep with
+# the Newton-Raphson method. The linear systems are solved by Krylov me-
+# thods using matrix-free Jacobian-vector products, i.e. forward mode
+# automatic differentiation of the residual vector. The realizations
+# that have converged are frozen while the others keep iterating. The
+# realizations whose line search fails to decrease the residual are
+# frozen at their last iterate and reported as failed. The frozen rea-
+# lizations are masked only, i.e. the batch is not compacted: their 
+# residual vectors, tangent products and preconditioners are still e-
+# valuated at every iteration, but their updates are discarded. The 
+# batch cannot be gathered to the active realizations alone, because
+# the material parameters and the loads are batched inside the class 
+# of the residual, which is built for all realizations
+
+class BatchedNewtonKrylovSolver:
+
+    def __init__(self, residual_class, linear_solver="CG", 
+    preconditioner="Jacobi", maximum_newton_iterations=20, 
+    relative_tolerance=1E-8, absolute_tolerance=1E-10, 
+    maximum_krylov_iterations=500, krylov_relative_tolerance=1E-6,
+    krylov_restart=20, maximum_line_search_iterations=10, verbose=True,
+    raise_on_failure=False):
+
+        # Saves the class that evaluates the residual vector, e.g. an 
+        # instance of CompressibleHyperelasticity
+
+        self.residual_class = residual_class
+
+        # Verifies the linear solver
+
+        available_linear_solvers = {"CG": batched_conjugate_gradient, 
+        "GMRES": batched_gmres}
+
+        if not (linear_solver in available_linear_solvers):
+
+            names = ""
+
+            for name in available_linear_solvers.keys():
+
+                names += "\n'"+str(name)+"'"
+
+            raise ValueError("The linear solver '"+str(linear_solver)+
+            "' is not available for 'BatchedNewtonKrylovSolver'. Check"+
+            " the available linear solvers:"+names)
+        
+        self.linear_solver = available_linear_solvers[linear_solver]
+
+        self.linear_solver_name = linear_solver
+
+        # Verifies the preconditioner
+
+        available_preconditioners = {"Jacobi": 
+        self.build_jacobi_preconditioner, "block Jacobi": 
+        self.build_block_jacobi_preconditioner, None: None}
+
+        if not (preconditioner in available_preconditioners):
+
+            names = ""
+
+            for name in available_preconditioners.keys():
+
+                names += "\n'"+str(name)+"'"
+
+            raise ValueError("The preconditioner '"+str(preconditioner)+
+            "' is not available for 'BatchedNewtonKrylovSolver'. Check"+
+            " the available preconditioners:"+names)
+        
+        self.build_preconditioner = available_preconditioners[
+        preconditioner]
+
+        # Saves the parameters of the iterative methods
+
+        self.maximum_newton_iterations = maximum_newton_iterations
+
+        self.relative_tolerance = relative_tolerance
+
+        self.absolute_tolerance = absolute_tolerance
+
+        self.maximum_krylov_iterations = maximum_krylov_iterations
+
+        self.krylov_relative_tolerance = krylov_relative_tolerance
+
+        self.krylov_restart = krylov_restart
+
+        self.maximum_line_search_iterations = (
+        maximum_line_search_iterations)
+
+        self.verbose = verbose
+
+        # Saves the flag to raise an error when any realization does not
+        # converge. Otherwise, the failed realizations are reported
+
+        self.raise_on_failure = raise_on_failure
+
+        # Gets the vector of parameters and the number of DOFs
+
+        vector_of_parameters = residual_class.vector_of_parameters
+
+        n_realizations = vector_of_parameters.shape[0]
+
+        n_dofs = vector_of_parameters.shape[1]
+
+        float_dtype = vector_of_parameters.dtype
+
+        # Creates a mask [n_realizations, n_dofs] that is 1 for the free
+        # DOFs and 0 for the DOFs with Dirichlet boundary conditions. It
+        # is realization-wise, because the boundary conditions can be 
+        # applied to some realizations only
+
+        dirichlet_indices = residual_class.BCs_class.all_indices
+
+        self.free_dofs_mask = tf.tensor_scatter_nd_update(tf.ones([
+        n_realizations, n_dofs], dtype=float_dtype), tf.cast(
+        dirichlet_indices, tf.int64), tf.zeros([tf.shape(
+        dirichlet_indices)[0]], dtype=float_dtype))
+
+        # Builds the DOFs of the nodes if the block Jacobi preconditio-
+        # ner needs them. The Jacobi preconditioner assembles the diago-
+        # nal directly, thus, it does not need any pattern
+
+        if preconditioner=="block Jacobi":
+
+            internal_work = residual_class.internal_work_variation
+
+            if internal_work.nodal_dofs is None:
+
+                internal_work.build_nodal_blocks_pattern()
+
+            if (3*internal_work.number_of_nodes)!=n_dofs:
+
+                raise ValueError("The block Jacobi preconditioner of 'B"+
+                "atchedNewtonKrylovSolver' requires each DOF to belong"+
+                " to exactly one node of the volume elements. Use the "+
+                "'Jacobi' preconditioner instead")
+
+            self.nodal_dofs = internal_work.nodal_dofs
+
+            # Gets the permutation from the nodal ordering back to the
+            # DOF ordering
+
+            self.nodal_to_dofs_permutation = tf.constant(np.argsort(
+            self.nodal_dofs.numpy().reshape(-1)), dtype=tf.int64)
+
+    # Defines a function to apply the tangent matrix to a direction u-
+    # sing forward mode automatic differentiation. The rows and columns
+    # of the DOFs with Dirichlet boundary conditions are replaced by 
+    # those of the identity
+
+    def apply_tangent(self, vector_of_parameters, direction):
+
+        with tf.autodiff.ForwardAccumulator(vector_of_parameters, 
+        direction*self.free_dofs_mask) as accumulator:
+
+            residual_vector = self.residual_class.evaluate_residual_tensor(
+            vector_of_parameters)
+
+        return ((self.free_dofs_mask*accumulator.jvp(residual_vector))+((
+        1.0-self.free_dofs_mask)*direction))
+
+    # Defines a function to build the Jacobi preconditioner, i.e. the in-
+    # verse of the diagonal of the tangent matrix
+
+    def build_jacobi_preconditioner(self, vector_of_parameters):
+
+        # Gets the diagonal [n_realizations, n_dofs] of the tangent ma-
+        # trix. Only the diagonal entries of the element matrices are e-
+        # valuated. The DOFs with Dirichlet boundary conditions get 1
+
+        diagonal = (self.residual_class.internal_work_variation.
+        assemble_tangent_diagonal(vector_of_parameters))
+
+        inverse_diagonal = tf.math.divide_no_nan(tf.ones_like(diagonal), (
+        self.free_dofs_mask*diagonal)+(1.0-self.free_dofs_mask))
+
+        return lambda vector: inverse_diagonal*vector
+
+    # Defines a function to build the block Jacobi preconditioner, i.e.
+    # the inverse of the 3x3 diagonal blocks of the tangent matrix asso-
+    # ciated to each node
+
+    def build_block_jacobi_preconditioner(self, vector_of_parameters):
+
+        # Gets the nodal blocks [n_realizations, n_nodes, 3, 3]. Only the
+        # blocks of the element matrices that couple a node to itself 
+        # are evaluated
+
+        blocks = (self.residual_class.internal_work_variation.
+        assemble_tangent_nodal_blocks(vector_of_parameters))
+
+        # Replaces the rows and columns of the DOFs with Dirichlet boun-
+        # dary conditions by those of the identity, then, inverts
+
+        nodal_mask = tf.gather(self.free_dofs_mask, self.nodal_dofs, 
+        axis=1)
+
+        inverse_blocks = tf.linalg.inv((blocks*nodal_mask[..., 
+        tf.newaxis]*nodal_mask[..., tf.newaxis, :])+tf.linalg.diag(
+        1.0-nodal_mask))
+
+        # Defines the application of the preconditioner, which gathers 
+        # the vector per node, multiplies by the inverse blocks, and
+        # permutes back to the ordering of DOFs
+
+        def apply_preconditioner(vector):
+
+            nodal_vector = tf.einsum('pnik,pnk->pni', inverse_blocks, 
+            tf.gather(vector, self.nodal_dofs, axis=1))
+
+            return tf.gather(tf.reshape(nodal_vector, [tf.shape(vector)[
+            0], -1]), self.nodal_to_dofs_permutation, axis=1)
+        
+        return apply_preconditioner
+
+    # Defines a function to evaluate the residual vector without the 
+    # DOFs with Dirichlet boundary conditions and its norm per realiza-
+    # tion
+
+    def evaluate_free_residual(self, vector_of_parameters):
+
+        residual_vector = (self.free_dofs_mask*
+        self.residual_class.evaluate_residual_tensor(vector_of_parameters))
+
+        return residual_vector, tf.norm(residual_vector, axis=1)
+
+    # Defines a compiled function with the Newton-Raphson loop. Returns
+    # the solution and, per realization, the convergence flags, the 
+    # line search failure flags, the numbers of Newton and of Krylov i-
+    # terations and the residual norms
+
+    @tf.function
+    def newton_raphson(self, initial_guess):
+
+        vector_of_parameters = initial_guess
+
+        # Evaluates the initial residual and the tolerance per realiza-
+        # tion
+
+        residual_vector, residual_norm = self.evaluate_free_residual(
+        vector_of_parameters)
+
+        tolerance = tf.maximum(self.relative_tolerance*residual_norm, 
+        self.absolute_tolerance)
+
+        converged = residual_norm<=tolerance
+
+        # Initializes the flags of the realizations whose line search
+        # failed
+
+        line_search_failed = tf.zeros(tf.shape(converged), dtype=tf.bool)
+
+        # Initializes the counters of iterations per realization
+
+        n_newton_iterations = tf.zeros(tf.shape(residual_norm), dtype=
+        tf.int32)
+
+        n_krylov_iterations = tf.zeros(tf.shape(residual_norm), dtype=
+        tf.int32)
+
+        iteration = tf.constant(0)
+
+        while (iteration<self.maximum_newton_iterations and not 
+        tf.reduce_all(tf.logical_or(converged, line_search_failed))):
+
+            active_realizations = tf.logical_not(tf.logical_or(converged,
+            line_search_failed))
+
+            # Builds the preconditioner at the current state
+
+            preconditioner = None
+
+            if self.build_preconditioner is not None:
+
+                preconditioner = self.build_preconditioner(
+                vector_of_parameters)
+
+            # Solves the linear system for the Newton step. The Krylov
+            # iterations of the frozen realizations are masked, i.e.
+            # their directions are evaluated but not used
+
+            linear_solver_arguments = {"preconditioner": preconditioner,
+            "active_realizations": active_realizations, "relative_tole"+
+            "rance": self.krylov_relative_tolerance, "maximum_iterations":
+            self.maximum_krylov_iterations}
+
+            if self.linear_solver_name=="GMRES":
+
+                linear_solver_arguments["restart"] = self.krylov_restart
+
+            newton_step, n_linear_iterations = self.linear_solver(
+            lambda direction: self.apply_tangent(vector_of_parameters, 
+            direction), -residual_vector, **linear_solver_arguments)
+
+            n_krylov_iterations += n_linear_iterations
+
+            # Performs a backtracking line search per realization on the
+            # norm of the residual. The step size is halved until the 
+            # norm decreases sufficiently
+
+            step_size = tf.cast(active_realizations, 
+            vector_of_parameters.dtype)
+
+            trial_vector = vector_of_parameters+(step_size[:, tf.newaxis
+            ]*newton_step)
+
+            trial_residual, trial_norm = self.evaluate_free_residual(
+            trial_vector)
+
+            accepted = tf.logical_or(tf.logical_not(active_realizations),
+            trial_norm<=((1.0-(1E-4*step_size))*residual_norm))
+
+            line_search_iteration = tf.constant(0)
+
+            while (line_search_iteration<
+            self.maximum_line_search_iterations and not tf.reduce_all(
+            accepted)):
+
+                step_size = tf.where(accepted, step_size, 0.5*step_size)
+
+                trial_vector = vector_of_parameters+(step_size[:, 
+                tf.newaxis]*newton_step)
+
+                trial_residual, trial_norm = self.evaluate_free_residual(
+                trial_vector)
+
+                accepted = tf.logical_or(accepted, trial_norm<=((1.0-(
+                1E-4*step_size))*residual_norm))
+
+                line_search_iteration += 1
+
+            # Flags the active realizations whose line search did not 
+            # decrease the residual. They do not take the step and are
+            # not iterated anymore
+
+            new_failures = tf.logical_and(active_realizations, 
+            tf.logical_not(accepted))
+
+            line_search_failed = tf.logical_or(line_search_failed, 
+            new_failures)
+
+            # Updates the state. The realizations that have converged be-
+            # fore keep their solution, as their step size is null. The 
+            # realizations that have just failed keep their last iterate
+
+            vector_of_parameters = tf.where(new_failures[:, tf.newaxis],
+            vector_of_parameters, trial_vector)
+
+            residual_vector = tf.where(new_failures[:, tf.newaxis], 
+            residual_vector, trial_residual)
+
+            residual_norm = tf.where(new_failures, residual_norm, 
+            trial_norm)
+
+            n_newton_iterations += tf.cast(active_realizations, tf.int32)
+
+            converged = tf.logical_or(converged, residual_norm<=tolerance)
+
+            iteration += 1
+
+        return (vector_of_parameters, converged, line_search_failed, 
+        n_newton_iterations, n_krylov_iterations, residual_norm)
+
+    # Defines a function to call the solution process. If time is given,
+    # the boundary conditions are updated and applied before solving
+
+    def __call__(self, time=None):
+
+        vector_of_parameters = self.residual_class.vector_of_parameters
+
+        if time is not None:
+
+            self.residual_class.apply_all_boundary_conditions(
+            vector_of_parameters, time)
+
+        # Solves and updates the vector of parameters
+
+        (solution, self.converged, self.line_search_failed, 
+        self.n_newton_iterations, self.n_krylov_iterations, 
+        self.residual_norm) = self.newton_raphson(tf.convert_to_tensor(
+        vector_of_parameters))
+
+        vector_of_parameters.assign(solution)
+
+        # Shows information
+
+        if self.verbose:
+
+            n_converged = int(tf.reduce_sum(tf.cast(self.converged, 
+            tf.int32)))
+
+            print("The batched Newton-Krylov solver converged "+str(
+            n_converged)+" out of "+str(self.converged.shape[0])+" rea"+
+            "lizations.\nMaximum number of Newton iterations: "+str(int(
+            tf.reduce_max(self.n_newton_iterations)))+"\nTotal number "+
+            "of Krylov iterations: "+str(int(tf.reduce_sum(
+            self.n_krylov_iterations)))+"\nMaximum residual norm: "+str(
+            float(tf.reduce_max(self.residual_norm)))+"\n")
+
+        # Reports the realizations that have not converged, telling 
+        # those whose line search failed
+
+        if not bool(tf.reduce_all(self.converged)):
+
+            failed_realizations = tf.reshape(tf.where(tf.logical_not(
+            self.converged)), [-1]).numpy().tolist()
+
+            line_search_failures = tf.reshape(tf.where(
+            self.line_search_failed), [-1]).numpy().tolist()
+
+            message = ("The batched Newton-Krylov solver did not conve"+
+            "rge for the realizations "+str(failed_realizations)+". The"+
+            " line search failed to decrease the residual after "+str(
+            self.maximum_line_search_iterations)+" halvings of the step"+
+            " for the realizations "+str(line_search_failures)+", which"+
+            " were kept at their last iterate")
+
+            if self.raise_on_failure:
+
+                raise ValueError(message)
+
+            print("WARNING: "+message+"\n")
+
+        return vector_of_parameters
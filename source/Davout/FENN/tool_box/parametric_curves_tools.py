@@ -6,6 +6,12 @@ import tensorflow as tf
 
 class linear:
 
+    # Flags that the curve is linear in time, thus, its value at any ti-
+    # me is the time multiplied by the value per unit of time. The loads
+    # of such curves are not reevaluated at each update
+
+    linear_in_time = True
+
     def __init__(self, current_time, final_value, final_time):
         
         self.current_time = current_time
@@ -22,4 +28,10 @@ class linear:
     @tf.function
     def __call__(self):
 
-        return self.final_value*(self.current_time/self.final_time)
\ No newline at end of file
+        return self.final_value*(self.current_time/self.final_time)
+
+    # Defines a function to get the value per unit of time
+
+    def evaluate_value_per_unit_time(self):
+
+        return self.final_value/self.final_time
\ No newline at end of file
@@ -1,3 +1,228 @@
-# Routine to perform sensitivity analysis
+# Routine to perform sensitivity analysis of converged solutions with
+# the adjoint method. Every realization of the BVP has its own adjoint
+# problem, but all of them are solved in lockstep
 
-# Defines a function to 
\ No newline at end of file
+import tensorflow as tf
+
+from ..tool_box.optimization_tools import BatchedNewtonKrylovSolver
+
+# Defines a class to evaluate the derivatives of a quantity of interest
+# with respect to the parameters of the BVP at a converged vector of
+# parameters u. The quantity of interest is a function J(u) that returns
+# a tensor [n_realizations], where the value of each realization depends
+# on the row of u of that realization only. The residual R(u, θ)=0 de-
+# fines u implicitly as a function of the parameters θ, thus
+#
+# dJ/dθ = -λ·∂R/∂θ, where K^T λ = ∂J/∂u
+#
+# K is the tangent matrix, whose rows and columns of the DOFs with Di-
+# richlet boundary conditions are replaced by those of the identity. The
+# tangent matrix of hyperelasticity with dead loads is symmetric, thus,
+# the adjoint problem is solved with the same Krylov methods and precon-
+# ditioners as the Newton steps. The parameters are the material para-
+# meters of the constitutive models, the traction tensors at the quadra-
+# ture points of the loaded surfaces, and the prescribed values of the
+# DOFs with Dirichlet boundary conditions
+
+class AdjointSensitivity:
+
+    def __init__(self, residual_class, quantity_of_interest,
+    linear_solver="CG", preconditioner="Jacobi",
+    maximum_krylov_iterations=1000, krylov_relative_tolerance=1E-10,
+    material_parameters_names=("mu", "lmbda")):
+
+        if not callable(quantity_of_interest):
+
+            raise TypeError("'quantity_of_interest' at 'AdjointSensiti"+
+            "vity' must be a function of the vector of parameters that"+
+            " returns a tensor [n_realizations]")
+
+        # Saves the class that evaluates the residual vector, e.g. an
+        # instance of CompressibleHyperelasticity
+
+        self.residual_class = residual_class
+
+        self.quantity_of_interest = quantity_of_interest
+
+        self.material_parameters_names = material_parameters_names
+
+        # Uses the batched Newton-Krylov solver for the application of
+        # the tangent matrix with Dirichlet boundary conditions, for the
+        # preconditioners, and for the Krylov methods
+
+        self.krylov_solver = BatchedNewtonKrylovSolver(residual_class,
+        linear_solver=linear_solver, preconditioner=preconditioner,
+        maximum_krylov_iterations=maximum_krylov_iterations,
+        krylov_relative_tolerance=krylov_relative_tolerance, verbose=
+        False)
+
+    # Defines a function to evaluate the quantity of interest and its
+    # gradient with respect to the vector of parameters [n_realizations,
+    # n_dofs]. As each realization of the quantity of interest depends
+    # on its own row of the vector of parameters only, the gradient of
+    # the sum over the realizations gives the gradients of all of them
+
+    def evaluate_quantity_of_interest(self, vector_of_parameters):
+
+        with tf.GradientTape() as tape:
+
+            tape.watch(vector_of_parameters)
+
+            quantity_of_interest = self.quantity_of_interest(
+            vector_of_parameters)
+
+            total_quantity_of_interest = tf.reduce_sum(
+            quantity_of_interest)
+
+        return quantity_of_interest, tape.gradient(
+        total_quantity_of_interest, vector_of_parameters)
+
+    # Defines a function to solve the adjoint problems of all realiza-
+    # tions. Returns the adjoint vector [n_realizations, n_dofs], which
+    # is null at the DOFs with Dirichlet boundary conditions, and the
+    # number of Krylov iterations per realization
+
+    def solve_adjoint_problem(self, vector_of_parameters,
+    quantity_of_interest_gradient):
+
+        solver = self.krylov_solver
+
+        preconditioner = None
+
+        if solver.build_preconditioner is not None:
+
+            preconditioner = solver.build_preconditioner(
+            vector_of_parameters)
+
+        linear_solver_arguments = {"preconditioner": preconditioner,
+        "relative_tolerance": solver.krylov_relative_tolerance, "maxim"+
+        "um_iterations": solver.maximum_krylov_iterations}
+
+        if solver.linear_solver_name=="GMRES":
+
+            linear_solver_arguments["restart"] = solver.krylov_restart
+
+        return solver.linear_solver(lambda direction:
+        solver.apply_tangent(vector_of_parameters, direction),
+        solver.free_dofs_mask*quantity_of_interest_gradient,
+        **linear_solver_arguments)
+
+    # Defines a function to evaluate the sensitivities. If no vector of
+    # parameters is given, the one saved in the residual class is used,
+    # which must have been converged before, e.g. by BatchedNewtonKry-
+    # lovSolver. Returns a dictionary with the quantity of interest, the
+    # adjoint vector, and the derivatives with respect to:
+    #
+    # "material parameters": a list with a dictionary per constitutive
+    # model, in the order of the materials, whose keys are the names of
+    # the material parameters. The derivatives have the shape of the pa-
+    # rameters, i.e. [n_realizations, 1, 1, 1, 1] if the parameters vary
+    # across realizations, or the sum over the realizations if the pa-
+    # rameter is shared
+    #
+    # "traction tensors": a list with a tensor [n_realizations, n_ele-
+    # ments, n_quadrature_points, 3] per loaded surface
+    #
+    # "traction vectors": a list with a tensor [n_realizations, 3] per
+    # loaded surface, which is the derivative with respect to a uniform
+    # traction vector on that surface
+    #
+    # "Dirichlet values": a tensor with the derivative with respect to
+    # each prescribed value, in the same order as the indices in the
+    # all_indices attribute of the class of Dirichlet boundary condi-
+    # tions
+
+    def __call__(self, vector_of_parameters=None):
+
+        if vector_of_parameters is None:
+
+            vector_of_parameters = (
+            self.residual_class.vector_of_parameters)
+
+        vector_of_parameters = tf.identity(vector_of_parameters)
+
+        # Gets the quantity of interest and its gradient
+
+        quantity_of_interest, quantity_of_interest_gradient = (
+        self.evaluate_quantity_of_interest(vector_of_parameters))
+
+        # Solves the adjoint problems
+
+        adjoint_vector, n_krylov_iterations = (
+        self.solve_adjoint_problem(vector_of_parameters,
+        quantity_of_interest_gradient))
+
+        # Gets the tensors of material parameters
+
+        internal_work = self.residual_class.internal_work_variation
+
+        traction_work = self.residual_class.traction_work_variation
+
+        material_parameters = [{name: getattr(constitutive_model, name
+        ) for name in self.material_parameters_names if hasattr(
+        constitutive_model, name)} for constitutive_model in (
+        internal_work.constitutive_models)]
+
+        traction_tensors = [traction_class.traction_tensor for (
+        traction_class) in traction_work.traction_classes]
+
+        # Differentiates the product of the adjoint vector and the resi-
+        # dual vector. The external work is evaluated again from the
+        # traction tensors, instead of being read from its variable
+
+        with tf.GradientTape(persistent=True) as tape:
+
+            tape.watch(vector_of_parameters)
+
+            for parameters in material_parameters:
+
+                tape.watch(list(parameters.values()))
+
+            adjoint_internal_work = tf.reduce_sum(adjoint_vector*(
+            internal_work.evaluate_residual_tensor(
+            vector_of_parameters)))
+
+            adjoint_external_work = tf.reduce_sum(adjoint_vector*
+            traction_work.assembly_plan(tf.concat([
+            traction_work.appropiate_contraction(i) for i in range(
+            traction_work.n_surfaces_under_load)], axis=1)))
+
+        # Gets the derivatives with respect to the material parameters
+
+        material_sensitivities = []
+
+        for parameters in material_parameters:
+
+            gradients = tape.gradient(adjoint_internal_work, list(
+            parameters.values()), unconnected_gradients=
+            tf.UnconnectedGradients.ZERO)
+
+            material_sensitivities.append({name: -gradient for name,
+            gradient in zip(parameters.keys(), gradients)})
+
+        # Gets the derivatives with respect to the traction tensors
+
+        traction_sensitivities = [-gradient for gradient in (
+        tape.gradient(adjoint_external_work, traction_tensors,
+        unconnected_gradients=tf.UnconnectedGradients.ZERO))]
+
+        # Gets the derivatives with respect to the prescribed values. As
+        # the prescribed DOFs are part of the vector of parameters, the
+        # explicit dependence of the quantity of interest is added
+
+        residual_gradient = tape.gradient(adjoint_internal_work,
+        vector_of_parameters)
+
+        del tape
+
+        dirichlet_sensitivities = tf.gather_nd(
+        quantity_of_interest_gradient-residual_gradient,
+        self.residual_class.BCs_class.all_indices)
+
+        return {"quantity of interest": quantity_of_interest, "adjoint"+
+        " vector": adjoint_vector, "number of Krylov iterations":
+        n_krylov_iterations, "material parameters":
+        material_sensitivities, "traction tensors":
+        traction_sensitivities, "traction vectors": [tf.reduce_sum(
+        gradient, axis=[1, 2]) for gradient in traction_sensitivities],
+        "Dirichlet values": dirichlet_sensitivities}
@@ -0,0 +1,231 @@
+# Routine to store methods to build the quadrature rules and the shape
+# functions of the tensor product finite elements, i.e. quadrilaterals
+# and hexahedrons. Everything here is evaluated once per element class
+# with numpy, then, the element classes convert the results to tensors
+
+import numpy as np
+
+########################################################################
+#                              Quadrature                              #
+########################################################################
+
+# Defines a function to get the tensor product Gauss-Legendre quadratu-
+# re over the reference domain [-1, 1]^n_dimensions. The number of poi-
+# nts per direction is the smallest one that integrates exactly a poly-
+# nomial of the given degree in each direction. Returns the points as an
+# array [n_quadrature_points, n_dimensions] and the weights as an array
+# [n_quadrature_points]
+
+def get_gauss_legendre_quadrature(n_dimensions, quadrature_degree):
+
+    if (not isinstance(quadrature_degree, int)) or quadrature_degree<1:
+
+        raise ValueError("A quadrature degree of "+str(quadrature_degree
+        )+" was asked to create tensor product finite elements. But it"+
+        " must be a positive integer")
+
+    # Gets the one-dimensional rule. n points integrate exactly polyno-
+    # mials of degree 2n-1
+
+    points_1D, weights_1D = np.polynomial.legendre.leggauss((
+    quadrature_degree//2)+1)
+
+    # Makes the tensor product. The first natural coordinate varies the
+    # fastest
+
+    grids = np.meshgrid(*([points_1D]*n_dimensions), indexing="ij")
+
+    weights_grids = np.meshgrid(*([weights_1D]*n_dimensions), indexing=
+    "ij")
+
+    points = np.stack([grid.reshape(-1, order="F") for grid in grids],
+    axis=1)
+
+    weights = np.prod(np.stack([grid.reshape(-1, order="F") for grid in (
+    weights_grids)], axis=1), axis=1)
+
+    return points, weights
+
+########################################################################
+#                   Natural coordinates of the nodes                   #
+########################################################################
+
+# Defines a function to get the natural coordinates of the nodes of a
+# quadrilateral in the GMSH ordering: corners, midpoints of the edges,
+# and center. Returns an array [n_nodes, 2]
+
+def get_quadrilateral_nodes_natural_coordinates(number_of_nodes):
+
+    corners = np.array([[-1.0, -1.0], [1.0, -1.0], [1.0, 1.0], [-1.0,
+    1.0]])
+
+    edges = [[0,1], [1,2], [2,3], [3,0]]
+
+    return get_tensor_product_nodes(corners, edges, [[0,1,2,3]],
+    number_of_nodes)
+
+# Defines a function to get the natural coordinates of the nodes of a
+# hexahedron in the GMSH ordering: corners, midpoints of the edges, cen-
+# ters of the faces, and center of the volume. Returns an array [n_no-
+# des, 3]
+
+def get_hexahedron_nodes_natural_coordinates(number_of_nodes):
+
+    corners = np.array([[-1.0, -1.0, -1.0], [1.0, -1.0, -1.0], [1.0,
+    1.0, -1.0], [-1.0, 1.0, -1.0], [-1.0, -1.0, 1.0], [1.0, -1.0, 1.0],
+    [1.0, 1.0, 1.0], [-1.0, 1.0, 1.0]])
+
+    edges = [[0,1], [0,3], [0,4], [1,2], [1,5], [2,3], [2,6], [3,7], [4,
+    5], [4,7], [5,6], [6,7]]
+
+    faces = [[0,1,2,3], [0,1,5,4], [0,3,7,4], [1,2,6,5], [2,3,7,6], [4,
+    5,6,7], [0,1,2,3,4,5,6,7]]
+
+    return get_tensor_product_nodes(corners, edges, faces,
+    number_of_nodes)
+
+# Defines a function to assemble the natural coordinates of the nodes
+# given the corners and the lists of corners that define the higher or-
+# der nodes. Each higher order node is the centroid of its corners
+
+def get_tensor_product_nodes(corners, edges, faces, number_of_nodes):
+
+    nodes = [corners]+[np.mean(corners[entity], axis=0, keepdims=True
+    ) for entity in edges+faces]
+
+    nodes = np.concatenate(nodes, axis=0)
+
+    # Verifies if the number of nodes is available
+
+    if not (number_of_nodes in [len(corners), len(corners)+len(edges),
+    len(nodes)]):
+
+        raise ValueError("The element with "+str(number_of_nodes)+" no"+
+        "des was asked, but the available numbers of nodes are "+str(
+        len(corners))+", "+str(len(corners)+len(edges))+", and "+str(
+        len(nodes)))
+
+    return nodes[:number_of_nodes]
+
+########################################################################
+#                           Shape functions                            #
+########################################################################
+
+# Defines a function to evaluate the Lagrange shape functions of a ten-
+# sor product element and their derivatives with respect to the natural
+# coordinates. Each shape function is the product of one-dimensional
+# Lagrange polynomials over the equally spaced points in [-1, 1]. Returns
+# an array [n_quadrature_points, n_nodes] of shape functions and an ar-
+# ray [n_quadrature_points, n_nodes, n_dimensions] of derivatives
+
+def evaluate_lagrange_shape_functions(points, nodes_natural_coordinates,
+polynomial_degree):
+
+    # Gets the one-dimensional interpolation points
+
+    interpolation_points = np.linspace(-1.0, 1.0, polynomial_degree+1)
+
+    # Evaluates the one-dimensional polynomials and their derivatives at
+    # each natural coordinate of the points. The arrays are [n_quadratu-
+    # re_points, n_nodes, n_dimensions]
+
+    values = np.ones((points.shape[0], nodes_natural_coordinates.shape[0
+    ], points.shape[1]))
+
+    derivatives = np.zeros_like(values)
+
+    for p in interpolation_points:
+
+        # Selects the nodes whose polynomial has a root at p, i.e. the
+        # nodes whose coordinate is not p
+
+        not_at_p = ~np.isclose(nodes_natural_coordinates, p)
+
+        denominator = np.where(not_at_p, nodes_natural_coordinates-p, 1.0)
+
+        factor = np.where(not_at_p[np.newaxis], (points[:, np.newaxis, :
+        ]-p)/denominator[np.newaxis], 1.0)
+
+        # Applies the product rule
+
+        derivatives = (derivatives*factor)+(values*np.where(not_at_p[
+        np.newaxis], 1.0/denominator[np.newaxis], 0.0))
+
+        values = values*factor
+
+    return tensor_product_of_polynomials(values, derivatives)
+
+# Defines a function to evaluate the serendipity shape functions of the
+# quadratic quadrilateral of 8 nodes and of the quadratic hexahedron of
+# 20 nodes. Returns an array [n_quadrature_points, n_nodes] of shape
+# functions and an array [n_quadrature_points, n_nodes, n_dimensions] of
+# derivatives
+
+def evaluate_serendipity_shape_functions(points,
+nodes_natural_coordinates):
+
+    n_dimensions = points.shape[1]
+
+    # Gets the linear factors (1+x*x_a) and the bubble factors (1-x²)
+    # per natural coordinate as arrays [n_quadrature_points, n_nodes,
+    # n_dimensions]. The bubble factor is used in the direction in which
+    # the node is at the midpoint
+
+    x = points[:, np.newaxis, :]
+
+    x_a = nodes_natural_coordinates[np.newaxis]
+
+    at_midpoint = np.isclose(x_a, 0.0)
+
+    values = np.where(at_midpoint, 1.0-(x*x), 1.0+(x*x_a))
+
+    derivatives = np.where(at_midpoint, -2.0*x, x_a*np.ones_like(x))
+
+    # Scales the factors, such that the shape functions are unitary at
+    # their nodes: 1/2^n_dimensions for the corners, and 1/2^(n_dimensi-
+    # ons-1) for the midpoints of the edges
+
+    scale = np.where(np.any(at_midpoint, axis=-1), 2.0, 1.0)/(2.0**
+    n_dimensions)
+
+    N, dN = tensor_product_of_polynomials(values, derivatives)
+
+    N = N*scale
+
+    dN = dN*scale[..., np.newaxis]
+
+    # Multiplies the corner functions by (x*x_a+y*y_a+z*z_a-n_dimensions
+    # +1)
+
+    is_corner = ~np.any(at_midpoint, axis=-1)
+
+    corner_factor = np.where(is_corner, np.sum(x*x_a, axis=-1)-
+    n_dimensions+1.0, 1.0)
+
+    corner_derivative = np.where(is_corner[..., np.newaxis], x_a, 0.0)
+
+    dN = (dN*corner_factor[..., np.newaxis])+(N[..., np.newaxis]*
+    corner_derivative)
+
+    N = N*corner_factor
+
+    return N, dN
+
+# Defines a function to make the product of one-dimensional polynomials
+# given as arrays [n_quadrature_points, n_nodes, n_dimensions] of values
+# and of derivatives. Returns the products and their gradients
+
+def tensor_product_of_polynomials(values, derivatives):
+
+    n_dimensions = values.shape[-1]
+
+    N = np.prod(values, axis=-1)
+
+    dN = []
+
+    for i in range(n_dimensions):
+
+        dN.append(np.prod(np.where(np.arange(n_dimensions)==i,
+        derivatives, values), axis=-1))
+
+    return N, np.stack(dN, axis=-1)
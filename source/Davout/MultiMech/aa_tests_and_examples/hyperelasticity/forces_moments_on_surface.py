@@ -0,0 +1,153 @@
+# Routine to test the evaluation of forces and moments on the surfaces
+# of a hyperelastic box along the pseudotime steps. The forms of the
+# post-process are compiled at the first step only, thus, the forces
+# on the loaded surface must follow the traction at every step
+
+import numpy as np
+
+from .....Davout.PythonicUtilities.path_tools import get_parent_path_of_file
+
+from .....Davout.PythonicUtilities.file_handling_tools import txt_toList
+
+from .....Davout.MultiMech.constitutive_models.hyperelasticity import isotropic_hyperelasticity as constitutive_models
+
+from .....Davout.MultiMech.physics import hyperelastic_cauchy_continuum as variational_framework
+
+########################################################################
+########################################################################
+##                      User defined parameters                       ##
+########################################################################
+########################################################################
+
+########################################################################
+#                          Simulation results                          #
+########################################################################
+
+# Defines the path to the results directory
+
+results_path = get_parent_path_of_file()
+
+post_processes = dict()
+
+post_processes["SaveForcesAndMomentsOnSurface"] = {"directory path":
+results_path, "file name": "forces_and_moments_right.txt", "surface ph"+
+"ysical group name": "right"}
+
+########################################################################
+#                         Material properties                          #
+########################################################################
+
+# Sets the material as a neo-hookean material using the corresponding
+# class
+
+constitutive_model = constitutive_models.NeoHookean({"E": 1E6, "nu":
+0.3})
+
+########################################################################
+#                                 Mesh                                 #
+########################################################################
+
+# Defines the dimensions of the box, and the file to save the mesh in
+
+length_x = 0.3
+
+length_z = 0.2
+
+mesh_fileName = {"length x": length_x, "length y": 1.0, "length z":
+length_z, "number of divisions in x": 2, "number of divisions in y": 6,
+"number of divisions in z": 2, "verbose": False, "mesh file name": "fo"+
+"rces_moments_box_mesh", "mesh file directory": get_parent_path_of_file(
+)}
+
+########################################################################
+#                            Function space                            #
+########################################################################
+
+# Defines the shape functions degree
+
+polynomial_degree = 2
+
+########################################################################
+#                           Solver parameters                          #
+########################################################################
+
+# Sets the solver parameters in a dictionary
+
+solver_parameters = dict()
+
+solver_parameters["newton_relative_tolerance"] = 1e-8
+
+solver_parameters["newton_absolute_tolerance"] = 1e-8
+
+solver_parameters["newton_maximum_iterations"] = 15
+
+# Sets the initial and the final pseudotimes, and the number of steps
+
+t = 0.0
+
+t_final = 1.0
+
+maximum_loadingSteps = 4
+
+########################################################################
+#                          Boundary conditions                         #
+########################################################################
+
+# Sets a referential traction on the right surface, that grows linear-
+# ly in time
+
+maximum_load = 1E5
+
+traction_dictionary = dict()
+
+traction_dictionary["right"] = {"load case": "UniformReferentialTracti"+
+"on", "amplitude_tractionX": 0.0, "amplitude_tractionY": maximum_load,
+"amplitude_tractionZ": 0.0, "parametric_load_curve": "linear", "t": t,
+"t_final": t_final}
+
+# Clamps the left surface
+
+bcs_dictionary = dict()
+
+bcs_dictionary["left"] = {"BC case": "FixedSupportDirichletBC"}
+
+########################################################################
+########################################################################
+##                      Calculation and solution                      ##
+########################################################################
+########################################################################
+
+# Solves the variational problem
+
+variational_framework.hyperelasticity_displacementBased(
+constitutive_model, traction_dictionary, maximum_loadingSteps, t_final,
+post_processes, mesh_fileName, solver_parameters, polynomial_degree=
+polynomial_degree, t=t, dirichlet_boundaryConditions=bcs_dictionary,
+verbose=True)
+
+########################################################################
+#                             Verification                             #
+########################################################################
+
+# Reads the forces and moments on the right surface. Each row is [time,
+# [fx, fy, fz, mx, my, mz]]
+
+forces_moments = txt_toList(results_path+"//forces_and_moments_right."+
+"txt")
+
+# The resultant force on the loaded surface is the referential traction
+# times the reference area. If the compiled forms kept the field of the
+# first step, the force would not follow the load
+
+for time, components in forces_moments:
+
+    expected_force = maximum_load*(time/t_final)*length_x*length_z
+
+    print("Time "+str(time)+": force in y "+str(components[1])+"; expe"+
+    "cted "+str(expected_force))
+
+    if not np.isclose(components[1], expected_force, rtol=5E-2):
+
+        raise ValueError("The force in y on the right surface at time "+
+        str(time)+" is "+str(components[1])+", whereas the traction gi"+
+        "ves "+str(expected_force))
@@ -146,6 +146,57 @@ class LinearVectorFieldExpression(UserExpression):
 
         return (3,)
 
+# Defines a function to construct a JIT-compiled expression for a sca-
+# lar or vector linear field with respect to space coordinates. The mean
+# field and its gradient are given to the expression as Constants, thus,
+# when they are assigned new values, the expression is updated as well
+# without evaluating python code at each point
+
+def compile_linearFieldExpression(mean_field, gradient_field, 
+x_centroid, y_centroid, z_centroid, degree=1):
+
+    # Converts lists to Constants
+
+    if isinstance(mean_field, list):
+
+        mean_field = Constant(mean_field)
+
+    if isinstance(gradient_field, list):
+
+        gradient_field = Constant(gradient_field)
+
+    # Gets the code of the position vector shifted by the centroid
+
+    y = ["(x[0]-x_centroid)", "(x[1]-y_centroid)", "(x[2]-z_centroid)"]
+
+    # Builds the code for a scalar field
+
+    if len(mean_field.ufl_shape)==0:
+
+        expression_code = ("mean_field+(gradient_field[0]*"+y[0]+")+(gr"+
+        "adient_field[1]*"+y[1]+")+(gradient_field[2]*"+y[2]+")")
+
+    # Builds the code for a vector field. The values of the gradient are
+    # flattened row by row
+
+    elif len(mean_field.ufl_shape)==1:
+
+        expression_code = tuple(("mean_field["+str(i)+"]+(gradient_fie"+
+        "ld["+str(3*i)+"]*"+y[0]+")+(gradient_field["+str((3*i)+1)+"]*"+
+        y[1]+")+(gradient_field["+str((3*i)+2)+"]*"+y[2]+")") for i in (
+        range(3)))
+
+    else:
+
+        raise ValueError("The compiled linear field expression is avai"+
+        "lable for scalar and vector fields only, but the mean field h"+
+        "as shape "+str(mean_field.ufl_shape))
+
+    return Expression(expression_code, mean_field=mean_field, 
+    gradient_field=gradient_field, x_centroid=float(x_centroid), 
+    y_centroid=float(y_centroid), z_centroid=float(z_centroid), degree=
+    degree)
+
 ########################################################################
 #                  Boundary conditions' domain classes                 #
 ########################################################################
@@ -257,6 +308,96 @@ class PeriodicCubicBoundary(SubDomain):
         y[2] = x[2] - self.length_z if near(x[2], self.z_centroid+
         self.semi_lengthZ, self.tolerance) else x[2]
 
+# Defines the C++ code of the periodic cubic boundary. It has the same 
+# inside and map methods of PeriodicCubicBoundary, but they are compi-
+# led, thus, the construction of the constrained function space does 
+# not call python code for each vertex of the mesh
+
+periodic_cubicBoundaryCode = """
+#include <cmath>
+#include <pybind11/pybind11.h>
+#include <pybind11/eigen.h>
+#include <dolfin/mesh/SubDomain.h>
+
+class PeriodicCubicBoundary : public dolfin::SubDomain
+{
+public:
+
+  double x_master, y_master, z_master, x_slave, y_slave, z_slave;
+
+  double length_x, length_y, length_z, tolerance;
+
+  PeriodicCubicBoundary(double x_centroid, double y_centroid, double 
+  z_centroid, double length_x, double length_y, double length_z, double
+  tolerance) : dolfin::SubDomain(), x_master(x_centroid-0.5*length_x),
+  y_master(y_centroid-0.5*length_y), z_master(z_centroid-0.5*length_z),
+  x_slave(x_centroid+0.5*length_x), y_slave(y_centroid+0.5*length_y),
+  z_slave(z_centroid+0.5*length_z), length_x(length_x), length_y(
+  length_y), length_z(length_z), tolerance(tolerance) {}
+
+  bool near_value(double a, double b) const
+  {
+    return std::abs(a-b)<=tolerance;
+  }
+
+  bool inside(Eigen::Ref<const Eigen::VectorXd> x, bool on_boundary) 
+  const override
+  {
+    return (near_value(x_master, x[0]) || near_value(y_master, x[1]) ||
+    near_value(z_master, x[2])) && on_boundary;
+  }
+
+  void map(Eigen::Ref<const Eigen::VectorXd> x, Eigen::Ref<
+  Eigen::VectorXd> y) const override
+  {
+    y[0] = near_value(x[0], x_slave) ? x[0]-length_x : x[0];
+
+    y[1] = near_value(x[1], y_slave) ? x[1]-length_y : x[1];
+
+    y[2] = near_value(x[2], z_slave) ? x[2]-length_z : x[2];
+  }
+};
+
+PYBIND11_MODULE(SIGNATURE, m)
+{
+  pybind11::class_<PeriodicCubicBoundary, std::shared_ptr<
+  PeriodicCubicBoundary>, dolfin::SubDomain>(m, "PeriodicCubicBoundary")
+  .def(pybind11::init<double, double, double, double, double, double, 
+  double>());
+}
+"""
+
+# Initializes the compiled module of the periodic cubic boundary. It is
+# compiled at the first use only
+
+periodic_cubicBoundaryModule = None
+
+# Defines a function to construct the compiled periodic cubic boundary.
+# The dimensions of the cube, the tolerance, and the verification of 
+# the shape of the mesh are taken from PeriodicCubicBoundary
+
+def compile_periodicCubicBoundary(x_centroid, y_centroid, z_centroid, 
+mesh_dataClass, tolerance=None):
+
+    global periodic_cubicBoundaryModule
+
+    # Gets the dimensions of the cube and verifies the mesh
+
+    python_boundary = PeriodicCubicBoundary(x_centroid, y_centroid, 
+    z_centroid, mesh_dataClass, tolerance=tolerance)
+
+    # Compiles the module if it has not been compiled yet
+
+    if periodic_cubicBoundaryModule is None:
+
+        periodic_cubicBoundaryModule = compile_cpp_code(
+        periodic_cubicBoundaryCode)
+
+    return periodic_cubicBoundaryModule.PeriodicCubicBoundary(float(
+    x_centroid), float(y_centroid), float(z_centroid), float(
+    python_boundary.length_x), float(python_boundary.length_y), float(
+    python_boundary.length_z), float(python_boundary.tolerance))
+
 ########################################################################
 #                            Field updating                            #
 ########################################################################
@@ -310,9 +451,10 @@ constrained_gradientFieldName, elements_dictionary, centroid_coordinates
             -1], constrained_fieldName)+dot(getattr(
             macro_quantitiesClasses[-1], constrained_gradientFieldName),
             (mesh_dataClass.x-centroid_vector))), 
-            LinearScalarFieldExpression(getattr(macro_quantitiesClasses[
-            -1], constrained_fieldName), getattr(macro_quantitiesClasses[
-            -1], constrained_gradientFieldName), *centroid_coordinates), 
+            compile_linearFieldExpression(getattr(
+            macro_quantitiesClasses[-1], constrained_fieldName), getattr(
+            macro_quantitiesClasses[-1], constrained_gradientFieldName), 
+            *centroid_coordinates), 
             FunctionSpace(mesh_dataClass.mesh, elements_dictionary[
             constrained_fieldName])], centroid_coordinates)
 
@@ -330,9 +472,10 @@ constrained_gradientFieldName, elements_dictionary, centroid_coordinates
             -1], constrained_fieldName)+dot(getattr(
             macro_quantitiesClasses[-1], constrained_gradientFieldName),
             (mesh_dataClass.x-centroid_vector))), 
-            LinearVectorFieldExpression(getattr(macro_quantitiesClasses[
-            -1], constrained_fieldName), getattr(macro_quantitiesClasses[
-            -1], constrained_gradientFieldName), *centroid_coordinates), 
+            compile_linearFieldExpression(getattr(
+            macro_quantitiesClasses[-1], constrained_fieldName), getattr(
+            macro_quantitiesClasses[-1], constrained_gradientFieldName), 
+            *centroid_coordinates), 
             FunctionSpace(mesh_dataClass.mesh, elements_dictionary[
             constrained_fieldName])], centroid_coordinates)
 
@@ -350,14 +493,14 @@ constrained_gradientFieldName, elements_dictionary, centroid_coordinates
 
         if n_dimsPrimalField==0:
 
-            return (LinearScalarFieldExpression(getattr(
+            return (compile_linearFieldExpression(getattr(
             macro_quantitiesClasses[-1], constrained_fieldName),getattr(
             macro_quantitiesClasses[-1], constrained_gradientFieldName), 
             *centroid_coordinates), None, centroid_coordinates)
 
         elif n_dimsPrimalField==1:
 
-            return (LinearVectorFieldExpression(getattr(
+            return (compile_linearFieldExpression(getattr(
             macro_quantitiesClasses[-1], constrained_fieldName),getattr(
             macro_quantitiesClasses[-1], constrained_gradientFieldName), 
             *centroid_coordinates), None, centroid_coordinates)
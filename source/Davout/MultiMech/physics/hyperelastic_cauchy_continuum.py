@@ -31,7 +31,9 @@ None, polynomial_degree=2, quadrature_degree=2, t=0.0,
 volume_physGroupsSubmesh=None, post_processesSubmesh=None, 
 solution_name=None, verbose=False, dirichlet_boundaryConditions=None,
 body_forcesDict=None, run_in_parallel=False, comm=None, 
-return_residual_vector_only=False):
+return_residual_vector_only=False, adaptive_stepping=None, checkpointing=
+None, restart_from=None, 
+deferred_post_processing=None):
 
     ####################################################################
     #                               Mesh                               #
@@ -135,4 +137,7 @@ return_residual_vector_only=False):
     post_processesSubmesh, neumann_loads=neumann_loads, dirichlet_loads=
     dirichlet_loads, solution_name=solution_name, 
     volume_physGroupsSubmesh=volume_physGroupsSubmesh, t=t, t_final=
-    t_final, maximum_loadingSteps=maximum_loadingSteps)
\ No newline at end of file
+    t_final, maximum_loadingSteps=maximum_loadingSteps, 
+    adaptive_stepping=adaptive_stepping, checkpointing=checkpointing, 
+    restart_from=restart_from, deferred_post_processing=
+    deferred_post_processing)
\ No newline at end of file
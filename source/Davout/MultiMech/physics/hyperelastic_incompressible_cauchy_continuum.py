@@ -31,7 +31,9 @@ solver_parameters, neumann_loads=None, dirichlet_loads=None,
 polynomial_degree_displacement=2, polynomial_degree_pressure=1, t=0.0, 
 volume_physGroupsSubmesh=None, post_processesSubmesh=None, solution_name=
 None, dirichlet_boundaryConditions=None, body_forcesDict=None, verbose=
-False, run_in_parallel=False, comm=None):
+False, run_in_parallel=False, comm=None, adaptive_stepping=None, 
+checkpointing=None, restart_from=None, 
+deferred_post_processing=None):
 
     ####################################################################
     #                               Mesh                               #
@@ -182,4 +184,7 @@ False, run_in_parallel=False, comm=None):
     post_processesSubmesh, dirichlet_loads=dirichlet_loads, 
     neumann_loads=neumann_loads, volume_physGroupsSubmesh=
     volume_physGroupsSubmesh, solution_name=solution_name, t=t, t_final=
-    t_final, maximum_loadingSteps=maximum_loadingSteps)
\ No newline at end of file
+    t_final, maximum_loadingSteps=maximum_loadingSteps, 
+    adaptive_stepping=adaptive_stepping, checkpointing=checkpointing, 
+    restart_from=restart_from, deferred_post_processing=
+    deferred_post_processing)
\ No newline at end of file
@@ -31,7 +31,9 @@ polynomial_degreeDisplacement=2, polynomial_degreeMicrorotation=2,
 t=0.0, neumann_loads=None, dirichlet_loads=None, solution_name=None,
 volume_physGroupsSubmesh=None, post_processesSubmesh=None, 
 dirichlet_boundaryConditions=None, verbose=False, body_forcesDict=None,
-body_momentsDict=None, run_in_parallel=False, comm=None):
+body_momentsDict=None, run_in_parallel=False, comm=None, 
+adaptive_stepping=None, checkpointing=None, restart_from=None, 
+deferred_post_processing=None):
 
     ####################################################################
     #                               Mesh                               #
@@ -142,4 +144,7 @@ body_momentsDict=None, run_in_parallel=False, comm=None):
     post_processesSubmesh, dirichlet_loads=dirichlet_loads, 
     neumann_loads=neumann_loads, volume_physGroupsSubmesh=
     volume_physGroupsSubmesh, solution_name=solution_name, t=t, t_final=
-    t_final, maximum_loadingSteps=maximum_loadingSteps)
\ No newline at end of file
+    t_final, maximum_loadingSteps=maximum_loadingSteps, 
+    adaptive_stepping=adaptive_stepping, checkpointing=checkpointing, 
+    restart_from=restart_from, deferred_post_processing=
+    deferred_post_processing)
\ No newline at end of file
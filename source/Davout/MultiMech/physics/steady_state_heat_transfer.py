@@ -30,7 +30,9 @@ mesh_fileName, solver_parameters, neumann_loads=None, dirichlet_loads=
 None, polynomial_degree=2, quadrature_degree=2, t=0.0, 
 volume_physGroupsSubmesh=None, post_processesSubmesh=None, 
 solution_name=None, verbose=False, dirichlet_boundaryConditions=None,
-heat_generation_dict=None, run_in_parallel=False, comm=None):
+heat_generation_dict=None, run_in_parallel=False, comm=None, 
+adaptive_stepping=None, checkpointing=None, restart_from=None, 
+deferred_post_processing=None):
 
     ####################################################################
     #                               Mesh                               #
@@ -126,4 +128,7 @@ heat_generation_dict=None, run_in_parallel=False, comm=None):
     post_processesSubmesh, neumann_loads=neumann_loads, dirichlet_loads=
     dirichlet_loads, solution_name=solution_name, 
     volume_physGroupsSubmesh=volume_physGroupsSubmesh, t=t, t_final=
-    t_final, maximum_loadingSteps=maximum_loadingSteps)
\ No newline at end of file
+    t_final, maximum_loadingSteps=maximum_loadingSteps, 
+    adaptive_stepping=adaptive_stepping, checkpointing=checkpointing, 
+    restart_from=restart_from, deferred_post_processing=
+    deferred_post_processing)
\ No newline at end of file
@@ -631,6 +631,10 @@ def initialize_cauchyStressSaving(data, direct_codeData, submesh_flag):
             
             self.result = file 
 
+            # Saves the name of the file to reopen it after a restart
+
+            self.file_name = file_name
+
             self.W = W 
 
             self.constitutive_model = constitutive_model
@@ -652,6 +656,12 @@ def initialize_cauchyStressSaving(data, direct_codeData, submesh_flag):
             self.required_fieldsNames = constitutive_tools.get_constitutiveModelFields(
             self.constitutive_model)
 
+            # Creates the registry to bind the fields to placeholders,
+            # such that the compiled right-hand side of the projection
+            # of the stress is reused at every step
+
+            self.form_registry = variational_tools.FormRegistry()
+
     output_object = OutputObject(file, W, constitutive_model, dx, 
     physical_groupsList, physical_groupsNamesToTags, 0.0)
 
@@ -665,13 +675,17 @@ fields_namesDict, flag_parentMeshReuse=False):
     mpi_print(output_object.comm_object, "Updates the saving of the Ca"+
     "uchy stress field\n")
     
+    # Binds the fields to the placeholders, such that the stress is 
+    # built out of the same coefficients at every step
+
+    field = output_object.form_registry.bind_fields(field)
+
     # Verifies if there is a pressure field. A correction to the Cauchy 
     # stress tensor must be added to this case, since the constitutive 
     # model does not give the spherical part of the stress in incompres-
     # sible hyperelasticity
 
-    pressure_correction = Constant([[0.0, 0.0, 0.0], [0.0, 0.0, 0.0], [
-    0.0, 0.0, 0.0]])
+    pressure_correction = None
 
     if "Pressure" in fields_namesDict:
 
@@ -766,6 +780,10 @@ submesh_flag):
             
             self.result = file 
 
+            # Saves the name of the file to reopen it after a restart
+
+            self.file_name = file_name
+
             self.W = W 
 
             self.constitutive_model = constitutive_model
@@ -787,6 +805,12 @@ submesh_flag):
             self.required_fieldsNames = constitutive_tools.get_constitutiveModelFields(
             self.constitutive_model)
 
+            # Creates the registry to bind the fields to placeholders,
+            # such that the compiled right-hand side of the projection
+            # of the stress is reused at every step
+
+            self.form_registry = variational_tools.FormRegistry()
+
     output_object = OutputObject(file, W, constitutive_model, dx, 
     physical_groupsList, physical_groupsNamesToTags, 0.0)
 
@@ -800,6 +824,11 @@ time, fields_namesDict, flag_parentMeshReuse=False):
     mpi_print(output_object.comm_object, "Updates the saving of the co"+
     "uple Cauchy stress field\n")
 
+    # Binds the fields to the placeholders, such that the stress is 
+    # built out of the same coefficients at every step
+
+    field = output_object.form_registry.bind_fields(field)
+
     return constitutive_tools.save_stressField(output_object, field, 
     time, flag_parentMeshReuse, ["Couple Cauchy stress", "stress"], "c"+
     "ouple_cauchy", "cauchy_stress", fields_namesDict)
@@ -880,6 +909,10 @@ submesh_flag):
             
             self.result = file 
 
+            # Saves the name of the file to reopen it after a restart
+
+            self.file_name = file_name
+
             self.W = W 
 
             self.constitutive_model = constitutive_model
@@ -901,6 +934,12 @@ submesh_flag):
             self.required_fieldsNames = constitutive_tools.get_constitutiveModelFields(
             self.constitutive_model)
 
+            # Creates the registry to bind the fields to placeholders,
+            # such that the compiled right-hand side of the projection
+            # of the stress is reused at every step
+
+            self.form_registry = variational_tools.FormRegistry()
+
     output_object = OutputObject(file, W, constitutive_model, dx, 
     physical_groupsList, physical_groupsNamesToTags, 0.0)
 
@@ -934,6 +973,11 @@ time, fields_namesDict, flag_parentMeshReuse=False):
         "ds names has the following keys:\n"+message+"\n\nThe asked nu"+
         "mber was "+str(field_number))
 
+    # Binds the fields to the placeholders, such that the stress is
+    # built out of the same coefficients at every step
+
+    field = output_object.form_registry.bind_fields(field)
+
     # If there is a single field, field number will be -1
 
     u_field = None
@@ -951,8 +995,7 @@ time, fields_namesDict, flag_parentMeshReuse=False):
     # the constitutive model does not give the spherical part of the
     # stress in incompressible hyperelasticity
 
-    pressure_correction = Constant([[0.0, 0.0, 0.0], [0.0, 0.0, 0.0], [
-    0.0, 0.0, 0.0]])
+    pressure_correction = None
 
     if "Pressure" in fields_namesDict:
 
@@ -1057,6 +1100,10 @@ submesh_flag):
             
             self.result = file 
 
+            # Saves the name of the file to reopen it after a restart
+
+            self.file_name = file_name
+
             self.W = W 
 
             self.constitutive_model = constitutive_model
@@ -1078,6 +1125,12 @@ submesh_flag):
             self.required_fieldsNames = constitutive_tools.get_constitutiveModelFields(
             self.constitutive_model)
 
+            # Creates the registry to bind the fields to placeholders,
+            # such that the compiled right-hand side of the projection
+            # of the stress is reused at every step
+
+            self.form_registry = variational_tools.FormRegistry()
+
     output_object = OutputObject(file, W, constitutive_model, dx, 
     physical_groupsList, physical_groupsNamesToTags, 0.0)
 
@@ -1092,6 +1145,11 @@ field_number, time, fields_namesDict, flag_parentMeshReuse=False):
     mpi_print(output_object.comm_object, "Updates the saving of the co"+
     "uple first Piola-Kirchhoff stress field\n")
     
+    # Binds the fields to the placeholders, such that the stress is 
+    # built out of the same coefficients at every step
+
+    field = output_object.form_registry.bind_fields(field)
+
     return constitutive_tools.save_stressField(output_object, field, 
     time, flag_parentMeshReuse, ["Couple first Piola-Kirchhoff stress", 
     "stress"], "couple_first_piola_kirchhoff", "first_piolaStress", 
@@ -1191,6 +1249,10 @@ def initialize_tractionSaving(data, direct_codeData, submesh_flag):
 
             self.result = file
 
+            # Saves the name of the file to reopen it after a restart
+
+            self.file_name = file_name
+
             self.physical_groupsList = physical_groupsList 
 
             self.physical_groupsNamesToTags = physical_groupsNamesToTags
@@ -1482,6 +1544,10 @@ def initialize_strain_energy(data, direct_codeData, submesh_flag):
 
             self.saving_method = saving_method
 
+            # Creates the registry of compiled forms
+
+            self.form_registry = variational_tools.FormRegistry()
+
     output_object = OutputObject(file_name, mesh_data_class, 
     constitutive_model, strain_energy_list, saving_method)
 
@@ -1515,6 +1581,10 @@ fields_namesDict):
     mpi_print(output_object.comm_object, "Updates the saving of the st"+
     "rain energy over the whole mesh\n")
 
+    # Binds the fields to the placeholders of the compiled forms
+
+    field = output_object.form_registry.bind_fields(field)
+
     # Gets the jacobian
 
     I = Identity(3)
@@ -1570,9 +1640,11 @@ fields_namesDict):
                         output_object.mesh_data_class.domain_physicalGroupsNameToTag.keys())))
 
                     # Adds the contribution of the strain energy of this
-                    # physical group
+                    # physical group. The form is compiled at the first
+                    # update only
 
-                    strain_energy_value += assemble(
+                    strain_energy_value += output_object.form_registry.assemble(
+                    local_physical_group, lambda: 
                     local_constitutive_model.strain_energy(C)*
                     output_object.mesh_data_class.dx(
                     output_object.mesh_data_class.domain_physicalGroupsNameToTag[
@@ -1596,9 +1668,11 @@ fields_namesDict):
                     output_object.mesh_data_class.domain_physicalGroupsNameToTag.keys())))
 
                 # Adds the contribution of the strain energy of this
-                # physical group
+                # physical group. The form is compiled at the first up-
+                # date only
 
-                strain_energy_value += assemble(
+                strain_energy_value += output_object.form_registry.assemble(
+                physical_group, lambda: 
                 local_constitutive_model.strain_energy(C)*
                 output_object.mesh_data_class.dx(
                 output_object.mesh_data_class.domain_physicalGroupsNameToTag[
@@ -1608,10 +1682,13 @@ fields_namesDict):
 
     else:
 
-        strain_energy_value += assemble(
-        output_object.constitutive_model.strain_energy(C)*
+        strain_energy_value += output_object.form_registry.assemble("", 
+        lambda: output_object.constitutive_model.strain_energy(C)*
         output_object.mesh_data_class.dx)
 
+    mpi_print(output_object.comm_object, 
+    output_object.form_registry.get_timingsMessage())
+
     # Appends this result to the output class
 
     output_object.result.append([time, strain_energy_value])
@@ -1724,6 +1801,10 @@ submesh_flag):
 
             self.surface_centroid = surface_centroid
 
+            # Creates the registry of compiled forms
+
+            self.form_registry = variational_tools.FormRegistry()
+
     output_object = OutputObject(file_name, mesh_data_class, 
     constitutive_model, forces_moments_list, new_ds, new_boundary_dict,
     surface_physical_group, surface_position_vector, area_inverse,
@@ -1762,6 +1843,10 @@ time, fields_namesDict):
     " of "+str(output_object.surface_area)+"\nThe centroid of this sur"+
     "face is at "+str(output_object.surface_centroid.values())+"\n")
 
+    # Binds the fields to the placeholders of the compiled forms
+
+    field = output_object.form_registry.bind_fields(field)
+
     # If there is a single field, field number will be -1
 
     u_field = None
@@ -1779,8 +1864,7 @@ time, fields_namesDict):
     # the constitutive model does not give the spherical part of the
     # stress in incompressible hyperelasticity
 
-    pressure_correction = Constant([[0.0, 0.0, 0.0], [0.0, 0.0, 0.0], [
-    0.0, 0.0, 0.0]])
+    pressure_correction = None
 
     if "Pressure" in fields_namesDict:
 
@@ -1814,6 +1898,42 @@ time, fields_namesDict):
 
     physical_groups_attached = output_object.new_boundary_physical_groups_dict[
     output_object.surface_physical_group]
+
+    # Defines a function to add the forces and moments of a constitutive
+    # model integrated over a tag of the new boundary measure. The forms
+    # are compiled at the first update only
+
+    def add_forces_moments(local_constitutive_model, integration_tag):
+
+        # Gets the first Piola-Kirchhoff stress tensor with the correc-
+        # tion of the pressure, if there is one
+
+        first_piola = local_constitutive_model.first_piolaStress(u_field)
+
+        if pressure_correction is not None:
+
+            first_piola = first_piola+pressure_correction
+
+        # Gets the resulting force
+
+        surface_force = first_piola*output_object.mesh_data_class.n
+
+        # Gets the resulting moment
+
+        surface_moment = cross(output_object.surface_position_vector, 
+        surface_force)
+
+        # Assembles the three components
+
+        for i in range(3):
+
+            forces[i] += output_object.form_registry.assemble(("force", 
+            i, integration_tag), lambda: surface_force[i]*
+            output_object.new_ds(integration_tag))
+
+            moments[i] += output_object.form_registry.assemble(("momen"+
+            "t", i, integration_tag), lambda: surface_moment[i]*
+            output_object.new_ds(integration_tag))
     
     # Verifies if the constitutive model is a dictionary
 
@@ -1849,46 +1969,8 @@ time, fields_namesDict):
 
                     if local_physical_group in physical_groups_attached:
 
-                        # Gets the resulting force
-
-                        surface_force = ((local_constitutive_model.first_piolaStress(
-                        u_field)+pressure_correction)*output_object.mesh_data_class.n)
-
-                        # Assembles the three components
-
-                        forces[0] += assemble(surface_force[0]*
-                        output_object.new_ds(physical_groups_attached[
-                        local_physical_group]))
-
-                        forces[1] += assemble(surface_force[1]*
-                        output_object.new_ds(physical_groups_attached[
-                        local_physical_group]))
-
-                        forces[2] += assemble(surface_force[2]*
-                        output_object.new_ds(physical_groups_attached[
-                        local_physical_group]))
-
-                        # Gets the resulting moment
-
-                        surface_moment = cross(
-                        output_object.surface_position_vector, (
-                        local_constitutive_model.first_piolaStress(
-                        u_field)+pressure_correction)*
-                        output_object.mesh_data_class.n)
-
-                        # Assembles the three components
-
-                        moments[0] += assemble(surface_moment[0]*
-                        output_object.new_ds(physical_groups_attached[
-                        local_physical_group]))
-
-                        moments[1] += assemble(surface_moment[1]*
-                        output_object.new_ds(physical_groups_attached[
-                        local_physical_group]))
-
-                        moments[2] += assemble(surface_moment[2]*
-                        output_object.new_ds(physical_groups_attached[
-                        local_physical_group]))
+                        add_forces_moments(local_constitutive_model,
+                        physical_groups_attached[local_physical_group])
 
             # Otherwise
 
@@ -1911,87 +1993,22 @@ time, fields_namesDict):
 
                 if physical_group in physical_groups_attached:
 
-                    # Gets the resulting force
-
-                    surface_force = ((local_constitutive_model.first_piolaStress(
-                    u_field)+pressure_correction)*output_object.mesh_data_class.n)
-
-                    # Assembles the three components
-
-                    forces[0] += assemble(surface_force[0]*
-                    output_object.new_ds(physical_groups_attached[
-                    physical_group]))
-
-                    forces[1] += assemble(surface_force[1]*
-                    output_object.new_ds(physical_groups_attached[
-                    physical_group]))
-
-                    forces[2] += assemble(surface_force[2]*
-                    output_object.new_ds(physical_groups_attached[
-                    physical_group]))
-
-                    # Gets the resulting moment
-
-                    surface_moment = cross(
-                    output_object.surface_position_vector, (
-                    local_constitutive_model.first_piolaStress(
-                    u_field)+pressure_correction)
-                    *output_object.mesh_data_class.n)
-
-                    # Assembles the three components
-
-                    moments[0] += assemble(surface_moment[0]*
-                    output_object.new_ds(physical_groups_attached[
-                    physical_group]))
-
-                    moments[1] += assemble(surface_moment[1]*
-                    output_object.new_ds(physical_groups_attached[
-                    physical_group]))
-
-                    moments[2] += assemble(surface_moment[2]*
-                    output_object.new_ds(physical_groups_attached[
-                    physical_group]))
+                    add_forces_moments(local_constitutive_model, 
+                    physical_groups_attached[physical_group])
 
     # Otherwise, computes for the whole mesh at once
 
     else:
 
-        # Gets the resulting force
-
-        surface_force = ((output_object.constitutive_model.first_piolaStress(
-        u_field)+pressure_correction)*output_object.mesh_data_class.n)
-
-        # Gets the resulting moment
-
-        surface_moment = cross(output_object.surface_position_vector, (
-        output_object.constitutive_model.first_piolaStress(u_field)+
-        pressure_correction)*output_object.mesh_data_class.n)
-
         # Iterates through the physical groups attached to this surface
 
         for integration_tag in physical_groups_attached.values():
 
-            # Assembles the three components
-
-            forces[0] += assemble(surface_force[0]*output_object.new_ds(
-            integration_tag))
+            add_forces_moments(output_object.constitutive_model, 
+            integration_tag)
 
-            forces[1] += assemble(surface_force[1]*output_object.new_ds(
-            integration_tag))
-
-            forces[2] += assemble(surface_force[2]*output_object.new_ds(
-            integration_tag))
-
-            # Assembles the three components
-
-            moments[0] += assemble(surface_moment[0]*output_object.new_ds(
-            integration_tag))
-
-            moments[1] += assemble(surface_moment[1]*output_object.new_ds(
-            integration_tag))
-
-            moments[2] += assemble(surface_moment[2]*output_object.new_ds(
-            integration_tag))
+    mpi_print(output_object.mesh_data_class.comm, 
+    output_object.form_registry.get_timingsMessage())
 
     # Appends this result to the output class
 
@@ -2090,6 +2107,10 @@ def initialize_mesh_volume(data, direct_codeData, submesh_flag):
 
             self.initial_volume = initial_volume
 
+            # Creates the registry of compiled forms
+
+            self.form_registry = variational_tools.FormRegistry()
+
     output_object = OutputObject(file_name, dx, volume_ratio_list, 
     initial_volume)
 
@@ -2123,6 +2144,10 @@ fields_namesDict):
     mpi_print(output_object.comm_object, "Updates the saving of the ra"+
     "tio of the meshe's volume to the initial volume of the mesh\n")
 
+    # Binds the fields to the placeholders of the compiled forms
+
+    field = output_object.form_registry.bind_fields(field)
+
     # Gets the jacobian
 
     I = Identity(3)
@@ -2141,13 +2166,19 @@ fields_namesDict):
 
     J = det(F)
     
-    # Calculates the new mesh volume
+    # Calculates the new mesh volume. The forms are compiled at the 
+    # first update only
 
-    new_volume = assemble(J*output_object.dx) 
+    new_volume = output_object.form_registry.assemble("volume", lambda: 
+    J*output_object.dx) 
 
     # Calculates the sum of a quadratic constraint over the jacobian
 
-    quadratic_constraint = assemble((J**2)*output_object.dx)
+    quadratic_constraint = output_object.form_registry.assemble("quadr"+
+    "atic constraint", lambda: (J**2)*output_object.dx)
+
+    mpi_print(output_object.comm_object, 
+    output_object.form_registry.get_timingsMessage())
 
     output_object.quadratic_constraint_list.append([time, 
     quadratic_constraint])
@@ -2301,6 +2332,10 @@ def initialize_fieldHomogenization(data, direct_codeData, submesh_flag):
 
             self.file_name = file_name
 
+            # Creates the registry of compiled forms
+
+            self.form_registry = variational_tools.FormRegistry()
+
     output_object = OutputObject(homogenized_fieldList, (1.0/volume), dx, 
     subdomain, file_name)
 
@@ -2314,6 +2349,10 @@ fields_namesDict):
     mpi_print(output_object.comm_object, "Updates the homogenization o"+
     "f the "+str(field_number)+" field\n")
 
+    # Binds the fields to the placeholders of the compiled forms
+
+    field = output_object.form_registry.bind_fields(field)
+
     # If the problem has a single field
 
     if field_number==-1:
@@ -2324,7 +2363,8 @@ fields_namesDict):
         output_object.result = homogenization_tools.homogenize_genericField(
         field, output_object.result, time, output_object.inverse_volume, 
         output_object.dx, output_object.subdomain, 
-        output_object.file_name, output_object.comm_object)
+        output_object.file_name, output_object.comm_object, 
+        form_registry=output_object.form_registry)
 
         return output_object
 
@@ -2339,7 +2379,8 @@ fields_namesDict):
         field[field_number], output_object.result, time, 
         output_object.inverse_volume, output_object.dx, 
         output_object.subdomain, output_object.file_name, 
-        output_object.comm_object)
+        output_object.comm_object, form_registry=
+        output_object.form_registry)
 
         return output_object
 
@@ -2363,6 +2404,11 @@ field_number, time, fields_namesDict):
     mpi_print(output_object.comm_object, "Updates the homogenization o"+
     "f the gradient of the "+str(field_number)+" field\n")
 
+    # Binds the fields to the placeholders of the compiled forms, so
+    # that the gradient is built out of the placeholders
+
+    field = output_object.form_registry.bind_fields(field)
+
     # Gets the gradient of the field
 
     grad_field = 0.0
@@ -2518,6 +2564,10 @@ submesh_flag):
             self.required_fieldsNames = constitutive_tools.get_constitutiveModelFields(
             self.constitutive_model)
 
+            # Creates the registry of compiled forms
+
+            self.form_registry = variational_tools.FormRegistry()
+
     output_object = OutputObject(homogenized_firstPiolaList, (1.0/volume
     ), dx, subdomain, file_name, constitutive_model, physical_groupsList,
     physical_groupsNamesToTags)
@@ -2533,6 +2583,10 @@ time, fields_namesDict):
     mpi_print(output_object.comm_object, "Updates the homogenization o"+
     "f the first Piola-Kirchhoff stress field\n")
 
+    # Binds the fields to the placeholders of the compiled forms
+
+    field = output_object.form_registry.bind_fields(field)
+
     output_object.result = homogenization_tools.homogenize_stressTensor(
     field, output_object.constitutive_model, "first_piola_kirchhoff", 
     "first_piolaStress", output_object.result, time, 
@@ -2540,7 +2594,8 @@ time, fields_namesDict):
     output_object.subdomain,output_object.file_name, 
     output_object.physical_groupsList, 
     output_object.physical_groupsNamesToTags, fields_namesDict, 
-    output_object.required_fieldsNames, output_object.comm_object)
+    output_object.required_fieldsNames, output_object.comm_object, 
+    form_registry=output_object.form_registry)
 
     return output_object
 
@@ -2679,6 +2734,10 @@ submesh_flag):
             self.required_fieldsNames = constitutive_tools.get_constitutiveModelFields(
             self.constitutive_model)
 
+            # Creates the registry of compiled forms
+
+            self.form_registry = variational_tools.FormRegistry()
+
     output_object = OutputObject(homogenized_firstPiolaList, (1.0/volume
     ), dx, subdomain, file_name, constitutive_model, physical_groupsList,
     physical_groupsNamesToTags, position_vector)
@@ -2694,6 +2753,10 @@ field_number, time, fields_namesDict):
     mpi_print(output_object.comm_object, "Updates the homogenization o"+
     "f the couple first Piola-Kirchhoff stress field\n")
 
+    # Binds the fields to the placeholders of the compiled forms
+
+    field = output_object.form_registry.bind_fields(field)
+
     """output_object.result = homogenization_tools.homogenize_stressTensor(
     field, output_object.constitutive_model, "couple_first_piola_kirch"+
     "hoff", "first_piolaStress", output_object.result, time, 
@@ -2709,7 +2772,8 @@ field_number, time, fields_namesDict):
     output_object.dx, output_object.subdomain, output_object.file_name, 
     output_object.physical_groupsList, 
     output_object.physical_groupsNamesToTags, fields_namesDict, 
-    output_object.required_fieldsNames, output_object.comm_object)
+    output_object.required_fieldsNames, output_object.comm_object, 
+    form_registry=output_object.form_registry)
 
     return output_object
 
@@ -2843,6 +2907,10 @@ def initialize_cauchyHomogenization(data, direct_codeData, submesh_flag):
             self.required_fieldsNames = constitutive_tools.get_constitutiveModelFields(
             self.constitutive_model)
 
+            # Creates the registry of compiled forms
+
+            self.form_registry = variational_tools.FormRegistry()
+
     output_object = OutputObject(homogenized_cauchyList, (1.0/volume
     ), dx, subdomain, file_name, constitutive_model, physical_groupsList,
     physical_groupsNamesToTags)
@@ -2858,13 +2926,18 @@ time, fields_namesDict):
     mpi_print(output_object.comm_object, "Updates the homogenization o"+
     "f the Cauchy stress field\n")
 
+    # Binds the fields to the placeholders of the compiled forms
+
+    field = output_object.form_registry.bind_fields(field)
+
     output_object.result = homogenization_tools.homogenize_stressTensor(
     field, output_object.constitutive_model, "cauchy", "cauchy_stress", 
     output_object.result, time, output_object.inverse_volume, 
     output_object.dx, output_object.subdomain, output_object.file_name, 
     output_object.physical_groupsList, 
     output_object.physical_groupsNamesToTags, fields_namesDict, 
-    output_object.required_fieldsNames, output_object.comm_object)
+    output_object.required_fieldsNames, output_object.comm_object, 
+    form_registry=output_object.form_registry)
 
     return output_object
 
@@ -2886,13 +2959,18 @@ time, fields_namesDict):
     mpi_print(output_object.comm_object, "Updates the homogenization o"+
     "f the couple Cauchy stress field\n")
 
+    # Binds the fields to the placeholders of the compiled forms
+
+    field = output_object.form_registry.bind_fields(field)
+
     output_object.result = homogenization_tools.homogenize_stressTensor(
     field, output_object.constitutive_model, "couple_cauchy", "cauchy_"+
     "stress", output_object.result, time, output_object.inverse_volume, 
     output_object.dx, output_object.subdomain, output_object.file_name, 
     output_object.physical_groupsList, 
     output_object.physical_groupsNamesToTags, fields_namesDict, 
-    output_object.required_fieldsNames, output_object.comm_object)
+    output_object.required_fieldsNames, output_object.comm_object, 
+    form_registry=output_object.form_registry)
 
     return output_object
 
@@ -4,7 +4,11 @@ from dolfin import *
 
 import numpy as np
 
-from .parallelization_tools import mpi_print, mpi_execute_function, mpi_barrier
+import os
+
+import pickle
+
+from .parallelization_tools import mpi_print, mpi_execute_function, mpi_barrier, mpi_xdmf_file
 
 from .functional_tools import FunctionalData, construct_monolithicFunctionSpace
 
@@ -222,10 +226,13 @@ False):
                     np.save(explicit_file_name, np.empty((0, len(
                     individual_field.vector()[:])+1)))
 
-                # Recovers what has already been saved
+                # Recovers what has already been saved. Keeps only the
+                # previous time steps, for, if the simulation was re-
+                # started from a checkpoint, steps after the checkpoint
+                # may have been saved already
 
                 array_of_vector_of_parameters = np.load(
-                explicit_file_name)
+                explicit_file_name)[0:time_step]
 
                 # Appends the current state of the vector of parameters
                 # along with time at the first column
@@ -296,10 +303,13 @@ False):
                     np.save(explicit_file_name, np.empty((0, len(
                     individual_field.vector()[:])+1)))
                 
-                # Recovers what has already been saved
+                # Recovers what has already been saved. Keeps only the
+                # previous time steps, for, if the simulation was re-
+                # started from a checkpoint, steps after the checkpoint
+                # may have been saved already
 
                 array_of_vector_of_parameters = np.load(
-                explicit_file_name)
+                explicit_file_name)[0:time_step]
 
                 # Appends the current state of the vector of parameters
                 # along with time at the first column
@@ -366,10 +376,13 @@ False):
                     np.save(explicit_file_name, np.empty((0, len(
                     individual_field.vector()[:])+1)))
 
-                # Recovers what has already been saved
+                # Recovers what has already been saved. Keeps only the
+                # previous time steps, for, if the simulation was re-
+                # started from a checkpoint, steps after the checkpoint
+                # may have been saved already
 
                 array_of_vector_of_parameters = np.load(
-                explicit_file_name)
+                explicit_file_name)[0:time_step]
 
                 # Appends the current state of the vector of parameters
                 # along with time at the first column
@@ -441,10 +454,13 @@ False):
                 np.save(explicit_file_name, np.empty((0, len(
                 individual_field.vector()[:])+1)))
 
-            # Recovers what has already been saved
+            # Recovers what has already been saved. Keeps only the pre-
+            # vious time steps, for, if the simulation was restarted from
+            # a checkpoint, steps after the checkpoint may have been saved
+            # already
 
             array_of_vector_of_parameters = np.load(
-            explicit_file_name)
+            explicit_file_name)[0:time_step]
 
             # Appends the current state of the vector of parameters
             # along with time at the first column
@@ -926,4 +942,284 @@ return_functional_data_class=False, verbose=True):
 
     else:
 
-        return solutions_across_time_steps, time_points
\ No newline at end of file
+        return solutions_across_time_steps, time_points
+
+########################################################################
+########################################################################
+##                             Checkpoints                            ##
+########################################################################
+########################################################################
+
+# Defines a function to write a checkpoint of a pseudotime stepping 
+# simulation into a binary file, from which the simulation can be re-
+# started. The checkpoint has the local array of the monolithic solu-
+# tion, the number of time keys already solved, the time value, the re-
+# maining data of the classes of macro quantities, the state of the 
+# adaptive pseudotime stepping controller, and the accumulated results
+# of the post-processes. In parallel, each processor writes its own fi-
+# le. The file is written into a temporary file first, and, then, it 
+# is renamed, so a preemption during the writing does not corrupt the
+# last checkpoint
+
+def write_checkpoint(file_name, functional_data_class, time_counter, 
+time_value, macro_quantitiesClasses=None, post_processingObjects=None,
+adaptive_controller=None, comm_object=None, verbose=True):
+    
+    """
+    Function for writing a checkpoint of a pseudotime stepping 
+    simulation.
+
+    file_name: name of the checkpoint file
+
+    functional_data_class: Instance of the FunctionalData class, whose
+    monolithic solution is saved
+
+    time_counter: number of time keys already solved
+
+    time_value: time value of the last solved time key
+
+    macro_quantitiesClasses: list of classes of macro quantities
+
+    post_processingObjects: dictionary or list of dictionaries of the
+    objects of the post-processes
+
+    adaptive_controller: instance of AdaptivePseudotimeStepping or None
+    """
+
+    file_name = get_checkpoint_file_name(file_name, comm_object)
+
+    # Assembles the dictionary of the state of the simulation
+
+    checkpoint = {"time counter": int(time_counter), "time value": float(
+    time_value), "solution": 
+    functional_data_class.monolithic_solution.vector().get_local(
+    ).copy()}
+
+    # Saves the remaining data of the macro quantities
+
+    if macro_quantitiesClasses is not None:
+
+        checkpoint["macro quantities"] = [deepcopy_state(
+        MacroScaleClass.variables) for MacroScaleClass in (
+        macro_quantitiesClasses)]
+
+    # Saves the state of the adaptive pseudotime stepping
+
+    if adaptive_controller is not None:
+
+        checkpoint["adaptive stepping"] = adaptive_controller.get_state()
+
+    # Saves the accumulated results of the post-processes
+
+    if post_processingObjects is not None:
+
+        checkpoint["post-processes"] = get_post_processes_state(
+        post_processingObjects)
+
+    # Writes into a temporary file and, then, replaces the checkpoint 
+    # file
+
+    temporary_file_name = file_name+".tmp"
+
+    with open(temporary_file_name, "wb") as checkpoint_file:
+
+        np.save(checkpoint_file, np.array(checkpoint, dtype=object),
+        allow_pickle=True)
+
+    os.replace(temporary_file_name, file_name)
+
+    if verbose:
+
+        mpi_print(comm_object, "Writes a checkpoint at time "+str(
+        time_value)+" into "+str(file_name)+"\n")
+
+# Defines a function to read a checkpoint written by write_checkpoint. 
+# It sets the monolithic solution, the macro quantities, the state of 
+# the adaptive pseudotime stepping controller, and the accumulated re-
+# sults of the post-processes in place. Returns the number of time keys
+# already solved and the time value of the checkpoint
+
+def read_checkpoint(file_name, functional_data_class, 
+macro_quantitiesClasses=None, post_processingObjects=None,
+adaptive_controller=None, comm_object=None, verbose=True):
+
+    file_name = get_checkpoint_file_name(file_name, comm_object)
+
+    verify_file_existence(file_name, termination=".npy")
+
+    checkpoint = np.load(file_name, allow_pickle=True).item()
+
+    # Verifies if the solution has the same number of DOFs
+
+    solution_vector = functional_data_class.monolithic_solution.vector()
+
+    if len(checkpoint["solution"])!=solution_vector.local_size():
+
+        raise IndexError("The checkpoint at '"+str(file_name)+"' has "+
+        str(len(checkpoint["solution"]))+" DOFs, whereas the solution "+
+        "has "+str(solution_vector.local_size())+" DOFs. Thus, the sim"+
+        "ulation cannot be restarted from it")
+
+    solution_vector.set_local(checkpoint["solution"])
+
+    solution_vector.apply("insert")
+
+    # Sets the remaining data of the macro quantities
+
+    if (macro_quantitiesClasses is not None) and ("macro quantities" in (
+    checkpoint)):
+
+        if len(macro_quantitiesClasses)!=len(checkpoint["macro quantit"+
+        "ies"]):
+
+            raise ValueError("The checkpoint at '"+str(file_name)+"' h"+
+            "as "+str(len(checkpoint["macro quantities"]))+" classes o"+
+            "f macro quantities, whereas the simulation has "+str(len(
+            macro_quantitiesClasses)))
+
+        for MacroScaleClass, variables in zip(macro_quantitiesClasses,
+        checkpoint["macro quantities"]):
+
+            MacroScaleClass.variables = variables
+
+    # Sets the state of the adaptive pseudotime stepping
+
+    if (adaptive_controller is not None) and ("adaptive stepping" in (
+    checkpoint)):
+
+        adaptive_controller.set_state(checkpoint["adaptive stepping"])
+
+    # Sets the accumulated results of the post-processes
+
+    if (post_processingObjects is not None) and ("post-processes" in (
+    checkpoint)):
+
+        set_post_processes_state(post_processingObjects, checkpoint[
+        "post-processes"], checkpoint["time counter"])
+
+    if verbose:
+
+        mpi_print(comm_object, "Restarts from the checkpoint at time "+
+        str(checkpoint["time value"])+" in "+str(file_name)+"\n")
+
+    return checkpoint["time counter"], checkpoint["time value"]
+
+# Defines a function to get the name of the checkpoint file. In paral-
+# lel, the rank of the processor is added to the name
+
+def get_checkpoint_file_name(file_name, comm_object):
+
+    file_name = take_outFileNameTermination(str(file_name))
+
+    if comm_object is not None:
+
+        file_name += "_rank_"+str(MPI.rank(comm_object))
+
+    return file_name+".npy"
+
+# Defines a function to get the accumulated results of the post-proces-
+# ses. The post-processing objects can be nested in dictionaries and 
+# lists. Only the attributes that are lists, numbers or arrays are sa-
+# ved, e.g. lists of homogenized quantities or counters of solution 
+# steps. Files and FEniCS objects are created again by the initializa-
+# tion of the post-processes
+
+def get_post_processes_state(post_processingObjects):
+
+    if isinstance(post_processingObjects, dict):
+
+        return {name: get_post_processes_state(output_object) for (name,
+        output_object) in post_processingObjects.items()}
+
+    elif isinstance(post_processingObjects, list):
+
+        return [get_post_processes_state(output_object) for (
+        output_object) in post_processingObjects]
+
+    state = dict()
+
+    if not hasattr(post_processingObjects, "__dict__"):
+
+        return state
+
+    for attribute, value in vars(post_processingObjects).items():
+
+        if isinstance(value, bool) or not isinstance(value, (list, int,
+        float, np.ndarray)):
+
+            continue
+
+        # Skips lists that cannot be serialized, e.g. lists of FEniCS
+        # objects
+
+        try:
+
+            pickle.dumps(value)
+
+        except Exception:
+
+            continue
+
+        state[attribute] = deepcopy_state(value)
+
+    return state
+
+# Defines a function to set the accumulated results of the post-proces-
+# ses back into the post-processing objects. The txt files are rewrit-
+# ten from the restored lists at the next time step. Plain xdmf files, 
+# though, cannot be appended to, thus, they are reopened with the suffix
+# '_restart_' and the number of time keys already solved, so the time 
+# steps before the checkpoint are kept in the original files
+
+def set_post_processes_state(post_processingObjects, state, 
+time_counter=0):
+
+    if isinstance(post_processingObjects, dict):
+
+        for name, output_object in post_processingObjects.items():
+
+            if name in state:
+
+                set_post_processes_state(output_object, state[name], 
+                time_counter)
+
+    elif isinstance(post_processingObjects, list):
+
+        for output_object, output_state in zip(post_processingObjects,
+        state):
+
+            set_post_processes_state(output_object, output_state, 
+            time_counter)
+
+    else:
+
+        for attribute, value in state.items():
+
+            setattr(post_processingObjects, attribute, value)
+
+        # Reopens the plain xdmf file of the results, if there is one
+
+        if isinstance(getattr(post_processingObjects, "result", None), 
+        XDMFFile) and hasattr(post_processingObjects, "file_name"):
+
+            comm_object = getattr(post_processingObjects, "comm_object",
+            None)
+
+            file_name = (post_processingObjects.file_name+"_restart_"+
+            str(time_counter))
+
+            post_processingObjects.result.close()
+
+            post_processingObjects.result = mpi_xdmf_file(comm_object,
+            file_name, add_termination=True)
+
+            mpi_print(comm_object, "WARNING: xdmf files cannot be appe"+
+            "nded to, thus, the time steps after the restart are saved"+
+            " at '"+file_name+".xdmf'\n")
+
+# Defines a function to copy a picklable state, so later modifications 
+# of the simulation do not change the saved state
+
+def deepcopy_state(state):
+
+    return pickle.loads(pickle.dumps(state))
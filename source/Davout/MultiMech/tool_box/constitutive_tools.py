@@ -473,6 +473,12 @@ def micropolar_curvatureTensor(phi):
 #                       Saving of stress measures                      #
 ########################################################################
 
+# Defines a null tensor to be used as pressure correction when the pres-
+# sure is not a field of the problem
+
+null_pressureCorrection = Constant([[0.0, 0.0, 0.0], [0.0, 0.0, 0.0], 
+[0.0, 0.0, 0.0]])
+
 # Defines a function to get, project and save a stress field
 
 def save_stressField(output_object, field, time, flag_parentMeshReuse,
@@ -492,12 +498,13 @@ pressure_correction=None):
 
         return output_object
     
-    # If the pressure correction is None, makes it a null tensor
+    # If the pressure correction is None, makes it a null tensor. The 
+    # same null tensor is used at every call, so that the compiled 
+    # right-hand side of the projection can be reused
 
     if pressure_correction is None:
 
-        pressure_correction = Constant([[0.0, 0.0, 0.0], [0.0, 0.0, 0.0], 
-        [0.0, 0.0, 0.0]])
+        pressure_correction = null_pressureCorrection
     
     # Verifies if the output object has the attribute with the names of 
     # the required fields
@@ -589,7 +596,8 @@ pressure_correction=None):
         integration_pairs, output_object.dx, output_object.W, 
         output_object.physical_groupsList, 
         output_object.physical_groupsNamesToTags, solution_names=
-        stress_solutionPlotNames)
+        stress_solutionPlotNames, rhs_key=variational_tools.get_rhs_key(
+        integration_pairs))
 
         # Saves the field into the sharable result with a submesh
 
@@ -615,9 +623,13 @@ pressure_correction=None):
         "te '"+str(stress_method)+"', thus the stress field cannot be "+
         "updated")(retrieved_fields), stress_name)+pressure_correction)
 
-        # Projects the stress into a function
+        # Projects the stress into a function. The mass matrix is facto-
+        # red once, and the compiled right-hand side is reused while the
+        # stress is evaluated with the same fields
 
-        stress_fieldFunction = project(stress_field, output_object.W)
+        stress_fieldFunction = variational_tools.get_projector(
+        output_object.W, output_object.dx).project([[stress_field, ""]],
+        rhs_key=variational_tools.get_rhs_key([[stress_field, ""]]))
 
         stress_fieldFunction.rename(*stress_solutionPlotNames)
 
@@ -756,8 +768,9 @@ stress_method, fields_namesDict, comm, digits=3):
         # Projects the stress into a function taking the trace to get 
         # the pressure
 
-        pressure_fieldFunction = project((1/3)*tr(stress_field), 
-        output_object.W)
+        pressure_fieldFunction = variational_tools.get_projector(
+        output_object.W, output_object.dx).project([[(1/3)*tr(
+        stress_field), ""]])
 
         # Updates the pressure by evaluating it the field at a point
 
@@ -1126,9 +1139,10 @@ tensor_name, fields_namesDict, comm):
 
                 # Projects the component
 
-                elasticity_tensorFunction = project(elasticity_tensor[
-                indices[0], indices[1], indices[2], indices[3]], 
-                output_object.W)
+                elasticity_tensorFunction = variational_tools.get_projector(
+                output_object.W, output_object.dx).project([[
+                elasticity_tensor[indices[0], indices[1], indices[2], 
+                indices[3]], ""]])
 
                 # Stores the component
 
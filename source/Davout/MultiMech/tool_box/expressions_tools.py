@@ -4,17 +4,29 @@ from dolfin import *
 
 import numpy as np
 
+import pickle
+
+from functools import partial
+
+from concurrent.futures import ProcessPoolExecutor
+
 from ...PythonicUtilities.function_tools import get_functions_arguments
 
-from ...MultiMech.tool_box.mesh_handling_tools import get_domain_dofs_to_physical_group
+from ...MultiMech.tool_box.mesh_handling_tools import get_domain_dofs_physical_group_labels
 
 from ...MultiMech.tool_box.functional_tools import construct_monolithicFunctionSpace
 
 # Defines a function to interpolate a python function into a finite ele-
-# ment space, the function must return a scalar
+# ment space, the function must return a scalar. If vectorized is True,
+# the function receives the array of coordinates of the DOFs [n_dofs, 3]
+# at once, and returns the array of values [n_dofs]. The DOFs can be 
+# sent in chunks of chunk_size DOFs. If the function is not vectorized, 
+# it can be evaluated DOF by DOF in a pool of n_processes processes, 
+# then, it must be serializable, i.e. it cannot be a lambda function
 
 def interpolate_scalar_function(scalar_function, function_space, name=
-None, mesh_data_class=None):
+None, mesh_data_class=None, vectorized=False, chunk_size=None, 
+n_processes=None):
 
     # Verifies the number of arguments, it must be only one: the position
     # vector in the mesh
@@ -65,46 +77,17 @@ None, mesh_data_class=None):
 
     dofs_coordinates = function_space.tabulate_dof_coordinates()
 
-    # Gets a dictionary of the DOFs to physical group if the mesh data
-    # class is given
-
-    dofs_dictionary = {}
-
-    scalar_arguments = {}
+    # Gets the array of physical groups of the DOFs if the mesh data 
+    # class is given and if the function asks for the physical group
 
-    if mesh_data_class is not None:
-
-        dofs_dictionary = get_domain_dofs_to_physical_group(
-        mesh_data_class, function_space)
-
-        # Gets the arguments of the scalar function
-
-        scalar_arguments = get_functions_arguments(scalar_function)
+    dofs_labels = get_dofs_labels(scalar_function, function_space, 
+    mesh_data_class, len(dofs_coordinates))
 
     # Gets the values of the function in the nodes
 
-    nodes_values = np.zeros(len(dofs_coordinates))
-
-    if "current_physical_group" in scalar_arguments:
-
-        for dof in range(len(dofs_coordinates)):
-
-            current_physical_group = None
-
-            for physical_name, physical_dofs in dofs_dictionary.items():
-
-                if dof in physical_dofs:
-
-                    current_physical_group = physical_name
-
-            nodes_values[dof] = scalar_function(dofs_coordinates[dof],
-            current_physical_group=current_physical_group)
-
-    else:
-
-        for dof in range(len(dofs_coordinates)):
-
-            nodes_values[dof] = scalar_function(dofs_coordinates[dof])
+    nodes_values = evaluate_function_at_dofs(scalar_function, [
+    dofs_coordinates], dofs_labels=dofs_labels, vectorized=vectorized,
+    chunk_size=chunk_size, n_processes=n_processes)
 
     # Creates a Function element over the finite element space
 
@@ -135,16 +118,19 @@ None, mesh_data_class=None):
 # Defines a function to interpolate a vector-valued or tensor-valued 
 # function on a function space. The function must return a numpy array 
 # and it must receive as argument a position vector and the number of 
-# the component to be evaluated
+# the component to be evaluated. If vectorized is True, the function re-
+# ceives the array of coordinates of the DOFs [n_dofs, 3] and the array
+# of components [n_dofs] at once, and returns the array of values 
+# [n_dofs]. The DOFs can be sent in chunks of chunk_size DOFs
 
 def interpolate_tensor_function(vector_function, function_space, name=
-None, mesh_data_class=None):
+None, mesh_data_class=None, vectorized=False, chunk_size=None):
 
-    # Verifies the number of arguments, it must be only one: the position
-    # vector in the mesh
+    # Verifies the number of arguments, it must be two: the position 
+    # vector in the mesh and the component
 
     number_of_arguments = get_functions_arguments(vector_function, 
-    number_of_arguments_only=True)
+    number_of_arguments_only=True, positional_arguments_only=True)
 
     if number_of_arguments!=2:
 
@@ -197,21 +183,27 @@ None, mesh_data_class=None):
     field_number_of_components = int(np.prod(function_space.ufl_element(
     ).value_shape()))
 
-    # Gets the values of the function in the DOFs
+    # Gets the local number of the component of each DOF
+
+    number_of_dofs = function_space.dim()
 
-    DOFs_values = np.zeros(function_space.dim())
+    dofs_components = np.arange(number_of_dofs)%field_number_of_components
 
-    for dof in range(function_space.dim()):
+    # Gets the array of physical groups of the DOFs if the mesh data 
+    # class is given and if the function asks for the physical group
 
-        # Gets the coordinates of the DOF
+    dofs_labels = get_dofs_labels(vector_function, function_space, 
+    mesh_data_class, len(dofs_coordinates))
 
-        dof_coordinate = dofs_coordinates[dof]
+    if dofs_labels is not None:
 
-        # Evaluates the function and updates the corresponding local 
-        # number of the DOF only
+        dofs_labels = dofs_labels[0:number_of_dofs]
 
-        DOFs_values[dof] = vector_function(dof_coordinate, dof % (
-        field_number_of_components))
+    # Gets the values of the function in the DOFs
+
+    DOFs_values = evaluate_function_at_dofs(vector_function, [
+    dofs_coordinates[0:number_of_dofs], dofs_components], dofs_labels=
+    dofs_labels, vectorized=vectorized, chunk_size=chunk_size)
 
     # Creates a Function element over the finite element space
 
@@ -237,4 +229,128 @@ None, mesh_data_class=None):
 
         return function_object, function_data_class
 
-    return function_object
\ No newline at end of file
+    return function_object
+
+########################################################################
+#                              Evaluation                              #
+########################################################################
+
+# Defines a function to get the array of physical groups of the DOFs if
+# the mesh data class is given and if the function has the keyword ar-
+# gument 'current_physical_group'. Otherwise, gives None
+
+def get_dofs_labels(python_function, function_space, mesh_data_class, 
+number_of_dofs):
+
+    if mesh_data_class is None:
+
+        return None
+    
+    if not ("current_physical_group" in get_functions_arguments(
+    python_function)):
+        
+        return None
+    
+    return get_domain_dofs_physical_group_labels(mesh_data_class, 
+    function_space, number_of_dofs=number_of_dofs)
+
+# Defines a function to evaluate a python function at the DOFs. The po-
+# sitional arguments are given as a list of arrays, whose first dimen-
+# sion is the number of DOFs. If the array of physical groups is given,
+# it is sent as the keyword argument 'current_physical_group'
+
+def evaluate_function_at_dofs(python_function, positional_arrays, 
+dofs_labels=None, vectorized=False, chunk_size=None, n_processes=None):
+
+    # Gets the number of DOFs and initializes the values
+
+    number_of_dofs = len(positional_arrays[0])
+
+    DOFs_values = np.zeros(number_of_dofs)
+
+    # Gets the keyword arguments
+
+    keyword_arrays = dict()
+
+    if dofs_labels is not None:
+
+        keyword_arrays["current_physical_group"] = dofs_labels
+
+    # If the function is vectorized, evaluates it chunk by chunk
+
+    if vectorized:
+
+        if chunk_size is None:
+
+            chunk_size = max(number_of_dofs, 1)
+
+        for first_dof in range(0, number_of_dofs, chunk_size):
+
+            last_dof = min(first_dof+chunk_size, number_of_dofs)
+
+            chunk_values = np.asarray(python_function(*[array[
+            first_dof:last_dof] for array in positional_arrays], **dict(
+            (key, array[first_dof:last_dof]) for key, array in (
+            keyword_arrays.items()))), dtype=float).reshape(-1)
+
+            if chunk_values.shape[0]!=(last_dof-first_dof):
+
+                raise ValueError("The vectorized function to be interp"+
+                "olated was evaluated at "+str(last_dof-first_dof)+" D"+
+                "OFs, but it returned "+str(chunk_values.shape[0])+" v"+
+                "alues. It must return an array with one value per DOF")
+
+            DOFs_values[first_dof:last_dof] = chunk_values
+
+    # If a pool of processes is asked for, evaluates the function DOF by
+    # DOF in the pool
+
+    elif n_processes is not None:
+
+        try:
+
+            pickle.dumps(python_function)
+
+        except Exception:
+
+            raise TypeError("The function to be interpolated must be s"+
+            "erializable to be evaluated in a pool of processes, but i"+
+            "t is not. Lambda functions and functions defined inside o"+
+            "ther functions cannot be serialized. Use a function defin"+
+            "ed at module level or 'construct_lambda_function' from Py"+
+            "thonicUtilities.function_tools")
+
+        if chunk_size is None:
+
+            chunk_size = max(number_of_dofs//(4*n_processes), 1)
+
+        with ProcessPoolExecutor(max_workers=n_processes) as executor:
+
+            DOFs_values[:] = list(executor.map(partial(evaluate_at_dof, 
+            python_function, dofs_labels is not None), *(
+            positional_arrays+([dofs_labels] if dofs_labels is not None 
+            else [])), chunksize=chunk_size))
+
+    # Otherwise, evaluates the function DOF by DOF
+
+    else:
+
+        for dof in range(number_of_dofs):
+
+            DOFs_values[dof] = python_function(*[array[dof] for array in (
+            positional_arrays)], **dict((key, array[dof]) for key, array 
+            in keyword_arrays.items()))
+
+    return DOFs_values
+
+# Defines a function to evaluate a python function at a single DOF. It 
+# is defined at module level to be sent to the pool of processes
+
+def evaluate_at_dof(python_function, has_label, *arguments):
+
+    if has_label:
+
+        return python_function(*arguments[:-1], current_physical_group=
+        arguments[-1])
+    
+    return python_function(*arguments)
@@ -5,6 +5,8 @@ from dolfin import *
 
 import numpy as np
 
+from time import perf_counter
+
 from copy import deepcopy
 
 from abc import ABC, abstractmethod
@@ -543,13 +545,16 @@ boundary_conditions, solver_parameters=None):
     # Sets the solver to this problem
 
     return create_solverClass(Res, solver_parameters, 
-    functional_data_class.fields_names_dict)
+    functional_data_class.fields_names_dict, residual_form=
+    residual_form, solution=monolithic_solution, boundary_conditions=
+    boundary_conditions, jacobian_form=residual_derivative)
 
 # Defines a function to create a class of NonlinearVariationalSolver 
 # with extra features taken from the solver_parameters dictionary
 
 def create_solverClass(non_linearProblem, solver_parameters, 
-fields_names_dict):
+fields_names_dict, residual_form=None, solution=None, 
+boundary_conditions=None, jacobian_form=None):
 
     if solver_parameters is None:
 
@@ -599,166 +604,532 @@ fields_names_dict):
         return set_solverParameters(NonlinearVariationalSolver(
         non_linearProblem), solver_parameters)
     
-    raise NotImplementedError("The custom solver has not been implemented yet")
+    # Eliminates the keys that are for the custom solver, without chan-
+    # ging the dictionary given by the user
 
-    # Eliminates the keys that are for the custom solver
+    native_parameters = dict()
 
-    for name in non_nativeParameters.keys():
+    for name, value in solver_parameters.items():
 
-        solver_parameters.pop(name)
+        if not (name in non_nativeParameters):
 
-    # Defines the class of the custom solver
+            native_parameters[name] = value
 
-    class CustomSolver:
+    # Instantiates the custom solver and sets the parameters
 
-        def __init__(self, problem):
-            
-            # Receives the NonlinearVariationalProblem and sets some de-
-            # fault parameters
+    return set_solverParameters(CustomNewtonSolver(non_linearProblem,
+    non_nativeParameters, residual_form=residual_form, solution=
+    solution, boundary_conditions=boundary_conditions, jacobian_form=
+    jacobian_form), native_parameters)
 
-            self.problem = problem
+# Defines a function to give the parameters for the upgrade of the Newton
+# implementation native to fenics
 
-            self.parameters = {"nonlinear_solver": "newton", "newton_s"+
-            "olver": dict()}
+def give_customSolverParametersKeys():
 
-            self.parameters["newton_solver"] = {"maximum_iterations": 25, 
-            "relative_tolerance": 1e-8, "absolute_tolerance": 1e-8, "r"+
-            "eport": True, "error_on_nonconvergence": True, "linear_so"+
-            "lver": "lu"}
+    return ["maximum_residual", "jacobian_update", "jacobian_reuse_ite"+
+    "rations", "maximum_contraction_rate", "secant_memory", "report_ti"+
+    "mings"]
 
-        def solve(self):
-            
-            # Gets the solution, the residual,the Gateaux derivative, 
-            # and boundary conditions
+########################################################################
+#                         Custom Newton solver                         #
+########################################################################
 
-            u = self.problem.u
+# Defines a class of Newton solver whose Jacobian is not necessarily 
+# updated at each iteration. The KSP object of PETSc, together with its
+# preconditioner or LU factorization, is kept alive across iterations 
+# and load steps, i.e. across calls of solve. The strategies to update
+# the Jacobian ('jacobian_update') are:
+#
+# 'full Newton': assembles and factorizes the Jacobian at each itera-
+# tion;
+#
+# 'modified Newton': keeps the factorization for at most 'jacobian_reu-
+# se_iterations' iterations, or until the ratio of consecutive residual
+# norms is larger than 'maximum_contraction_rate';
+#
+# 'Broyden': modified Newton whose inverse Jacobian is corrected by the
+# secant (bad) Broyden update after each iteration;
+#
+# 'BFGS': modified Newton whose inverse Jacobian is corrected by the
+# limited-memory BFGS update, which requires a symmetric Jacobian, e.g.
+# hyperelasticity with dead loads.
+#
+# The secant corrections are discarded when the Jacobian is factorized
+# again, or when 'secant_memory' pairs have been stored
+
+class CustomNewtonSolver:
+
+    def __init__(self, problem, non_native_parameters, residual_form=
+    None, solution=None, boundary_conditions=None, jacobian_form=None):
+        
+        # Receives the NonlinearVariationalProblem and sets some default 
+        # parameters, which are changed by set_solverParameters
 
-            F_form = self.problem.F
+        self.problem = problem
 
-            J_form = self.problem.J
+        self.parameters = {"nonlinear_solver": "newton", "newton_solve"+
+        "r": {"maximum_iterations": 25, "relative_tolerance": 1e-8, "a"+
+        "bsolute_tolerance": 1e-8, "report": True, "error_on_nonconver"+
+        "gence": True, "linear_solver": "lu", "preconditioner": "defau"+
+        "lt", "krylov_solver": {"absolute_tolerance": 1e-12, "relative"+
+        "_tolerance": 1e-10, "maximum_iterations": 1000, "monitor_conv"+
+        "ergence": False}}, "snes_solver": dict()}
 
-            bcs = self.problem.bcs
+        # Gets the forms, the solution, and the boundary conditions. If
+        # they were not given, takes them from the problem
 
-            if J_form is None:
+        self.u = solution if solution is not None else problem.u
 
-                du = TrialFunction(u.function_space())
+        self.F_form = (residual_form if residual_form is not None else 
+        problem.F)
 
-                J_form = derivative(F_form, u, du)
+        self.bcs = (boundary_conditions if boundary_conditions is not 
+        None else problem.bcs)
 
-            # Initializes the residual vector and the solution update
-            # step
+        if not isinstance(self.bcs, (list, tuple)):
 
-            residual_vector = None
+            self.bcs = [self.bcs]
 
-            du = Function(u.function_space())
+        self.J_form = jacobian_form
 
-            # Gets some parameters
+        if self.J_form is None:
 
-            max_iter = self.parameters["newton_solver"]["maximum_iterations"]
+            self.J_form = getattr(problem, "J", None)
 
-            a_tol = self.parameters["newton_solver"]["absolute_tolerance"]
+        if self.J_form is None:
 
-            r_tol = self.parameters["newton_solver"]["relative_tolerance"]
+            self.J_form = derivative(self.F_form, self.u, TrialFunction(
+            self.u.function_space()))
 
-            report = self.parameters["newton_solver"]["report"]
+        # Gets the custom parameters
 
-            error_on_nonconvergence = self.parameters["newton_solver"]["error_on_nonconvergence"]
+        self.maximum_residual = non_native_parameters.get("maximum_res"+
+        "idual", np.inf)
 
-            linear_solver = self.parameters["newton_solver"]["linear_solver"]
+        self.jacobian_update = non_native_parameters.get("jacobian_upd"+
+        "ate", "full Newton")
 
-            converged = False
+        available_updates = ["full Newton", "modified Newton", "Broyde"+
+        "n", "BFGS"]
 
-            initial_residual = None
+        if not (self.jacobian_update in available_updates):
 
-            for k in range(1, max_iter+1):
+            raise NameError("'jacobian_update' in the solver parameter"+
+            "s is '"+str(self.jacobian_update)+"', but it must be one "+
+            "of the following strategies: "+str(available_updates))
 
-                # Assembles residual
+        self.jacobian_reuse_iterations = non_native_parameters.get("ja"+
+        "cobian_reuse_iterations", 5)
 
-                residual_vector = assemble(F_form)
+        self.maximum_contraction_rate = non_native_parameters.get("max"+
+        "imum_contraction_rate", 0.5)
 
-                for bc in bcs:
+        self.secant_memory = non_native_parameters.get("secant_memory", 
+        20)
 
-                    bc.apply(residual_vector, u.vector())
+        self.report_timings = non_native_parameters.get("report_timing"+
+        "s", False)
 
-                res_norm = residual_vector.norm("l2")
+        # Initializes the objects that are reused across iterations and
+        # load steps. They are created at the first solve, because the 
+        # parameters of the linear solver are set after the instantiation
 
-                if k==1:
+        self.ksp = None
 
-                    initial_residual = res_norm*1.0
+        self.jacobian_matrix = PETScMatrix()
 
-                if report:
+        self.residual_vector = PETScVector()
 
-                    print(f"  Newton iteration {k}: r (norm) = {res_norm:.6e}")
+        self.du = Function(self.u.function_space())
 
-                if not np.isfinite(res_norm):
+        self.iterations_since_factorization = 0
 
-                    raise RuntimeError("Newton solver diverged: residu"+
-                    "al is NaN or Inf")
-                
-                elif res_norm>non_nativeParameters["maximum_residual"]:
+        self.secant_pairs = []
 
-                    raise RuntimeError("Newton solver diverged: residu"+
-                    "al is "+str(res_norm)+", which is larger than the"+
-                    " tolerance of "+str(non_nativeParameters["maximum"+
-                    "_residual"]))
+        # Initializes the accumulated timings in seconds
 
-                if res_norm < a_tol:
+        self.timings = {"residual assembly": 0.0, "Jacobian assembly": 
+        0.0, "factorization": 0.0, "solve": 0.0}
 
-                    converged = True
+        self.n_factorizations = 0
 
-                    break
+    # Defines a function to create the KSP object of PETSc with the li-
+    # near solver and the preconditioner given in the parameters
 
-                elif (res_norm/initial_residual)<r_tol:
+    def create_ksp(self):
 
-                    converged = True
+        newton_parameters = self.parameters["newton_solver"]
 
-                    break
+        linear_solver = newton_parameters["linear_solver"]
 
-                # Assembles Jacobian
+        self.ksp = PETSc.KSP().create(self.jacobian_matrix.mat().getComm())
 
-                J = assemble(J_form)
+        preconditioner = self.ksp.getPC()
 
-                for bc in bcs:
+        # Direct solvers are a LU factorization applied once
 
-                    bc.apply(J)
+        direct_solvers = {"lu": None, "default": None, "mumps": "mumps",
+        "superlu": "superlu", "superlu_dist": "superlu_dist", "umfpack":
+        "umfpack", "petsc": "petsc"}
 
-                # Solves for update
+        if linear_solver in direct_solvers:
 
-                solve(J, du.vector(), residual_vector, linear_solver)
+            self.ksp.setType("preonly")
 
-                # Update solution
+            preconditioner.setType("lu")
 
-                u.vector().axpy(-1.0, du.vector())
+            if direct_solvers[linear_solver] is not None:
 
-                u.vector().apply("insert")
+                preconditioner.setFactorSolverType(direct_solvers[
+                linear_solver])
 
-            if not converged:
+            return
 
-                msg = f"Newton solver did not converge after {max_iter} iterations."
+        # Otherwise, it is a Krylov method
 
-                if error_on_nonconvergence:
+        preconditioners = {"default": "ilu", "none": "none", "jacobi": 
+        "jacobi", "sor": "sor", "ilu": "ilu", "icc": "icc", "amg": "ga"+
+        "mg", "petsc_amg": "gamg", "hypre_amg": "hypre"}
 
-                    raise RuntimeError(msg)
-                
-                else:
+        if not (newton_parameters["preconditioner"] in preconditioners):
 
-                    print(msg)
+            raise NameError("The preconditioner '"+str(newton_parameters[
+            "preconditioner"])+"' is not available for the custom New"+
+            "ton solver. Check the available ones: "+str(list(
+            preconditioners.keys())))
 
-            elif report:
+        self.ksp.setType(linear_solver)
 
-                print(f"  Newton solver converged in {k} iterations.\n")
-        
-    # Instantiates the new class and sets the parameters
+        preconditioner.setType(preconditioners[newton_parameters["prec"+
+        "onditioner"]])
 
-    return set_solverParameters(CustomSolver(non_linearProblem), 
-    solver_parameters)
+        if newton_parameters["preconditioner"]=="hypre_amg":
 
-# Defines a function to give the parameters for the upgrade of the Newton
-# implementation native to fenics
+            preconditioner.setHYPREType("boomeramg")
 
-def give_customSolverParametersKeys():
+        krylov_parameters = newton_parameters["krylov_solver"]
+
+        self.ksp.setTolerances(rtol=krylov_parameters["relative_toler"+
+        "ance"], atol=krylov_parameters["absolute_tolerance"], max_it=
+        krylov_parameters["maximum_iterations"])
+
+        if krylov_parameters["monitor_convergence"]:
+
+            self.ksp.setMonitor(lambda ksp, iteration, residual_norm: 
+            print("    Krylov iteration "+str(iteration)+": r (norm) = "+
+            str(residual_norm)))
+
+    # Defines a function to assemble the Jacobian and to factorize it, 
+    # or to set up its preconditioner. The operators of the KSP object
+    # are reset, thus, PETSc reuses the symbolic factorization, since
+    # the sparsity pattern does not change
+
+    def update_jacobian(self):
+
+        start_time = perf_counter()
+
+        assemble(self.J_form, tensor=self.jacobian_matrix)
+
+        for bc in self.bcs:
+
+            bc.apply(self.jacobian_matrix)
+
+        self.timings["Jacobian assembly"] += perf_counter()-start_time
+
+        if self.ksp is None:
+
+            self.create_ksp()
+
+        start_time = perf_counter()
+
+        self.ksp.setOperators(self.jacobian_matrix.mat())
+
+        self.ksp.setUp()
+
+        self.timings["factorization"] += perf_counter()-start_time
+
+        self.n_factorizations += 1
+
+        self.iterations_since_factorization = 0
+
+        # Discards the secant corrections of the old Jacobian
+
+        self.secant_pairs = []
+
+    # Defines a function to apply the inverse of the factorized Jacobian
+    # to a PETSc vector
+
+    def apply_factorized_inverse(self, vector):
+
+        result = vector.duplicate()
+
+        start_time = perf_counter()
+
+        self.ksp.solve(vector, result)
+
+        self.timings["solve"] += perf_counter()-start_time
+
+        if self.ksp.getConvergedReason()<0:
+
+            raise RuntimeError("The linear solver of the custom Newton"+
+            " solver did not converge. PETSc's reason is "+str(
+            self.ksp.getConvergedReason()))
+
+        return result
+
+    # Defines a function to apply the approximation of the inverse Jaco-
+    # bian, i.e. the inverse of the factorized Jacobian corrected by the
+    # secant updates
+
+    def apply_inverse_jacobian(self, vector):
+
+        # Broyden's update stores the pairs (a_i, y_i), and the inverse 
+        # is H0 + sum a_i y_i^T
+
+        if self.jacobian_update=="Broyden":
+
+            result = self.apply_factorized_inverse(vector)
+
+            for a_vector, y_vector in self.secant_pairs:
+
+                result.axpy(y_vector.dot(vector), a_vector)
+
+            return result
+
+        # The BFGS update stores the pairs (s_i, y_i, rho_i), and the in-
+        # verse is applied by the two-loop recursion
+
+        elif self.jacobian_update=="BFGS":
+
+            q_vector = vector.copy()
+
+            alphas = []
+
+            for s_vector, y_vector, rho in reversed(self.secant_pairs):
+
+                alphas.append(rho*s_vector.dot(q_vector))
+
+                q_vector.axpy(-alphas[-1], y_vector)
+
+            result = self.apply_factorized_inverse(q_vector)
+
+            for (s_vector, y_vector, rho), alpha in zip(
+            self.secant_pairs, reversed(alphas)):
+
+                beta = rho*y_vector.dot(result)
+
+                result.axpy(alpha-beta, s_vector)
+
+            return result
+
+        return self.apply_factorized_inverse(vector)
+
+    # Defines a function to store the secant pair of the last step s =
+    # u_k-u_(k-1) and of the change of the residual y = R_k-R_(k-1)
+
+    def add_secant_pair(self, s_vector, y_vector):
+
+        y_norm_squared = y_vector.dot(y_vector)
+
+        if self.jacobian_update=="Broyden":
+
+            if y_norm_squared>0.0:
+
+                a_vector = s_vector.copy()
+
+                a_vector.axpy(-1.0, self.apply_inverse_jacobian(y_vector))
+
+                a_vector.scale(1.0/y_norm_squared)
+
+                self.secant_pairs.append((a_vector, y_vector))
+
+        elif self.jacobian_update=="BFGS":
+
+            curvature = y_vector.dot(s_vector)
+
+            # Skips the pairs without positive curvature, which would
+            # make the approximation indefinite
+
+            if curvature>0.0:
+
+                self.secant_pairs.append((s_vector, y_vector, 1.0/
+                curvature))
+
+    # Defines a function to decide if the Jacobian must be assembled and
+    # factorized again
+
+    def needs_new_jacobian(self, contraction_rate):
+
+        if self.ksp is None or self.jacobian_update=="full Newton":
+
+            return True
+
+        elif self.iterations_since_factorization>=(
+        self.jacobian_reuse_iterations):
+
+            return True
+
+        elif (contraction_rate is not None) and (contraction_rate>
+        self.maximum_contraction_rate):
+
+            return True
+
+        elif len(self.secant_pairs)>=self.secant_memory:
+
+            return True
+
+        return False
+
+    # Defines a function to solve the nonlinear problem
+
+    def solve(self):
 
-    return ["maximum_residual"]
+        newton_parameters = self.parameters["newton_solver"]
+
+        max_iter = newton_parameters["maximum_iterations"]
+
+        a_tol = newton_parameters["absolute_tolerance"]
+
+        r_tol = newton_parameters["relative_tolerance"]
+
+        report = newton_parameters["report"]
+
+        solution_vector = as_backend_type(self.u.vector())
+
+        du_vector = as_backend_type(self.du.vector()).vec()
+
+        converged = False
+
+        initial_residual = None
+
+        previous_residual_norm = None
+
+        previous_residual = None
+
+        timings_before = dict(self.timings)
+
+        n_factorizations_before = self.n_factorizations
+
+        for k in range(1, max_iter+1):
+
+            # Assembles residual
+
+            start_time = perf_counter()
+
+            assemble(self.F_form, tensor=self.residual_vector)
+
+            for bc in self.bcs:
+
+                bc.apply(self.residual_vector, solution_vector)
+
+            self.timings["residual assembly"] += perf_counter()-start_time
+
+            residual = self.residual_vector.vec()
+
+            res_norm = self.residual_vector.norm("l2")
+
+            if k==1:
+
+                initial_residual = res_norm*1.0
+
+            if report:
+
+                print(f"  Newton iteration {k}: r (norm) = {res_norm:.6e}")
+
+            if not np.isfinite(res_norm):
+
+                raise RuntimeError("Newton solver diverged: residual i"+
+                "s NaN or Inf")
+            
+            elif res_norm>self.maximum_residual:
+
+                raise RuntimeError("Newton solver diverged: residual i"+
+                "s "+str(res_norm)+", which is larger than the toleran"+
+                "ce of "+str(self.maximum_residual))
+
+            if res_norm<a_tol or (initial_residual>0.0 and (res_norm/
+            initial_residual)<r_tol):
+
+                converged = True
+
+                break
+
+            # Gets the contraction rate of the residual norm
+
+            contraction_rate = None
+
+            if previous_residual_norm is not None and (
+            previous_residual_norm>0.0):
+
+                contraction_rate = res_norm/previous_residual_norm
+
+            # Updates the Jacobian if needed. Otherwise, adds the secant
+            # pair of the last step
+
+            if self.needs_new_jacobian(contraction_rate):
+
+                self.update_jacobian()
+
+            elif previous_residual is not None and (self.jacobian_update
+            in ["Broyden", "BFGS"]):
+
+                y_vector = residual.copy()
+
+                y_vector.axpy(-1.0, previous_residual)
+
+                s_vector = du_vector.copy()
+
+                s_vector.scale(-1.0)
+
+                self.add_secant_pair(s_vector, y_vector)
+
+            # Solves for update
+
+            self.apply_inverse_jacobian(residual).copy(du_vector)
+
+            self.iterations_since_factorization += 1
+
+            previous_residual_norm = res_norm
+
+            previous_residual = residual.copy()
+
+            # Update solution
+
+            self.u.vector().axpy(-1.0, self.du.vector())
+
+            self.u.vector().apply("insert")
+
+        if not converged:
+
+            msg = f"Newton solver did not converge after {max_iter} iterations."
+
+            if newton_parameters["error_on_nonconvergence"]:
+
+                raise RuntimeError(msg)
+            
+            else:
+
+                print(msg)
+
+        elif report:
+
+            print(f"  Newton solver converged in {k} iterations.\n")
+
+        # Shows the timings of this solve
+
+        if self.report_timings:
+
+            print("  Timings of the custom Newton solver ("+str(
+            self.n_factorizations-n_factorizations_before)+" factoriza"+
+            "tions):")
+
+            for name, value in self.timings.items():
+
+                print("    "+name+": "+str(value-timings_before[name])+
+                " s")
+
+        return k, converged
 
 # Defines a function to update solver parameters
 
@@ -1697,6 +2068,21 @@ class MacroQuantitiesInTime(TimeSteppingClasses):
             setattr(self, variable, Constant(self.variables[variable][
             self.time_keys[0]]))
 
+        # Stores the time points and the data of each variable as ar-
+        # rays, since the update method deletes the used time keys from
+        # the data dictionaries. They are used to interpolate the macro
+        # quantities at intermediate time points
+
+        self.interpolation_times = np.array(self.time_keys, dtype=float)
+
+        self.interpolation_data = dict()
+
+        for variable, variable_dataDict in self.variables.items():
+
+            self.interpolation_data[variable] = np.array([np.array(
+            variable_dataDict[time_key], dtype=float) for time_key in (
+            variable_dataDict.keys())])
+
     # Defines a function to update the macro quantitites given the cur-
     # rent time value
 
@@ -1727,6 +2113,53 @@ class MacroQuantitiesInTime(TimeSteppingClasses):
 
             variable_dataDict.pop(time_key)
 
+    # Defines a function to update the macro quantities at a time value
+    # between the time keys, e.g. at the substeps of adaptive pseudotime
+    # stepping. The data is linearly interpolated between the two clo-
+    # sest time keys, and no key is deleted from the data dictionaries
+
+    def update_interpolated(self, time_value):
+
+        # If there is a single time key, there is nothing to interpolate
+
+        if len(self.interpolation_times)<2:
+
+            for variable, variable_data in self.interpolation_data.items():
+
+                getattr(self, variable).assign(Constant(variable_data[0
+                ].tolist()))
+
+            return
+
+        # Gets the interval of time keys that contains the time value
+
+        index = int(np.clip(np.searchsorted(self.interpolation_times,
+        time_value), 1, len(self.interpolation_times)-1))
+
+        initial_time = self.interpolation_times[index-1]
+
+        interval = self.interpolation_times[index]-initial_time
+
+        # Gets the interpolation weight, which is clipped to avoid ex-
+        # trapolation
+
+        weight = 0.0
+
+        if interval!=0.0:
+
+            weight = min(max((time_value-initial_time)/interval, 0.0),
+            1.0)
+
+        # Iterates through the variables
+
+        for variable, variable_data in self.interpolation_data.items():
+
+            interpolated_value = (((1.0-weight)*variable_data[index-1])+(
+            weight*variable_data[index]))
+
+            getattr(self, variable).assign(Constant(
+            interpolated_value.tolist()))
+
 # Defines a function to test if the time keys are the same comparing the
 # standard with a given set
 
@@ -21,7 +21,7 @@ from ...PythonicUtilities import recursion_tools
 # Defines a function to homogenize a generic field
 
 def homogenize_genericField(field, homogenized_fieldList, time, 
-inverse_volume, dx, subdomain, file_name, comm):
+inverse_volume, dx, subdomain, file_name, comm, form_registry=None):
     
     # Gets the dimensionality of the field
 
@@ -38,70 +38,37 @@ inverse_volume, dx, subdomain, file_name, comm):
 
         dimensionality = field.ufl_shape
 
-    # Initializes the homogenized value
+    # Gets the list of pairs of field and physical group to be integra-
+    # ted
 
-    homogenized_value = 0.0
+    if isinstance(subdomain, int):
 
-    # If the field is a scalar
+        field_list = [[field, subdomain]]
 
-    if len(dimensionality)==0:
-
-        if isinstance(subdomain, int) or isinstance(subdomain, tuple):
-
-            homogenized_value += inverse_volume*assemble(field*dx(
-            subdomain))
-
-        else:
-
-            homogenized_value += inverse_volume*assemble(field*dx)
+    elif isinstance(subdomain, tuple):
 
-    # If the field is not scalar, iterates through the dimensions
+        field_list = [[field, subsubdomain] for subsubdomain in (
+        subdomain)]
 
     else:
 
-        # Makes the homogenized value a list with the format of the 
-        # field to be homogenized, e.g. vectors, tensors and so forth
-
-        homogenized_value = np.zeros(dimensionality)
-
-        # Get the possible combinations of indexes
+        field_list = [[field, ""]]
 
-        indexes_combinations = recursion_tools.get_indexesCombinations(
-        dimensionality)
+    # Integrates all components of the field over all the physical 
+    # groups at once
 
-        if isinstance(subdomain, int):
+    homogenized_value = inverse_volume*get_homogenizationEngine(dx, 
+    dimensionality).integrate(field_list, form_registry=form_registry)[1]
 
-            # Iterates through the combinations
+    # Gets the homogenized value back to a float or to a list with the 
+    # format of the field to be homogenized, e.g. vectors, tensors and 
+    # so forth
 
-            for index_combination in indexes_combinations:
-
-                homogenized_value[tuple(index_combination)] = (
-                inverse_volume*assemble(field[tuple(index_combination)]*
-                dx(subdomain)))
-                
-        elif isinstance(subdomain, tuple):
-
-            # Iterates through the combinations
-
-            for index_combination in indexes_combinations:
-
-                for subsubdomain in subdomain:
-
-                    homogenized_value[tuple(index_combination)] += (
-                    inverse_volume*assemble(field[tuple(
-                    index_combination)]*dx(subsubdomain)))
-
-        else:
-
-            # Iterates through the combinations
-
-            for index_combination in indexes_combinations:
+    if len(dimensionality)==0:
 
-                homogenized_value[tuple(index_combination)] = (
-                inverse_volume*assemble(field[tuple(index_combination)]*
-                dx))
+        homogenized_value = float(homogenized_value)
 
-        # Gets the homogenized value back to a list
+    else:
 
         homogenized_value = homogenized_value.tolist()
 
@@ -127,7 +94,7 @@ def homogenize_stressTensor(field, constitutive_model, stress_name,
 stress_method, homogenized_tensorList, time, inverse_volume, dx, 
 homogenization_subdomain, file_name, physical_groupsList, 
 physical_groupsNamesToTags, fields_namesDict, required_fieldsNames,
-comm):
+comm, form_registry=None):
     
     # Converts the homogenization subdomain to the physical groups tags
 
@@ -171,13 +138,10 @@ comm):
             converted_homogenizationSubdomain.append(
             homogenization_subdomain)
     
-    # Initializes the homogenized tensor
+    # Initializes the list of pairs of stress field and physical group 
+    # to be integrated. All of them are integrated at once afterwards
 
-    homogenized_tensor = [[0.0, 0.0, 0.0], [0.0, 0.0, 0.0], [0.0, 0.0, 
-    0.0]]
-
-    tensor_indexes = [[0,0], [0,1], [0,2], [1,0], [1,1], [1,2], [2,0], [
-    2,1], [2,2]]
+    field_list = []
     
     # Verifies if the domain is homogeneous. If the constitutive model 
     # is a dictionary, the domain in heterogeneous
@@ -224,11 +188,7 @@ comm):
                     if (sub in converted_homogenizationSubdomain) or (
                     converted_homogenizationSubdomain==[""]):
 
-                        for index in tensor_indexes:
-
-                            homogenized_tensor[index[0]][index[1]] += (
-                            inverse_volume*assemble(stress_field[tuple(
-                            index)]*dx(sub)))
+                        field_list.append([stress_field, sub])
 
             else:
 
@@ -247,11 +207,7 @@ comm):
                 if ((local_subdomain in converted_homogenizationSubdomain
                 ) or (converted_homogenizationSubdomain==[""])):
 
-                    for index in tensor_indexes:
-
-                        homogenized_tensor[index[0]][index[1]] += (
-                        inverse_volume*assemble(stress_field[tuple(index
-                        )]*dx(local_subdomain)))
+                    field_list.append([stress_field, local_subdomain])
 
     else:
 
@@ -270,20 +226,19 @@ comm):
 
         if converted_homogenizationSubdomain==[""]:
 
-            for index in tensor_indexes:
-
-                homogenized_tensor[index[0]][index[1]] += (
-                inverse_volume*assemble(stress_field[tuple(index)]*dx))
+            field_list.append([stress_field, ""])
 
         else:
 
             for domain in converted_homogenizationSubdomain:
 
-                for index in tensor_indexes:
+                field_list.append([stress_field, domain])
+
+    # Integrates all components of the stress fields over all the phy-
+    # sical groups at once
 
-                    homogenized_tensor[index[0]][index[1]] += (
-                    inverse_volume*assemble(stress_field[tuple(index)]*
-                    dx(domain)))
+    homogenized_tensor = (inverse_volume*get_homogenizationEngine(dx, (
+    3,3)).integrate(field_list, form_registry=form_registry)[1]).tolist()
 
     # Adds the homogenized tensor to the list
 
@@ -302,7 +257,8 @@ comm):
 def homogenize_coupleFirstPiola(field, constitutive_model, 
 homogenized_tensorList, time, position_vector, inverse_volume, dx, 
 homogenization_subdomain, file_name, physical_groupsList, 
-physical_groupsNamesToTags, fields_namesDict, required_fieldsNames, comm):
+physical_groupsNamesToTags, fields_namesDict, required_fieldsNames, comm,
+form_registry=None):
     
     # Converts the homogenization subdomain to the physical groups tags
 
@@ -346,13 +302,10 @@ physical_groupsNamesToTags, fields_namesDict, required_fieldsNames, comm):
             converted_homogenizationSubdomain.append(
             homogenization_subdomain)
     
-    # Initializes the homogenized tensor
+    # Initializes the list of pairs of stress field and physical group 
+    # to be integrated. All of them are integrated at once afterwards
 
-    homogenized_tensor = [[0.0, 0.0, 0.0], [0.0, 0.0, 0.0], [0.0, 0.0, 
-    0.0]]
-
-    tensor_indexes = [[0,0], [0,1], [0,2], [1,0], [1,1], [1,2], [2,0], [
-    2,1], [2,2]]
+    field_list = []
     
     # Verifies if the domain is homogeneous. If the constitutive model 
     # is a dictionary, the domain in heterogeneous
@@ -410,11 +363,7 @@ physical_groupsNamesToTags, fields_namesDict, required_fieldsNames, comm):
                     if (sub in converted_homogenizationSubdomain) or (
                     converted_homogenizationSubdomain==[""]):
 
-                        for index in tensor_indexes:
-
-                            homogenized_tensor[index[0]][index[1]] += (
-                            inverse_volume*assemble(stress_field[tuple(
-                            index)]*dx(sub)))
+                        field_list.append([stress_field, sub])
 
             else:
 
@@ -433,11 +382,7 @@ physical_groupsNamesToTags, fields_namesDict, required_fieldsNames, comm):
                 if ((local_subdomain in converted_homogenizationSubdomain
                 ) or (converted_homogenizationSubdomain==[""])):
 
-                    for index in tensor_indexes:
-
-                        homogenized_tensor[index[0]][index[1]] += (
-                        inverse_volume*assemble(stress_field[tuple(index
-                        )]*dx(local_subdomain)))
+                    field_list.append([stress_field, local_subdomain])
 
     else:
 
@@ -467,20 +412,19 @@ physical_groupsNamesToTags, fields_namesDict, required_fieldsNames, comm):
 
         if converted_homogenizationSubdomain==[""]:
 
-            for index in tensor_indexes:
-
-                homogenized_tensor[index[0]][index[1]] += (
-                inverse_volume*assemble(stress_field[tuple(index)]*dx))
+            field_list.append([stress_field, ""])
 
         else:
 
             for domain in converted_homogenizationSubdomain:
 
-                for index in tensor_indexes:
+                field_list.append([stress_field, domain])
+
+    # Integrates all components of the stress fields over all the phy-
+    # sical groups at once
 
-                    homogenized_tensor[index[0]][index[1]] += (
-                    inverse_volume*assemble(stress_field[tuple(index)]*
-                    dx(domain)))
+    homogenized_tensor = (inverse_volume*get_homogenizationEngine(dx, (
+    3,3)).integrate(field_list, form_registry=form_registry)[1]).tolist()
 
     # Adds the homogenized tensor to the list
 
@@ -502,4 +446,203 @@ stress_name, stress_method, homogenized_tensorList, time, inverse_volume,
 dx, homogenization_subdomain, file_name, physical_groupsList, 
 physical_groupsNamesToTags, fields_namesDict, required_fieldsNames):
     
-    pass
\ No newline at end of file
+    pass
+
+########################################################################
+#                        Homogenization engine                         #
+########################################################################
+
+# Defines a class to integrate all components of a field over all phy-
+# sical groups in a single assembly. The components of the field are 
+# tested against a space of piecewise constant vectors, hence the as-
+# sembled vector has the integral of each component over each cell. The
+# integrals over each physical group are then reduced from the cell 
+# values using the cell markers
+
+class HomogenizationEngine:
+
+    def __init__(self, dx, value_shape):
+
+        # Saves the integration measure and the shape of the field
+        
+        self.dx = dx
+
+        self.value_shape = tuple(value_shape)
+
+        # Gets the mesh and its communicator
+
+        mesh = dx.ufl_domain().ufl_cargo()
+
+        self.comm = mesh.mpi_comm()
+
+        # Gets the combinations of indexes of the components
+
+        self.indexes_combinations = [tuple(index_combination) for (
+        index_combination) in recursion_tools.get_indexesCombinations(
+        list(self.value_shape))]
+
+        n_components = max(len(self.indexes_combinations), 1)
+
+        # Creates the space of piecewise constant vectors with a compo-
+        # nent for each component of the field
+
+        if len(self.value_shape)==0:
+
+            W = FunctionSpace(mesh, "DG", 0)
+
+        else:
+
+            W = VectorFunctionSpace(mesh, "DG", 0, dim=n_components)
+
+        self.v = TestFunction(W)
+
+        # Gets the DOFs of each cell, where each column is a component.
+        # Only the cells whose DOFs are owned by this processor are kept
+
+        dofmap = W.dofmap()
+
+        ownership_range = dofmap.ownership_range()
+
+        n_ownedDofs = ownership_range[1]-ownership_range[0]
+
+        cell_dofs = np.array([dofmap.cell_dofs(i) for i in range(
+        mesh.num_cells())], dtype=int).reshape((mesh.num_cells(), 
+        n_components))
+
+        owned_cells = cell_dofs[:,0]<n_ownedDofs
+
+        self.cell_dofs = cell_dofs[owned_cells]
+
+        # Gets the physical group of each cell. If the measure has no 
+        # subdomain data, all cells belong to the physical group 0
+
+        if dx.subdomain_data() is None:
+
+            cell_markers = np.zeros(mesh.num_cells(), dtype=int)
+
+        else:
+
+            cell_markers = np.array(dx.subdomain_data().array(), dtype=
+            int)
+
+        cell_markers = cell_markers[owned_cells]
+
+        # Gets the physical groups of all processors, and the position 
+        # of the physical group of each cell in this list
+
+        self.physical_groups = np.unique(np.concatenate(
+        self.comm.allgather(np.unique(cell_markers))))
+
+        self.cell_groups = np.searchsorted(self.physical_groups, 
+        cell_markers)
+
+    # Defines a function to sum the values of the cells [n_cells, 
+    # n_components] over each physical group and over all processors
+
+    def reduce_byPhysicalGroup(self, cell_values):
+
+        group_values = np.zeros((len(self.physical_groups), 
+        cell_values.shape[1]))
+
+        np.add.at(group_values, self.cell_groups, cell_values)
+
+        return self.comm.allreduce(group_values)
+
+    # Defines a function to integrate a list of pairs of field and phy-
+    # sical group tag, where the empty string stands for the whole do-
+    # main. Returns a dictionary of the integrals over each physical 
+    # group, and the integral over all of them. If a registry of compi-
+    # led forms is given, the linear form is compiled once and stored in
+    # it, thus, the fields must be bound to the placeholders of the re-
+    # gistry
+
+    def integrate(self, field_list, form_registry=None):
+
+        # If there is nothing to integrate, the integrals are null
+
+        if len(field_list)==0:
+
+            return dict([(int(physical_group), np.zeros(self.value_shape
+            )) for physical_group in self.physical_groups]), np.zeros(
+            self.value_shape)
+
+        # Defines a function to build the linear form
+
+        def build_linearForm():
+
+            linear_form = 0.0
+
+            for field, subdomain in field_list:
+
+                # Arranges the components of the field as a vector
+
+                if len(self.value_shape)==0:
+
+                    field_vector = field
+
+                else:
+
+                    field_vector = as_vector([field[index_combination] 
+                    for index_combination in self.indexes_combinations])
+
+                # Updates the linear form
+
+                if subdomain=="":
+
+                    linear_form += inner(field_vector, self.v)*self.dx
+
+                else:
+
+                    linear_form += inner(field_vector, self.v)*self.dx(
+                    subdomain)
+
+            return linear_form
+
+        # Assembles the integrals over each cell
+
+        if form_registry is None:
+
+            cell_integrals = assemble(build_linearForm())
+
+        else:
+
+            cell_integrals = form_registry.assemble(("homogenization", 
+            self.value_shape), build_linearForm)
+
+        # Reduces the integrals over the physical groups
+
+        group_integrals = self.reduce_byPhysicalGroup(
+        cell_integrals.get_local()[self.cell_dofs])
+
+        # Reshapes the integrals to the shape of the field
+
+        subdomain_integrals = dict()
+
+        for i, physical_group in enumerate(self.physical_groups):
+
+            subdomain_integrals[int(physical_group)] = group_integrals[i
+            ].reshape(self.value_shape)
+
+        return subdomain_integrals, np.sum(group_integrals, axis=0
+        ).reshape(self.value_shape)
+
+# Defines a function to get the homogenization engine of an integration
+# measure and of a shape of field. The engines are built once and stored
+
+def get_homogenizationEngine(dx, value_shape):
+
+    engine_key = (id(dx.ufl_domain().ufl_cargo()), id(
+    dx.subdomain_data()), tuple(value_shape))
+
+    if not (engine_key in homogenization_engines):
+
+        homogenization_engines[engine_key] = HomogenizationEngine(dx, 
+        value_shape)
+
+    return homogenization_engines[engine_key]
+
+# Initializes the dictionary of homogenization engines, whose keys are 
+# the identifiers of the mesh and of its cell markers, and the shape of 
+# the field
+
+homogenization_engines = dict()
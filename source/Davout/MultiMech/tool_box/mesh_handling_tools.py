@@ -6,6 +6,8 @@ import meshio
 
 import numpy as np
 
+import weakref
+
 from copy import copy, deepcopy
 
 from scipy.spatial import KDTree
@@ -932,16 +934,135 @@ boundary_meshFunction=None, boundary_physicalGroupsNameToTag=None):
     domain_physicalGroupsNameToTag, boundary_physicalGroupsNameToTag, 
     False)
 
+    # Builds the operator to transfer fields between the parent mesh and
+    # the submesh once, and saves it in the mesh data class of the sub-
+    # mesh
+
+    submesh_data_class.transfer_operator = SubmeshTransferOperator(
+    sub_mesh, sub_toParentCellMap, sub_meshMapping, parent_meshMapping,
+    submesh_function, Function(parent_functionSpace))
+
     # Returns the submesh, the updated cell markers, and the DOF mappings
 
     return (submesh_data_class, submesh_functionSpace, sub_meshMapping, 
     parent_meshMapping, submesh_function, sub_toParentCellMap)
 
+# Defines a class to transfer the vector of parameters of a field be-
+# tween a parent mesh and a submesh. The DOFs of the submesh and the 
+# corresponding DOFs of the parent mesh are gathered once into flat ar-
+# rays of local indices, thus, each transfer is a single vectorized 
+# gather and scatter of the local arrays of the PETSc vectors
+
+class SubmeshTransferOperator:
+
+    def __init__(self, submesh, sub_toParentCellMap, sub_meshMapping,
+    parent_meshMapping, field_submesh, field_parentMesh):
+
+        submesh_dofs = []
+
+        parent_dofs = []
+
+        # Iterates through the fields of the meshes and through the ele-
+        # ments of the submesh to get the DOFs of each element
+
+        for i in range(len(sub_meshMapping)):
+
+            for submesh_index in range(submesh.num_cells()):
+
+                submesh_dofs.append(sub_meshMapping[i].cell_dofs(
+                submesh_index))
+
+                parent_dofs.append(parent_meshMapping[i].cell_dofs(
+                sub_toParentCellMap[submesh_index]))
+
+        # Flattens the DOFs. An empty array is added, because the sub-
+        # mesh may have no elements in this processor
+
+        submesh_dofs = np.concatenate(submesh_dofs+[np.zeros(0, dtype=
+        np.intc)]).astype(np.intc)
+
+        parent_dofs = np.concatenate(parent_dofs+[np.zeros(0, dtype=
+        np.intc)]).astype(np.intc)
+
+        # Eliminates the DOFs that are shared by neighbouring elements
+
+        submesh_dofs, unique_indices = np.unique(submesh_dofs, 
+        return_index=True)
+
+        parent_dofs = parent_dofs[unique_indices]
+
+        # Keeps only the DOFs of the submesh that are owned by this pro-
+        # cessor, since the ghost values are updated by the vector
+
+        owned_dofs = submesh_dofs<field_submesh.vector().local_size()
+
+        self.submesh_dofs = submesh_dofs[owned_dofs]
+
+        self.parent_dofs = parent_dofs[owned_dofs]
+
+        # Verifies if all the DOFs of the parent mesh are owned by this
+        # processor. Otherwise, the ghost values are read by indexing
+        # the vector
+
+        self.parent_dofs_owned = bool(np.all(self.parent_dofs<
+        field_parentMesh.vector().local_size()))
+
+    # Defines a function to transfer the field of the parent mesh to the
+    # submesh
+
+    def transfer_to_submesh(self, field_parentMesh, field_submesh):
+
+        if self.parent_dofs_owned:
+
+            parent_values = field_parentMesh.vector().get_local()[
+            self.parent_dofs]
+
+        else:
+
+            parent_values = field_parentMesh.vector()[self.parent_dofs]
+
+        submesh_values = field_submesh.vector().get_local()
+
+        submesh_values[self.submesh_dofs] = parent_values
+
+        field_submesh.vector().set_local(submesh_values)
+
+        field_submesh.vector().apply("insert")
+
+        return field_submesh
+
+    # Defines a function to transfer the field of the submesh to the pa-
+    # rent mesh, e.g. for coupling. Only the DOFs of the parent mesh in
+    # the region of the submesh are changed. The DOFs of the parent mesh
+    # that are not owned by this processor are not written
+
+    def transfer_to_parent(self, field_submesh, field_parentMesh):
+
+        submesh_values = field_submesh.vector().get_local()[
+        self.submesh_dofs]
+
+        parent_values = field_parentMesh.vector().get_local()
+
+        owned_dofs = self.parent_dofs<len(parent_values)
+
+        parent_values[self.parent_dofs[owned_dofs]] = submesh_values[
+        owned_dofs]
+
+        field_parentMesh.vector().set_local(parent_values)
+
+        field_parentMesh.vector().apply("insert")
+
+        return field_parentMesh
+
 # Defines a function to update the field parameters vector of a submesh 
-# given the corresponding vector at the parent mesh
+# given the corresponding vector at the parent mesh. If the operator to
+# transfer the fields is not given, it is built and saved for the next
+# calls with the same field of the submesh and function space of the 
+# parent mesh
 
 def field_parentToSubmesh(submesh, field_parentMesh, sub_toParentCellMap, 
-sub_meshMapping=None, parent_meshMapping=None, field_submesh=None):
+sub_meshMapping=None, parent_meshMapping=None, field_submesh=None,
+transfer_operator=None):
     
     # If the field of the submesh is not explicitely given, creates it
     # as a copy of the parent field jsut with a different mesh
@@ -951,78 +1072,252 @@ sub_meshMapping=None, parent_meshMapping=None, field_submesh=None):
         field_submesh = Function(FunctionSpace(submesh, 
         field_parentMesh.ufl_element()))
 
-    # If the mesh mappings have not been provided
+    # If the transfer operator is not given, tries to get one that has
+    # already been built for this field of the submesh
+
+    if transfer_operator is None:
+
+        field_key = id(field_submesh)
+
+        operator_key = (submesh.id(), 
+        field_parentMesh.function_space().id())
+
+        if operator_key in submesh_transfer_operators.get(field_key, {}):
+
+            transfer_operator = submesh_transfer_operators[field_key][
+            operator_key]
+
+    # If the transfer operator has not been built yet
+
+    if transfer_operator is None:
+
+        # If the mesh mappings have not been provided
+
+        if (sub_meshMapping is None) or (parent_meshMapping is None):
+
+            # Gets the parent field function space and its shape func-
+            # tion
+
+            submesh_functionSpace = field_submesh.function_space()
+
+            parent_functionSpace = field_parentMesh.function_space()
+
+            shape_function = parent_functionSpace.ufl_element().family()
+
+            # Initializes the DOF mappings for the RVE and for the ori-
+            # ginal mesh
+
+            sub_meshMapping = []
+
+            parent_meshMapping = []
+
+            # Verifies whether there is only on field
+
+            if shape_function!='Mixed':
+
+                sub_meshMapping.append(submesh_functionSpace.dofmap())
+
+                parent_meshMapping.append(parent_functionSpace.dofmap())
 
-    if (sub_meshMapping is None) or (parent_meshMapping is None):
+            # If there are multiple fields
 
-        # Gets the parent field function space and its shape function
+            else:
+
+                # Iterates through the number of fields
+
+                for i in range(parent_functionSpace.ufl_element(
+                ).num_sub_elements()):
+
+                    # Adds the submesh mapping and the parent mesh map-
+                    # ping
+
+                    sub_meshMapping.append(submesh_functionSpace.sub(i
+                    ).dofmap())
+
+                    parent_meshMapping.append(parent_functionSpace.sub(
+                    i).dofmap())
+
+        transfer_operator = SubmeshTransferOperator(submesh, 
+        sub_toParentCellMap, sub_meshMapping, parent_meshMapping, 
+        field_submesh, field_parentMesh)
+
+        # Saves the operator. The operators of a field of the submesh 
+        # are freed when this field is garbage collected
+
+        if not (field_key in submesh_transfer_operators):
+
+            submesh_transfer_operators[field_key] = dict()
+
+            weakref.finalize(field_submesh, 
+            submesh_transfer_operators.pop, field_key, None)
 
-        submesh_functionSpace = field_submesh.function_space()
+        submesh_transfer_operators[field_key][operator_key] = (
+        transfer_operator)
 
-        parent_functionSpace = field_parentMesh.function_space()
+    # Translates the values of the solution using the DOFs mapping
 
-        shape_function = parent_functionSpace.ufl_element().family()
+    return transfer_operator.transfer_to_submesh(field_parentMesh, 
+    field_submesh)
 
-        # Initializes the DOF mappings for the RVE and for the original 
-        # mesh
+# Initializes the dictionary of operators to transfer fields from the 
+# parent meshes to the submeshes. Its keys are the identifiers of the 
+# fields of the submeshes, and its values are dictionaries whose keys 
+# are the identifiers of the submesh and of the function space of the
+# parent mesh
 
-        sub_meshMapping = []
+submesh_transfer_operators = dict()
 
-        parent_meshMapping = []
+########################################################################
+#                            Spatial index                             #
+########################################################################
+
+# Defines a class to answer point queries on a mesh. The KD-trees of the
+# vertices and of the DOF coordinates, and the bounding-box tree of the
+# cells are built once, at the first query that needs them, and all que-
+# ries take arrays of points [n_points, 3]
 
-        # Verifies whether there is only on field
+class MeshSpatialIndex:
 
-        if shape_function!='Mixed':
+    def __init__(self, mesh_data_class, functional_data_class=None):
 
-            sub_meshMapping.append(submesh_functionSpace.dofmap())
+        # Accepts the mesh proper or a class with a .mesh attribute
 
-            parent_meshMapping.append(parent_functionSpace.dofmap())
+        if hasattr(mesh_data_class, "coordinates"):
 
-        # If there are multiple fields
+            self.mesh = mesh_data_class
 
         else:
 
-            # Iterates through the number of fields
+            self.mesh = mesh_data_class.mesh
 
-            for i in range(parent_functionSpace.ufl_element(
-            ).num_sub_elements()):
+        self.functional_data_class = functional_data_class
 
-                # Adds the submesh mapping and the parent mesh mapping
+        self.vertex_tree = None
 
-                sub_meshMapping.append(submesh_functionSpace.sub(i
-                ).dofmap())
+        self.cell_tree = None
 
-                parent_meshMapping.append(parent_functionSpace.sub(i
-                ).dofmap())
+        # Initializes the dictionary of DOF trees, whose keys are pairs 
+        # of field name and the flag to get the DOFs of higher order sha-
+        # pe functions too
 
-    # Iterates through the elements of the submesh
+        self.dofs_trees = dict()
 
-    for element in cells(submesh):
+    # Defines a function to get the KD-tree of the vertices
 
-        # Gets the index of the element in the submesh
+    def get_vertex_tree(self):
 
-        submesh_index = element.index()
+        if self.vertex_tree is None:
 
-        # Gets the index of the element in the parent mesh
+            self.vertex_tree = KDTree(self.mesh.coordinates())
 
-        parent_index = sub_toParentCellMap[submesh_index]
+        return self.vertex_tree
 
-        # Iterates through the fields of the meshes. If the mesh has on-
-        # ly one field, displacement for instance, the list of DOF map-
-        # ping has only one component
+    # Defines a function to get the bounding-box tree of the cells
 
-        for i in range(len(sub_meshMapping)):
+    def get_cell_tree(self):
+
+        if self.cell_tree is None:
+
+            self.cell_tree = self.mesh.bounding_box_tree()
+
+        return self.cell_tree
+
+    # Defines a function to get the DOF indices, their coordinates and 
+    # their KD-tree for a field
+
+    def get_dofs_tree(self, field_name=None, get_higher_order_dofs_too=
+    True):
+
+        key = (field_name, get_higher_order_dofs_too)
+
+        if not (key in self.dofs_trees):
 
-            # Translates the values of the solution using the DOFs map-
-            # ping
+            if self.functional_data_class is None:
 
-            field_submesh.vector()[sub_meshMapping[i].cell_dofs(
-            submesh_index)] = field_parentMesh.vector()[
-            parent_meshMapping[i].cell_dofs(parent_index)] 
+                raise ValueError("The spatial index was created withou"+
+                "t a functional data class, thus, it cannot query DOFs")
 
-    # Returns the submesh field
+            dofs_indices, dofs_coordinates = (
+            get_dofs_in_field_and_coordinates(self.functional_data_class, 
+            field_name, get_higher_order_dofs_too=
+            get_higher_order_dofs_too))
 
-    return field_submesh
+            dofs_indices = np.asarray(dofs_indices)
+
+            self.dofs_trees[key] = (dofs_indices, dofs_coordinates, 
+            KDTree(dofs_coordinates))
+
+        return self.dofs_trees[key]
+
+    # Defines a function to get the vertices closest to the points. Re-
+    # turns an array of node numbers and an array of their coordinates
+
+    def query_nodes(self, points):
+
+        _, node_numbers = self.get_vertex_tree().query(np.atleast_2d(
+        points))
+
+        return node_numbers, self.mesh.coordinates()[node_numbers]
+
+    # Defines a function to get the DOFs within the tolerance from each
+    # point. Returns a list with a sorted list of DOFs indices per point
+
+    def query_dofs(self, points, field_name=None, tolerance=1E-6, 
+    get_higher_order_dofs_too=True):
+
+        dofs_indices, _, dofs_tree = self.get_dofs_tree(field_name, 
+        get_higher_order_dofs_too=get_higher_order_dofs_too)
+
+        return [sorted(dofs_indices[positions].tolist()) for positions in (
+        dofs_tree.query_ball_point(np.atleast_2d(points), tolerance))]
+
+    # Defines a function to get the cells that contain the points. Re-
+    # turns an array of cell indices, where -1 means that no cell has 
+    # been found around the point
+
+    def query_cells(self, points):
+
+        cell_tree = self.get_cell_tree()
+
+        n_cells = self.mesh.num_cells()
+
+        cells_indices = np.array([cell_tree.compute_first_entity_collision(
+        Point(*point)) for point in np.atleast_2d(points)], dtype=int)
+
+        cells_indices[cells_indices>=n_cells] = -1
+
+        return cells_indices
+
+# Defines a function to get the spatial index of a mesh, which is saved
+# in the functional data class, if it is given, or in the mesh data 
+# class. Hence, the trees are built only once
+
+def get_spatial_index(mesh_data_class, functional_data_class=None):
+
+    owner = mesh_data_class
+
+    if functional_data_class is not None:
+
+        owner = functional_data_class
+
+    spatial_index = getattr(owner, "spatial_index", None)
+
+    if spatial_index is None:
+
+        spatial_index = MeshSpatialIndex(mesh_data_class, 
+        functional_data_class=functional_data_class)
+
+        # The mesh proper may not accept new attributes
+
+        try:
+
+            owner.spatial_index = spatial_index
+
+        except AttributeError:
+
+            pass
+
+    return spatial_index
 
 ########################################################################
 #                           Element finding                            #
@@ -1062,21 +1357,17 @@ get_vertex_nodes_indices=False, get_vertex_nodes_coordinates=False):
         "---the spatial coordinates of the point. Currently, it is:\n"+
         str(point_coordinates))
 
-    # Creates a tree of the mesh to search for and element efficiently
-
-    mesh_tree = mesh_data_class.mesh.bounding_box_tree()
-
-    # Searches for a finite element that contains a point or is closest
-    # to it. But converts the point coordinates to a Point object first
+    # Searches for a finite element that contains a point using the 
+    # tree of the mesh in the spatial index
 
-    finite_element_number = mesh_tree.compute_first_entity_collision(
-    Point(*point_coordinates))
+    finite_element_number = get_spatial_index(mesh_data_class
+    ).query_cells([point_coordinates])[0]
 
     # Verifies if the found number is valid
 
     finite_element = None
 
-    if finite_element_number<mesh_data_class.mesh.num_cells():
+    if finite_element_number>=0:
 
         # Recovers the finite element object
 
@@ -1227,9 +1518,17 @@ node_number, node_coordinates, set_ofNodes=None):
             "o a point from must be a list. The provided set of nodes,"+
             " however, is not a list: "+str(set_ofNodes))
 
-        # Gets a tree of these coordinates
+        # Gets a tree of these coordinates. If all nodes are queried, the
+        # tree of the spatial index of the mesh is used
 
-        coordinates_tree = KDTree(mesh_coordinates)
+        if set_ofNodes is None:
+
+            coordinates_tree = get_spatial_index(mesh_dataClass
+            ).get_vertex_tree()
+
+        else:
+
+            coordinates_tree = KDTree(mesh_coordinates)
 
         # Gets the number of the node that is closest to the given coor-
         # dinates
@@ -1591,6 +1890,24 @@ class DOFsNode:
                 raise ValueError("'do_not_throw_error' is True, but 'n"+
                 "_closest_nodes' was not provided. Give a number of cl"+
                 "osest nodes to the given coordinate to be returned")
+
+        # Gets the distinct locations of the DOFs, since multiple DOFs 
+        # can share a node, and the positions of the DOFs at each loca-
+        # tion. Then, builds a tree of the locations, so each query does
+        # not evaluate the distances to all DOFs
+
+        self.locations, location_per_dof = np.unique(
+        self.dof_coordinates, axis=0, return_inverse=True)
+
+        location_per_dof = location_per_dof.reshape(-1)
+
+        sorted_positions = np.argsort(location_per_dof, kind="stable")
+
+        self.dofs_per_location = np.split(sorted_positions, np.cumsum(
+        np.bincount(location_per_dof, minlength=self.locations.shape[0])
+        )[:-1])
+
+        self.locations_tree = KDTree(self.locations)
             
     # Defines a method to get the coordinates of a given DOF
 
@@ -1617,70 +1934,46 @@ class DOFsNode:
 
     def __call__(self, x, y, z):
 
-        # Constructs a point array and calculate the distances from this
-        # point to the DOFs coordinates
+        point = np.array([x, y, z])
 
-        distances = np.linalg.norm(self.dof_coordinates-np.array([x, y, 
-        z]), axis=1)
-
-        dofs_indices = None
+        locations = None
 
         # If the tolerance is not to be used, but simply the closest DOFs
-        # are to be found
+        # are to be found, gets the closest locations
 
         if self.do_not_throw_error:
 
-            # Gets the closest DOFs to the given coordinate
-
-            dofs_indices = np.argsort(distances)
-            
-            # Initializes a counter of found nodes
-
-            verified_nodes = 1
-
-            # Iterates over the DOFs coordinates using the sorted DOF 
-            # indices to look for all DOFs that map to the closest node
-
-            for sorted_index, dof_index in enumerate(dofs_indices):
-
-                # Verifies if the current node is different than the last
-                # one
-
-                if not np.allclose(self.dof_coordinates[dof_index],
-                self.dof_coordinates[dofs_indices[max(0,sorted_index-1)]
-                ]):
-                    
-                    verified_nodes += 1
-
-                    # Verifies if the number of nodes found is higher 
-                    # than the number of selected nodes
-
-                    if verified_nodes>self.n_closest_nodes:
+            _, locations = self.locations_tree.query(point, k=min(
+            self.n_closest_nodes, self.locations.shape[0]))
 
-                        # Cuts the list of DOF indices
-
-                        dofs_indices = dofs_indices[0:sorted_index]
-
-                        break
+            locations = np.atleast_1d(locations)
 
         else:
 
-            # Selects the DOFs indices that are close to the point given
-            # the tolerance
+            # Selects the locations that are close to the point given the
+            # tolerance
 
-            dofs_indices = np.where(distances<self.tolerance)[0]
+            locations = self.locations_tree.query_ball_point(point, 
+            self.tolerance)
 
             # Verifies if the found DOFs are close enough to consider it
             # a valid node
 
-            if len(dofs_indices)==0:
+            if len(locations)==0:
+
+                _, closest_location = self.locations_tree.query(point)
 
-                closest_node = self.dof_coordinates[np.argmin(distances)]
+                closest_node = self.locations[closest_location]
 
                 raise ValueError("Point ("+str(x)+", "+str(y)+", "+str(z
                 )+") is not a valid node to look for DOFs. The closest"+
                 " node is x="+str(closest_node[0])+", y="+str(
                 closest_node[1])+", z="+str(closest_node[2]))
+
+        # Gets the positions of the DOFs at these locations
+
+        dofs_indices = np.concatenate([self.dofs_per_location[location
+        ] for location in locations])
             
         # Reassembles the DOFs to match the list of DOFs indices. Pairs 
         # DOF indices and 
@@ -2093,39 +2386,71 @@ def get_domain_dofs_to_physical_group(mesh_data_class, function_space):
 
     dof_map = function_space.dofmap()
 
+    # Gets the vertices of each cell and the physical group of each cell
+
+    cells_vertices = mesh_data_class.mesh.cells()
+
+    cells_markers = mesh_data_class.domain_meshFunction.array()
+
     # Iterates through the doamin physical groups
 
     for physical_name, physical_tag in (
     mesh_data_class.domain_physicalGroupsNameToTag.items()):
 
-        # Initializes the set of DOFs
-
-        dofs_set = set()
+        # Gets the vertices of the cells that belong to this domain
 
-        # Iterates through the mesh elements
+        physical_vertices = np.unique(cells_vertices[cells_markers==(
+        physical_tag)])
 
-        for cell in cells(mesh_data_class.mesh):
+        # Adds the DOFs of these vertices to the dictionary
 
-            # Verifies if it belongs to the domain
+        if len(physical_vertices)>0:
 
-            if mesh_data_class.domain_meshFunction[cell]==(
-            physical_tag):
-                
-                # Iterates through the nodes of this cell
-                
-                for node in vertices(cell):
-                    
-                    dofs_set.update(dof_map.entity_dofs(
-                    mesh_data_class.mesh, 0, [node.index()]))
+            dofs_dictionary[physical_name] = set(dof_map.entity_dofs(
+            mesh_data_class.mesh, 0, physical_vertices.tolist()))
 
-        # Adds to the dictionary
+        else:
 
-        dofs_dictionary[physical_name] = dofs_set
+            dofs_dictionary[physical_name] = set()
 
     # Returns the dictionary
 
     return dofs_dictionary
 
+# Defines a function to get the name of the domain physical group of 
+# each degree of freedom as an array. DOFs shared by more than one phy-
+# sical group get the last one in the dictionary of physical groups, and
+# DOFs without physical group get None
+
+def get_domain_dofs_physical_group_labels(mesh_data_class, 
+function_space, number_of_dofs=None):
+
+    # Gets the number of local DOFs if it was not given
+
+    if number_of_dofs is None:
+
+        number_of_dofs = len(function_space.tabulate_dof_coordinates())
+
+    # Initializes the array of labels
+
+    dofs_labels = np.full(number_of_dofs, None, dtype=object)
+
+    # Iterates through the dictionary of DOFs of each physical group
+
+    for physical_name, physical_dofs in get_domain_dofs_to_physical_group(
+    mesh_data_class, function_space).items():
+
+        physical_dofs = np.fromiter(physical_dofs, dtype=int, count=len(
+        physical_dofs))
+
+        # Filters out the DOFs beyond the number of DOFs, e.g. the ghost
+        # DOFs in parallel, which are not owned by this processor
+
+        dofs_labels[physical_dofs[physical_dofs<number_of_dofs]] = (
+        physical_name)
+
+    return dofs_labels
+
 # Defines a function to convert a (possibly) string physical group to 
 # the corresponding integer physical group
 
@@ -238,7 +238,8 @@ boundary_conditions=None, fluctuation_field=False):
         mixed_element = elements_dictionary[fields_names[0]]
 
     # The function space is constrained in its construction if the peri-
-    # odic boundary condition is required
+    # odic boundary condition is required. The periodic boundary is com-
+    # piled to avoid python callbacks for each vertex of the mesh
 
     monolithic_functionSpace = 0
 
@@ -246,7 +247,7 @@ boundary_conditions=None, fluctuation_field=False):
 
         monolithic_functionSpace = FunctionSpace(mesh_dataClass.mesh, 
         mixed_element, constrained_domain=
-        multiscale_expressions.PeriodicCubicBoundary(
+        multiscale_expressions.compile_periodicCubicBoundary(
         *centroid_coordinates, mesh_dataClass))
 
     else:
@@ -12,12 +12,16 @@ from ..tool_box import post_processing_tools
 
 from ..tool_box import functional_tools
 
+from ..tool_box import binary_tools
+
 from ..tool_box.parallelization_tools import mpi_print
 
 from ..post_processes import post_processes_classes as post_classes
 
 from ...PythonicUtilities import programming_tools
 
+from ...PythonicUtilities.dictionary_tools import verify_obligatory_and_optional_keys
+
 ########################################################################
 #                        Newton-Raphson schemes                        #
 ########################################################################
@@ -36,7 +40,8 @@ mesh_dataClass, constitutive_model, post_processesDict=None,
 post_processesSubmeshDict=None, dirichlet_loads=None, neumann_loads=None, 
 solution_name=None, volume_physGroupsSubmesh=None, 
 macro_quantitiesClasses=None, t=None, t_final=None, maximum_loadingSteps=
-None, field_correction=None):
+None, field_correction=None, adaptive_stepping=None, checkpointing=
+None, restart_from=None, deferred_post_processing=None):
     
     # Verifies if a problem with more fields was mistakenly given to the
     # single-field Newton-Raphson scheme
@@ -51,7 +56,10 @@ None, field_correction=None):
         volume_physGroupsSubmesh=volume_physGroupsSubmesh, 
         macro_quantitiesClasses=macro_quantitiesClasses, t=t, t_final=
         t_final, maximum_loadingSteps=maximum_loadingSteps, 
-        fields_corrections=field_correction)
+        fields_corrections=field_correction, adaptive_stepping=
+        adaptive_stepping, checkpointing=checkpointing, 
+        restart_from=restart_from, deferred_post_processing=
+        deferred_post_processing)
     
     # If no solution name was provided
 
@@ -237,130 +245,45 @@ None, field_correction=None):
 
         time_keys = np.linspace(t, t_final, maximum_loadingSteps)
 
-    # Initializes a counter for the whole simulation time
-
-    start_time_simulation = time.time()
-
-    # Iterates through the pseudotime stepping
-
-    for t in time_keys:
-
-        # Updates the pseudo time variables and the counter
-        
-        time_counter += 1
-
-        # Prints step information
-
-        print_stepInfo(time_counter, t, mesh_dataClass.comm)
-
-        # Updates the Dirichlet boundary conditions 
-
-        for dirichlet_load in dirichlet_loads:
-
-            # Tests whether this load is a dolfin Constant
-
-            if isinstance(dirichlet_load, Constant):
-
-                dirichlet_load.assign(t)
-
-            # If the load is a class and has an attribute "update"
-
-            elif hasattr(dirichlet_load, "update_load"):
-
-                dirichlet_load.update_load(t)
-
-            # Otherwise, updates it as a class (Expressions are classes)
-
-            elif hasattr(dirichlet_load, "t"):
-
-                dirichlet_load.t = t
-
-            else:
-
-                raise AttributeError("Cannot update the dirichlet load"+
-                " because the class '"+str(dirichlet_load)+"' does not"+
-                " have the attribute 't'")
-
-        # Updates the Neumann boundary conditions 
-
-        for neumann_load in neumann_loads:
+    # If the pseudotime stepping is adaptive, creates the controller of
+    # the substeps between the time keys
 
-            # Tests whether this load is a dolfin Constant
+    adaptive_controller = None
 
-            if isinstance(neumann_load, Constant):
+    if not (adaptive_stepping is None or adaptive_stepping is False):
 
-                neumann_load.assign(t)
+        adaptive_controller = AdaptivePseudotimeStepping(
+        adaptive_stepping, solver, solution_field, time_keys, 
+        dirichlet_loads, neumann_loads, macro_quantitiesClasses, comm=
+        mesh_dataClass.comm)
 
-            # If the load is a class and has an attribute "update"
+    # Verifies the options of the checkpoints
 
-            elif hasattr(neumann_load, "update_load"):
+    checkpointing = get_checkpointing_options(checkpointing)
 
-                neumann_load.update_load(t)
+    # If the simulation is to be restarted from a checkpoint, reads it. 
+    # The time keys that were already solved are skipped
 
-            # Otherwise, updates it as a class (Expressions are classes)
+    if restart_from is not None:
 
-            elif hasattr(neumann_load, "t"):
-
-                neumann_load.t = t
-
-            else:
-
-                raise AttributeError("Cannot update the neumann load b"+
-                "ecause the class '"+str(neumann_load)+"' does not hav"+
-                "e the attribute 't'")
-
-        # Updates the classes of macroscale quantities
-
-        for MacroScaleClass in macro_quantitiesClasses:
-
-            MacroScaleClass.update(t)
-
-        # Solves the nonlinear variational problem 
-
-        start_time = time.time()
-
-        solver.solve()
-
-        end_time = time.time()
-
-        mpi_print(mesh_dataClass.comm, "The solution of this pseudotime took "+str(end_time-
-        start_time)+" seconds\n\n")
-
-        # If the field has to be corrected, like in multiscale analysis, 
-        # using a correction field
-
-        if not (field_correction is None):
-
-            # Interpolates the correction of the field by the given
-            # function space, and, then, adds the resulting vector of
-            # parameters to the solution's one
-
-            correction_projection.interpolate(field_correction[1])
-
-            # Takes care if the solution field has the same number of 
-            # degrees of freedom as the correction does
+        time_counter, _ = binary_tools.read_checkpoint(restart_from, 
+        functional_data_class, macro_quantitiesClasses=
+        macro_quantitiesClasses, post_processingObjects=[
+        post_processingObjects, post_processingObjectsSubmesh], 
+        adaptive_controller=adaptive_controller, comm_object=
+        mesh_dataClass.comm)
 
-            if len(solution_field.vector())!=len(
-            correction_projection.vector()):
-                
-                # If there's a difference, an intermediate field has to
-                # be created in the function space of the correction 
-                
-                if intermediate_field is None:
+    # Defines a function to evaluate the post-processes at a time value
+    # given the list [solution_field, intermediate_field]. The interme-
+    # diate field is None if the correction does not need it
 
-                    intermediate_field = Function(field_correction[2])
+    def evaluate_post_processes(t, fields):
 
-                # In this space, the solution will be projected and the
-                # interpolated correction will be added
-                
-                intermediate_field.vector()[:] = (project(solution_field, 
-                field_correction[2]).vector()[:]+
-                correction_projection.vector()[:])
+        nonlocal solution_submesh
 
-            else:
+        solution_field, intermediate_field = fields
 
-                solution_field.vector()[:] += (
-                correction_projection.vector()[:])
+        start_postProcessingTime = time.time()
 
         # Renames the solution
 
@@ -405,7 +328,8 @@ None, field_correction=None):
                 solution_submesh = mesh_tools.field_parentToSubmesh(
                 submesh_data_class.mesh, solution_field, RVE_toParentCellMap, 
                 sub_meshMapping=RVE_meshMapping, parent_meshMapping=
-                parent_meshMapping, field_submesh=solution_submesh)
+                parent_meshMapping, field_submesh=solution_submesh, 
+                transfer_operator=submesh_data_class.transfer_operator)
 
             else:
 
@@ -479,7 +403,118 @@ None, field_correction=None):
         end_postProcessingTime = time.time()
 
         mpi_print(mesh_dataClass.comm, "\n\nThe post-processing phase took "+str(
-        end_postProcessingTime-end_time)+" seconds\n\n")
+        end_postProcessingTime-start_postProcessingTime)+" seconds\n\n")
+
+    # Initializes the queue of the post-processes. If they are deferred,
+    # the loads are set at the time value of each snapshot before its
+    # post-processes are evaluated
+
+    post_processing_queue = DeferredPostProcessing(
+    deferred_post_processing, evaluate_post_processes, lambda 
+    time_value: update_loads(time_value, dirichlet_loads, neumann_loads, 
+    macro_quantitiesClasses, interpolate_macro_quantities=not (
+    adaptive_controller is None)))
+
+    # Initializes a counter for the whole simulation time
+
+    start_time_simulation = time.time()
+
+    # Iterates through the pseudotime stepping
+
+    for t in time_keys[time_counter:]:
+
+        # Updates the pseudo time variables and the counter
+        
+        time_counter += 1
+
+        # Prints step information
+
+        print_stepInfo(time_counter, t, mesh_dataClass.comm)
+
+        # Updates the loads and solves the nonlinear variational pro-
+        # blem. If the pseudotime stepping is adaptive, the controller
+        # advances the solution through substeps until this time key
+
+        start_time = time.time()
+
+        if adaptive_controller is None:
+
+            update_loads(t, dirichlet_loads, neumann_loads, 
+            macro_quantitiesClasses)
+
+            solver.solve()
+
+        else:
+
+            adaptive_controller.advance_to(t)
+
+        end_time = time.time()
+
+        mpi_print(mesh_dataClass.comm, "The solution of this pseudotime took "+str(end_time-
+        start_time)+" seconds\n\n")
+
+        # If the field has to be corrected, like in multiscale analysis, 
+        # using a correction field
+
+        if not (field_correction is None):
+
+            # Interpolates the correction of the field by the given
+            # function space, and, then, adds the resulting vector of
+            # parameters to the solution's one
+
+            correction_projection.interpolate(field_correction[1])
+
+            # Takes care if the solution field has the same number of 
+            # degrees of freedom as the correction does
+
+            if len(solution_field.vector())!=len(
+            correction_projection.vector()):
+                
+                # If there's a difference, an intermediate field has to
+                # be created in the function space of the correction 
+                
+                if intermediate_field is None:
+
+                    intermediate_field = Function(field_correction[2])
+
+                # In this space, the solution will be projected and the
+                # interpolated correction will be added
+                
+                intermediate_field.vector()[:] = (project(solution_field, 
+                field_correction[2]).vector()[:]+
+                correction_projection.vector()[:])
+
+            else:
+
+                solution_field.vector()[:] += (
+                correction_projection.vector()[:])
+
+        # Hands the fields to the post-processes
+
+        post_processing_queue.submit(t, [solution_field, 
+        intermediate_field])
+
+        # Writes a checkpoint at every given number of time keys and at
+        # the last one
+
+        if checkpointing is not None and ((time_counter%checkpointing[
+        "interval"]==0) or time_counter==len(time_keys)):
+
+            # Evaluates the deferred post-processes first, such that the
+            # checkpoint has their objects up to this time key
+
+            post_processing_queue.flush()
+
+            binary_tools.write_checkpoint(checkpointing["file name"],
+            functional_data_class, time_counter, t, 
+            macro_quantitiesClasses=macro_quantitiesClasses, 
+            post_processingObjects=[post_processingObjects, 
+            post_processingObjectsSubmesh], adaptive_controller=
+            adaptive_controller, comm_object=mesh_dataClass.comm)
+
+    # Evaluates the post-processes that are still in the queue
+
+    post_processing_queue.flush()
 
     final_time_simulation = time.time()
 
@@ -488,6 +523,15 @@ None, field_correction=None):
     final_time_simulation-start_time_simulation)+" seconds\n##########"+
     "##############################################################\n")
 
+    # Shows the statistics of the adaptive pseudotime stepping
+
+    if not (adaptive_controller is None):
+
+        mpi_print(mesh_dataClass.comm, "The adaptive pseudotime steppi"+
+        "ng took "+str(adaptive_controller.n_substeps)+" substeps, "+str(
+        adaptive_controller.n_cutbacks)+" cutbacks, and "+str(
+        adaptive_controller.n_newton_iterations)+" Newton iterations\n")
+
 # Defines a function to iterate through a Newton-Raphson loop of a vari-
 # ational problem of multiple fields
 
@@ -502,7 +546,8 @@ mesh_dataClass, constitutive_model, post_processesList=None,
 post_processesSubmeshList=None, dirichlet_loads=None, neumann_loads=None, 
 solution_name=None, volume_physGroupsSubmesh=None, 
 macro_quantitiesClasses=None, t=None, t_final=None, maximum_loadingSteps=
-None, fields_corrections=None):
+None, fields_corrections=None, adaptive_stepping=None, checkpointing=
+None, restart_from=None, deferred_post_processing=None):
     
     # If no solution name was provided
 
@@ -636,7 +681,10 @@ None, fields_corrections=None):
         volume_physGroupsSubmesh=volume_physGroupsSubmesh, 
         macro_quantitiesClasses=macro_quantitiesClasses, t=t, t_final=
         t_final, maximum_loadingSteps=maximum_loadingSteps,
-        field_correction=fields_corrections)
+        field_correction=fields_corrections, adaptive_stepping=
+        adaptive_stepping, checkpointing=checkpointing, 
+        restart_from=restart_from, deferred_post_processing=
+        deferred_post_processing)
     
     mpi_print(mesh_dataClass.comm, "\n################################"+
     "########################################\n#              The Newt"+
@@ -816,125 +864,44 @@ None, fields_corrections=None):
 
         time_keys = np.linspace(t, t_final, maximum_loadingSteps)
 
-    # Initializes a counter of time for the whole simulation
-
-    start_time_simulation = time.time()
-
-    # Iterates through the pseudotime stepping
-
-    for t in time_keys:
-
-        # Updates the pseudo time variables and the counter
-        
-        time_counter += 1
-
-        # Prints step information
-
-        print_stepInfo(time_counter, t, mesh_dataClass.comm)
-
-        # Updates the Dirichlet boundary conditions 
-
-        for dirichlet_load in dirichlet_loads:
-
-            # Tests whether this load is a dolfin Constant
-
-            if isinstance(dirichlet_load, Constant):
-
-                dirichlet_load.assign(t)
-
-            # If the load is a class and has an attribute "update"
-
-            elif hasattr(dirichlet_load, "update_load"):
-
-                dirichlet_load.update_load(t)
-
-            # Otherwise, updates it as a class (Expressions are classes)
-
-            elif hasattr(dirichlet_load, "t"):
-
-                dirichlet_load.t = t
-
-            else:
-
-                raise AttributeError("Cannot update the dirichlet load"+
-                " because the class '"+str(dirichlet_load)+"' does not"+
-                " have the attribute 't'")
-
-        # Updates the Neumann boundary conditions 
-
-        for neumann_load in neumann_loads:
-
-            # Tests whether this load is a dolfin Constant
+    # If the pseudotime stepping is adaptive, creates the controller of
+    # the substeps between the time keys
 
-            if isinstance(neumann_load, Constant):
+    adaptive_controller = None
 
-                neumann_load.assign(t)
+    if not (adaptive_stepping is None or adaptive_stepping is False):
 
-            # If the load is a class and has an attribute "update"
+        adaptive_controller = AdaptivePseudotimeStepping(
+        adaptive_stepping, solver, solution_field, time_keys, 
+        dirichlet_loads, neumann_loads, macro_quantitiesClasses, comm=
+        mesh_dataClass.comm)
 
-            elif hasattr(neumann_load, "update_load"):
+    # Verifies the options of the checkpoints
 
-                neumann_load.update_load(t)
+    checkpointing = get_checkpointing_options(checkpointing)
 
-            # Otherwise, updates it as a class (Expressions are classes)
+    # If the simulation is to be restarted from a checkpoint, reads it. 
+    # The time keys that were already solved are skipped
 
-            elif hasattr(neumann_load, "t"):
+    if restart_from is not None:
 
-                neumann_load.t = t
+        time_counter, _ = binary_tools.read_checkpoint(restart_from, 
+        functional_data_class, macro_quantitiesClasses=
+        macro_quantitiesClasses, post_processingObjects=[
+        post_processingObjects, post_processingObjectsSubmesh], 
+        adaptive_controller=adaptive_controller, comm_object=
+        mesh_dataClass.comm)
 
-            else:
-
-                raise AttributeError("Cannot update the neumann load b"+
-                "ecause the class '"+str(neumann_load)+"' does not hav"+
-                "e the attribute 't'")
-
-        # Updates the classes of macroscale quantities
-
-        for MacroScaleClass in macro_quantitiesClasses:
-
-            MacroScaleClass.update(t)
-
-        # Solves the nonlinear variational problem 
-
-        start_time = time.time()
-
-        solver.solve()
-
-        end_time = time.time()
-
-        mpi_print(mesh_dataClass.comm, "The solution of this pseudotime took "+str(end_time-
-        start_time)+" seconds\n\n")
-
-        # Splits the solution and appends each field to a list. Adds the
-        # correction if needed (the correction is another field; linear
-        # or quadratic, as examples)
-
-        split_solution = list(solution_field.split(deepcopy=True))
-
-        for field_name, field_correction in fields_corrections.items():
-
-            field_index = 0
-
-            try:
-
-                field_index = fields_namesDict[field_name]
-
-            except:
+    # Defines a function to evaluate the post-processes at a time value
+    # given the list [solution_field, *split_solution]
 
-                raise KeyError("The field correction of the '"+str(
-                field_name)+"' cannot be added to the solution for thi"+
-                "s name was not found in the dictionary of fields' nam"+
-                "es':\n"+str(list(fields_namesDict.keys())))
+    def evaluate_post_processes(t, fields):
 
-            # Interpolates the correction of the field by the given 
-            # function space, and, then, adds the resulting vector of
-            # parameters to the solution's one
+        nonlocal solution_submesh
 
-            correction_projection = interpolate(field_correction[1], 
-            field_correction[2])
+        solution_field, *split_solution = fields
 
-            split_solution[field_index].vector()[:] += (
-            correction_projection.vector()[:])
+        start_postProcessingTime = time.time()
 
         # Renames the solution fields
 
@@ -972,7 +939,8 @@ None, fields_corrections=None):
             solution_submesh = mesh_tools.field_parentToSubmesh(
             submesh_data_class.mesh, solution_field, RVE_toParentCellMap, 
             sub_meshMapping=RVE_meshMapping, parent_meshMapping=
-            parent_meshMapping, field_submesh=solution_submesh)
+            parent_meshMapping, field_submesh=solution_submesh, 
+            transfer_operator=submesh_data_class.transfer_operator)
 
             # Splits the solution
 
@@ -1077,18 +1045,784 @@ None, fields_corrections=None):
         end_postProcessingTime = time.time()
 
         mpi_print(mesh_dataClass.comm, "\n\nThe post-processing phase took "+str(
-        end_postProcessingTime-end_time)+" seconds\n\n")
+        end_postProcessingTime-start_postProcessingTime)+" seconds\n\n")
 
-    final_time_simulation = time.time()
+    # Initializes the queue of the post-processes. If they are deferred,
+    # the loads are set at the time value of each snapshot before its
+    # post-processes are evaluated
 
-    mpi_print(mesh_dataClass.comm, "\n#########################################################"+
-    "###############\nThe whole simulation took: "+str(
-    final_time_simulation-start_time_simulation)+" seconds\n##########"+
-    "##############################################################\n")
+    post_processing_queue = DeferredPostProcessing(
+    deferred_post_processing, evaluate_post_processes, lambda 
+    time_value: update_loads(time_value, dirichlet_loads, neumann_loads, 
+    macro_quantitiesClasses, interpolate_macro_quantities=not (
+    adaptive_controller is None)))
 
-########################################################################
-#                              Utilities                               #
-########################################################################
+    # Initializes a counter of time for the whole simulation
+
+    start_time_simulation = time.time()
+
+    # Iterates through the pseudotime stepping
+
+    for t in time_keys[time_counter:]:
+
+        # Updates the pseudo time variables and the counter
+        
+        time_counter += 1
+
+        # Prints step information
+
+        print_stepInfo(time_counter, t, mesh_dataClass.comm)
+
+        # Updates the loads and solves the nonlinear variational pro-
+        # blem. If the pseudotime stepping is adaptive, the controller
+        # advances the solution through substeps until this time key
+
+        start_time = time.time()
+
+        if adaptive_controller is None:
+
+            update_loads(t, dirichlet_loads, neumann_loads, 
+            macro_quantitiesClasses)
+
+            solver.solve()
+
+        else:
+
+            adaptive_controller.advance_to(t)
+
+        end_time = time.time()
+
+        mpi_print(mesh_dataClass.comm, "The solution of this pseudotime took "+str(end_time-
+        start_time)+" seconds\n\n")
+
+        # Splits the solution and appends each field to a list. Adds the
+        # correction if needed (the correction is another field; linear
+        # or quadratic, as examples)
+
+        split_solution = list(solution_field.split(deepcopy=True))
+
+        for field_name, field_correction in fields_corrections.items():
+
+            field_index = 0
+
+            try:
+
+                field_index = fields_namesDict[field_name]
+
+            except:
+
+                raise KeyError("The field correction of the '"+str(
+                field_name)+"' cannot be added to the solution for thi"+
+                "s name was not found in the dictionary of fields' nam"+
+                "es':\n"+str(list(fields_namesDict.keys())))
+
+            # Interpolates the correction of the field by the given 
+            # function space, and, then, adds the resulting vector of
+            # parameters to the solution's one
+
+            correction_projection = interpolate(field_correction[1], 
+            field_correction[2])
+
+            split_solution[field_index].vector()[:] += (
+            correction_projection.vector()[:])
+
+        # Hands the fields to the post-processes
+
+        post_processing_queue.submit(t, [solution_field]+
+        split_solution)
+
+        # Writes a checkpoint at every given number of time keys and at
+        # the last one
+
+        if checkpointing is not None and ((time_counter%checkpointing[
+        "interval"]==0) or time_counter==len(time_keys)):
+
+            # Evaluates the deferred post-processes first, such that the
+            # checkpoint has their objects up to this time key
+
+            post_processing_queue.flush()
+
+            binary_tools.write_checkpoint(checkpointing["file name"],
+            functional_data_class, time_counter, t, 
+            macro_quantitiesClasses=macro_quantitiesClasses, 
+            post_processingObjects=[post_processingObjects, 
+            post_processingObjectsSubmesh], adaptive_controller=
+            adaptive_controller, comm_object=mesh_dataClass.comm)
+
+    # Evaluates the post-processes that are still in the queue
+
+    post_processing_queue.flush()
+
+    final_time_simulation = time.time()
+
+    mpi_print(mesh_dataClass.comm, "\n#########################################################"+
+    "###############\nThe whole simulation took: "+str(
+    final_time_simulation-start_time_simulation)+" seconds\n##########"+
+    "##############################################################\n")
+
+    # Shows the statistics of the adaptive pseudotime stepping
+
+    if not (adaptive_controller is None):
+
+        mpi_print(mesh_dataClass.comm, "The adaptive pseudotime steppi"+
+        "ng took "+str(adaptive_controller.n_substeps)+" substeps, "+str(
+        adaptive_controller.n_cutbacks)+" cutbacks, and "+str(
+        adaptive_controller.n_newton_iterations)+" Newton iterations\n")
+
+########################################################################
+#                    Adaptive pseudotime stepping                      #
+########################################################################
+
+# Defines a class to advance the solution from one time key to the next
+# through substeps of adaptive size. The step grows when the Newton-
+# Raphson scheme converges in few iterations, and it is cut back when
+# the scheme diverges, in which case the solution is restored from the
+# last converged state before retrying. The initial guess of each sub-
+# step is extrapolated from the last two converged solutions. The time
+# keys are always hit exactly, thus, the post-processes are evaluated
+# only at them. The dictionary of options may have the keys:
+#
+# "initial step": size of the first substep. The default is the inter-
+# val between the first two time keys
+#
+# "minimum step": size below which a diverged substep is not cut back
+# anymore, and an error is raised. The default is 1E-4 times the ini-
+# tial step
+#
+# "maximum step": maximum size of a substep. The default is the whole
+# interval of time keys
+#
+# "growth factor": factor to multiply the step after an easy substep.
+# The default is 1.5
+#
+# "cutback factor": factor to multiply the step after a diverged sub-
+# step. The default is 0.5
+#
+# "easy iterations": maximum number of Newton iterations of a substep
+# for it to be considered easy. The default is 4
+#
+# "predictor": "secant" to extrapolate the initial guess linearly from
+# the last two converged solutions, or "constant" to start from the
+# last converged solution. The default is "secant"
+#
+# "initial time": time value of the initial state of the solution. The
+# interval between it and the first time key is stepped through like
+# the others, thus, the first time key can be cut back too. The de-
+# fault is 0.0
+
+class AdaptivePseudotimeStepping:
+
+    def __init__(self, adaptive_stepping, solver, solution_field,
+    time_keys, dirichlet_loads, neumann_loads, macro_quantitiesClasses,
+    comm=None):
+
+        # Verifies the dictionary of options. Copies it first, because
+        # the default values are set into the dictionary
+
+        if adaptive_stepping is True:
+
+            adaptive_stepping = dict()
+
+        adaptive_stepping = verify_obligatory_and_optional_keys(dict(
+        adaptive_stepping), [], {"initial step": {"type": (int, float),
+        "default": None}, "minimum step": {"type": (int, float), "defa"+
+        "ult": None}, "maximum step": {"type": (int, float), "default":
+        None}, "growth factor": {"type": (int, float), "default": 1.5},
+        "cutback factor": {"type": (int, float), "default": 0.5}, "eas"+
+        "y iterations": {"type": int, "default": 4}, "predictor": {"ty"+
+        "pe": str, "default": "secant"}, "initial time": {"type": (int,
+        float), "default": 0.0}}, "adaptive_stepping", "AdaptivePseudo"+
+        "timeStepping")
+
+        if not (adaptive_stepping["predictor"] in ["secant", "constant"]):
+
+            raise NameError("The 'predictor' of the adaptive pseudotim"+
+            "e stepping must be either 'secant' or 'constant'. Current"+
+            "ly, it is: "+str(adaptive_stepping["predictor"]))
+
+        if adaptive_stepping["growth factor"]<1.0:
+
+            raise ValueError("The 'growth factor' of the adaptive pseu"+
+            "dotime stepping must be at least 1. Currently, it is: "+str(
+            adaptive_stepping["growth factor"]))
+
+        if (adaptive_stepping["cutback factor"]<=0.0 or
+        adaptive_stepping["cutback factor"]>=1.0):
+
+            raise ValueError("The 'cutback factor' of the adaptive pse"+
+            "udotime stepping must be between 0 and 1. Currently, it i"+
+            "s: "+str(adaptive_stepping["cutback factor"]))
+
+        # Verifies if the classes of macro quantities can be interpola-
+        # ted at the intermediate time points
+
+        for MacroScaleClass in macro_quantitiesClasses:
+
+            if not hasattr(MacroScaleClass, "update_interpolated"):
+
+                raise AttributeError("The adaptive pseudotime stepping"+
+                " requires the classes of macro quantities to have the"+
+                " method 'update_interpolated', but the class '"+str(
+                type(MacroScaleClass).__name__)+"' does not have it")
+
+        # Gets the whole interval of time keys
+
+        time_span = abs(time_keys[-1]-time_keys[0])
+
+        # Sets the default sizes of the steps
+
+        if adaptive_stepping["initial step"] is None:
+
+            adaptive_stepping["initial step"] = time_span
+
+            if len(time_keys)>1:
+
+                adaptive_stepping["initial step"] = abs(time_keys[1]-
+                time_keys[0])
+
+        if adaptive_stepping["minimum step"] is None:
+
+            adaptive_stepping["minimum step"] = 1E-4*adaptive_stepping[
+            "initial step"]
+
+        if adaptive_stepping["maximum step"] is None:
+
+            adaptive_stepping["maximum step"] = time_span
+
+        # Saves the options and the objects of the problem
+
+        self.step = float(adaptive_stepping["initial step"])
+
+        self.minimum_step = float(adaptive_stepping["minimum step"])
+
+        self.maximum_step = float(adaptive_stepping["maximum step"])
+
+        self.growth_factor = float(adaptive_stepping["growth factor"])
+
+        self.cutback_factor = float(adaptive_stepping["cutback factor"])
+
+        self.easy_iterations = adaptive_stepping["easy iterations"]
+
+        self.predictor = adaptive_stepping["predictor"]
+
+        self.initial_time = float(adaptive_stepping["initial time"])
+
+        self.solver = solver
+
+        self.solution_vector = solution_field.vector()
+
+        self.dirichlet_loads = dirichlet_loads
+
+        self.neumann_loads = neumann_loads
+
+        self.macro_quantitiesClasses = macro_quantitiesClasses
+
+        self.comm = comm
+
+        # Initializes the list of the last two converged states, each
+        # one as a pair of the time value and the local array of the so-
+        # lution vector
+
+        self.converged_states = []
+
+        # Initializes the counters of Newton iterations and of substeps
+
+        self.n_newton_iterations = 0
+
+        self.n_substeps = 0
+
+        self.n_cutbacks = 0
+
+    # Defines a function to get the state of the controller, to write
+    # checkpoints
+
+    def get_state(self):
+
+        return {"step": self.step, "converged states": [(time_value,
+        solution.copy()) for time_value, solution in (
+        self.converged_states)], "number of Newton iterations": 
+        self.n_newton_iterations, "number of substeps": self.n_substeps,
+        "number of cutbacks": self.n_cutbacks}
+
+    # Defines a function to set the state of the controller, when the
+    # simulation is restarted from a checkpoint
+
+    def set_state(self, state):
+
+        self.step = state["step"]
+
+        self.converged_states = list(state["converged states"])
+
+        self.n_newton_iterations = state["number of Newton iterations"]
+
+        self.n_substeps = state["number of substeps"]
+
+        self.n_cutbacks = state["number of cutbacks"]
+
+    # Defines a function to set the local array of the solution vector
+
+    def set_solution(self, local_array):
+
+        self.solution_vector.set_local(local_array)
+
+        self.solution_vector.apply("insert")
+
+    # Defines a function to set the initial guess of a substep at the
+    # given time value
+
+    def predict_solution(self, time_value):
+
+        # Restarts from the last converged solution, since the solution
+        # vector may have been changed after it, e.g. by the corrections
+        # of the fields in multiscale analysis
+
+        last_time, last_solution = self.converged_states[-1]
+
+        if self.predictor=="secant" and len(self.converged_states)>1:
+
+            # Extrapolates linearly from the last two converged solutions
+
+            previous_time, previous_solution = self.converged_states[0]
+
+            ratio = (time_value-last_time)/(last_time-previous_time)
+
+            self.set_solution(last_solution+(ratio*(last_solution-
+            previous_solution)))
+
+        else:
+
+            self.set_solution(last_solution)
+
+    # Defines a function to try to solve the problem at the given time
+    # value. Returns the number of Newton iterations, or None if the
+    # scheme diverged
+
+    def try_solve(self, time_value):
+
+        update_loads(time_value, self.dirichlet_loads,
+        self.neumann_loads, self.macro_quantitiesClasses,
+        interpolate_macro_quantities=True)
+
+        try:
+
+            n_iterations, converged = self.solver.solve()
+
+        except RuntimeError as error_message:
+
+            mpi_print(self.comm, "The Newton-Raphson scheme diverged a"+
+            "t time "+str(time_value)+": "+str(error_message))
+
+            return None
+
+        if not converged:
+
+            return None
+
+        return n_iterations
+
+    # Defines a function to save a converged state, keeping the last two
+    # only
+
+    def save_converged_state(self, time_value):
+
+        self.converged_states.append((time_value,
+        self.solution_vector.get_local().copy()))
+
+        if len(self.converged_states)>2:
+
+            self.converged_states.pop(0)
+
+    # Defines a function to advance the solution until the given time
+    # key. Returns the number of Newton iterations spent on it
+
+    def advance_to(self, time_key):
+
+        time_key = float(time_key)
+
+        # If there is no converged state yet, takes the initial state of
+        # the solution at the initial time as the state to cut back to.
+        # Hence, the interval until the first time key is subdivided as
+        # well
+
+        if len(self.converged_states)==0:
+
+            self.save_converged_state(self.initial_time)
+
+            # If the first time key is the initial time itself, there is
+            # no interval to subdivide, so it is solved directly
+
+            if abs(time_key-self.initial_time)<=1E-12*max(1.0, abs(
+            time_key)):
+
+                n_iterations = self.try_solve(time_key)
+
+                if n_iterations is None:
+
+                    raise RuntimeError("The Newton-Raphson scheme dive"+
+                    "rged at the first time key, "+str(time_key)+", wh"+
+                    "ich coincides with the initial time, thus, there "+
+                    "is no interval to cut back")
+
+                self.n_newton_iterations += n_iterations
+
+                self.n_substeps += 1
+
+                self.converged_states = []
+
+                self.save_converged_state(time_key)
+
+                return n_iterations
+
+        # Gets the current time and the direction of the time stepping
+
+        current_time = self.converged_states[-1][0]
+
+        direction = 1.0 if time_key>=current_time else -1.0
+
+        n_iterations_key = 0
+
+        # Iterates through the substeps
+
+        while abs(time_key-current_time)>1E-12*max(1.0, abs(time_key)):
+
+            # Gets the size of the substep. If the remaining interval af-
+            # ter this substep would be much smaller than the step, the
+            # time key is taken at once
+
+            step = min(self.step, self.maximum_step)
+
+            remaining_interval = abs(time_key-current_time)
+
+            if step>=(remaining_interval-(1E-2*step)):
+
+                next_time = time_key
+
+            else:
+
+                next_time = current_time+(direction*step)
+
+            # Sets the initial guess and tries to solve
+
+            self.predict_solution(next_time)
+
+            n_iterations = self.try_solve(next_time)
+
+            # If the scheme diverged, cuts back the step, restores the
+            # last converged state and retries
+
+            if n_iterations is None:
+
+                self.n_cutbacks += 1
+
+                self.step = self.cutback_factor*abs(next_time-
+                current_time)
+
+                if self.step<self.minimum_step:
+
+                    raise RuntimeError("The Newton-Raphson scheme dive"+
+                    "rged at time "+str(next_time)+", and the step can"+
+                    "not be cut back anymore, for it would be "+str(
+                    self.step)+", which is smaller than the minimum st"+
+                    "ep, "+str(self.minimum_step))
+
+                mpi_print(self.comm, "Cuts back the pseudotime step to"+
+                " "+str(self.step)+"\n")
+
+                self.set_solution(self.converged_states[-1][1])
+
+                continue
+
+            # Saves the converged state
+
+            self.n_newton_iterations += n_iterations
+
+            n_iterations_key += n_iterations
+
+            self.n_substeps += 1
+
+            self.save_converged_state(next_time)
+
+            current_time = next_time
+
+            # Grows the step if the substep was easy
+
+            if n_iterations<=self.easy_iterations:
+
+                self.step = min(self.growth_factor*self.step,
+                self.maximum_step)
+
+        return n_iterations_key
+
+# Defines a function to update the Dirichlet and Neumann loads and the
+# classes of macro quantities at the given time value. If the macro
+# quantities are to be interpolated, the time value can be between the
+# time keys
+
+def update_loads(t, dirichlet_loads, neumann_loads,
+macro_quantitiesClasses, interpolate_macro_quantities=False):
+
+    # Updates the Dirichlet boundary conditions
+
+    for dirichlet_load in dirichlet_loads:
+
+        # Tests whether this load is a dolfin Constant
+
+        if isinstance(dirichlet_load, Constant):
+
+            dirichlet_load.assign(t)
+
+        # If the load is a class and has an attribute "update"
+
+        elif hasattr(dirichlet_load, "update_load"):
+
+            dirichlet_load.update_load(t)
+
+        # Otherwise, updates it as a class (Expressions are classes)
+
+        elif hasattr(dirichlet_load, "t"):
+
+            dirichlet_load.t = t
+
+        else:
+
+            raise AttributeError("Cannot update the dirichlet load bec"+
+            "ause the class '"+str(dirichlet_load)+"' does not have th"+
+            "e attribute 't'")
+
+    # Updates the Neumann boundary conditions
+
+    for neumann_load in neumann_loads:
+
+        # Tests whether this load is a dolfin Constant
+
+        if isinstance(neumann_load, Constant):
+
+            neumann_load.assign(t)
+
+        # If the load is a class and has an attribute "update"
+
+        elif hasattr(neumann_load, "update_load"):
+
+            neumann_load.update_load(t)
+
+        # Otherwise, updates it as a class (Expressions are classes)
+
+        elif hasattr(neumann_load, "t"):
+
+            neumann_load.t = t
+
+        else:
+
+            raise AttributeError("Cannot update the neumann load becau"+
+            "se the class '"+str(neumann_load)+"' does not have the at"+
+            "tribute 't'")
+
+    # Updates the classes of macroscale quantities
+
+    for MacroScaleClass in macro_quantitiesClasses:
+
+        if interpolate_macro_quantities:
+
+            MacroScaleClass.update_interpolated(t)
+
+        else:
+
+            MacroScaleClass.update(t)
+
+########################################################################
+#                       Deferred post-processing                       #
+########################################################################
+
+# Defines a class to defer the post-processes of the time keys. At each
+# time key, the scheme hands a snapshot of the fields, i.e. the local
+# arrays of their vectors of parameters, and the time value to a queue.
+# The queue is flushed when it reaches its depth, before a checkpoint is
+# written, and after the last time key: the snapshots are copied back
+# into the fields in the order they were given, the loads are set at
+# their time values, and the post-processes are evaluated. Afterwards,
+# the current solution and loads are restored. Hence, the post-proces-
+# ses never run concurrently with the solver, and all processes of MPI
+# flush at the same time keys. The memory of the queue is bounded by
+# its depth. If deferred_post_processing is None or False, the post-
+# processes are evaluated at once at each time key. The dictionary of
+# options may have the key:
+#
+# "queue depth": maximum number of snapshots in the queue before it is
+# flushed. The default is 4
+
+class DeferredPostProcessing:
+
+    def __init__(self, deferred_post_processing, 
+    evaluate_post_processes, update_time):
+
+        # Verifies the options
+
+        self.options = get_deferred_post_processing_options(
+        deferred_post_processing)
+
+        # Saves the function that evaluates the post-processes given the
+        # time value and the list of fields, and the function that sets 
+        # the loads at a time value
+
+        self.evaluate_post_processes = evaluate_post_processes
+
+        self.update_time = update_time
+
+        # Initializes the queue of snapshots and the list of fields they
+        # are copied back into
+
+        self.queue = []
+
+        self.fields = []
+
+    # Defines a function to get the local arrays of a list of fields. 
+    # Fields that were not created yet are kept as None
+
+    def get_local_arrays(self, fields):
+
+        return [None if field is None else field.vector().get_local(
+        ) for field in fields]
+
+    # Defines a function to hand the fields at a time key to the post-
+    # processes
+
+    def submit(self, time_value, fields):
+
+        # If the post-processes are not deferred, evaluates them at once
+
+        if self.options is None:
+
+            self.evaluate_post_processes(time_value, fields)
+
+            return
+
+        # Saves the fields and the snapshot of their current values
+
+        self.fields = list(fields)
+
+        self.queue.append((time_value, self.get_local_arrays(fields)))
+
+        # Flushes the queue if it is full
+
+        if len(self.queue)>=self.options["queue depth"]:
+
+            self.flush()
+
+    # Defines a function to evaluate the post-processes of all snapshots
+    # in the queue, in the order they were given
+
+    def flush(self):
+
+        if len(self.queue)==0:
+
+            return
+
+        # Saves the current values of the fields and the current time 
+        # value, which is the one of the last snapshot
+
+        current_arrays = self.get_local_arrays(self.fields)
+
+        current_time = self.queue[-1][0]
+
+        queue = self.queue
+
+        self.queue = []
+
+        for time_value, arrays in queue:
+
+            # Copies the snapshot into the fields
+
+            fields = []
+
+            for field, array in zip(self.fields, arrays):
+
+                if array is None:
+
+                    fields.append(None)
+
+                else:
+
+                    field.vector().set_local(array)
+
+                    field.vector().apply("insert")
+
+                    fields.append(field)
+
+            # Sets the loads at the time value of the snapshot and eval-
+            # uates the post-processes
+
+            self.update_time(time_value)
+
+            self.evaluate_post_processes(time_value, fields)
+
+        # Restores the current values of the fields and of the loads
+
+        for field, array in zip(self.fields, current_arrays):
+
+            if array is not None:
+
+                field.vector().set_local(array)
+
+                field.vector().apply("insert")
+
+        self.update_time(current_time)
+
+########################################################################
+#                              Utilities                               #
+########################################################################
+
+# Defines a function to verify the options of the checkpoints. The dic-
+# tionary must have the key "file name", and it may have the key "in-
+# terval", which is the number of time keys between checkpoints; the
+# default is 1
+
+def get_checkpointing_options(checkpointing):
+
+    if checkpointing is None:
+
+        return None
+
+    elif isinstance(checkpointing, str):
+
+        checkpointing = {"file name": checkpointing}
+
+    checkpointing = verify_obligatory_and_optional_keys(dict(
+    checkpointing), {"file name": {"type": str}}, {"interval": {"type":
+    int, "default": 1}}, "checkpointing", "newton_raphson")
+
+    if checkpointing["interval"]<1:
+
+        raise ValueError("The 'interval' of the checkpoints must be a "+
+        "positive integer. Currently, it is: "+str(checkpointing["inte"+
+        "rval"]))
+
+    return checkpointing
+
+# Defines a function to verify the options of the deferred post-proces-
+# sing. True gives the default options
+
+def get_deferred_post_processing_options(deferred_post_processing):
+
+    if deferred_post_processing is None or (deferred_post_processing is 
+    False):
+
+        return None
+
+    elif deferred_post_processing is True:
+
+        deferred_post_processing = {}
+
+    deferred_post_processing = verify_obligatory_and_optional_keys(dict(
+    deferred_post_processing), {}, {"queue depth": {"type": int, "defa"+
+    "ult": 4}}, "deferred_post_processing", "newton_raphson")
+
+    if deferred_post_processing["queue depth"]<1:
+
+        raise ValueError("The 'queue depth' of the deferred post-proce"+
+        "ssing must be a positive integer. Currently, it is: "+str(
+        deferred_post_processing["queue depth"]))
+
+    return deferred_post_processing
 
 # Defines a function to print the stepping information
 
@@ -221,10 +221,14 @@ None, polynomial_degree=None, comm_object=None, verbose=True):
                     ).mesh().mpi_comm(), explicit_file_name)
 
                     # If the file was not provided, the append flag must
-                    # must be false to not append a new checkpoint if no
-                    # previous structure had been saved
+                    # be false to not append a new checkpoint if no pre-
+                    # vious structure had been saved. Unless the simula-
+                    # tion was restarted from a checkpoint, i.e. this is
+                    # not the first time step and the file exists, when
+                    # the time steps are appended to the previous ones
 
-                    append_flag = False
+                    append_flag = (time_step>0 and verify_file_existence(
+                    explicit_file_name, do_not_raise_error=True))
 
                 # Writes the function
 
@@ -287,11 +291,15 @@ None, polynomial_degree=None, comm_object=None, verbose=True):
                     file = XDMFFile(individual_field.function_space(
                     ).mesh().mpi_comm(), explicit_file_name)
 
-                    # If the file was not provided, the append flag
-                    # must be false to not append a new checkpoint
-                    # if no previous structure had been saved
-
-                    append_flag = False
+                    # If the file was not provided, the append flag must
+                    # be false to not append a new checkpoint if no pre-
+                    # vious structure had been saved. Unless the simula-
+                    # tion was restarted from a checkpoint, i.e. this is
+                    # not the first time step and the file exists, when
+                    # the time steps are appended to the previous ones
+
+                    append_flag = (time_step>0 and verify_file_existence(
+                    explicit_file_name, do_not_raise_error=True))
                 
                 # Writes the field
 
@@ -350,11 +358,15 @@ None, polynomial_degree=None, comm_object=None, verbose=True):
                     file = XDMFFile(individual_field.function_space(
                     ).mesh().mpi_comm(), explicit_file_name)
 
-                    # If the file was not provided, the append flag
-                    # must be false to not append a new checkpoint
-                    # if no previous structure had been saved
+                    # If the file was not provided, the append flag must
+                    # be false to not append a new checkpoint if no pre-
+                    # vious structure had been saved. Unless the simula-
+                    # tion was restarted from a checkpoint, i.e. this is
+                    # not the first time step and the file exists, when
+                    # the time steps are appended to the previous ones
 
-                    append_flag = False
+                    append_flag = (time_step>0 and verify_file_existence(
+                    explicit_file_name, do_not_raise_error=True))
 
                 # Writes the function
 
@@ -420,9 +432,13 @@ None, polynomial_degree=None, comm_object=None, verbose=True):
 
                 # If the file was not provided, the append flag must
                 # be false to not append a new checkpoint if no pre-
-                # vious structure had been saved
+                # vious structure had been saved. Unless the simulation
+                # was restarted from a checkpoint, i.e. this is not the
+                # first time step and the file exists, when the time 
+                # steps are appended to the previous ones
 
-                append_flag = False
+                append_flag = (time_step>0 and verify_file_existence(
+                explicit_file_name, do_not_raise_error=True))
             
             # Writes the field
 
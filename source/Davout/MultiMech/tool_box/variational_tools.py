@@ -6,6 +6,10 @@ import ufl_legacy
 
 import copy
 
+import weakref
+
+from time import perf_counter
+
 from ..tool_box import tensor_tools
 
 from ..tool_box import surface_loading_tools
@@ -1134,170 +1138,410 @@ physical_groupsNamesToTags=None, throw_error=True):
 lambda: ["field", "field"]})
 
 def project_piecewiseField(field_list, dx, V, physical_groupsList,
-physical_groupsNamesToTags, solution_names=None, verbose=True):
+physical_groupsNamesToTags, solution_names=None, verbose=True, 
+rhs_key=None):
     
     # Creates the projected field
 
-    projected_fieldTrial = TrialFunction(V)
+    projected_field = Function(V)
+
+    projected_field.rename(*solution_names)
+
+    # Gets the projector with the mass matrix already factored, and 
+    # projects the field
+
+    return get_projector(V, dx).project(field_list, projected_field=
+    projected_field, rhs_key=rhs_key, physical_groupsList=
+    physical_groupsList, physical_groupsNamesToTags=
+    physical_groupsNamesToTags, verbose=verbose)
+
+# Defines a function to project a field defined on the boundary only
 
-    v = TestFunction(V)
+def project_overBoundary(field_list, ds, V, physical_groupsList,
+physical_groupsNamesToTags, solution_names=None, verbose=True,
+verify_physical_groups=True, rhs_key=None):
+    
+    # Creates the projected field
 
     projected_field = Function(V)
 
-    projected_field.rename(*solution_names)
+    if not (solution_names is None):
 
-    # Assembles and solves the variational form
+        projected_field.rename(*solution_names)
 
-    bilinear_form = inner(projected_fieldTrial, v)*dx
+    # Gets the projector with the mass matrix already factored. Uses 
+    # the flag keep_diagonal because the bilinear form is mostly zero, 
+    # since the field is zero within the domain
+
+    return get_projector(V, ds, keep_diagonal=True).project(field_list,
+    projected_field=projected_field, rhs_key=rhs_key, 
+    physical_groupsList=physical_groupsList, 
+    physical_groupsNamesToTags=physical_groupsNamesToTags, verbose=
+    verbose, verify_physical_groups=verify_physical_groups)
+
+# Defines a function to project a field over a region of the domain
 
-    # Initializes the linear form
+def projection_overRegion(field, V, dx, subdomain, physical_groupsList,
+physical_groupsNamesToTags):
 
-    linear_form = 0.0
+    # Gets the projector with the mass matrix already factored, and 
+    # projects the field
 
-    # Iterates through the pairs of function to be projected and physi-
-    # cal group tag
+    return get_projector(V, dx).project([[field, subdomain]], 
+    physical_groupsList=physical_groupsList, 
+    physical_groupsNamesToTags=physical_groupsNamesToTags)
 
-    for projected_function, subdomain in field_list:
+# Defines a class to project fields onto a finite element space repea-
+# tedly. The mass matrix does not change between projections, thus it is
+# assembled and factored once. For discontinuous spaces integrated over
+# cells, the mass matrix is block-diagonal, and it is factored cell by 
+# cell. The right-hand side can be compiled once and reused, as long as
+# the expression being projected keeps the same coefficients
+
+class Projector:
+
+    def __init__(self, V, measure, keep_diagonal=False, solver_type=
+    "lu"):
+        
+        # Saves a weak reference to the function space, such that the 
+        # stored projectors do not keep it alive, and the integration 
+        # measure
+
+        self.V_reference = weakref.ref(V)
+
+        self.measure = measure
+
+        # Creates the bilinear form
+
+        bilinear_form = inner(TrialFunction(V), TestFunction(V))*measure
 
-        if subdomain=="":
+        # Verifies if the space is discontinuous and if the measure is 
+        # over cells. In this case, the mass matrix is inverted locally
 
-            if verbose:
+        self.local_solve = ((V.ufl_element().family() in [
+        "Discontinuous Lagrange", "DG"]) and (measure.integral_type()==
+        "cell") and (not keep_diagonal))
 
-                print("Projects over entire domain because subdomain w"+
-                "as defined as "+str(subdomain))
+        if self.local_solve:
 
-            # Updates the linear form
+            self.solver = LocalSolver(bilinear_form)
 
-            linear_form += (inner(projected_function, v)*dx)
+            self.solver.factorize()
 
         else:
 
-            if verbose:
+            # Assembles the mass matrix. The flag keep_diagonal is used
+            # when the bilinear form is mostly zero, e.g. when the field
+            # is zero within the domain
 
-                print("Projects over the subdomain "+str(subdomain))
+            A = assemble(bilinear_form, keep_diagonal=keep_diagonal)
 
-            # Checks the subdomain for strings
+            if keep_diagonal:
 
-            subdomain = verify_physicalGroups(subdomain,
-            physical_groupsList, physical_groupsNamesToTags=
-            physical_groupsNamesToTags)
+                A.ident_zeros()
 
-            # Updates the linear form
+            # Creates the solver with the factorization or the precondi-
+            # tioner of the mass matrix, which is reused for every pro-
+            # jection
 
-            linear_form += (inner(projected_function, v)*dx(subdomain))
+            if solver_type=="lu":
 
-    # Solves the algebraic system to get the FEM parameters
+                self.solver = LUSolver(A)
 
-    solve(bilinear_form==linear_form, projected_field)
+            elif solver_type=="cg":
 
-    # Returns the projected field
+                self.solver = KrylovSolver(A, "cg", "jacobi")
 
-    return projected_field
+            else:
 
-# Defines a function to project a field defined on the boundary only
+                raise ValueError("The solver type of the projector is '"+
+                str(solver_type)+"', but it must be either 'lu' or 'cg'")
 
-def project_overBoundary(field_list, ds, V, physical_groupsList,
-physical_groupsNamesToTags, solution_names=None, verbose=True,
-verify_physical_groups=True):
-    
-    # Creates the projected field
+        # Initializes the key and the compiled form of the right-hand 
+        # side
 
-    projected_fieldTrial = TrialFunction(V)
+        self.rhs_key = None
 
-    v = TestFunction(V)
+        self.rhs_form = None
 
-    projected_field = Function(V)
+        # Initializes the vector of the right-hand side
 
-    if not (solution_names is None):
+        self.rhs_vector = None
 
-        projected_field.rename(*solution_names)
+    # Defines a function to build the linear form out of a list of pairs
+    # of function to be projected and physical group tag
 
-    # Assembles and solves the variational form
+    def build_linear_form(self, field_list, physical_groupsList=None,
+    physical_groupsNamesToTags=None, verbose=False, 
+    verify_physical_groups=True):
 
-    bilinear_form = inner(projected_fieldTrial, v)*ds
+        # Creates the test function
 
-    # Initializes the linear form
+        v = TestFunction(self.V_reference())
 
-    linear_form = 0.0
+        # Initializes the linear form
 
-    # Iterates through the pairs of function to be projected and physi-
-    # cal group tag
+        linear_form = 0.0
 
-    for projected_function, subdomain in field_list:
+        # Iterates through the pairs of function to be projected and 
+        # physical group tag
+
+        for projected_function, subdomain in field_list:
+
+            if subdomain=="":
+
+                if verbose:
+
+                    print("Projects over entire domain because subdoma"+
+                    "in was defined as "+str(subdomain))
+
+                # Updates the linear form
+
+                linear_form += (inner(projected_function, v)*
+                self.measure)
+
+            else:
+
+                if verbose:
+
+                    print("Projects over the subdomain "+str(subdomain))
+
+                # Checks the subdomain for strings
+
+                if verify_physical_groups:
+
+                    subdomain = verify_physicalGroups(subdomain,
+                    physical_groupsList, physical_groupsNamesToTags=
+                    physical_groupsNamesToTags)
+
+                # Updates the linear form
+
+                linear_form += (inner(projected_function, v)*
+                self.measure(subdomain))
+
+        return linear_form
+
+    # Defines a function to project a list of pairs of function and phy-
+    # sical group tag. If a key of the right-hand side is given and it
+    # is equal to the key of the last projection, the compiled form of
+    # the right-hand side is reused
+
+    def project(self, field_list, projected_field=None, rhs_key=None,
+    physical_groupsList=None, physical_groupsNamesToTags=None, 
+    verbose=False, verify_physical_groups=True):
+        
+        # Creates the projected field if it was not given
 
-        if subdomain=="":
+        if projected_field is None:
 
-            if verbose:
+            projected_field = Function(self.V_reference())
 
-                print("Projects over entire domain because subdomain w"+
-                "as defined as "+str(subdomain))
+        # Compiles the right-hand side if it cannot be reused
 
-            # Updates the linear form
+        if (rhs_key is None) or (rhs_key!=self.rhs_key):
 
-            linear_form += (inner(projected_function, v)*ds)
+            self.rhs_form = Form(self.build_linear_form(field_list, 
+            physical_groupsList=physical_groupsList, 
+            physical_groupsNamesToTags=physical_groupsNamesToTags, 
+            verbose=verbose, verify_physical_groups=
+            verify_physical_groups))
+
+            self.rhs_key = rhs_key
+
+        # Assembles the right-hand side reusing its vector
+
+        if self.rhs_vector is None:
+
+            self.rhs_vector = assemble(self.rhs_form)
 
         else:
 
-            if verbose:
+            assemble(self.rhs_form, tensor=self.rhs_vector)
 
-                print("Projects over the subdomain "+str(subdomain))
+        # Solves the algebraic system to get the FEM parameters
 
-            # Checks the subdomain for strings
+        if self.local_solve:
 
-            if verify_physical_groups:
+            self.solver.solve_local(projected_field.vector(), 
+            self.rhs_vector, self.V_reference().dofmap())
 
-                subdomain = verify_physicalGroups(subdomain,
-                physical_groupsList, physical_groupsNamesToTags=
-                physical_groupsNamesToTags)
+        else:
 
-            # Updates the linear form
+            self.solver.solve(projected_field.vector(), self.rhs_vector)
 
-            linear_form += (inner(projected_function, v)*ds(subdomain))
+        # Returns the projected field
 
-    # Assembles the linear and the bilinear forms. Uses flags keep_dia-
-    # gonal and ident_zeros because the bilinear form is mostly zero, 
-    # since the field is zero within the domain
+        return projected_field
 
-    A = assemble(bilinear_form, keep_diagonal=True)
+# Defines a function to get the projector of a function space and of an
+# integration measure. The projectors are built once and stored
 
-    A.ident_zeros()
+def get_projector(V, measure, keep_diagonal=False):
 
-    L = assemble(linear_form)
+    # Gets the key of the projector out of the function space, of the 
+    # integration measure, and of its subdomains
 
-    # Solves the algebraic system to get the FEM parameters
+    space_key = id(V)
 
-    solve(A, projected_field.vector(), L)
+    projector_key = (V.id(), measure.integral_type(), id(
+    measure.subdomain_data()), str(measure.metadata()), keep_diagonal)
 
-    # Returns the projected field
+    if projector_key in projectors.get(space_key, {}):
 
-    return projected_field
+        return projectors[space_key][projector_key]
 
-# Defines a function to project a field over a region of the domain
+    # Saves the projector. The projectors of a function space are freed
+    # when this space is garbage collected
 
-def projection_overRegion(field, V, dx, subdomain, physical_groupsList,
-physical_groupsNamesToTags):
+    if not (space_key in projectors):
 
-    # Checks the subdomain for strings
+        projectors[space_key] = dict()
 
-    subdomain = verify_physicalGroups(subdomain, physical_groupsList, 
-    physical_groupsNamesToTags=physical_groupsNamesToTags)
+        weakref.finalize(V, projectors.pop, space_key, None)
 
-    # Creates the projected field
+    projectors[space_key][projector_key] = Projector(V, measure, 
+    keep_diagonal=keep_diagonal)
 
-    projected_fieldTrial = TrialFunction(V)
+    return projectors[space_key][projector_key]
 
-    v = TestFunction(V)
+# Defines a function to get the key of the right-hand side of a projec-
+# tion out of a list of pairs of function to be projected and physical
+# group tag. The key is made of the representation of the UFL expres-
+# sion, of the identifiers of its coefficients, and of the physical 
+# groups. Hence, different expressions of the same coefficients do not
+# share the key. The fields must be bound to placeholders, e.g. by the 
+# FormRegistry, otherwise, the fields split by deep copy are new coef-
+# ficients at every step, and the right-hand side is compiled again
 
-    projected_field = Function(V)
+def get_rhs_key(field_list):
+
+    rhs_key = []
+
+    for projected_function, subdomain in field_list:
+
+        rhs_key.append((repr(projected_function), tuple(id(coefficient
+        ) for coefficient in (ufl_legacy.algorithms.extract_coefficients(
+        projected_function))), str(subdomain)))
+
+    return tuple(rhs_key)
+
+# Initializes the dictionary of projectors. The keys are the identifiers
+# of the python objects of the function spaces, and the values are dic-
+# tionaries whose keys are the identifiers of the function space and of
+# the integration measure
+
+projectors = dict()
+
+# Defines a class to store compiled forms of a post-process, so that the
+# forms are built and compiled once, and only assembled at each update.
+# The solution fields that are given at each update can be new objects,
+# e.g. when a mixed solution is split by deep copy. Hence, the fields 
+# are bound to placeholder functions, whose values are updated at each 
+# call, and the forms are built out of these placeholders
+
+class FormRegistry:
+
+    def __init__(self):
+
+        # Initializes the dictionary of placeholder functions and the 
+        # dictionary of compiled forms
+
+        self.bound_fields = dict()
+
+        self.forms = dict()
+
+        # Initializes the accumulated timings in seconds, and the number
+        # of assemblies
+
+        self.timings = {"form compilation": 0.0, "assembly": 0.0}
+
+        self.n_assemblies = 0
+
+    # Defines a function to bind a field or a list of fields to the pla-
+    # ceholder functions. Returns the placeholders with the same struc-
+    # ture as the given fields. Objects that are not functions, e.g. UFL
+    # expressions, are returned as they are, hence, they must have been
+    # built from placeholders already
+
+    def bind_fields(self, field):
+
+        if isinstance(field, list):
+
+            return [self.bind_field(i, sub_field) for i, sub_field in (
+            enumerate(field))]
+        
+        return self.bind_field(-1, field)
+
+    # Defines a function to bind a single field
+
+    def bind_field(self, field_key, field):
+
+        if not isinstance(field, Function):
+
+            return field
+        
+        # Creates the placeholder if it does not exist yet or if the si-
+        # ze of the field has changed. In the latter case, the compiled
+        # forms are discarded
+
+        placeholder = self.bound_fields.get(field_key, None)
+
+        if (placeholder is None) or (placeholder.vector().local_size()!=
+        field.vector().local_size()):
+
+            placeholder = Function(field.function_space())
+
+            placeholder.rename(field.name(), field.label())
+
+            self.bound_fields[field_key] = placeholder
+
+            self.forms = dict()
+
+        # Copies the values of the field into the placeholder
+
+        placeholder.vector().set_local(field.vector().get_local())
+
+        placeholder.vector().apply("insert")
+
+        return placeholder
+
+    # Defines a function to get a compiled form by its key. If the form
+    # does not exist yet, it is built by the given function without ar-
+    # guments and compiled
+
+    def get_form(self, form_key, form_builder):
+
+        if not (form_key in self.forms):
+
+            start_time = perf_counter()
+
+            self.forms[form_key] = Form(form_builder())
+
+            self.timings["form compilation"] += perf_counter()-start_time
+
+        return self.forms[form_key]
+
+    # Defines a function to assemble a compiled form by its key
+
+    def assemble(self, form_key, form_builder):
+
+        form = self.get_form(form_key, form_builder)
+
+        start_time = perf_counter()
+
+        value = assemble(form)
+
+        self.timings["assembly"] += perf_counter()-start_time
 
-    # Assembles and solves the variational form
+        self.n_assemblies += 1
 
-    bilinear_form = inner(projected_fieldTrial, v)*dx
-                     
-    linear_form = (inner(field, v)*dx(subdomain))
+        return value
 
-    solve(bilinear_form==linear_form, projected_field)
+    # Defines a function to get a message with the timings
 
-    # Returns the projected field
+    def get_timingsMessage(self):
 
-    return projected_field
\ No newline at end of file
+        return ("Cached forms: "+str(len(self.forms))+". Compilation: "+
+        str(self.timings["form compilation"])+" s. Assembly: "+str(
+        self.timings["assembly"])+" s over "+str(self.n_assemblies)+
+        " assemblies\n")